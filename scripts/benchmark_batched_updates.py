@@ -0,0 +1,93 @@
+import sys
+import os
+import time
+import random
+
+# Measures the batched updates: how many commands an "update all" run starts with and without batching (and the estimated startup overhead,
+# from --startup-time seconds per command, which includes the gsudo hop when elevated), and how fast the output of a batched command is split
+# back into the output of every package. The outputs are made up, in the format of pip and scoop; no package manager is run.
+#   python scripts/benchmark_batched_updates.py [--updates N] [--startup-time S]
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(root_dir, "wingetui"))
+
+from PackageManagers.batchedUpdates import BatchOutputSplitter, getBatches, MAX_BATCH_SIZE
+
+updateCount = int(sys.argv[sys.argv.index("--updates")+1]) if "--updates" in sys.argv else 200
+startupTime = float(sys.argv[sys.argv.index("--startup-time")+1]) if "--startup-time" in sys.argv else 3
+
+
+class Capabilities():
+    def __init__(self, supportsBatchUpdates: bool):
+        self.SupportsBatchUpdates = supportsBatchUpdates
+
+class Manager():
+    def __init__(self, name: str, supportsBatchUpdates: bool):
+        self.NAME = name
+        self.Capabilities = Capabilities(supportsBatchUpdates)
+
+class Package():
+    def __init__(self, id: str, source: str, manager: Manager):
+        self.Id = id
+        self.Source = source
+        self.PackageManager = manager
+
+
+MANAGERS = { # Name: (sources, supports batch updates), like their PackageManagerCapabilities
+    "Winget": (["Winget"], False),
+    "Chocolatey": (["Chocolatey"], True),
+    "Scoop": (["Scoop: main", "Scoop: extras"], True),
+    "Pip": (["Pip"], True),
+    "Npm": (["Npm", "Npm@global"], True),
+}
+managers = {name: Manager(name, batchable) for name, (sources, batchable) in MANAGERS.items()}
+
+rng = random.Random(0)
+packages = []
+for i in range(updateCount):
+    name = rng.choices(list(MANAGERS), weights=[5, 2, 2, 3, 2])[0]
+    packages.append(Package(f"package{i}-{rng.choice(['core', 'cli', 'lib'])}", rng.choice(MANAGERS[name][0]), managers[name]))
+
+batches = getBatches(packages)
+if sorted(package.Id for batch in batches for package in batch) != sorted(package.Id for package in packages):
+    print("🔴 The batches do not hold every package exactly once")
+    sys.exit(1)
+print(f"{updateCount} updates, {startupTime} s of startup per command, up to {MAX_BATCH_SIZE} packages per batch\n")
+print(f"{'Mode':<10}{'Commands':>10}{'Est. startup time (s)':>23}")
+print(f"{'single':<10}{updateCount:>10}{updateCount * startupTime:>23.0f}")
+print(f"{'batched':<10}{len(batches):>10}{len(batches) * startupTime:>23.0f}\n")
+
+
+def makeOutput(ids: list[str], linesPerPackage: int) -> tuple[list[str], list[list[str]]]:
+    """
+    Returns the lines of a batched update, and the lines every package should get
+    """
+    lines: list[str] = [f"Updating {len(ids)} apps..."]
+    expected: list[list[str]] = [[lines[0]] for _ in ids]
+    for index, packageId in enumerate(ids):
+        section = [f"Updating '{packageId}' (1.0.{index} -> 1.1.0)"] + [f"Downloading https://example.com/file{n}.zip ({n} KB)" for n in range(linesPerPackage)] + [f"'{packageId}' (1.1.0) was installed successfully!"]
+        lines += section
+        expected[index] += section
+    summary = "Successfully installed " + " ".join(f"{packageId}-1.1.0" for packageId in ids)
+    lines.append(summary)
+    for output in expected:
+        output.append(summary)
+    return lines, expected
+
+
+print(f"{'Packages':>9}{'Lines':>9}{'Split (ms)':>12}{'Lines/s':>12}")
+for batchSize in (5, MAX_BATCH_SIZE, 100):
+    ids = [f"package{i}-{rng.choice(['core', 'cli', 'lib'])}" for i in range(batchSize)]
+    lines, expected = makeOutput(ids, 200)
+    bestTime = None
+    for _ in range(5):
+        splitter = BatchOutputSplitter(ids)
+        start = time.perf_counter()
+        for line in lines:
+            splitter.addLine(line)
+        elapsed = time.perf_counter() - start
+        bestTime = elapsed if bestTime is None else min(bestTime, elapsed)
+    if any(splitter.getLines(index) != expected[index] for index in range(batchSize)):
+        print(f"🔴 The output of the batch of {batchSize} packages was not split correctly")
+        sys.exit(1)
+    print(f"{batchSize:>9}{len(lines):>9}{bestTime*1000:>12.2f}{len(lines)/bestTime:>12.0f}")
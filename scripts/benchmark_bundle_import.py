@@ -0,0 +1,53 @@
+import sys
+import os
+import json
+import time
+import random
+
+# Measures the import of a bundle: reading a resolved (version 2) bundle gives packages that can be installed right away,
+# while the ids of a legacy bundle that are not on the loaded Discover catalog have to be searched on the package managers first.
+# The search time of the legacy import is estimated from --search-time (seconds per search) and the parallel resolutions.
+#   python scripts/benchmark_bundle_import.py [--packages N] [--search-time S]
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(root_dir, "wingetui"))
+
+from PackageManagers.packageBundle import BundleEntry, createBundle, readBundle, LEGACY_SECTIONS
+from PackageManagers.packageResolver import MAX_PARALLEL_RESOLUTIONS
+
+packageCount = int(sys.argv[sys.argv.index("--packages")+1]) if "--packages" in sys.argv else 1000
+searchTime = float(sys.argv[sys.argv.index("--search-time")+1]) if "--search-time" in sys.argv else 2
+MANAGERS = {"winget": ("Winget", "Winget: winget"), "scoop": ("Scoop", "Scoop: main"), "chocolatey": ("Chocolatey", "Chocolatey"), "pip": ("Pip", "Pip"), "npm": ("Npm", "Npm")}
+OPTIONS = {"SkipHashCheck": False, "InteractiveInstallation": False, "RunAsAdministrator": False, "Version": "", "Architecture": "", "InstallationScope": "", "CustomParameters": []}
+
+rng = random.Random(0)
+entries = []
+for i in range(packageCount):
+    managerName, source = MANAGERS[rng.choice(LEGACY_SECTIONS)]
+    entries.append(BundleEntry(f"Publisher{i % 50}.Package{i}", f"Package {i}", f"{rng.randrange(10)}.{rng.randrange(10)}.{i}", source, managerName, dict(OPTIONS, Version=rng.choice(["", "1.0.0"]))))
+bundle = json.dumps(createBundle(entries), indent=4)
+legacyBundle = json.loads(bundle)
+del legacyBundle["packages"]
+legacyBundle = json.dumps(legacyBundle, indent=4)
+
+
+def importBundle(contents: str) -> tuple[float, list[BundleEntry]]:
+    start = time.perf_counter()
+    importedEntries = readBundle(json.loads(contents))
+    return (time.perf_counter() - start) * 1000, importedEntries
+
+
+print(f"{packageCount} packages, {searchTime} s per search, {MAX_PARALLEL_RESOLUTIONS} searches in parallel\n")
+print(f"{'Bundle':<10}{'Size (KB)':>11}{'Read (ms)':>11}{'Resolved':>10}{'Lookups':>9}{'Est. lookup time (s)':>22}")
+for name, contents in (("legacy", legacyBundle), ("resolved", bundle)):
+    readTime, importedEntries = min(importBundle(contents) for _ in range(5))
+    if len(importedEntries) != packageCount:
+        print(f"🔴 {len(importedEntries)} packages were read from the {name} bundle, expected {packageCount}")
+        sys.exit(1)
+    resolved = sum(1 for entry in importedEntries if entry.isResolved())
+    lookups = packageCount - resolved # Worst case: none of them is on the loaded catalog
+    print(f"{name:<10}{len(contents)/1024:>11.0f}{readTime:>11.2f}{resolved:>10}{lookups:>9}{lookups * searchTime / MAX_PARALLEL_RESOLUTIONS:>22.1f}")
+
+if any((a.Id, a.ManagerName, a.Version, a.Options) != (b.Id, b.ManagerName, b.Version, b.Options) for a, b in zip(entries, importBundle(bundle)[1])):
+    print("🔴 The resolved bundle does not round-trip")
+    sys.exit(1)
@@ -0,0 +1,115 @@
+import sys
+import os
+import time
+from threading import Thread
+
+# Measures the cost of making an installation thread cancellable: the old KillableThread (a sys.settrace line tracer, reproduced here since
+# it has been removed) against a CancellationToken checked once per output line. Also measures how long a cancelled token takes to stop
+# a waiting thread and to kill a running command together with its child processes (the command needs a POSIX shell).
+#   python scripts/benchmark_cancellation.py [--lines N]
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(root_dir, "wingetui"))
+
+from PackageManagers.cancellationToken import CancellationToken
+from PackageManagers.processRunner import Runner
+
+lineCount = int(sys.argv[sys.argv.index("--lines")+1]) if "--lines" in sys.argv else 300000
+lines = [f"Downloading https://example.com/package{i}.zip ] {i % 100}% ({i} KB)" for i in range(lineCount)]
+
+
+class TracedThread(Thread):
+    """
+    The old tools.KillableThread
+    """
+    def __init__(self, *args, **keywords):
+        super().__init__(*args, **keywords)
+        self.shouldBeRuning = True
+
+    def start(self):
+        self._run = self.run
+        self.run = self.settrace_and_run
+        Thread.start(self)
+
+    def settrace_and_run(self):
+        sys.settrace(self.globaltrace)
+        self._run()
+
+    def globaltrace(self, frame, event, arg):
+        return self.localtrace if event == 'call' else None
+
+    def localtrace(self, frame, event, arg):
+        if not(self.shouldBeRuning) and event == 'line':
+            raise SystemExit()
+        return self.localtrace
+
+
+def processLines(token: CancellationToken = None) -> None:
+    """
+    Does the work of an installation thread: strips the lines, looks for progress markers and builds the output
+    """
+    output = []
+    counter = 0
+    for line in lines:
+        if token and token.isCancelled():
+            return
+        line = line.strip()
+        if "] 100%" in line or "Downloading" in line:
+            counter += 1
+        output.append(line)
+    "\n".join(output)
+
+
+def timeThread(threadClass: type, token: CancellationToken = None) -> float:
+    best = None
+    for _ in range(3):
+        thread = threadClass(target=processLines, args=(token,))
+        start = time.perf_counter()
+        thread.start()
+        thread.join()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+baseline = timeThread(Thread)
+traced = timeThread(TracedThread)
+tokenChecked = timeThread(Thread, CancellationToken())
+print(f"{lineCount} output lines processed on a thread\n")
+print(f"{'Thread':<28}{'Time (ms)':>11}{'Overhead':>10}")
+for name, elapsed in (("plain", baseline), ("KillableThread (settrace)", traced), ("CancellationToken checks", tokenChecked)):
+    print(f"{name:<28}{elapsed*1000:>11.1f}{elapsed/baseline:>9.2f}x")
+
+token = CancellationToken()
+waiter = Thread(target=token.wait)
+waiter.start()
+time.sleep(0.1)
+start = time.perf_counter()
+token.cancel()
+waiter.join()
+print(f"\nWaiting thread stopped {(time.perf_counter() - start)*1000:.2f} ms after cancelling its token")
+
+if os.name != "nt":
+    token = CancellationToken()
+    p = Runner.start("sleep 60 & echo $!; sleep 60 & echo $!; wait", timeout=None, limited=False, token=token)
+    childPids = []
+    for line in p.getLines():
+        childPids.append(int(line))
+        if len(childPids) == 2:
+            break
+    start = time.perf_counter()
+    token.cancel()
+    result = p.wait(10)
+    elapsed = time.perf_counter() - start
+    def isAlive(pid: int) -> bool:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                return f.read().split(")")[-1].split()[0] != "Z"
+        except OSError:
+            return False
+    time.sleep(0.1)
+    alive = [pid for pid in childPids if isAlive(pid)]
+    print(f"Command killed {elapsed*1000:.1f} ms after cancelling its token (cancelled={result.Cancelled if result else None}), {len(alive)} of its {len(childPids)} child processes left alive")
+    if alive or not result or not result.Cancelled:
+        print("🔴 The command was not fully killed")
+        sys.exit(1)
@@ -0,0 +1,83 @@
+import sys
+import os
+import time
+import tempfile
+from threading import Thread
+
+# Stress test of the live output window of an operation: a worker thread pushes --lines lines through a signal (like the addInfoLine
+# signal of the installer widgets) into a LiveOutputConsole, and the longest stall of the event loop, the repaints and the time until
+# everything has been shown are measured. The old handler (setPlainText with the whole text plus the new line, on a queued connection)
+# is measured with --old-lines lines, since it gets quadratic. Runs offscreen.
+#   python scripts/benchmark_live_output.py [--lines N] [--old-lines N]
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(root_dir, "wingetui"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QObject, QTimer, Signal, Qt
+from PySide6.QtWidgets import QApplication, QPlainTextEdit
+from liveOutputConsole import LiveOutputConsole, MAX_CONSOLE_LINES
+
+lineCount = int(sys.argv[sys.argv.index("--lines")+1]) if "--lines" in sys.argv else 100000
+oldLineCount = int(sys.argv[sys.argv.index("--old-lines")+1]) if "--old-lines" in sys.argv else 5000
+
+app = QApplication(sys.argv)
+
+
+class Emitter(QObject):
+    addInfoLine = Signal(str)
+
+
+def pushLines(handler, connectionType: Qt.ConnectionType, count: int, isDone) -> tuple[float, float]:
+    """
+    Pushes the lines from a worker thread and returns the time until all of them have been shown and the longest event loop stall, in ms
+    """
+    emitter = Emitter()
+    emitter.addInfoLine.connect(handler, connectionType)
+    lastBeat = time.perf_counter()
+    longestStall = 0
+    def beat():
+        nonlocal lastBeat, longestStall
+        now = time.perf_counter()
+        longestStall = max(longestStall, now - lastBeat)
+        lastBeat = now
+    heartbeat = QTimer()
+    heartbeat.setInterval(1)
+    heartbeat.timeout.connect(beat)
+    heartbeat.start()
+    def worker():
+        for i in range(count):
+            emitter.addInfoLine.emit(f"Downloading package-{i}.zip ] {i % 100}% ({i} KB of {count} KB)")
+        emitter.addInfoLine.emit("END")
+    start = time.perf_counter()
+    Thread(target=worker).start()
+    while not isDone():
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+    heartbeat.stop()
+    return elapsed * 1000, longestStall * 1000
+
+
+logFile = os.path.join(tempfile.mkdtemp(), "output.log")
+textEdit = QPlainTextEdit()
+textEdit.show()
+console = LiveOutputConsole(textEdit, logFile)
+newTime, newStall = pushLines(console.addLine, Qt.ConnectionType.DirectConnection, lineCount, lambda: textEdit.document().lastBlock().text() == "END")
+console.close()
+
+oldTextEdit = QPlainTextEdit()
+oldTextEdit.show()
+def oldHandler(s: str):
+    oldTextEdit.setPlainText(oldTextEdit.toPlainText()+"\n"+s)
+    oldTextEdit.verticalScrollBar().setValue(oldTextEdit.verticalScrollBar().maximum())
+oldTime, oldStall = pushLines(oldHandler, Qt.ConnectionType.QueuedConnection, oldLineCount, lambda: oldTextEdit.document().lastBlock().text() == "END")
+
+print(f"{'Handler':<12}{'Lines':>9}{'Time (ms)':>12}{'Longest stall (ms)':>20}{'Repaints':>10}{'Shown lines':>13}")
+print(f"{'old':<12}{oldLineCount:>9}{oldTime:>12.0f}{oldStall:>20.1f}{oldLineCount+1:>10}{oldTextEdit.blockCount():>13}")
+print(f"{'console':<12}{lineCount:>9}{newTime:>12.0f}{newStall:>20.1f}{console.repaints:>10}{textEdit.blockCount():>13}")
+with open(logFile, encoding="utf-8") as f:
+    savedLines = sum(1 for _ in f)
+print(f"\n{savedLines} lines saved to the output file")
+if savedLines != lineCount + 1 or textEdit.blockCount() > MAX_CONSOLE_LINES or console.receivedLines != lineCount + 1:
+    print("🔴 The console lost lines or kept too many of them")
+    sys.exit(1)
@@ -0,0 +1,92 @@
+import sys
+import os
+import time
+import shutil
+import tempfile
+
+# Compares the old operation history (a single setting file, read, split, prepended to and rewritten on every operation) against the
+# segmented OperationHistoryStore: the time of appending an operation as the history grows, the first (index building) and the next
+# queries, and the import of a legacy history.
+#   python scripts/benchmark_operation_history.py [--operations N] [--output-lines N]
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(root_dir, "wingetui"))
+
+from operationHistory import OperationHistoryStore, HistoryEntry, ENTRY_SEPARATOR, HISTORY_PAGE_SIZE
+
+operationCount = int(sys.argv[sys.argv.index("--operations")+1]) if "--operations" in sys.argv else 20000
+outputLines = int(sys.argv[sys.argv.index("--output-lines")+1]) if "--output-lines" in sys.argv else 40
+managers = ("Winget", "Scoop", "Chocolatey", "Pip", "Npm")
+outcomes = ("succeeded", "succeeded", "succeeded", "failed", "cancelled")
+
+def getEntry(i: int) -> HistoryEntry:
+    return HistoryEntry("update", f"Package {i % 500}", f"Publisher.Package{i % 500}", f"1.{i}", managers[i % 5].lower(), managers[i % 5], f"{managers[i % 5].lower()} update Publisher.Package{i % 500}",
+                        0 if outcomes[i % 5] == "succeeded" else 1, outcomes[i % 5], f"2023-{1 + i // 2000 % 12:02d}-{1 + i // 100 % 28:02d} 12:00:00", output=[f"Output line {j} of the operation {i}" for j in range(outputLines)])
+
+folder = tempfile.mkdtemp()
+
+legacyFile = os.path.join(folder, "OperationHistory")
+open(legacyFile, "w").close()
+def oldAppend(entry: HistoryEntry) -> None:
+    with open(legacyFile, "r", encoding="utf-8", errors="ignore") as f:
+        currentInstallations = f.read().split(ENTRY_SEPARATOR)
+    stringToAdd = f" Operation: {entry.Operation} - Perform date {entry.Date}\n Package: <Package: {entry.PackageName};{entry.PackageId};{entry.Version};{entry.Source};<PackageManagers.{entry.ManagerName.lower()}.X object at 0x0>;None>\n Command-line call: \"{entry.Command}\"\n"
+    stringToAdd += f" Output code: {entry.ReturnCode}\n Console output:\n" + "".join(f"   | {line}\n" for line in entry.Output)
+    with open(legacyFile, "w", encoding="utf-8", errors="ignore") as f:
+        f.write(ENTRY_SEPARATOR.join(([stringToAdd] + currentInstallations)[0:100]))
+
+store = OperationHistoryStore(os.path.join(folder, "history"))
+checkpoints = sorted({min(operationCount, n) for n in (100, 1000, 5000, operationCount)})
+newTimes: dict[int, float] = {}
+windowStart = time.perf_counter()
+for i in range(operationCount):
+    if (i + 100) in checkpoints:
+        windowStart = time.perf_counter()
+    store.append(getEntry(i))
+    if i + 1 in checkpoints:
+        newTimes[i + 1] = (time.perf_counter() - windowStart) / min(100, i + 1) # Average of the last 100 appends
+for i in range(100):
+    oldAppend(getEntry(i))
+elapsed = time.perf_counter()
+for i in range(50):
+    oldAppend(getEntry(i))
+oldTime = (time.perf_counter() - elapsed) / 50
+
+print(f"{'Operations on the history':<28}{'Append (ms)':>13}")
+print(f"{'old, 100 (its limit)':<28}{oldTime*1000:>13.3f}")
+for count, elapsed in newTimes.items():
+    print(f"{f'store, {count}':<28}{elapsed*1000:>13.3f}")
+
+store = OperationHistoryStore(os.path.join(folder, "history"))
+start = time.perf_counter()
+firstPage = store.query(limit=HISTORY_PAGE_SIZE)
+indexTime = time.perf_counter() - start
+queries = (("first page", {}), ("tenth page", {"offset": 9 * HISTORY_PAGE_SIZE}), ("package id", {"packageId": "package42"}), ("manager", {"managerName": "Scoop"}),
+           ("outcome", {"outcome": "failed"}), ("day", {"day": getEntry(operationCount // 2).getDay()}), ("manager and outcome", {"managerName": "Pip", "outcome": "failed"}))
+print(f"\nIndex of {len(store.positions)} operations built in {indexTime*1000:.0f} ms\n")
+print(f"{'Query':<22}{'Results':>9}{'Time (ms)':>11}")
+failed = False
+for name, filters in queries:
+    start = time.perf_counter()
+    results = store.query(limit=HISTORY_PAGE_SIZE, **filters)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<22}{len(results):>9}{elapsed*1000:>11.2f}")
+    if not results:
+        failed = True
+    for entry in results:
+        if (filters.get("managerName") and entry.ManagerName != filters["managerName"]) or (filters.get("outcome") and entry.Outcome != filters["outcome"]) or (filters.get("day") and entry.getDay() != filters["day"]) or (filters.get("packageId") and filters["packageId"] not in entry.PackageId.lower()):
+            failed = True
+if firstPage[0].Version != f"1.{operationCount - 1}":
+    failed = True
+
+importStore = OperationHistoryStore(os.path.join(folder, "imported"), legacyFile=legacyFile)
+start = time.perf_counter()
+imported = importStore.query(limit=1000)
+print(f"\n{len(imported)} legacy operations imported in {(time.perf_counter() - start)*1000:.0f} ms")
+if len(imported) != 100 or imported[0].PackageId != getEntry(49).PackageId or imported[0].ManagerName != getEntry(49).ManagerName or len(imported[0].Output) != outputLines:
+    failed = True
+
+shutil.rmtree(folder)
+if failed:
+    print("🔴 The operation history returned wrong operations")
+    sys.exit(1)
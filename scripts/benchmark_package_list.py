@@ -0,0 +1,144 @@
+import sys
+import os
+import gc
+import time
+import subprocess
+from operator import attrgetter
+
+# Measures the cost of the package lists of the software sections: the old tree widget lists (a tree item per package, with a tooltip
+# stored per column as soon as the item is created, added to the tree page by page while the user scrolls, and a list to check which
+# items were already added) against the package model (a row per package, read from the package when the view paints it, and every
+# showable row shown at once on a table view). The packages exist on both variants, so only what the list keeps on top of them is
+# counted, and a viewport gets painted once the pages are shown. It runs under the Qt offscreen platform:
+#   python scripts/benchmark_package_list.py [--packages N] [--pages N]
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(root_dir, "wingetui"))
+
+from PySide6.QtGui import QIcon, QPixmap
+from PySide6.QtWidgets import QAbstractItemView, QApplication, QHeaderView, QTableView, QTreeWidget, QTreeWidgetItem
+from packageListModel import PackageListModel, PackageListSortingModel
+
+packageCount = int(sys.argv[sys.argv.index("--packages")+1]) if "--packages" in sys.argv else 50000
+pageCount = int(sys.argv[sys.argv.index("--pages")+1]) if "--pages" in sys.argv else 100 # Pages of 100 items the user scrolls through
+PAGE_SIZE = 100
+
+app = QApplication(sys.argv)
+icon = QIcon(QPixmap(24, 24))
+
+
+class BenchmarkPackage():
+    __slots__ = ("Name", "Id", "Version", "Source", "PackageManager")
+
+    def __init__(self, i: int):
+        self.Name = f"Package {i}"
+        self.Id = f"Publisher.Package{i}"
+        self.Version = f"{i % 10}.{i % 7}.{i}"
+        self.Source = "Winget: winget"
+        self.PackageManager = None
+
+    def getSourceIcon(self) -> QIcon:
+        return icon
+
+
+class OldItem(QTreeWidgetItem):
+    def setText(self, column: int, text: str) -> None:
+        self.setToolTip(column, text)
+        return super().setText(column, text)
+
+
+def getResidentMemory() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def createItems(packages: list[BenchmarkPackage]) -> list[QTreeWidgetItem]:
+    items = []
+    for package in packages:
+        item = OldItem()
+        for column, text in enumerate((package.Name, package.Id, package.Version, package.Source, "", f"{len(items):020d}"), start=1):
+            item.setText(column, text)
+            if column < 5:
+                item.setIcon(column, icon)
+        items.append(item)
+    return items
+
+
+def createModel(packages: list[BenchmarkPackage]) -> PackageListSortingModel:
+    model = PackageListModel(["", "Name", "Id", "Version", "Source"], {1: attrgetter("Name"), 2: attrgetter("Id"), 3: attrgetter("Version"), 4: attrgetter("Source")}, {1: icon, 2: icon, 3: icon}, 4)
+    for package in packages:
+        model.addPackage(package)
+    proxy = PackageListSortingModel()
+    proxy.setSourceModel(model)
+    return proxy
+
+
+def paint(view: QAbstractItemView) -> float:
+    """
+    Paints a viewport of the list scrolled to the last shown row, returning the time taken (ms)
+    """
+    view.resize(1000, 700)
+    view.scrollToBottom()
+    start = time.perf_counter()
+    view.grab()
+    return (time.perf_counter() - start) * 1000
+
+
+def pageItems(items: list[QTreeWidgetItem]) -> tuple[float, float]:
+    """
+    Adds pageCount pages of items to a tree like the old SoftwareSection.addItemsToTreeWidget, returning the time of the last page and of a paint (ms)
+    """
+    tree = QTreeWidget()
+    tree.setColumnCount(7)
+    addedItems = []
+    lastPageTime = 0
+    for page in range(min(pageCount, len(items) // PAGE_SIZE)):
+        start = time.perf_counter()
+        for itemToAdd in items[page*PAGE_SIZE:(page+1)*PAGE_SIZE]:
+            if itemToAdd not in addedItems:
+                tree.addTopLevelItem(itemToAdd)
+                addedItems.append(itemToAdd)
+        lastPageTime = (time.perf_counter() - start) * 1000
+    paintTime = paint(tree)
+    tree.clear()
+    return lastPageTime, paintTime
+
+
+def showRows(proxy: PackageListSortingModel, packages: list[BenchmarkPackage]) -> tuple[float, float]:
+    """
+    Shows the rows of pageCount pages at once, like SoftwareSection.addItemsToTreeWidget, on a table view with rows of a fixed
+    height (like TableView), returning the time taken and of a paint (ms)
+    """
+    view = QTableView()
+    view.setShowGrid(False)
+    view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+    view.verticalHeader().hide()
+    view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+    view.verticalHeader().setDefaultSectionSize(39)
+    view.setModel(proxy)
+    start = time.perf_counter()
+    proxy.setPackages(packages[:pageCount*PAGE_SIZE])
+    showTime = (time.perf_counter() - start) * 1000
+    return showTime, paint(view)
+
+
+if "--only" in sys.argv: # Each variant runs on its own process, so the memory freed by one of them does not hide the memory used by the other
+    name = sys.argv[sys.argv.index("--only")+1]
+    packages = [BenchmarkPackage(i) for i in range(packageCount)]
+    gc.collect()
+    memoryBefore = getResidentMemory()
+    start = time.perf_counter()
+    if name == "model":
+        proxy = createModel(packages)
+    else:
+        items = createItems(packages)
+    createTime = (time.perf_counter() - start) * 1000
+    memory = getResidentMemory() - memoryBefore
+    lastPageTime, paintTime = showRows(proxy, packages) if name == "model" else pageItems(items)
+    print(f"{name:<10}{createTime:>13.0f}{memory:>13.1f}{lastPageTime:>16.2f}{paintTime:>12.2f}")
+else:
+    print(f"{packageCount} packages, scrolling through {pageCount} pages of {PAGE_SIZE} items (the model shows them at once)\n")
+    print(f"{'List':<10}{'Create (ms)':>13}{'Memory (MB)':>13}{'Last page (ms)':>16}{'Paint (ms)':>12}", flush=True)
+    for name in ("old", "model"):
+        subprocess.run([sys.executable, __file__, "--only", name, "--packages", str(packageCount), "--pages", str(pageCount)], check=True)
@@ -0,0 +1,98 @@
+import sys
+import os
+import gc
+import ast
+import time
+import tracemalloc
+
+# Measures the memory kept by --packages Package and UpgradablePackage objects, with the old classes (reproduced here: an instance
+# __dict__ per package, the version and source strings of every row kept apart, and the NewPackage of every UpgradablePackage built
+# right away) and the current ones (__slots__, interned versions and sources, and NewPackage built when it is first read).
+# The packages are built from rows split out of a text line, like the package manager parsers do, and only what they keep is counted.
+#   python scripts/benchmark_packages_memory.py [--packages N]
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(root_dir, "wingetui"))
+
+packageCount = int(sys.argv[sys.argv.index("--packages")+1]) if "--packages" in sys.argv else 100000
+
+try:
+    from PackageManagers.PackageClasses import Package, UpgradablePackage
+except ImportError: # tools.py needs Windows, so elsewhere the current classes are loaded straight from their source, with the imports they need
+    with open(os.path.join(root_dir, "wingetui", "PackageManagers", "PackageClasses.py"), encoding="utf-8") as f:
+        source = ast.parse(f.read())
+    imports = [node for node in source.body if isinstance(node, (ast.Import, ast.ImportFrom)) and not (isinstance(node, ast.ImportFrom) and node.module == "tools")]
+    classes = [node for node in source.body if isinstance(node, ast.ClassDef) and node.name in ("Package", "UpgradablePackage")]
+    namespace = {"__name__": "PackageManagers.PackageClasses", "__package__": "PackageManagers"}
+    exec(compile(ast.Module(body=imports + classes, type_ignores=[]), "PackageClasses.py", "exec"), namespace)
+    Package, UpgradablePackage = namespace["Package"], namespace["UpgradablePackage"]
+
+
+class OldPackage():
+    Name: str = ""
+    Id: str = ""
+    Version: str = ""
+    Source: str = ""
+    PackageItem = None
+    PackageManager = None
+
+    def __init__(self, Name: str, Id: str, Version: str, Source: str, PackageManager):
+        self.Name = Name
+        self.Id = Id
+        self.Version = Version
+        self.Source = Source
+        self.PackageManager = PackageManager
+
+
+class OldUpgradablePackage(OldPackage):
+    NewVersion = ""
+    NewPackage: OldPackage = None
+
+    def __init__(self, Name: str, Id: str, InstalledVersion: str, NewVersion: str, Source: str, PackageManager):
+        super().__init__(Name, Id, InstalledVersion, Source, PackageManager)
+        self.NewVersion = NewVersion
+        self.NewPackage = OldPackage(Name, Id, NewVersion, Source, PackageManager)
+
+
+def getLine(i: int) -> str:
+    return f"Package {i}|Publisher.Package{i}|{i % 40}.{i % 7}.0|{i % 40}.{i % 7 + 1}.0|Winget: winget"
+
+
+def measure(build) -> tuple[float, float]:
+    """
+    Returns the bytes kept per package and the microseconds taken to build every package
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    packages = [build(getLine(i).split("|")) for i in range(packageCount)]
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del packages
+    return memory / packageCount, elapsed * 1e6 / packageCount
+
+
+CASES = [
+    ("Package", lambda fields: OldPackage(fields[0], fields[1], fields[2], fields[4], None), lambda fields: Package(fields[0], fields[1], fields[2], fields[4], None)),
+    ("UpgradablePackage", lambda fields: OldUpgradablePackage(fields[0], fields[1], fields[2], fields[3], fields[4], None), lambda fields: UpgradablePackage(fields[0], fields[1], fields[2], fields[3], fields[4], None)),
+]
+
+print(f"Building {packageCount} packages, {40*7} different versions on a single source\n")
+print(f"{'Class':<20}{'Old (B/package)':>17}{'Now (B/package)':>17}{'Saved':>8}{'Old (µs)':>10}{'Now (µs)':>10}")
+failed = False
+for name, oldBuild, newBuild in CASES:
+    oldMemory, oldTime = measure(oldBuild)
+    newMemory, newTime = measure(newBuild)
+    print(f"{name:<20}{oldMemory:>17.0f}{newMemory:>17.0f}{(1 - newMemory/oldMemory)*100:>7.0f}%{oldTime:>10.2f}{newTime:>10.2f}")
+    if newMemory >= oldMemory:
+        failed = True
+
+package = UpgradablePackage("Package", "Publisher.Package", "1.0", "1.1", "Winget: winget", None)
+if package.NewPackage.Version != "1.1" or package.NewPackage is not package.NewPackage or hasattr(package, "__dict__"):
+    print("🔴 The NewPackage of an UpgradablePackage is wrong, or the packages still have an instance dictionary")
+    failed = True
+if failed:
+    print("🔴 The current package classes do not take less memory than the old ones")
+    sys.exit(1)
@@ -0,0 +1,61 @@
+import sys
+import os
+import heapq
+import random
+
+# Simulates an "update all" run through the InstallationScheduler and reports how long the whole queue takes to drain (the makespan)
+# with serial operations, with the concurrency caps of the package managers, and with no caps at all (the old parallel installs).
+# Operation durations are made up (seconds per update, by package manager); no package manager is run.
+#   python scripts/benchmark_parallel_installs.py [--updates N]
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(root_dir, "wingetui"))
+
+from installationScheduler import InstallationScheduler, InstallationJob
+
+updateCount = int(sys.argv[sys.argv.index("--updates")+1]) if "--updates" in sys.argv else 50
+MANAGERS = { # Name: (duration range, MaxParallelOperations, ExclusiveResource), like their PackageManagerCapabilities
+    "Winget": ((20, 90), 1, "WindowsInstaller"),
+    "Chocolatey": ((20, 60), 1, "WindowsInstaller"),
+    "Scoop": ((5, 20), 1, ""),
+    "Pip": ((3, 10), 1, ""),
+    "Npm": ((3, 10), 1, ""),
+}
+
+rng = random.Random(0)
+updates = [(name, rng.uniform(*MANAGERS[name][0])) for name in rng.choices(list(MANAGERS), weights=[5, 2, 2, 3, 2], k=updateCount)]
+
+
+def simulate(parallel: bool, caps: bool) -> tuple[float, int]:
+    """
+    Returns the time the last update finishes at and the highest amount of Windows Installer operations that ran at the same time
+    """
+    scheduler = InstallationScheduler(lambda: parallel, len(updates) if not caps else 4)
+    clock = 0
+    finishTimes: list[tuple[float, str]] = []
+    runningInstallers = set()
+    maxInstallers = 0
+    def start(jobId: str, name: str, duration: float):
+        nonlocal maxInstallers
+        heapq.heappush(finishTimes, (clock + duration, jobId))
+        if MANAGERS[name][2]:
+            runningInstallers.add(jobId)
+            maxInstallers = max(maxInstallers, len(runningInstallers))
+    for i, (name, duration) in enumerate(updates):
+        _, maxParallel, resource = MANAGERS[name]
+        job = InstallationJob(str(i), f"Package {i}", name, lambda i=i, name=name, duration=duration: start(str(i), name, duration),
+                              maxParallelOperations=maxParallel if caps else len(updates), exclusiveResource=resource if caps else "")
+        scheduler.queue(job)
+    while finishTimes:
+        clock, jobId = heapq.heappop(finishTimes)
+        runningInstallers.discard(jobId)
+        scheduler.finish(jobId)
+    return clock, maxInstallers
+
+
+print(f"{updateCount} updates, {sum(duration for _, duration in updates):.0f} s of operations\n")
+print(f"{'Mode':<12}{'Makespan (s)':>14}{'Speed-up':>10}{'Parallel MSI installs':>23}")
+serialTime = simulate(parallel=False, caps=True)[0]
+for mode, parallel, caps in (("serial", False, True), ("capped", True, True), ("uncapped", True, False)):
+    makespan, maxInstallers = simulate(parallel, caps)
+    print(f"{mode:<12}{makespan:>14.0f}{serialTime / makespan:>9.1f}x{maxInstallers:>23}")
@@ -0,0 +1,93 @@
+import sys
+import os
+import time
+import tracemalloc
+
+# Replays the recorded package manager outputs in parser_fixtures through the process runner and the output parsers,
+# and reports the parse time, the memory allocations and the amount of rows found for each of them.
+# It does not need Windows nor Qt, so it can be run on any machine:
+#   python scripts/benchmark_parsers.py [--repeat N] [--iterations N]
+# --repeat multiplies the table rows of every fixture, to benchmark big outputs (such as a full winget search)
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+fixtures_dir = os.path.join(root_dir, "scripts", "parser_fixtures")
+sys.path.append(os.path.join(root_dir, "wingetui"))
+
+
+def replay(fixture: str, repeat: int, firstRow: int, lastRow: int):
+    """
+    Stub executable: prints the fixture as the package manager would, repeating the lines [firstRow:lastRow] the given amount of times
+    """
+    with open(fixture, "rb") as f:
+        lines = f.read().split(b"\n")
+    lines = [line+b"\n" for line in lines[:-1]] + ([lines[-1]] if lines[-1] else []) # Do not split on the spinner carriage returns
+    output = sys.stdout.buffer
+    output.writelines(lines[:firstRow])
+    for _ in range(repeat):
+        output.writelines(lines[firstRow:lastRow])
+    output.writelines(lines[lastRow:])
+    output.flush()
+
+
+if len(sys.argv) > 1 and sys.argv[1] == "--replay":
+    replay(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), int(sys.argv[5]))
+    sys.exit(0)
+
+
+from PackageManagers.processRunner import Runner
+from PackageManagers.outputParsers import *
+
+repeat = int(sys.argv[sys.argv.index("--repeat")+1]) if "--repeat" in sys.argv else 1
+iterations = int(sys.argv[sys.argv.index("--iterations")+1]) if "--iterations" in sys.argv else 50
+
+# (name, fixture, parser, first repeated row, last repeated row, rows outside of the repeated block)
+# The lines outside the repeated block that are parsed as rows (choco and pip notices) are filtered later on by the managers' blacklists
+CASES = [
+    ("Winget upgrade",  "winget_upgrade.txt", parseWingetUpdates, 2, 12, 1),
+    ("Winget list",     "winget_list.txt", parseWingetInstalled, 2, 14, 0),
+    ("Winget search",   "winget_search.txt", parseWingetSearch, 2, 10, 0),
+    ("Scoop status",    "scoop_status.txt", lambda lines: parseSplitTable(lines, minColumns=3), 4, 12, 0),
+    ("Scoop list",      "scoop_list.txt", parseScoopInstalled, 4, 10, 0),
+    ("Choco outdated",  "choco_outdated.txt", lambda lines: parseChocoTable(lines, minColumns=3, separator="|"), 4, 14, 1),
+    ("Choco list",      "choco_list.txt", lambda lines: parseChocoTable(lines, minColumns=2), 1, 12, 2),
+    ("Pip outdated",    "pip_outdated.txt", lambda lines: parseSplitTable(lines, minColumns=3), 2, 12, 1),
+    ("Pip list",        "pip_list.txt", lambda lines: parseSplitTable(lines, minColumns=2), 2, 13, 0),
+    ("Npm outdated",    "npm_outdated.txt", lambda lines: parseSplitTable(lines, minColumns=4, headerMarker="Package"), 1, 7, 0),
+    ("Npm list",        "npm_list.txt", parseNpmTree, 1, 9, 0),
+]
+
+print(f"Replaying {len(CASES)} fixtures, rows repeated {repeat} time(s), {iterations} parse iteration(s) each\n")
+print(f"{'Parser':<16}{'Rows':>8}{'Lines':>8}{'Replay (ms)':>13}{'Parse (ms)':>12}{'µs/line':>9}{'Peak (KiB)':>12}{'Blocks':>9}")
+
+failed = False
+for name, fixture, parser, firstRow, lastRow, extraRows in CASES:
+    expectedRows = (lastRow-firstRow)*repeat + extraRows
+
+    time0 = time.perf_counter()
+    result = Runner.run([sys.executable, os.path.abspath(__file__), "--replay", os.path.join(fixtures_dir, fixture), str(repeat), str(firstRow), str(lastRow)], shell=False)
+    rows = sum(1 for _ in parser(stripLines(result.Output)))
+    replayTime = time.perf_counter()-time0
+
+    time0 = time.perf_counter()
+    for _ in range(iterations):
+        for _ in parser(stripLines(result.Output)):
+            pass
+    parseTime = (time.perf_counter()-time0)/iterations
+
+    tracemalloc.start()
+    parsedRows = list(parser(stripLines(result.Output)))
+    peak = tracemalloc.get_traced_memory()[1]
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+    del parsedRows
+
+    status = ""
+    if not result.succeeded() or rows != expectedRows:
+        status = f"  <- expected {expectedRows} rows, the replay returned {result.ReturnCode}"
+        failed = True
+    print(f"{name:<16}{rows:>8}{len(result.Output):>8}{replayTime*1000:>13.1f}{parseTime*1000:>12.3f}{parseTime*1000000/max(len(result.Output), 1):>9.2f}{peak/1024:>12.1f}{blocks:>9}{status}")
+
+if failed:
+    print("\n🔴 Some parsers did not return the expected amount of rows")
+    sys.exit(1)
+print("\n🟢 All parsers returned the expected amount of rows")
@@ -0,0 +1,129 @@
+import sys
+import os
+import time
+import random
+import itertools
+
+# Measures the latency of filtering the package list on every keystroke, typing a few queries one character at a time:
+#  - linear: the old scan, normalizing the name and id of every package on every keystroke
+#  - index: the substring search of the section SearchIndex (Updates and Installed sections)
+#  - ranked: the top-K relevance search of the Discover section, checked against RANKED_TARGET
+# It also measures what indexing a catalog costs the main thread when it is indexed on a loader thread and merged, like Discover does.
+#   python scripts/benchmark_search.py [--sizes 10000,50000,100000]
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(root_dir, "wingetui"))
+
+from PackageManagers.searchIndex import SearchIndex
+
+sizes = [int(size) for size in sys.argv[sys.argv.index("--sizes")+1].split(",")] if "--sizes" in sys.argv else [10000, 50000, 100000]
+QUERIES = ["visual studio", "python", "node-js", "7zip", "microsoft.powertoys", "zzzzzz", "vscode", "chorme", "pyhton", "powertys"]
+RANKED_LIMIT = 500 # Same as DISCOVER_RESULTS_LIMIT
+RANKED_TARGET = (50000, 20) # The ranked search must stay under 20 ms (p95) per keystroke with 50k packages
+SYLLABLES = ["ba", "co", "de", "fi", "go", "hu", "ka", "le", "mi", "no", "pa", "qu", "ra", "si", "to", "vu", "wa", "xe", "yo", "zi",
+             "str", "chr", "th", "sh", "pl", "gr", "tr", "bl", "ex", "on", "er", "in", "an", "ix", "ox"]
+KNOWN_WORDS = ["Microsoft", "Visual", "Studio", "Code", "Python", "Node", "JS", "Git", "Google", "Chrome", "Mozilla", "Firefox", "Power", "Toys"]
+
+
+class FakeItem():
+    """
+    Stand-in for a tree item: the old filter read the name and id back from the item on every keystroke
+    """
+    def __init__(self, name: str, id: str):
+        self.texts = {1: name, 2: id}
+
+    def text(self, column: int) -> str:
+        return self.texts[column]
+
+
+def generatePackages(count: int) -> list[tuple[str, str]]:
+    """
+    Builds package names from a vocabulary of made up words with a Zipf distribution, like the publishers and words of a real catalog
+    """
+    rng = random.Random(count)
+    vocabulary = sorted({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize() for _ in range(8000)}) + KNOWN_WORDS
+    rng.shuffle(vocabulary)
+    cumulativeWeights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    packages = []
+    for i in range(count):
+        words = rng.choices(vocabulary, cum_weights=cumulativeWeights, k=rng.randint(1, 3))
+        packages.append((" ".join(words), f"{rng.choice(vocabulary)}.{''.join(words)}"))
+    packages[count // 2] = ("7-Zip", "7zip.7zip")
+    packages[count // 3] = ("Visual Studio Code", "Microsoft.VisualStudioCode")
+    packages[count // 4] = ("PowerToys (Preview)", "Microsoft.PowerToys")
+    return packages
+
+
+def linearFilter(items: list[FakeItem], text: str) -> list[FakeItem]:
+    querytext = text.replace("-", "").replace(" ", "").lower()
+    return [item for item in items if querytext in item.text(1).lower().replace("-", "").replace(" ", "") or querytext in item.text(2).lower().replace("-", "").replace(" ", "")]
+
+
+def indexFilter(items: list[FakeItem], index: SearchIndex, text: str) -> list[FakeItem]:
+    matchingItems = index.search(text)
+    return [item for item in items if item in matchingItems]
+
+
+def keystrokes(query: str) -> list[str]:
+    return [query[:length] for length in range(1, len(query)+1)]
+
+
+targetMet = True
+mergeTimes: dict[int, tuple[float, float]] = {}
+print(f"{'Packages':>10}{'Filter':>10}{'Build (ms)':>12}{'Mean (ms)':>11}{'p95 (ms)':>10}{'Max (ms)':>10}")
+for size in sizes:
+    packages = generatePackages(size)
+    items = [FakeItem(name, id) for name, id in packages]
+    buildStart = time.perf_counter()
+    index = SearchIndex()
+    for item, (name, id) in zip(items, packages):
+        index.add(item, name, id)
+    buildTime = (time.perf_counter() - buildStart) * 1000
+    half = size // 2 # Two catalogs, indexed on their loader threads
+    mergedIndex = SearchIndex()
+    catalogIndexes = [SearchIndex(mergedIndex.reserve(half)), SearchIndex(mergedIndex.reserve(size - half))]
+    for position, (item, (name, id)) in enumerate(zip(items, packages)):
+        catalogIndexes[position >= half].add(item, name, id)
+    mergeStart = time.perf_counter()
+    for catalogIndex in catalogIndexes:
+        mergedIndex.merge(catalogIndex)
+    mergeTimes[size] = (buildTime, (time.perf_counter() - mergeStart) * 1000)
+    if mergedIndex.rankedSearch("vscode", RANKED_LIMIT) != index.rankedSearch("vscode", RANKED_LIMIT):
+        print("🔴 The merged index does not return the same results")
+        sys.exit(1)
+    for mode in ("linear", "index", "ranked"):
+        latencies = []
+        for query in QUERIES:
+            for text in keystrokes(query):
+                if mode == "ranked" and len(text) < 2: # Discover only searches from two characters on
+                    continue
+                start = time.perf_counter()
+                if mode == "linear":
+                    result = linearFilter(items, text)
+                elif mode == "index":
+                    result = indexFilter(items, index, text)
+                else:
+                    result = index.rankedSearch(text, RANKED_LIMIT)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if mode == "index":
+                    expected = linearFilter(items, text)
+                    if result != expected:
+                        print(f"🔴 Index returned {len(result)} item(s) for \"{text}\", expected {len(expected)}")
+                        sys.exit(1)
+        for query, expectedId in (("vscode", "Microsoft.VisualStudioCode"), ("7zip", "7zip.7zip"), ("powertys", "Microsoft.PowerToys")):
+            if mode == "ranked" and expectedId not in [item.text(2) for item in index.rankedSearch(query, 10)]:
+                print(f"🔴 {expectedId} is not on the top 10 results for \"{query}\"")
+                sys.exit(1)
+        latencies.sort()
+        p95 = latencies[int(len(latencies)*0.95)]
+        print(f"{size:>10}{mode:>10}{buildTime if mode != 'linear' else 0:>12.1f}{sum(latencies)/len(latencies):>11.2f}{p95:>10.2f}{latencies[-1]:>10.2f}")
+        if mode == "ranked" and size == RANKED_TARGET[0] and p95 > RANKED_TARGET[1]:
+            targetMet = False
+
+print(f"\n{'Packages':>10}{'Added on the main thread (ms)':>32}{'Merged on the main thread (ms)':>33}")
+for size, (buildTime, mergeTime) in mergeTimes.items():
+    print(f"{size:>10}{buildTime:>32.1f}{mergeTime:>33.1f}")
+
+if RANKED_TARGET[0] in sizes:
+    print(f"\nRanked search target (p95 under {RANKED_TARGET[1]} ms with {RANKED_TARGET[0]} packages): {'met' if targetMet else 'NOT MET'}")
+    sys.exit(0 if targetMet else 1)
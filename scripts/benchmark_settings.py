@@ -0,0 +1,153 @@
+import sys
+import os
+import time
+import shutil
+import tempfile
+
+# Microbenchmark of the settings: get and set throughput of the old one-file-per-setting functions (reproduced here, with their cache that
+# every write wiped) against the SettingsStore, on a mix of reads with a write every --write-every reads (like toggling a setting while
+# isEnabled(), AlwaysElevate and AllowParallelInstalls keep being checked). The store saves its changes a moment later, together, so the
+# time of a set followed by a save is measured too. Also checks the migration of the legacy layout and the changes of other instances.
+#   python scripts/benchmark_settings.py [--operations N] [--write-every N]
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(root_dir, "wingetui"))
+
+from settingsStore import SettingsStore, SETTINGS_FILE_NAME
+
+operationCount = int(sys.argv[sys.argv.index("--operations")+1]) if "--operations" in sys.argv else 200000
+writeEvery = int(sys.argv[sys.argv.index("--write-every")+1]) if "--write-every" in sys.argv else 1000
+keys = [f"Disable{name}" for name in ("Winget", "Scoop", "Chocolatey", "Pip", "Npm")] + [f"AlwaysElevate{name}" for name in ("Winget", "Scoop", "Chocolatey", "Pip", "Npm")] + ["AllowParallelInstalls", "DisableNotifications"]
+
+folder = tempfile.mkdtemp()
+settingsCache = {}
+
+def oldGetSettings(s: str) -> bool:
+    global settingsCache
+    try:
+        return settingsCache[s]
+    except KeyError:
+        v = os.path.exists(os.path.join(folder, s))
+        settingsCache[s] = v
+        return v
+
+def oldSetSettings(s: str, v: bool) -> None:
+    global settingsCache
+    settingsCache = {}
+    if v:
+        open(os.path.join(folder, s), "w").close()
+    else:
+        try:
+            os.remove(os.path.join(folder, s))
+        except FileNotFoundError:
+            pass
+
+def oldGetSettingsValue(s: str) -> str:
+    try:
+        return str(settingsCache[s+"Value"])
+    except KeyError:
+        try:
+            with open(os.path.join(folder, s), "r", encoding="utf-8", errors="ignore") as sf:
+                v = sf.read()
+        except FileNotFoundError:
+            return ""
+        settingsCache[s+"Value"] = v
+        return v
+
+def oldSetSettingsValue(s: str, v: str) -> None:
+    global settingsCache
+    settingsCache = {}
+    with open(os.path.join(folder, s), "w", encoding="utf-8", errors="ignore") as sf:
+        sf.write(v)
+
+def runMix(get, set) -> float:
+    start = time.perf_counter()
+    for i in range(operationCount):
+        if i % writeEvery == 0:
+            set(keys[i // writeEvery % len(keys)], i // writeEvery // len(keys) % 2 == 1)
+        else:
+            get(keys[i % len(keys)])
+    return time.perf_counter() - start
+
+def timeCalls(function, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        function(i)
+    return (time.perf_counter() - start) / count
+
+for i, key in enumerate(keys):
+    oldSetSettings(key, i % 2 == 0)
+oldSetSettingsValue("PreferredTheme", "dark")
+oldSetSettingsValue("BlacklistedUpdates", ",".join(f"Publisher.Package{i}" for i in range(200)))
+oldSetSettingsValue("OperationHistory", "legacy history")
+open(os.path.join(folder, "WingetUI_1700000000.0"), "w").close()
+open(os.path.join(folder, "announcement.png"), "w").close()
+
+oldMix = runMix(oldGetSettings, oldSetSettings)
+oldGet = timeCalls(lambda i: (settingsCache.clear(), oldGetSettings(keys[i % len(keys)])), 20000)
+oldSet = timeCalls(lambda i: oldSetSettingsValue("PreferredTheme", f"theme{i}"), 2000)
+settingsCache = {}
+expectedSettings = {key: oldGetSettings(key) for key in keys}
+
+store = SettingsStore(folder)
+start = time.perf_counter()
+store.load()
+migrationTime = time.perf_counter() - start
+migratedNames = store.getNames()
+failed = False
+remainingFiles = sorted(os.listdir(folder))
+if remainingFiles != sorted(["OperationHistory", "WingetUI_1700000000.0", "announcement.png", SETTINGS_FILE_NAME]):
+    print(f"🔴 Unexpected files after the migration: {remainingFiles}")
+    failed = True
+if store.getValue("PreferredTheme") != f"theme{1999}" or not store.get("BlacklistedUpdates") or "OperationHistory" in migratedNames:
+    failed = True
+for key in keys:
+    if store.get(key) != expectedSettings[key]:
+        failed = True
+
+changes = []
+store.subscribe(lambda key, value: changes.append((key, value)), "AllowParallelInstalls")
+newMix = runMix(store.get, store.set)
+allowParallelInstalls = not store.get("AllowParallelInstalls") # The mix only writes it on long enough runs, so it is toggled explicitly
+store.set("AllowParallelInstalls", allowParallelInstalls)
+if changes[-1:] != [("AllowParallelInstalls", "" if allowParallelInstalls else None)]:
+    print("🔴 The AllowParallelInstalls subscriber was not notified of the change")
+    failed = True
+store.save()
+newWrites = store.writes - 1 # The first write is the migration
+newGet = timeCalls(lambda i: store.get(keys[i % len(keys)]), 200000)
+newUncachedGet = timeCalls(lambda i: store.get(keys[i % len(keys)], cache=False), 20000)
+newSet = timeCalls(lambda i: store.setValue("PreferredTheme", f"theme{i}"), 2000)
+newSavedSet = timeCalls(lambda i: (store.setValue("PreferredTheme", f"saved{i}"), store.save()), 2000)
+writes = store.writes
+start = time.perf_counter()
+with store.transaction():
+    for i in range(1000):
+        store.setValue(f"Setting{i % 100}", str(i))
+transactionTime = time.perf_counter() - start
+if store.writes != writes + 1:
+    failed = True
+
+reloaded = SettingsStore(folder)
+if reloaded.getNames() != store.getNames() or reloaded.getValue("Setting99") != "999":
+    failed = True
+otherInstance = SettingsStore(folder)
+otherInstance.set("DisableWinget", not store.get("DisableWinget"))
+otherInstance.save()
+if store.get("DisableWinget", cache=False) != otherInstance.get("DisableWinget"):
+    failed = True
+
+print(f"{newWrites} writes of the settings file on the mixed run, against {operationCount // writeEvery} setting files written")
+print(f"{len(migratedNames)} legacy settings migrated in {migrationTime*1000:.1f} ms\n")
+print(f"{'':<34}{'Old (files)':>14}{'Store':>14}")
+print(f"{'Mixed, writing every ' + str(writeEvery):<34}{operationCount/oldMix:>12.0f}/s{operationCount/newMix:>12.0f}/s")
+print(f"{'Get (old: cache miss)':<34}{oldGet*1e6:>12.2f}us{newGet*1e6:>12.2f}us")
+print(f"{'Get with cache=False':<34}{oldGet*1e6:>12.2f}us{newUncachedGet*1e6:>12.2f}us")
+print(f"{'Set value':<34}{oldSet*1e6:>12.1f}us{newSet*1e6:>12.1f}us")
+print(f"{'Set value and save it':<34}{oldSet*1e6:>12.1f}us{newSavedSet*1e6:>12.1f}us")
+print(f"{'1000 sets on a transaction':<34}{'':>14}{transactionTime*1000:>12.1f}ms")
+
+shutil.rmtree(folder)
+if failed:
+    print("🔴 The settings store lost or changed settings")
+    sys.exit(1)
@@ -0,0 +1,114 @@
+import sys
+import os
+import time
+import random
+
+# Measures the cost of filtering a package section sorted by a column: the old finishFiltering sorted every package item
+# on every call reading the keys back from the tree items, the current one keeps the order of every column (SortOrderCache)
+# and only picks the matching items from it. It also measures the load of a new manager's items merged into a built order.
+#   python scripts/benchmark_sorting.py [--packages N]
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(root_dir, "wingetui"))
+
+from PySide6.QtWidgets import QTreeWidgetItem
+from PackageManagers.searchIndex import SearchIndex
+from PackageManagers.sortOrders import SortOrderCache
+from PackageManagers.versionKeys import getVersionKey
+
+packageCount = int(sys.argv[sys.argv.index("--packages")+1]) if "--packages" in sys.argv else 50000
+QUERIES = ["", "m", "mi", "mic", "micro", "microsoft", "python", "zzz"]
+COLUMNS = {1: "Name", 2: "Id", 3: "Version", 4: "Source"}
+SOURCES = ["Winget: winget", "Winget: msstore", "Scoop: main", "Scoop: extras", "Chocolatey", "Pip", "Npm"]
+
+
+class PackageItem(QTreeWidgetItem):
+    __hash__ = object.__hash__ # Like TreeWidgetItemWithQAction
+
+
+class FakePackage():
+    def __init__(self, name: str, id: str, version: str, source: str):
+        self.Name = name
+        self.Id = id
+        self.Version = version
+        self.Source = source
+
+    def getVersionKey(self) -> tuple:
+        return getVersionKey(self.Version)
+
+
+rng = random.Random(0)
+packages = [FakePackage(f"{rng.choice(['Microsoft', 'Python', 'Mozilla', 'Google', 'Git'])} Package {rng.randrange(10**6)}", f"Publisher{i % 500}.Package{i}",
+                        f"{rng.randrange(20)}.{rng.randrange(20)}.{rng.randrange(100)}", rng.choice(SOURCES)) for i in range(packageCount)]
+items: list[PackageItem] = []
+ItemPackageReference: dict[PackageItem, FakePackage] = {}
+index = SearchIndex()
+for package in packages:
+    item = PackageItem()
+    for column, text in enumerate((package.Name, package.Id, package.Version, package.Source), start=1):
+        item.setText(column, text)
+    items.append(item)
+    ItemPackageReference[item] = package
+    index.add(item, package.Name, package.Id)
+
+oldKeys = {
+    1: lambda item: item.text(1),
+    2: lambda item: item.text(2),
+    3: lambda item: ItemPackageReference[item].getVersionKey(),
+    4: lambda item: item.text(4),
+}
+cache = SortOrderCache({
+    1: lambda item: ItemPackageReference[item].Name,
+    2: lambda item: ItemPackageReference[item].Id,
+    3: lambda item: ItemPackageReference[item].getVersionKey(),
+    4: lambda item: ItemPackageReference[item].Source,
+})
+
+
+def oldFilter(packageItems: list[PackageItem], column: int, descending: bool, text: str) -> list[PackageItem]:
+    packageItems.sort(key=oldKeys[column], reverse=descending)
+    matchingItems = index.search(text)
+    return [item for item in packageItems if item in matchingItems]
+
+
+def currentFilter(packageItems: list[PackageItem], column: int, descending: bool, text: str) -> list[PackageItem]:
+    packageItems = set(packageItems)
+    matchingItems = packageItems if text == "" else index.search(text) & packageItems
+    return cache.getSortedItems(items, column, descending, matchingItems)
+
+
+print(f"{packageCount} packages, {len(QUERIES)} queries per column\n")
+print(f"{'Column':<10}{'Old (ms/filter)':>17}{'Current (ms/filter)':>21}{'First sort (ms)':>17}")
+for column, columnName in COLUMNS.items():
+    timings = {}
+    start = time.perf_counter()
+    cache.getOrder(column, items)
+    firstSort = (time.perf_counter() - start) * 1000
+    for name, function in (("old", oldFilter), ("current", currentFilter)):
+        packageItems = items.copy()
+        start = time.perf_counter()
+        results = [function(packageItems, column, descending, text) for descending in (False, True) for text in QUERIES]
+        timings[name] = (time.perf_counter() - start) * 1000 / (len(QUERIES) * 2)
+        if name == "old":
+            expected = [[oldKeys[column](item) for item in result] for result in results]
+        elif [[oldKeys[column](item) for item in result] for result in results] != expected:
+            print(f"🔴 The cached {columnName} order does not match a full sort")
+            sys.exit(1)
+    if cache.getSortedItems(items, column, True, set(items)) != sorted(items, key=oldKeys[column], reverse=True):
+        print(f"🔴 The descending {columnName} order does not keep the packages with equal keys in the same order")
+        sys.exit(1)
+    print(f"{columnName:<10}{timings['old']:>17.2f}{timings['current']:>21.2f}{firstSort:>17.1f}")
+
+newItems = []
+for i in range(packageCount // 10):
+    package = FakePackage(f"Late Package {i}", f"Late.Package{i}", f"1.{i}", "Pip")
+    item = PackageItem()
+    ItemPackageReference[item] = package
+    newItems.append(item)
+items.extend(newItems)
+for item in newItems:
+    cache.add(item)
+start = time.perf_counter()
+for column in COLUMNS:
+    cache.getOrder(column, items)
+print(f"\nMerging {len(newItems)} new items into the {len(COLUMNS)} built orders: {(time.perf_counter() - start) * 1000:.1f} ms")
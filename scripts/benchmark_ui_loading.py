@@ -0,0 +1,115 @@
+import sys
+import os
+import time
+from threading import Thread
+
+# Measures the time-to-interactive of loading a big package list into a tree widget, delivering the packages from a worker thread
+# with one queued signal per package (the old way) and with the BatchedDelivery chunks the software sections use, queuing a list of
+# packages or a lazy sequence of them (like the LazyPackageList of the catalog caches), whose packages get built as they are delivered.
+# It runs under the Qt offscreen platform, so it does not need a display:
+#   python scripts/benchmark_ui_loading.py [--packages N]
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(root_dir, "wingetui"))
+
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtWidgets import QApplication, QTreeWidget, QTreeWidgetItem
+from batchedDelivery import BatchedDelivery, TARGET_FRAME_TIME
+
+packageCount = int(sys.argv[sys.argv.index("--packages")+1]) if "--packages" in sys.argv else 20000
+VISIBLE_ITEMS = 100 # The sections only add the first 100 matching items to the tree widget, the rest are added when scrolling
+
+app = QApplication(sys.argv)
+
+
+class FakeSection(QObject):
+    """
+    Stand-in for a SoftwareSection: builds a tree item per package, like SoftwareSection.addItem does
+    """
+    addProgram = Signal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.packageList = QTreeWidget()
+        self.packageList.setColumnCount(7)
+        self.packageList.show()
+        self.packageItems: list[QTreeWidgetItem] = []
+        self.showableItems: list[QTreeWidgetItem] = []
+        self.addProgram.connect(self.addItem)
+
+    def addItem(self, package: tuple[str, str, str, str]) -> None:
+        item = QTreeWidgetItem()
+        for column, text in enumerate(package, start=1):
+            item.setText(column, text)
+            item.setToolTip(column, text)
+        self.packageItems.append(item)
+        if "" in package[1].lower().replace("-", "").replace(" ", ""):
+            self.showableItems.append(item)
+            if len(self.showableItems) <= VISIBLE_ITEMS:
+                self.packageList.addTopLevelItem(item)
+
+
+def benchmark(mode: str) -> tuple[float, float, int]:
+    """
+    Returns the time-to-interactive (ms), the longest event loop stall (ms) and the amount of frames that took longer than TARGET_FRAME_TIME
+    """
+    section = FakeSection()
+    delivery = BatchedDelivery(section.addItem)
+    packages = [(f"Package {i}", f"Publisher.Package{i}", f"{i % 10}.{i % 7}.{i}", "Winget: winget") for i in range(packageCount)]
+    frames: list[float] = []
+    lastTick = [0.0]
+    finished = [0.0]
+    built = [0]
+    builtAtQueueTime = [0]
+
+    def buildPackages():
+        for i in range(packageCount):
+            built[0] += 1
+            yield (f"Package {i}", f"Publisher.Package{i}", f"{i % 10}.{i % 7}.{i}", "Winget: winget")
+
+    def tick():
+        now = time.perf_counter()
+        frames.append((now - lastTick[0]) * 1000)
+        lastTick[0] = now
+
+    def finish():
+        finished[0] = time.perf_counter()
+        app.quit()
+
+    def load():
+        if mode == "signals":
+            for package in packages:
+                section.addProgram.emit(package)
+            section.addProgram.emit(None)
+        elif mode == "lazy":
+            delivery.queueItems(buildPackages())
+            builtAtQueueTime[0] = built[0]
+            delivery.queueCall(finish)
+        else:
+            delivery.queueItems(packages)
+            delivery.queueCall(finish)
+
+    if mode == "signals":
+        section.addProgram.disconnect()
+        section.addProgram.connect(lambda package: section.addItem(package) if package is not None else finish())
+
+    heartbeat = QTimer()
+    heartbeat.setInterval(1)
+    heartbeat.timeout.connect(tick)
+    heartbeat.start()
+    startTime = lastTick[0] = time.perf_counter()
+    Thread(target=load, daemon=True).start()
+    app.exec()
+    heartbeat.stop()
+    assert len(section.packageItems) == packageCount, f"Expected {packageCount} packages, got {len(section.packageItems)}"
+    assert builtAtQueueTime[0] < packageCount, "The lazy sequence was read as a whole when it got queued"
+    section.packageList.close()
+    return (finished[0] - startTime) * 1000, max(frames, default=0), sum(1 for frame in frames if frame > TARGET_FRAME_TIME)
+
+
+print(f"Loading {packageCount} packages under the {app.platformName()} platform\n")
+print(f"{'Delivery':<12}{'Time-to-interactive (ms)':>26}{'Longest stall (ms)':>20}{f'Frames > {TARGET_FRAME_TIME} ms':>16}")
+for mode in ("signals", "batched", "lazy"):
+    timeToInteractive, longestStall, slowFrames = benchmark(mode)
+    print(f"{mode:<12}{timeToInteractive:>26.1f}{longestStall:>20.1f}{slowFrames:>16}")
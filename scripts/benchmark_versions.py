@@ -0,0 +1,147 @@
+import sys
+import os
+import time
+import random
+
+# Checks the version keys against a corpus of real winget, chocolatey, pip and npm version strings (each list is in ascending order,
+# and equal versions are grouped in a tuple), and the update checks of pairs of versions reported by the package managers. Then measures
+# sorting --versions random versions with the old Package.getFloatVersion (reproduced here, since it has been removed) and the keys.
+#   python scripts/benchmark_versions.py [--versions N]
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(root_dir, "wingetui"))
+
+from PackageManagers.versionKeys import getVersionKey, getVersionSortString, isNewerVersion, parseVersion
+
+versionCount = int(sys.argv[sys.argv.index("--versions")+1]) if "--versions" in sys.argv else 50000
+
+CORPUS = {
+    "winget": [
+        ["1.9", "1.10.2", "1.10.10", "2.0"],
+        ["7.3.9", "7.4.0-preview.6", "7.4.0-rc.1", "7.4.0", "7.4.1"], # Microsoft.PowerShell
+        ["10.0.19041.1", "10.0.19041.1202", "10.0.22621.1"], # Four-part Windows versions
+        ["2022.12", "2023.1", "2023.10.1", "2024.2"], # Calendar versions
+        ["116.0.5845.97", "116.0.5845.111", "117.0.5938.62"], # Google.Chrome
+        ["1.1.1t", "1.1.1u", "1.1.1w", "3.0.11", "3.1.2"], # ShiningLight.OpenSSL
+        ["2.42.0", "2.42.0.2", "2.43.0"], # Git.Git
+        [("2.0", "2.0.0", "v2.0.0", "2.0.0.0")],
+        ["0.9.9", "1.0.0-alpha", "1.0.0-alpha.1", "1.0.0-beta", "1.0.0-beta.2", "1.0.0-beta.11", "1.0.0-rc.1", "1.0.0"], # semver.org
+    ],
+    "choco": [
+        ["3.11.4", "3.11.5", "3.12.0-rc1", "3.12.0"], # python
+        ["2.2.2", "2.3.0-beta-20230925", "2.3.0"],
+        ["119.0.1", "120.0", "120.0.1"], # firefox
+        ["8.5.0", "8.5.0.20231018", "8.5.1"], # package fix versions
+        ["1.0.2", "1.0.2.1", "1.0.2.2"],
+    ],
+    "pip": [
+        ["1.0.dev1", "1.0a1", "1.0a2", "1.0b1", "1.0rc1", "1.0", "1.0.post1", "1.1"], # PEP 440
+        ["23.2.1", "23.3", "23.3.1"], # pip
+        ["2.0.0rc1", "2.0.0", "2.0.1"],
+        ["0.9", "0.10", "0.10.1"],
+        [("1.0c1", "1.0rc1")],
+        ["3.12.0b4", "3.12.0rc1", "3.12.0"],
+    ],
+    "npm": [
+        ["1.0.0-beta.1", "1.0.0-beta.2", "1.0.0"],
+        ["9.8.1", "9.9.0", "10.0.0-pre.0", "10.0.0"], # npm
+        ["4.9.5", "5.0.0-dev.20230112", "5.0.0-beta", "5.0.0-rc", "5.0.0"], # typescript: the dev builds come before the prereleases
+        ["18.2.0", "18.3.0"],
+    ],
+}
+
+# (new version, installed version, is the update shown)
+UPDATES = [
+    ("1.1.1d", "1.1.1c", True),
+    ("1.1.1a", "1.1.1", True),
+    ("1.0.0-next.3", "1.0.0-beta.1", True), # Unknown tag: an update the manager reported is never dropped
+    ("2.1.0-x64", "2.1.0", True),
+    ("18.3.0-canary-1a2b3c", "18.2.0", True),
+    ("1.10.2", "1.9", True),
+    ("7.4.1", "7.4.0", True),
+    ("7.4.0", "7.4.0-rc.1", True),
+    ("1.0", "1.0rc1", True),
+    ("1.0.post1", "1.0", True),
+    ("2.0", "2.0.0", False),
+    ("1.9", "1.10.2", False),
+    ("7.4.0-rc.1", "7.4.0", False),
+    ("1.0a1", "1.0", False),
+    ("Unknown", "1.0", True),
+    ("1.0", "Unknown", True),
+    ("latest", "latest", False),
+]
+
+failed = False
+checked = 0
+for manager, lists in CORPUS.items():
+    for versions in lists:
+        groups = [group if type(group) == tuple else (group,) for group in versions]
+        for lower, higher in zip(groups, groups[1:]):
+            for a in lower:
+                for b in higher:
+                    checked += 1
+                    if not getVersionKey(a) < getVersionKey(b) or not getVersionSortString(a) < getVersionSortString(b) or parseVersion(a)[1] or parseVersion(b)[1]:
+                        print(f"🔴 {manager}: {a} should sort below {b}")
+                        failed = True
+        for group in groups:
+            for a in group:
+                for b in group:
+                    checked += 1
+                    if getVersionKey(a) != getVersionKey(b):
+                        print(f"🔴 {manager}: {a} should equal {b}")
+                        failed = True
+for newVersion, oldVersion, shown in UPDATES:
+    checked += 1
+    if isNewerVersion(newVersion, oldVersion) != shown:
+        print(f"🔴 The update from {oldVersion} to {newVersion} should {'' if shown else 'not '}be shown")
+        failed = True
+print(f"{checked} version checks, {sum(len(lists) for lists in CORPUS.values())} version lists and {len(UPDATES)} updates\n")
+
+
+def getFloatVersion(version: str) -> str:
+    newver = ""
+    dotAdded = False
+    for char in version:
+        if char in "0123456789":
+            newver += char
+        elif char == ".":
+            if not dotAdded:
+                newver += "."
+                dotAdded = True
+    if newver and newver != ".":
+        strver = "{:040.10f}".format(float(newver))
+    else:
+        strver = "{:040.10f}".format(0.0)
+    return strver
+
+
+rng = random.Random(0)
+corpusVersions = [version for lists in CORPUS.values() for versions in lists for group in versions for version in (group if type(group) == tuple else (group,))]
+versions = [rng.choice(corpusVersions) if i % 10 == 0 else ".".join(str(rng.randrange(30)) for _ in range(rng.randrange(2, 5))) + rng.choice(["", "", "", "-beta.2", "rc1", "a", ".post1"]) for i in range(versionCount)]
+
+start = time.perf_counter()
+sorted(versions, key=getFloatVersion)
+oldTime = time.perf_counter() - start
+parseVersion.cache_clear()
+start = time.perf_counter()
+keySorted = sorted(versions, key=getVersionKey)
+coldTime = time.perf_counter() - start
+start = time.perf_counter()
+sorted(versions, key=getVersionKey)
+warmTime = time.perf_counter() - start
+start = time.perf_counter()
+stringSorted = sorted(versions, key=getVersionSortString)
+stringTime = time.perf_counter() - start
+if [getVersionKey(version) for version in keySorted] != [getVersionKey(version) for version in stringSorted]:
+    print("🔴 The sort strings do not sort like the keys")
+    failed = True
+oldMistakes = sum(1 for versions in CORPUS.values() for group in versions for a, b in zip(group, group[1:]) if type(a) == str and type(b) == str and getFloatVersion(a) > getFloatVersion(b))
+
+print(f"{'Sorting ' + str(versionCount) + ' versions':<34}{'Time (ms)':>11}")
+print(f"{'old getFloatVersion':<34}{oldTime*1000:>11.0f}")
+print(f"{'version keys, parsing them':<34}{coldTime*1000:>11.0f}")
+print(f"{'version keys, already parsed':<34}{warmTime*1000:>11.0f}")
+print(f"{'sort strings (hidden column)':<34}{stringTime*1000:>11.0f}")
+print(f"\nThe old getFloatVersion sorts {oldMistakes} consecutive pairs of the corpus in the wrong order")
+if failed:
+    sys.exit(1)
@@ -0,0 +1,173 @@
+import sys
+import os
+import time
+
+# Compares the rows/sec of the old winget table parsing (the column positions taken from the header, and every row split again after
+# collapsing its double spaces, reproduced here from winget.py since it has been removed) against the ColumnTableParser-based parsers,
+# on multi-thousand-line winget search and upgrade outputs. The outputs are replayed through the process runner with the --replay stub
+# of benchmark_parsers.py, repeating the table rows of the recorded fixtures. Also reports on how many rows both parsers agree.
+#   python scripts/benchmark_winget_parsers.py [--lines N] [--iterations N]
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+fixtures_dir = os.path.join(root_dir, "scripts", "parser_fixtures")
+sys.path.append(os.path.join(root_dir, "wingetui"))
+
+from PackageManagers.processRunner import Runner
+from PackageManagers.outputParsers import stripLines, parseWingetSearch, parseWingetUpdates
+
+lineCount = int(sys.argv[sys.argv.index("--lines")+1]) if "--lines" in sys.argv else 5000
+iterations = int(sys.argv[sys.argv.index("--iterations")+1]) if "--iterations" in sys.argv else 5
+
+
+def oldParseWingetSearch(lines: list[str]) -> list[tuple[str, str, str]]:
+    rows: list[tuple[str, str, str]] = []
+    hasShownId: bool = False
+    idPosition: int = 0
+    versionPosition: int = 0
+    for line in lines:
+        line = line.strip()
+        if line:
+            if not hasShownId:
+                if " Id " in line:
+                    line = line.replace("\x08-\x08\\\x08|\x08 \r","")
+                    for char in ("\r", "/", "|", "\\", "-"):
+                        line = line.split(char)[-1].strip()
+                    hasShownId = True
+                    idPosition = len(line.split("Id")[0])
+                    versionPosition = len(line.split("Version")[0])
+            elif "---" in line:
+                pass
+            else:
+                try:
+                    name = line[0:idPosition].strip()
+                    idVersionSubstr = line[idPosition:].strip()
+                    if "  " in name:
+                        oName = name
+                        while "  " in oName:
+                            oName = oName.replace("  ", " ")
+                        idVersionSubstr = oName.split(" ")[-1]+idVersionSubstr
+                        name = " ".join(oName.split(" ")[:-1])
+                    idVersionSubstr.replace("\t", " ")
+                    while "  " in idVersionSubstr:
+                        idVersionSubstr = idVersionSubstr.replace("  ", " ")
+                    iOffset = 0
+                    id = idVersionSubstr.split(" ")[iOffset]
+                    ver = idVersionSubstr.split(" ")[iOffset+1]
+                    if len(id) == 1:
+                        iOffset + 1
+                        id = idVersionSubstr.split(" ")[iOffset]
+                        ver = idVersionSubstr.split(" ")[iOffset+1]
+                    if ver.strip() in ("<", "-"):
+                        iOffset += 1
+                        ver = idVersionSubstr.split(" ")[iOffset+1]
+                    if "  " in name:
+                        name = name.replace("  ", "#").replace("# ", "#").replace(" #", "#")
+                        while "##" in name:
+                            name = name.replace("##", "#")
+                    rows.append((name, id, ver))
+                except IndexError:
+                    rows.append((line[0:idPosition].strip(), line[idPosition:versionPosition].strip(), line[versionPosition:].strip()))
+    return rows
+
+
+def oldParseWingetUpdates(lines: list[str]) -> list[tuple[str, str, str, str, str]]:
+    rows: list[tuple[str, str, str, str, str]] = []
+    hasShownId: bool = False
+    idPosition: int = 0
+    versionPosition: int = 0
+    newVerPosition: int = 0
+    for line in lines:
+        line = line.strip()
+        if not hasShownId:
+            if " Id " in line:
+                line = line.replace("\x08-\x08\\\x08|\x08 \r","")
+                for char in ("\r", "/", "|", "\\", "-"):
+                    line = line.split(char)[-1].strip()
+                hasShownId = True
+                idPosition = len(line.split("Id")[0])
+                versionPosition = len(line.split("Version")[0])
+                newVerPosition = len(line.split("Available")[0])
+        elif "---" in line:
+            pass
+        else:
+            element = line
+            StoreName = "Winget"
+            try:
+                verElement = element[idPosition:].strip()
+                verElement.replace("\t", " ")
+                while "  " in verElement:
+                    verElement = verElement.replace("  ", " ")
+                iOffset = 0
+                id = verElement.split(" ")[iOffset+0]
+                ver = verElement.split(" ")[iOffset+1]
+                newver = verElement.split(" ")[iOffset+2]
+                if len(id)==1:
+                    iOffset + 1
+                    id = verElement.split(" ")[iOffset+0]
+                    newver = verElement.split(" ")[iOffset+2]
+                    ver = verElement.split(" ")[iOffset+1]
+                if ver.strip() in ("<", ">", "-"):
+                    iOffset += 1
+                    ver = verElement.split(" ")[iOffset+1]
+                    newver = verElement.split(" ")[iOffset+2]
+                name = element[0:idPosition].strip()
+                if "winget" in line:
+                    StoreName = "Winget: winget"
+                elif "msstore" in line:
+                    StoreName = "Winget: msstore"
+                if not "  " in name:
+                    rows.append((name, id, ver, newver, StoreName))
+                else:
+                    name = name.replace("  ", "#").replace("# ", "#").replace(" #", "#")
+                    while "##" in name:
+                        name = name.replace("##", "#")
+                    rows.append((name.split("#")[0], name.split("#")[-1]+id, ver, newver, StoreName))
+            except IndexError:
+                rows.append((element[0:idPosition].strip(), element[idPosition:versionPosition].strip(), element[versionPosition:newVerPosition].split(" ")[0].strip(), element[newVerPosition:].split(" ")[0].strip(), StoreName))
+    return rows
+
+
+def newParseWingetUpdates(lines: list[str]) -> list[tuple[str, str, str, str, str]]:
+    return [(name, id, version, newVersion, "Winget: msstore" if "msstore" in source else "Winget: winget") for name, id, version, newVersion, source in parseWingetUpdates(stripLines(lines))]
+
+
+# (name, fixture, old parser, new parser, first repeated row, last repeated row, columns compared)
+CASES = [
+    ("Winget search",  "winget_search.txt", oldParseWingetSearch, lambda lines: list(parseWingetSearch(stripLines(lines))), 2, 10, 3),
+    ("Winget upgrade", "winget_upgrade.txt", oldParseWingetUpdates, newParseWingetUpdates, 2, 12, 4),
+]
+
+print(f"Parsing winget outputs of about {lineCount} lines, best of {iterations} iteration(s)\n")
+print(f"{'Parser':<16}{'Lines':>8}{'Old rows':>10}{'New rows':>10}{'Old rows/s':>13}{'New rows/s':>13}{'Speedup':>9}{'Agree':>8}")
+
+failed = False
+for name, fixture, oldParser, newParser, firstRow, lastRow, columns in CASES:
+    repeat = max(1, lineCount // (lastRow-firstRow))
+    result = Runner.run([sys.executable, os.path.join(root_dir, "scripts", "benchmark_parsers.py"), "--replay", os.path.join(fixtures_dir, fixture), str(repeat), str(firstRow), str(lastRow)], shell=False)
+    if not result.succeeded():
+        print(f"🔴 The replay of {fixture} returned {result.ReturnCode}")
+        sys.exit(1)
+    lines = result.Output
+
+    times: dict[str, float] = {}
+    rows: dict[str, list[tuple]] = {}
+    for parserName, parser in (("old", oldParser), ("new", newParser)):
+        best = float("inf")
+        for _ in range(iterations):
+            time0 = time.perf_counter()
+            rows[parserName] = parser(lines)
+            best = min(best, time.perf_counter()-time0)
+        times[parserName] = best
+
+    oldRows = {row[1]: row[:columns] for row in rows["old"]}
+    agreeing = sum(1 for row in rows["new"] if oldRows.get(row[1]) == row[:columns])
+    if len(rows["new"]) < (lastRow-firstRow)*repeat:
+        print(f"🔴 {name}: the new parser returned {len(rows['new'])} rows, expected at least {(lastRow-firstRow)*repeat}")
+        failed = True
+    oldRate = len(rows["old"]) / times["old"]
+    newRate = len(rows["new"]) / times["new"]
+    print(f"{name:<16}{len(lines):>8}{len(rows['old']):>10}{len(rows['new']):>10}{oldRate:>13.0f}{newRate:>13.0f}{newRate/oldRate:>8.1f}x{agreeing*100/max(len(rows['new']), 1):>7.0f}%")
+
+print("\nThe old parsers also return the lines around the tables (such as the \"N upgrades available.\" summary) as rows, which the managers then had to filter out")
+if failed:
+    sys.exit(1)
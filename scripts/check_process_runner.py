@@ -0,0 +1,196 @@
+import sys
+import os
+import time
+import subprocess
+
+# Checks the process runner against stub executables (this same script, run with --stub) that behave like the package managers can:
+# commands that hang (timeout), that get cancelled with child processes of their own (the whole process tree must be killed), that flood
+# their output while nobody reads it (the pipe must be paused, holding a bounded amount of lines), that get started together (at most
+# MAX_CONCURRENT_COMMANDS at once), and that exit while a child process still prints to their output (the trailing lines must be kept).
+# The stubs need a POSIX system (the tree kill signals the process group of the command):
+#   python scripts/check_process_runner.py
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(root_dir, "wingetui"))
+
+
+def stub(mode: str, argument: str) -> None:
+    """
+    Stub executable: behaves as the given mode says, printing its pid first
+    """
+    output = sys.stdout
+    if mode == "sleep":
+        print(f"pid {os.getpid()}", flush=True)
+        time.sleep(float(argument))
+    elif mode == "tree": # A child that sleeps, like an installer started by a package manager
+        child = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--stub", "sleep", argument])
+        print(f"pid {os.getpid()}", flush=True)
+        child.wait()
+    elif mode == "flood":
+        print(f"pid {os.getpid()}", flush=True)
+        lineCount = int(argument)
+        for block in range(0, lineCount, 500): # Written in blocks, as a buffered output would be
+            output.write("".join(f"Output line {i} of a command that prints a lot of output, like a full catalog listing\n" for i in range(block, min(block + 500, lineCount))))
+            output.flush()
+    elif mode == "trailing": # Exits right away, while a child keeps printing to the same output for a moment
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "--stub", "late-lines", argument])
+        print(f"pid {os.getpid()}", flush=True)
+    elif mode == "late-lines":
+        time.sleep(0.5)
+        for i in range(int(argument)):
+            output.write(f"Trailing line {i}\n")
+        output.flush()
+    elif mode == "lingering": # Exits right away, while a child keeps the output open without printing anything
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "--stub", "sleep", argument])
+        print(f"pid {os.getpid()}", flush=True)
+
+
+if len(sys.argv) > 1 and sys.argv[1] == "--stub":
+    stub(sys.argv[2], sys.argv[3])
+    sys.exit(0)
+
+
+from PackageManagers.processRunner import ProcessRunner, MAX_CONCURRENT_COMMANDS, MAX_PENDING_BATCHES, EOF_GRACE_PERIOD
+from PackageManagers.cancellationToken import CancellationToken
+
+if os.name != "posix":
+    print("🔴 The stub executables need a POSIX system")
+    sys.exit(1)
+
+Runner = ProcessRunner()
+failed = False
+
+
+def getStub(mode: str, argument: str | int) -> list[str]:
+    return [sys.executable, os.path.abspath(__file__), "--stub", mode, str(argument)]
+
+
+def isAlive(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            return stat.read().rsplit(")", 1)[1].split()[0] != "Z" # Zombies have been killed, they only wait to be reaped
+    except (FileNotFoundError, IndexError):
+        return False
+
+
+def countAlive(pids: list[int], deadline: float = 1) -> int:
+    """
+    Returns how many of the given processes are still alive after up to deadline seconds. The killed ones take a moment to be gone
+    """
+    end = time.monotonic() + deadline
+    while any(isAlive(pid) for pid in pids) and time.monotonic() < end:
+        time.sleep(0.02)
+    return sum(isAlive(pid) for pid in pids)
+
+
+def getTreePids(output: list[str]) -> list[int]:
+    """
+    Returns the pids the stubs printed on the given output, and the pids of their children
+    """
+    pids = {int(line.split()[1]) for line in output if line.startswith("pid ")}
+    children = subprocess.run(["ps", "-o", "pid=", "--ppid", ",".join(str(pid) for pid in pids)], capture_output=True, text=True).stdout.split() if pids else []
+    return sorted(pids | {int(pid) for pid in children})
+
+
+def check(name: str, passed: bool, details: str) -> None:
+    global failed
+    print(f"{'🟢' if passed else '🔴'} {name:<34}{details}")
+    if not passed:
+        failed = True
+
+
+# Timeout: the command and its child get killed once the timeout expires
+start = time.perf_counter()
+handle = Runner.start(getStub("tree", 30), shell=False, timeout=1)
+lines = []
+for line in handle.getLines():
+    lines.append(line)
+    pids = getTreePids(lines)
+result = handle.wait()
+elapsed = time.perf_counter() - start
+alive = countAlive(pids)
+check("Timeout", result.TimedOut and not result.succeeded() and elapsed < 5 and len(pids) == 2 and alive == 0,
+      f"timed out after {elapsed:.2f} s (timeout of 1 s), {alive} of {len(pids)} processes alive")
+
+# Cancellation: cancelling the token kills the whole process tree
+token = CancellationToken()
+handle = Runner.start(getStub("tree", 30), shell=False, timeout=None, token=token)
+lines = [next(handle.getLines())]
+time.sleep(0.3) # Let the child start
+pids = getTreePids(lines)
+start = time.perf_counter()
+token.cancel()
+result = handle.wait(10)
+elapsed = time.perf_counter() - start
+alive = countAlive(pids)
+check("Cancellation and tree kill", result is not None and result.Cancelled and len(pids) == 2 and alive == 0,
+      f"cancelled in {elapsed*1000:.0f} ms, {alive} of {len(pids)} processes alive")
+
+# Cancelling before the command gets to start (it waits for a free place) must not start it
+blockers = [Runner.start(getStub("sleep", 30), shell=False, timeout=None) for _ in range(MAX_CONCURRENT_COMMANDS)]
+token = CancellationToken()
+handle = Runner.start(getStub("sleep", 30), shell=False, timeout=None, token=token)
+token.cancel()
+result = handle.wait(10)
+for blocker in blockers:
+    blocker.cancel()
+    blocker.wait(10)
+check("Cancellation while queued", result is not None and result.Cancelled and handle.pid is None, "cancelled before it could start" if handle.pid is None else "it was started anyway")
+
+# Backpressure: while the lines are not consumed the pipe gets paused, and the stub blocks on its writes instead of the lines piling up
+lineCount = 200000
+handle = Runner.start(getStub("flood", lineCount), shell=False, timeout=None)
+time.sleep(2)
+pendingBatches = len(handle.batches)
+pendingLines = sum(len(batch) for batch in handle.batches)
+paused = handle.protocol is not None and handle.protocol.isPaused and handle.isRunning()
+readLines = sum(1 for _ in handle.getLines())
+result = handle.wait()
+check("Backpressure", paused and pendingBatches <= MAX_PENDING_BATCHES + 1 and pendingLines < lineCount and readLines == lineCount + 1 and result.succeeded(),
+      f"paused with {pendingBatches} batches ({pendingLines} of {lineCount} lines) pending, then read {readLines - 1} lines")
+
+# Waiting without reading the output drops it, including the lines printed afterwards, so the command is never blocked on a write
+lineCount = 2000000
+handle = Runner.start(getStub("flood", lineCount), shell=False, timeout=None)
+time.sleep(1)
+start = time.perf_counter()
+result = handle.wait(20)
+elapsed = time.perf_counter() - start
+check("Waiting without reading output", result is not None and result.succeeded() and not handle.batches,
+      f"finished {elapsed:.2f} s after the wait, with {len(handle.batches)} batches pending" if result else f"still running after 20 s, {'paused' if handle.protocol.isPaused else 'not paused'}")
+if result is None:
+    handle.cancel()
+    handle.wait(10)
+
+# Concurrency cap: only MAX_CONCURRENT_COMMANDS commands run at once, the rest wait for a free place
+handles = [Runner.start(getStub("sleep", 0.5), shell=False) for _ in range(MAX_CONCURRENT_COMMANDS * 3)]
+running: list[int] = []
+while any(handle.isRunning() for handle in handles):
+    running.append(sum(1 for handle in handles if handle.pid is not None and handle.isRunning()))
+    time.sleep(0.01)
+unlimited = [Runner.start(getStub("sleep", 0.5), shell=False, limited=False) for _ in range(MAX_CONCURRENT_COMMANDS * 2)]
+unlimitedRunning = 0
+while any(handle.isRunning() for handle in unlimited):
+    unlimitedRunning = max(unlimitedRunning, sum(1 for handle in unlimited if handle.pid is not None and handle.isRunning()))
+    time.sleep(0.01)
+check(f"Concurrency cap of {MAX_CONCURRENT_COMMANDS}", max(running) == MAX_CONCURRENT_COMMANDS and all(handle.wait().succeeded() for handle in handles) and unlimitedRunning > MAX_CONCURRENT_COMMANDS,
+      f"at most {max(running)} of {len(handles)} commands running at once ({unlimitedRunning} of {len(unlimited)} unlimited ones)")
+
+# Trailing output: the lines printed (by a child) after the command has exited are not lost
+result = Runner.run(getStub("trailing", 5000), shell=False)
+trailingLines = sum(1 for line in result.Output if line.startswith("Trailing line"))
+check("Trailing output after exit", result.succeeded() and trailingLines == 5000, f"{trailingLines} of 5000 lines printed after the exit were read")
+
+# A child that keeps the output open after the command exits does not keep the command running for longer than the grace period
+start = time.perf_counter()
+result = Runner.run(getStub("lingering", 30), shell=False)
+elapsed = time.perf_counter() - start
+check("Output kept open after exit", result.succeeded() and elapsed < EOF_GRACE_PERIOD + 3, f"finished after {elapsed:.2f} s (grace period of {EOF_GRACE_PERIOD} s)")
+for pid in getTreePids(result.Output):
+    if isAlive(pid):
+        os.kill(pid, 9)
+
+if failed:
+    print("\n🔴 The process runner failed some checks")
+    sys.exit(1)
+print("\n🟢 The process runner passed all the checks")
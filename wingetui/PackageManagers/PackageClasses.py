@@ -1,27 +1,35 @@
-import subprocess
-from typing import Optional
+import subprocess, sys, functools
+from typing import Callable, Optional
 import PySide6.QtCore
 import PySide6.QtWidgets
 from tools import _, blueColor
+from .versionKeys import getVersionKey, getVersionSortString, isNewerVersion
+from .processRunner import RunningCommand
+from .cancellationToken import CancellationToken
+from .queryPipeline import QuerySearch
+from .queryCache import getQueryCache
 from PySide6.QtCore import *
 from PySide6.QtGui import *
 from PySide6.QtWidgets import *
 
 
 class Package():
-    Name: str = ""
-    Id: str = ""
-    Version: str = ""
-    Source: str = ""
-    PackageItem: QTreeWidgetItem = None
-    PackageManager: 'PackageManagerModule' = None
+    __slots__ = ("Name", "Id", "Version", "Source", "PackageItem", "PackageManager", "_VersionKey")
+    Name: str
+    Id: str
+    Version: str
+    Source: str
+    PackageItem: QTreeWidgetItem
+    PackageManager: 'PackageManagerModule'
     
     def __init__(self, Name: str, Id: str, Version: str, Source: str, PackageManager: 'PackageManagerModule'):
         self.Name = Name
         self.Id = Id
-        self.Version = Version
-        self.Source = Source
+        self.Version = sys.intern(Version)
+        self.Source = sys.intern(Source)
+        self.PackageItem = None
         self.PackageManager = PackageManager
+        self._VersionKey = None
         
     def isWinget(self) -> bool:
         return self.Source.lower() == "winget"
@@ -51,68 +59,95 @@ class Package():
         """
         return manager == self.PackageManager
     
-    def getFloatVersion(self) -> float:
-        newver = ""
-        dotAdded = False
-        for char in self.Version:
-            if char in "0123456789":
-                newver += char
-            elif char == ".":
-                if not dotAdded:
-                    newver += "."
-                    dotAdded = True
-        if newver and newver != ".":
-            strver = "{:040.10f}".format(float(newver))
-        else:
-            strver = "{:040.10f}".format(0.0)
-        return strver
+    def getVersionKey(self) -> tuple:
+        """
+        Returns the comparable version key of the package, parsed only once per package
+        """
+        if self._VersionKey is None or self._VersionKey[0] != self.Version:
+            self._VersionKey = (self.Version, getVersionKey(self.Version))
+        return self._VersionKey[1]
+    
+    def getSortableVersion(self) -> str:
+        """
+        Returns a string that sorts as text like the package versions do
+        """
+        return getVersionSortString(self.Version)
         
     def __str__(self) -> str:
         return f"<Package: {self.Name};{self.Id};{self.Version};{self.Source};{self.PackageManager};{self.PackageItem}>"
         
 class UpgradablePackage(Package):
-    NewVersion = ""
-    NewPackage: Package = None
+    __slots__ = ("NewVersion", "_NewPackage")
+    NewVersion: str
     
     def __init__(self, Name: str, Id: str, InstalledVersion: str, NewVersion: str, Source: str, PackageManager: 'PackageManagerModule'):
         super().__init__(Name, Id, InstalledVersion, Source, PackageManager)
-        self.NewVersion = NewVersion
-        self.NewPackage = Package(Name, Id, NewVersion, Source, PackageManager)
+        self.NewVersion = sys.intern(NewVersion)
+        self._NewPackage = None
+        
+    @property
+    def NewPackage(self) -> Package:
+        """
+        The Package object representing the new version. Only gets created when accessed.
+        """
+        if self._NewPackage is None:
+            self._NewPackage = Package(self.Name, self.Id, self.NewVersion, self.Source, self.PackageManager)
+        return self._NewPackage
+    
+    def getNewVersionKey(self) -> tuple:
+        return getVersionKey(self.NewVersion)
+    
+    def isNewerVersionAvailable(self) -> bool:
+        """
+        Checks whether the new version is actually newer than the installed one
+        """
+        return isNewerVersion(self.NewVersion, self.Version)
         
 class PackageDetails(Package):
-    Name: str = ""
-    Id: str = ""
-    Version: str = ""
-    NewVersion: str = ""
-    Source: str = ""
-    PackageObject: Package = None
-    Publisher: str = _("Not available")
-    Author: str = _("Not available")
-    Description: str = _("Not available")
-    HomepageURL: str = _("Not available")
-    License: str = ""
-    LicenseURL: str = ""
-    InstallerURL: str = _("Not available")
-    InstallerHash: str = _("Not available")
-    InstallerSize: int = 0 # In Megabytes
-    InstallerType: str = _("Not available")
-    ManifestUrl: str = _("Not available")
-    UpdateDate: str = _("Not available")
-    ReleaseNotes: str = _("Not available")
-    ReleaseNotesUrl: str = _("Not available")
-    Versions: list[str] = []
-    Architectures: list[str] = []
-    Scopes: list[str] = []
-    Tags: list[str] = []
+    __slots__ = ("NewVersion", "PackageObject", "Publisher", "Author", "Description", "HomepageURL", "License", "LicenseURL", "InstallerURL", "InstallerHash", "InstallerSize", "InstallerType", "ManifestUrl", "UpdateDate", "ReleaseNotes", "ReleaseNotesUrl", "Versions", "Architectures", "Scopes", "Tags")
+    NewVersion: str
+    PackageObject: Package
+    Publisher: str
+    Author: str
+    Description: str
+    HomepageURL: str
+    License: str
+    LicenseURL: str
+    InstallerURL: str
+    InstallerHash: str
+    InstallerSize: int # In Megabytes
+    InstallerType: str
+    ManifestUrl: str
+    UpdateDate: str
+    ReleaseNotes: str
+    ReleaseNotesUrl: str
+    Versions: list[str]
+    Architectures: list[str]
+    Scopes: list[str]
+    Tags: list[str]
     
     def __init__(self, package: Package):
-        self.Name = package.Name
-        self.Id = package.Id
-        self.Version = package.Version
-        self.Source = package.Source
+        super().__init__(package.Name, package.Id, package.Version, package.Source, package.PackageManager)
         self.PackageObject = package
-        if type(package) == UpgradablePackage:
-            self.NewVersion = package.NewVersion
+        self.NewVersion = package.NewVersion if type(package) == UpgradablePackage else ""
+        self.Publisher = _("Not available")
+        self.Author = _("Not available")
+        self.Description = _("Not available")
+        self.HomepageURL = _("Not available")
+        self.License = ""
+        self.LicenseURL = ""
+        self.InstallerURL = _("Not available")
+        self.InstallerHash = _("Not available")
+        self.InstallerSize = 0
+        self.InstallerType = _("Not available")
+        self.ManifestUrl = _("Not available")
+        self.UpdateDate = _("Not available")
+        self.ReleaseNotes = _("Not available")
+        self.ReleaseNotesUrl = _("Not available")
+        self.Versions = []
+        self.Architectures = []
+        self.Scopes = []
+        self.Tags = []
         
     def asUrl(self, url: str) -> str:
         return f"<a href='{url}' style='color:{blueColor}'>{url}</a>" if "://" in url else url
@@ -146,11 +181,15 @@ class PackageManagerCapabilities():
     SupportsCustomVersions: bool = False
     SupportsCustomArchitectures: bool = False
     SupportsCustomScopes: bool = False
+    MaxParallelOperations: int = 1 # Operations of the manager that can run at the same time, when parallel installs are allowed
+    ExclusiveResource: str = "" # Operations of managers that need the same exclusive resource never run at the same time
+    SupportsBatchUpdates: bool = False # The manager can update several packages with a single command
 
 class InstallationWidgetType(QWidget):
     finishInstallation: Signal
     addInfoLine: Signal
     counterSignal: Signal
+    CancellationToken: CancellationToken # Cancelled when the user cancels the operation. The commands of the operation are started with it, so they get killed
     
     def __init__(self) -> None:
         raise RuntimeError("This class is a type declaration!")
@@ -191,27 +230,33 @@ class PackageManagerModule():
         Will return a PackageDetails object containing the information of the given Package object
         """
 
-    def startInstallation(self, package: Package, options: InstallationOptions, installationWidget: InstallationWidgetType) -> subprocess.Popen:
+    def startInstallation(self, package: Package, options: InstallationOptions, installationWidget: InstallationWidgetType) -> RunningCommand:
         """
         Starts a thread that installs the specified Package, making use of the given options. Reports the progress through the given InstallationWidget
         """
         
-    def startUpdate(self, package: Package, options: InstallationOptions, installationWidget: InstallationWidgetType) -> subprocess.Popen:
+    def startUpdate(self, package: Package, options: InstallationOptions, installationWidget: InstallationWidgetType) -> RunningCommand:
         """
         Starts a thread that updates the specified Package, making use of the given options. Reports the progress through the given InstallationWidget
         """
         
-    def installationThread(self, p: subprocess.Popen, options: InstallationOptions, installationWidget: InstallationWidgetType):
+    def startBatchUpdate(self, packages: list[Package], options: InstallationOptions, installationWidgets: list[InstallationWidgetType]) -> RunningCommand:
+        """
+        Starts a thread that updates all the specified Packages with a single command, making use of the given options. Only available if Capabilities.SupportsBatchUpdates is set.
+        The output is split by package, and the progress and result of every Package are reported through the InstallationWidget at the same position
+        """
+        
+    def installationThread(self, p: RunningCommand, options: InstallationOptions, installationWidget: InstallationWidgetType):
         """
         Internal method that handles the installation of the given package
         """
         
-    def startUninstallation(self, package: Package, options: InstallationOptions, installationWidget: InstallationWidgetType) -> subprocess.Popen:
+    def startUninstallation(self, package: Package, options: InstallationOptions, installationWidget: InstallationWidgetType) -> RunningCommand:
         """
         Starts a thread that removes the specified Package, making use of the given options. Reports the progress through the given InstallationWidget
         """
         
-    def uninstallationThread(self, p: subprocess.Popen, options: InstallationOptions, installationWidget: InstallationWidgetType):
+    def uninstallationThread(self, p: RunningCommand, options: InstallationOptions, installationWidget: InstallationWidgetType):
         """
         Internal method that handles the removal of the given package
         """
@@ -233,12 +278,31 @@ class PackageManagerModule():
         
 class DynamicPackageManager(PackageManagerModule):
         
-    def getPackagesForQuery(self, query: str) -> list[Package]:
+    def getPackagesForQuery(self, query: str, search: QuerySearch = None) -> list[Package]:
         f"""
         Will retieve the packages for the given "query: str" from the package manager {self.NAME} in the format of a list[Package] object.
+        The commands started are attached to "search: QuerySearch", if given, so they get killed when the search is superseded.
         """
 
 
+def cachedQuery(getPackagesForQuery: Callable) -> Callable:
+    """
+    Decorator for the getPackagesForQuery method of the dynamic package managers: a query searched in the last minutes
+    is answered from the query cache of the package manager instead of running the search again
+    """
+    @functools.wraps(getPackagesForQuery)
+    def cachedGetPackagesForQuery(self: DynamicPackageManager, query: str, search: QuerySearch = None) -> list[Package]:
+        cache = getQueryCache(self.NAME)
+        records = cache.get(query)
+        if records is not None:
+            print(f"🔵 {self.NAME} search for \"{query}\" loaded from the query cache (hit rate {cache.getHitRate():.0%})")
+            return [Package(name, id, version, source, self) for name, id, version, source in records]
+        packages = getPackagesForQuery(self, query, search)
+        if packages and not (search and search.isCancelled()): # Empty results may come from a failed search, and cancelled ones are incomplete
+            cache.put(query, [[package.Name, package.Id, package.Version, package.Source] for package in packages])
+        return packages
+    return cachedGetPackagesForQuery
+
 
 RETURNCODE_OPERATION_SUCCEEDED = 0
 RETURNCODE_NO_APPLICABLE_UPDATE_FOUND = 92849
@@ -251,6 +315,7 @@ RETURNCODE_INCORRECT_HASH = 2
 RETURNCODE_NEEDS_ELEVATION = 1603
 RETURNCODE_NEEDS_SCOOP_ELEVATION = 1602
 RETURNCODE_NEEDS_PIP_ELEVATION = 1601
+RETURNCODE_BATCH_FAILED = 1600 # Given by a failed batched update to the packages it did not update, which then get updated on their own
 
 class BlacklistMethod():
     Legacy = 0
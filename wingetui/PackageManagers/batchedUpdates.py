@@ -0,0 +1,80 @@
+import re
+
+MAX_BATCH_SIZE = 20 # Packages updated by a single command. Keeps the command line short, and limits what a failing command takes down with it
+
+
+def getBatchKey(package: 'Package') -> tuple[str, str] | None:
+    """
+    Returns the key of the batches the package can be updated with, or None if its package manager updates one package per command.
+    Packages are only batched with packages of the same manager and source, so all of them get the same command line parameters.
+    """
+    if not package.PackageManager.Capabilities.SupportsBatchUpdates:
+        return None
+    return (package.PackageManager.NAME, package.Source)
+
+
+def getBatches(packages: list['Package']) -> list[list['Package']]:
+    """
+    Groups the given packages in the batches they should be updated with, keeping their order. Packages that can't be batched get a batch of their own.
+    """
+    batches: list[list['Package']] = []
+    openBatches: dict[tuple[str, str], list['Package']] = {}
+    for package in packages:
+        key = getBatchKey(package)
+        if key is None:
+            batches.append([package])
+            continue
+        batch = openBatches.get(key)
+        if batch is None or len(batch) >= MAX_BATCH_SIZE:
+            batch = openBatches[key] = []
+            batches.append(batch)
+        batch.append(package)
+    return batches
+
+
+def normalizeId(packageId: str) -> str:
+    return packageId.lower().replace("_", "-")
+
+
+class BatchOutputSplitter():
+    """
+    Splits the output of a command that updates several packages into the output of every package.
+    A line that names one of the packages belongs to it, and so do the lines that follow it until another package is named.
+    Lines that name several packages (summaries) belong to all of them, and so do the lines printed before any package is named.
+    Package ids are matched case-insensitively, as whole words: "pkg" is named on "pkg-1.2.0" or "'pkg'", but not on "pkg-utils".
+    """
+    packageIds: list[str] = []
+    outputs: list[list[str]] = []
+    currentPackage: int = -1
+
+    def __init__(self, packageIds: list[str]):
+        self.packageIds = packageIds
+        self.outputs = [[] for _ in packageIds]
+        self.currentPackage = -1
+        self.packageIndexes: dict[str, list[int]] = {}
+        for index, packageId in enumerate(packageIds):
+            self.packageIndexes.setdefault(normalizeId(packageId), []).append(index)
+        longestFirst = sorted(self.packageIndexes, key=len, reverse=True)
+        self.pattern = re.compile(r"(?<![\w.\-])("+"|".join(re.escape(packageId) for packageId in longestFirst)+r")(?![\w]|\.\w|-[^\d\s])")
+
+    def addLine(self, line: str) -> list[int]:
+        """
+        Stores the line on the output of the packages it belongs to, and returns their indexes
+        """
+        namedPackages = sorted({index for match in self.pattern.finditer(normalizeId(line)) for index in self.packageIndexes[match.group(1)]})
+        if len(namedPackages) == 1:
+            self.currentPackage = namedPackages[0]
+        elif not namedPackages:
+            namedPackages = [self.currentPackage] if self.currentPackage >= 0 else list(range(len(self.packageIds)))
+        for index in namedPackages:
+            self.outputs[index].append(line)
+        return namedPackages
+
+    def namesPackage(self, index: int, line: str) -> bool:
+        return any(index in self.packageIndexes[match.group(1)] for match in self.pattern.finditer(normalizeId(line)))
+
+    def getLines(self, index: int) -> list[str]:
+        return self.outputs[index]
+
+    def getOutput(self, index: int) -> str:
+        return "".join(line+"\n" for line in self.outputs[index])
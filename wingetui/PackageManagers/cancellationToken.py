@@ -0,0 +1,57 @@
+from threading import Event, Lock
+from typing import Callable
+
+
+class CancellationToken():
+    """
+    Cancels an operation cooperatively: the code doing the work checks isCancelled() at the points where it can stop,
+    and whatever can't check it (a child process, a job waiting on the installation queue) registers a callback that cancels it.
+    Cancelling is thread-safe and only happens once. A callback registered after the token has been cancelled is called right away.
+    """
+    cancelled: bool = False
+    callbacks: list[Callable[[], None]] = []
+
+    def __init__(self):
+        self.cancelled = False
+        self.callbacks = []
+        self.event = Event()
+        self.lock = Lock()
+
+    def cancel(self) -> None:
+        with self.lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            callbacks = self.callbacks
+            self.callbacks = []
+        self.event.set()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"🟠 Cancellation callback {callback} failed: {type(e).__name__}: {e}")
+
+    def isCancelled(self) -> bool:
+        return self.cancelled
+
+    def register(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Calls the callback (from the thread that cancels the token) once the token gets cancelled. Returns a function that unregisters it
+        """
+        with self.lock:
+            if not self.cancelled:
+                self.callbacks.append(callback)
+                return lambda: self.unregister(callback)
+        callback()
+        return lambda: None
+
+    def unregister(self, callback: Callable[[], None]) -> None:
+        with self.lock:
+            if callback in self.callbacks:
+                self.callbacks.remove(callback)
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Blocks until the token gets cancelled, and returns False if the timeout expired first. Use it instead of time.sleep on cancellable waits
+        """
+        return self.event.wait(timeout)
@@ -4,6 +4,11 @@ from tools import *
 from tools import _
 from .PackageClasses import *
 from .sampleHelper import *
+from .packageCache import PackageCacheWriter, PackageCatalog, LazyPackageList
+from .processRunner import Runner, RunningCommand
+from .refreshCoordinator import Refresher
+from .outputParsers import stripLines, parseChocoTable
+from .batchedUpdates import BatchOutputSplitter
 
 
 class ChocoPackageManager(SamplePackageManager):
@@ -32,6 +37,9 @@ class ChocoPackageManager(SamplePackageManager):
     Capabilities.SupportsCustomVersions = True
     Capabilities.SupportsCustomArchitectures = True
     Capabilities.SupportsCustomScopes = False
+    Capabilities.MaxParallelOperations = 1
+    Capabilities.ExclusiveResource = "WindowsInstaller" # MSI based installers can't run at the same time
+    Capabilities.SupportsBatchUpdates = True
     
     if not os.path.exists(CACHE_FILE_PATH):
         os.makedirs(CACHE_FILE_PATH)
@@ -43,77 +51,54 @@ class ChocoPackageManager(SamplePackageManager):
         f"""
         Will retieve the cached packages for the package manager {self.NAME} in the format of a list[Package] object.
         If the cache is empty, will forcefully cache the packages and return a valid list[Package] object.
-        Finally, it will start a background cacher thread.
+        Finally, it will start a background cacher thread, if the catalog was not refreshed recently.
         """
         print(f"🔵 Starting {self.NAME} search for available packages")
         try:
-            packages: list[Package] = []
-            if os.path.exists(self.CACHE_FILE):
-                f = open(self.CACHE_FILE, "r", encoding="utf-8", errors="ignore")
-                content = f.read()
-                f.close()
-                if content != "":
-                    print(f"🟢 Found valid, non-empty cache file for {self.NAME}!")
-                    for line in content.split("\n"):
-                        package = line.split(",")
-                        if len(package) >= 3 and not package[0] in self.BLACKLISTED_PACKAGE_NAMES and not package[1] in self.BLACKLISTED_PACKAGE_IDS and not package[2] in self.BLACKLISTED_PACKAGE_VERSIONS:
-                            packages.append(Package(formatPackageIdAsName(package[0]), package[1], package[2], self.NAME, Choco))
-                    Thread(target=self.cacheAvailablePackages, daemon=True, name=f"{self.NAME} package cacher thread").start()
-                    print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
-                    return packages
-                else:
-                    print(f"🟠 {self.NAME} cache file exists but is empty!")
-                    if second_attempt:
-                        print(f"🔴 Could not load {self.NAME} packages, returning an empty list!")
-                        return []
-                    self.cacheAvailablePackages()
-                    return self.getAvailablePackages(second_attempt = True)
+            catalog = PackageCatalog(self.CACHE_FILE)
+            if len(catalog) > 0:
+                print(f"🟢 Found valid, non-empty cache file for {self.NAME}!")
+                packages: list[Package] = LazyPackageList(catalog, lambda fields: Package(fields[0], fields[1], fields[2], self.NAME, Choco))
+                Refresher.refresh(self.NAME, self.cacheAvailablePackages)
+                print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
+                return packages
+            elif os.path.exists(self.CACHE_FILE):
+                print(f"🟠 {self.NAME} cache file exists but is empty!")
+                if second_attempt:
+                    print(f"🔴 Could not load {self.NAME} packages, returning an empty list!")
+                    return []
+                Refresher.refresh(self.NAME, self.cacheAvailablePackages, force=True).wait()
+                return self.getAvailablePackages(second_attempt = True)
             else:
                 print(f"🟡 {self.NAME} cache file does not exist, creating cache forcefully and returning new package list")
                 if second_attempt:
                     print(f"🔴 Could not load {self.NAME} packages, returning an empty list!")
                     return []
-                self.cacheAvailablePackages()
+                Refresher.refresh(self.NAME, self.cacheAvailablePackages, force=True).wait()
                 return self.getAvailablePackages(second_attempt = True)
         except Exception as e:
             report(e)
             return []
         
-    def cacheAvailablePackages(self) -> None:
+    def cacheAvailablePackages(self) -> bool:
         """
         INTERNAL METHOD
         Will load the available packages and write them into the cache file
         """
         print(f"🔵 Starting {self.NAME} package caching")
         try:
-            p = subprocess.Popen([self.EXECUTABLE, "search", "*"] , stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, env=os.environ.copy())
-            ContentsToCache = ""
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                if line:
-                    if len(line.split(" ")) >= 2:
-                        name = formatPackageIdAsName(line.split(" ")[0])
-                        id = line.split(" ")[0]
-                        version = line.split(" ")[1]
-                        
-                        if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
-                            ContentsToCache += f"{name},{id},{version}\n"
-            AlreadyCachedPackages = ""
-            try:
-                if os.path.exists(self.CACHE_FILE):
-                    f = open(self.CACHE_FILE, "r")
-                    AlreadyCachedPackages = f.read()
-                    f.close()
-            except Exception as e:
-                report(e)
-            for line in AlreadyCachedPackages.split("\n"):
-                if line.split(",")[0] not in ContentsToCache:
-                    ContentsToCache += line + "\n"
-            with open(self.CACHE_FILE, "w") as f:
-                f.write(ContentsToCache)
+            with PackageCacheWriter(self.CACHE_FILE) as cache, Runner.start([self.EXECUTABLE, "search", "*"], env=os.environ.copy(), timeout=900) as p:
+                for package in parseChocoTable(stripLines(p.getLines()), minColumns=2):
+                    name = formatPackageIdAsName(package[0])
+                    id = package[0]
+                    version = package[1]
+                    if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
+                        cache.addPackage(name, id, version)
             print(f"🟢 {self.NAME} packages cached successfuly")
+            return True
         except Exception as e:
             report(e)
+            return False
             
     def getAvailableUpdates(self) -> list[UpgradablePackage]:
         f"""
@@ -122,27 +107,18 @@ class ChocoPackageManager(SamplePackageManager):
         print(f"🔵 Starting {self.NAME} search for updates")
         try:
             packages: list[UpgradablePackage] = []
-            p = subprocess.Popen([self.EXECUTABLE, "outdated"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-            rawoutput = "\n\n---------"
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                rawoutput += "\n"+line
-                if line:
-                    
-                    if len(line.split("|")) >= 3:
-                        #Replace these lines with the parse mechanism
-                        name = formatPackageIdAsName(line.split("|")[0])
-                        id = line.split("|")[0]
-                        version = line.split("|")[1]
-                        newVersion = line.split("|")[2]
-                        source = self.NAME
-                    else:
-                        continue
-                    
-                    if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
-                        packages.append(UpgradablePackage(name, id, version, newVersion, source, Choco))
+            p = Runner.start([self.EXECUTABLE, "outdated"], cwd=os.getcwd(), env=os.environ.copy())
+            rawoutput: list[str] = ["\n---------"]
+            for package in parseChocoTable(stripLines(p.getLines(), rawoutput), minColumns=3, separator="|"):
+                name = formatPackageIdAsName(package[0])
+                id = package[0]
+                version = package[1]
+                newVersion = package[2]
+                source = self.NAME
+                if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    packages.append(UpgradablePackage(name, id, version, newVersion, source, Choco))
             print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
-            globals.PackageManagerOutput += rawoutput
+            globals.PackageManagerOutput += "\n" + "\n".join(rawoutput)
             return packages
         except Exception as e:
             report(e)
@@ -155,21 +131,17 @@ class ChocoPackageManager(SamplePackageManager):
         print(f"🔵 Starting {self.NAME} search for installed packages")
         try:
             packages: list[Package] = []
-            p = subprocess.Popen([self.EXECUTABLE, "list", "--local-only"] , stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-            rawoutput = "\n\n---------"
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                rawoutput += "\n"+line
-                if line:
-                    if len(line.split(" ")) >= 2:
-                        name = formatPackageIdAsName(line.split(" ")[0])
-                        id = line.split(" ")[0]
-                        version = line.split(" ")[1]
-                        source = self.NAME
-                        if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
-                            packages.append(Package(name, id, version, source, Choco))
+            p = Runner.start([self.EXECUTABLE, "list", "--local-only"], cwd=os.getcwd(), env=os.environ.copy())
+            rawoutput: list[str] = ["\n---------"]
+            for package in parseChocoTable(stripLines(p.getLines(), rawoutput), minColumns=2):
+                name = formatPackageIdAsName(package[0])
+                id = package[0]
+                version = package[1]
+                source = self.NAME
+                if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    packages.append(Package(name, id, version, source, Choco))
             print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
-            globals.PackageManagerOutput += rawoutput
+            globals.PackageManagerOutput += "\n" + "\n".join(rawoutput)
             return packages
         except Exception as e:
             report(e)
@@ -182,17 +154,12 @@ class ChocoPackageManager(SamplePackageManager):
         print(f"🔵 Starting get info for {package.Name} on {self.NAME}")
         details = PackageDetails(package)
         try:
-            p = subprocess.Popen([self.EXECUTABLE, "info", package.Id], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-            output: list[str] = []
+            result = Runner.run([self.EXECUTABLE, "info", package.Id], cwd=os.getcwd(), env=os.environ.copy(), timeout=120)
             details.ManifestUrl = f"https://community.chocolatey.org/packages/{package.Id}"
             details.Architectures = ["x86"]
             isReadingDescription = False
             isReadingReleaseNotes = False
-            while p.poll() is None:
-                line = p.stdout.readline()
-                if line:
-                    output.append(str(line, encoding='utf-8', errors="ignore"))
-            for line in output:
+            for line in result.Output:
                 if isReadingDescription:
                     if line.startswith("  "):
                         details.Description += "<br>"+line
@@ -245,15 +212,12 @@ class ChocoPackageManager(SamplePackageManager):
                 elif "Tags" in line:
                     details.Tags = [tag for tag in line.replace("Tags:", "").strip().split(" ") if tag != ""]
             details.Versions = []
-            p = subprocess.Popen([self.EXECUTABLE, "find", "-e", package.Id, "-a"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
             print(f"🟢 Starting get info for id {package.Id}")
-            output = []
-            while p.poll() is None:
-                line = p.stdout.readline().strip()
+            result = Runner.run([self.EXECUTABLE, "find", "-e", package.Id, "-a"], cwd=os.getcwd(), env=os.environ.copy(), timeout=120)
+            for line in result.Output:
+                line = line.strip()
                 if line:
-                    output.append(str(line, encoding='utf-8', errors="ignore"))
-            for line in output:
-                details.Versions.append(line.split(" ")[1])
+                    details.Versions.append(line.split(" ")[1])
             print(f"🟢 Get info finished for {package.Name} on {self.NAME}")
             return details
         except Exception as e:
@@ -280,37 +244,44 @@ class ChocoPackageManager(SamplePackageManager):
             Parameters += ["--version="+options.Version, "--allow-downgrade"]
         return Parameters
 
-    def startInstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> subprocess.Popen:
+    def startInstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> RunningCommand:
         Command = [self.EXECUTABLE, "install", package.Id, "-y"] + self.getParameters(options)
         if options.RunAsAdministrator:
             Command = [GSUDO_EXECUTABLE] + Command
         print(f"🔵 Starting {package} installation with Command", Command)
-        p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=GSUDO_EXE_LOCATION, env=os.environ.copy())
+        p = Runner.start(Command, cwd=GSUDO_EXE_LOCATION, env=os.environ.copy(), timeout=None, limited=False, token=widget.CancellationToken)
         Thread(target=self.installationThread, args=(p, options, widget,), name=f"{self.NAME} installation thread: installing {package.Name}").start()
         return p
         
-    def startUpdate(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> subprocess.Popen:
+    def startUpdate(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> RunningCommand:
         Command = [self.EXECUTABLE, "upgrade", package.Id, "-y"] + self.getParameters(options)
         if options.RunAsAdministrator:
             Command = [GSUDO_EXECUTABLE] + Command
         print(f"🔵 Starting {package} update with Command", Command)
-        p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=GSUDO_EXE_LOCATION, env=os.environ.copy())
+        p = Runner.start(Command, cwd=GSUDO_EXE_LOCATION, env=os.environ.copy(), timeout=None, limited=False, token=widget.CancellationToken)
         Thread(target=self.installationThread, args=(p, options, widget,), name=f"{self.NAME} installation thread: updating {package.Name}").start()
         return p
 
-    def installationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: InstallationWidgetType):
+    def startBatchUpdate(self, packages: list[Package], options: InstallationOptions, widgets: list[InstallationWidgetType]) -> RunningCommand:
+        Command = [self.EXECUTABLE, "upgrade"] + [package.Id for package in packages] + ["-y"] + self.getParameters(options)
+        if options.RunAsAdministrator:
+            Command = [GSUDO_EXECUTABLE] + Command
+        print(f"🔵 Starting batched update of {len(packages)} packages with Command", Command)
+        p = Runner.start(Command, cwd=GSUDO_EXE_LOCATION, env=os.environ.copy(), timeout=None, limited=False)
+        Thread(target=self.batchUpdateThread, args=(p, packages, options, widgets,), name=f"{self.NAME} installation thread: batched update of {len(packages)} packages").start()
+        return p
+
+    def installationThread(self, p: RunningCommand, options: InstallationOptions, widget: InstallationWidgetType):
         output = ""
         counter = 0
-        p.stdin = b"\r\n"
-        while p.poll() is None:
-            line = str(p.stdout.readline(), encoding='utf-8', errors="ignore").strip()
+        for line in p.getLines():
+            line = line.strip()
             if line:
                 widget.addInfoLine.emit(line)
                 counter += 1
                 widget.counterSignal.emit(counter)
                 output += line+"\n"
-        p.wait()
-        outputCode = p.returncode
+        outputCode = p.wait().ReturnCode
         if outputCode in (1641, 3010):
             outputCode = RETURNCODE_OPERATION_SUCCEEDED
         elif outputCode == 3010:
@@ -319,31 +290,49 @@ class ChocoPackageManager(SamplePackageManager):
             outputCode = RETURNCODE_NEEDS_ELEVATION
         widget.finishInstallation.emit(outputCode, output)
 
-    def startUninstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> subprocess.Popen:
+    def batchUpdateThread(self, p: RunningCommand, packages: list[Package], options: InstallationOptions, widgets: list[InstallationWidgetType]):
+        splitter = BatchOutputSplitter([package.Id for package in packages])
+        counters = [0 for package in packages]
+        for line in p.getLines():
+            line = line.strip()
+            if line:
+                for index in splitter.addLine(line):
+                    widgets[index].addInfoLine.emit(line)
+                    counters[index] += 1
+                    widgets[index].counterSignal.emit(counters[index])
+        returnCode = p.wait().ReturnCode
+        for index, widget in enumerate(widgets):
+            output = splitter.getOutput(index)
+            packageId = packages[index].Id.lower()
+            if returnCode in (0, 1641, 3010) or f"the upgrade of {packageId} was successful" in output.lower():
+                outputCode = RETURNCODE_OPERATION_SUCCEEDED # The exit code is the one of the worst package, so the ones that got upgraded are looked up on the output
+            elif "Run as administrator" in output or "The requested operation requires elevation" in output or 'ERROR: Exception calling "CreateDirectory" with "1" argument(s): "Access to the path' in output:
+                outputCode = RETURNCODE_NEEDS_ELEVATION
+            else:
+                outputCode = returnCode
+            widget.finishInstallation.emit(outputCode, output)
+
+    def startUninstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> RunningCommand:
         Command = [self.EXECUTABLE, "uninstall", package.Id, "-y"] + self.getParameters(options)
         if options.RunAsAdministrator:
             Command = [GSUDO_EXECUTABLE] + Command
         print(f"🔵 Starting {package} uninstall with Command", Command)
-        p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=GSUDO_EXE_LOCATION, env=os.environ.copy())
+        p = Runner.start(Command, cwd=GSUDO_EXE_LOCATION, env=os.environ.copy(), timeout=None, limited=False, token=widget.CancellationToken)
         Thread(target=self.uninstallationThread, args=(p, options, widget,), name=f"{self.NAME} installation thread: uninstalling {package.Name}").start()
         return p
 
-    def uninstallationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: InstallationWidgetType):
+    def uninstallationThread(self, p: RunningCommand, options: InstallationOptions, widget: InstallationWidgetType):
         outputCode = RETURNCODE_OPERATION_SUCCEEDED
         counter = 0
         output = ""
-        p.stdin = b"\r\n"
-        while p.poll() is None:
-            line = p.stdout.readline()
+        for line in p.getLines():
             line = line.strip()
-            line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
                 widget.addInfoLine.emit(line)
                 counter += 1
                 widget.counterSignal.emit(counter)
                 output += line+"\n"
-        p.wait()
-        outputCode = p.returncode
+        outputCode = p.wait().ReturnCode
         if outputCode in (1605, 1614, 1641):
             outputCode = RETURNCODE_OPERATION_SUCCEEDED
         elif outputCode == 3010:
@@ -353,9 +342,9 @@ class ChocoPackageManager(SamplePackageManager):
         widget.finishInstallation.emit(outputCode, output)
         
     def detectManager(self, signal: Signal = None) -> None:
-        o = subprocess.run(f"{self.EXECUTABLE} -v", shell=True, stdout=subprocess.PIPE)
+        o = Runner.run(f"{self.EXECUTABLE} -v", mergeStderr=False, timeout=60)
         globals.componentStatus[f"{self.NAME}Found"] = shutil.which(self.EXECUTABLE) != None
-        globals.componentStatus[f"{self.NAME}Version"] = o.stdout.decode('utf-8').replace("\n", "")
+        globals.componentStatus[f"{self.NAME}Version"] = "".join(o.Output)
         if signal:
             signal.emit()
         
@@ -4,6 +4,9 @@ from tools import *
 from tools import _
 from .PackageClasses import *
 from .sampleHelper import *
+from .processRunner import Runner, RunningCommand
+from .outputParsers import stripLines, parseSplitTable, parseNpmTree
+from .batchedUpdates import BatchOutputSplitter
     
     
 class NPMPackageManager(DynamicLoadPackageManager):
@@ -28,6 +31,8 @@ class NPMPackageManager(DynamicLoadPackageManager):
     Capabilities.SupportsCustomVersions = True
     Capabilities.SupportsCustomArchitectures = False
     Capabilities.SupportsCustomScopes = True
+    Capabilities.MaxParallelOperations = 1
+    Capabilities.SupportsBatchUpdates = True
     
     icon = None
 
@@ -37,30 +42,25 @@ class NPMPackageManager(DynamicLoadPackageManager):
     def isEnabled(self) -> bool:
         return not getSettings(f"Disable{self.NAME}")
 
-    def getPackagesForQuery(self, query: str) -> list[Package]:
+    @cachedQuery
+    def getPackagesForQuery(self, query: str, search: QuerySearch = None) -> list[Package]:
         f"""
         Will retieve the packages for the given "query: str" from the package manager {self.NAME} in the format of a list[Package] object.
+        The commands started are attached to "search: QuerySearch", if given, so they get killed when the search is superseded.
         """
         print(f"🔵 Starting {self.NAME} search for dynamic packages")
         try:
             packages: list[Package] = []
-            p = subprocess.Popen(f"{self.EXECUTABLE} search {query}", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.path.expanduser("~"), env=os.environ.copy(), shell=True)
-            DashesPassed = False
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                if line:
-                    if not DashesPassed:
-                        if "NAME" in line:
-                            DashesPassed = True
-                    else:
-                        package = list(filter(None, line.split("|")))
-                        if len(package) >= 4:
-                            name = formatPackageIdAsName(package[0][1:] if package[0][0] == "@" else package[0]).strip()
-                            id = package[0].strip()
-                            version = package[4].strip()
-                            source = self.NAME
-                            if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(Package(name, id, version, source, Npm))
+            p = Runner.start(f"{self.EXECUTABLE} search {query}", cwd=os.path.expanduser("~"), env=os.environ.copy())
+            if search:
+                search.attach(p)
+            for package in parseSplitTable(stripLines(p.getLines()), minColumns=5, headerMarker="NAME", separator="|"):
+                name = formatPackageIdAsName(package[0][1:] if package[0][0] == "@" else package[0]).strip()
+                id = package[0].strip()
+                version = package[4].strip()
+                source = self.NAME
+                if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    packages.append(Package(name, id, version, source, Npm))
             print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
             return packages
         except Exception as e:
@@ -74,27 +74,17 @@ class NPMPackageManager(DynamicLoadPackageManager):
         print(f"🔵 Starting {self.NAME} search for updates")
         try:
             packages: list[UpgradablePackage] = []
-            p = subprocess.Popen(f"{self.EXECUTABLE} outdated", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.path.expanduser("~"), env=os.environ.copy(), shell=True)
-            DashesPassed = False
-            rawoutput = "\n\n---------"
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                rawoutput += "\n"+line
-                if line:
-                    if not DashesPassed:
-                        if "Package" in line:
-                            DashesPassed = True
-                    else:
-                        package = list(filter(None, line.split(" ")))
-                        if len(package) >= 4:
-                            name = formatPackageIdAsName(package[0][1:] if package[0][0] == "@" else package[0]).strip()
-                            id = package[0].strip()
-                            version = package[1].strip()
-                            newVersion = package[3].strip()
-                            source = self.NAME
-                            if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS and not newVersion in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(UpgradablePackage(name, id, version, newVersion, source, Npm))
-            globals.PackageManagerOutput += rawoutput
+            p = Runner.start(f"{self.EXECUTABLE} outdated", cwd=os.path.expanduser("~"), env=os.environ.copy())
+            rawoutput: list[str] = ["\n---------"]
+            for package in parseSplitTable(stripLines(p.getLines(), rawoutput), minColumns=4, headerMarker="Package"):
+                name = formatPackageIdAsName(package[0][1:] if package[0][0] == "@" else package[0]).strip()
+                id = package[0].strip()
+                version = package[1].strip()
+                newVersion = package[3].strip()
+                source = self.NAME
+                if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS and not newVersion in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    packages.append(UpgradablePackage(name, id, version, newVersion, source, Npm))
+            globals.PackageManagerOutput += "\n" + "\n".join(rawoutput)
             print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
             return packages
         except Exception as e:
@@ -108,45 +98,21 @@ class NPMPackageManager(DynamicLoadPackageManager):
         print(f"🔵 Starting {self.NAME} search for installed packages")
         try:
             packages: list[Package] = []
-            p = subprocess.Popen(f"{self.EXECUTABLE} list", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.path.expanduser("~"), env=os.environ.copy(), shell=True)
-            currentScope = ""
-            rawoutput = "\n\n---------"
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                rawoutput += "\n"+line
-                if line and len(line) > 4:
-                    if line[1:3] in ("--", "──"):
-                        line = line[3:]
-                        package = line.split("@")
-                        if len(package) >= 2:
-                            idString = '@'.join(package[:-1]).strip()
-                            name = formatPackageIdAsName(idString[1:] if idString[0] == "@" else idString).strip()
-                            id = idString.strip()
-                            version = package[-1].strip()
-                            if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(Package(name, id, version, self.NAME+currentScope, Npm))
-                    elif "@" in line.split(" ")[0]:
-                        currentScope = "@"+line.split(" ")[0][:-1]
-                        print("🔵 NPM changed scope to", currentScope)
-            globals.PackageManagerOutput += rawoutput
-            p = subprocess.Popen(f"{self.EXECUTABLE} list -g", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.path.expanduser("~"), env=os.environ.copy(), shell=True)
-            rawoutput = "\n\n---------"
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                rawoutput += "\n"+line
-                if line and len(line) > 4:
-                    if line[1:3] in ("--", "──"):
-                        line = line[3:]
-                        package = line.split("@")
-                        if len(package) >= 2:
-                            idString = '@'.join(package[:-1]).strip()
-                            name = formatPackageIdAsName(idString[1:] if idString[0] == "@" else idString)
-                            id = idString
-                            version = package[-1].strip()
-                            if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(Package(name, id, version, self.NAME+"@global", Npm))
+            p = Runner.start(f"{self.EXECUTABLE} list", cwd=os.path.expanduser("~"), env=os.environ.copy())
+            rawoutput: list[str] = ["\n---------"]
+            for id, version, currentScope in parseNpmTree(stripLines(p.getLines(), rawoutput)):
+                name = formatPackageIdAsName(id[1:] if id[0] == "@" else id).strip()
+                if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    packages.append(Package(name, id, version, self.NAME+currentScope, Npm))
+            globals.PackageManagerOutput += "\n" + "\n".join(rawoutput)
+            p = Runner.start(f"{self.EXECUTABLE} list -g", cwd=os.path.expanduser("~"), env=os.environ.copy())
+            rawoutput = ["\n---------"]
+            for id, version, _scope in parseNpmTree(stripLines(p.getLines(), rawoutput)):
+                name = formatPackageIdAsName(id[1:] if id[0] == "@" else id)
+                if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    packages.append(Package(name, id, version, self.NAME+"@global", Npm))
             print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
-            globals.PackageManagerOutput += rawoutput
+            globals.PackageManagerOutput += "\n" + "\n".join(rawoutput)
             return packages
         except Exception as e:
             report(e)
@@ -163,12 +129,8 @@ class NPMPackageManager(DynamicLoadPackageManager):
             details.ManifestUrl = f"https://www.npmjs.com/package/{package.Id}"
             details.ReleaseNotesUrl = f"https://www.npmjs.com/package/{package.Id}?activeTab=versions"
             details.Scopes = ["Global"]       
-            p = subprocess.Popen(f"{self.EXECUTABLE} info {package.Id}", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.path.expanduser("~"), env=os.environ, shell=True)
-            output: list[str] = []
-            while p.poll() is None:
-                line = p.stdout.readline()
-                if line:
-                    output.append(str(line, encoding='utf-8', errors="ignore").strip())
+            result = Runner.run(f"{self.EXECUTABLE} info {package.Id}", cwd=os.path.expanduser("~"), env=os.environ, timeout=120)
+            output: list[str] = [line.strip() for line in result.Output]
             lineNo = 0
             ReadingMaintainer = False
             for line in output:
@@ -195,10 +157,9 @@ class NPMPackageManager(DynamicLoadPackageManager):
                 elif line.startswith("published"):
                     details.Publisher = line.split("by")[-1].split("<")[0].strip()
                     details.UpdateDate = line.split("by")[0].replace("published", "").strip()
-            p = subprocess.Popen(f"{self.EXECUTABLE} info {package.Id} versions --json", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.path.expanduser("~"), env=os.environ, shell=True)
-            output: list[str] = []
-            while p.poll() is None:
-                line = str(p.stdout.readline(), encoding='utf-8', errors="ignore").strip()
+            p = Runner.start(f"{self.EXECUTABLE} info {package.Id} versions --json", cwd=os.path.expanduser("~"), env=os.environ, timeout=120)
+            for line in p.getLines():
+                line = line.strip()
                 if line.startswith("\""):
                     details.Versions = [line[:-1].replace("\"", "")] + details.Versions # The addition order is inverted, so the latest version shows at the top
             print(f"🟢 Get info finished for {package.Name} on {self.NAME}")
@@ -222,38 +183,62 @@ class NPMPackageManager(DynamicLoadPackageManager):
         Parameters += []
         return Parameters
 
-    def startInstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> subprocess.Popen:
+    def startInstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> RunningCommand:
         if "@global" in package.Source:
             options.InstallationScope = "Global"
         Command = ["cmd.exe", "/C", self.EXECUTABLE, "install", package.Id+("@latest" if options.Version == "" else f"@{options.Version}")] + self.getParameters(options)
         if options.RunAsAdministrator:
             Command = [GSUDO_EXECUTABLE] + Command
         print(f"🔵 Starting {package} installation with Command", Command)
-        p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=os.path.expanduser("~"), env=os.environ)
+        p = Runner.start(Command, cwd=os.path.expanduser("~"), env=os.environ, timeout=None, limited=False, token=widget.CancellationToken)
         Thread(target=self.installationThread, args=(p, options, widget,), name=f"{self.NAME} installation thread: installing {package.Name}").start()
         return p
 
-    def startUpdate(self, package: UpgradablePackage, options: InstallationOptions, widget: InstallationWidgetType) -> subprocess.Popen:
+    def startUpdate(self, package: UpgradablePackage, options: InstallationOptions, widget: InstallationWidgetType) -> RunningCommand:
         if "@global" in package.Source:
             options.InstallationScope = "Global"
         Command = ["cmd.exe", "/C", self.EXECUTABLE, "install", package.Id+"@"+package.NewVersion] + self.getParameters(options)
         if options.RunAsAdministrator:
             Command = [GSUDO_EXECUTABLE] + Command
         print(f"🔵 Starting {package} update with Command", Command)
-        p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=os.path.expanduser("~"), env=os.environ)
+        p = Runner.start(Command, cwd=os.path.expanduser("~"), env=os.environ, timeout=None, limited=False, token=widget.CancellationToken)
         Thread(target=self.installationThread, args=(p, options, widget,), name=f"{self.NAME} installation thread: update {package.Name}").start()
         return p
         
-    def installationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: InstallationWidgetType):
+    def startBatchUpdate(self, packages: list[UpgradablePackage], options: InstallationOptions, widgets: list[InstallationWidgetType]) -> RunningCommand:
+        if "@global" in packages[0].Source:
+            options.InstallationScope = "Global"
+        Command = ["cmd.exe", "/C", self.EXECUTABLE, "install"] + [package.Id+"@"+package.NewVersion for package in packages] + self.getParameters(options)
+        if options.RunAsAdministrator:
+            Command = [GSUDO_EXECUTABLE] + Command
+        print(f"🔵 Starting batched update of {len(packages)} packages with Command", Command)
+        p = Runner.start(Command, cwd=os.path.expanduser("~"), env=os.environ, timeout=None, limited=False)
+        Thread(target=self.batchUpdateThread, args=(p, packages, options, widgets,), name=f"{self.NAME} installation thread: batched update of {len(packages)} packages").start()
+        return p
+
+    def batchUpdateThread(self, p: RunningCommand, packages: list[UpgradablePackage], options: InstallationOptions, widgets: list[InstallationWidgetType]):
+        splitter = BatchOutputSplitter([package.Id for package in packages])
+        for line in p.getLines():
+            line = line.strip()
+            if line:
+                for index in splitter.addLine(line):
+                    widgets[index].addInfoLine.emit(line)
+        match p.wait().ReturnCode:
+            case 0:
+                outputCode = RETURNCODE_OPERATION_SUCCEEDED
+            case other:
+                outputCode = RETURNCODE_BATCH_FAILED # npm installs all the packages or none of them, so a single failing package takes down the whole batch. Every package is retried on its own
+        for index, widget in enumerate(widgets):
+            widget.finishInstallation.emit(outputCode, splitter.getOutput(index))
+        
+    def installationThread(self, p: RunningCommand, options: InstallationOptions, widget: InstallationWidgetType):
         output = ""
-        while p.poll() is None:
-            line = p.stdout.readline()
+        for line in p.getLines():
             line = line.strip()
-            line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
                 widget.addInfoLine.emit(line)
                 output += line+"\n"
-        match p.returncode:
+        match p.wait().ReturnCode:
             case 0:
                 outputCode = RETURNCODE_OPERATION_SUCCEEDED
             case other:
@@ -261,28 +246,26 @@ class NPMPackageManager(DynamicLoadPackageManager):
                 
         widget.finishInstallation.emit(outputCode, output)
         
-    def startUninstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> subprocess.Popen:
+    def startUninstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> RunningCommand:
         if "@global" in package.Source:
             options.InstallationScope = "Global"
         Command = [self.EXECUTABLE, "uninstall", ] + self.getParameters(options)
         if options.RunAsAdministrator:
             Command = [GSUDO_EXECUTABLE] + Command
         print(f"🔵 Starting {package} uninstall with Command", Command)
-        p = subprocess.Popen(" ".join(Command), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=os.path.expanduser("~"), env=os.environ)
+        p = Runner.start(" ".join(Command), cwd=os.path.expanduser("~"), env=os.environ, timeout=None, limited=False, token=widget.CancellationToken)
         Thread(target=self.uninstallationThread, args=(p, options, widget,), name=f"{self.NAME} installation thread: uninstall {package.Name}").start()
         return p
         
-    def uninstallationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: InstallationWidgetType):
+    def uninstallationThread(self, p: RunningCommand, options: InstallationOptions, widget: InstallationWidgetType):
         outputCode = 1
         output = ""
-        while p.poll() is None:
-            line = p.stdout.readline()
+        for line in p.getLines():
             line = line.strip()
-            line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
                 widget.addInfoLine.emit(line)
                 output += line+"\n"
-        match p.returncode:
+        match p.wait().ReturnCode:
             case 0:
                 outputCode = RETURNCODE_OPERATION_SUCCEEDED
             case other:
@@ -290,9 +273,9 @@ class NPMPackageManager(DynamicLoadPackageManager):
         widget.finishInstallation.emit(outputCode, output)
 
     def detectManager(self, signal: Signal = None) -> None:
-        o = subprocess.run(f"{self.EXECUTABLE} --version", shell=True, stdout=subprocess.PIPE)
+        o = Runner.run(f"{self.EXECUTABLE} --version", mergeStderr=False, timeout=60)
         globals.componentStatus[f"{self.NAME}Found"] = shutil.which("npm") != None
-        globals.componentStatus[f"{self.NAME}Version"] = o.stdout.decode('utf-8').split("\n")[0]
+        globals.componentStatus[f"{self.NAME}Version"] = o.Output[0] if o.Output else ""
         if signal:
             signal.emit()
         
@@ -0,0 +1,176 @@
+from typing import Iterable, Iterator
+from .tableParser import ColumnTableParser
+
+# Parsers for the output of the package manager commands. They take the output lines (as yielded by RunningCommand.getLines())
+# and yield plain tuples, so they can be run (and benchmarked) on any platform, without the managers or Qt.
+
+
+def stripLines(lines: Iterable[str], output: list[str] = None) -> Iterator[str]:
+    """
+    Yields the stripped lines, appending them to output (if given) so the raw output can be logged afterwards
+    """
+    for line in lines:
+        line = line.strip()
+        if output is not None:
+            output.append(line)
+        yield line
+
+
+def parseWingetSearch(lines: Iterable[str]) -> Iterator[tuple[str, str, str]]:
+    """
+    winget search: yields (name, id, version)
+    """
+    parser = ColumnTableParser(versionColumns=(2,))
+    for line in lines:
+        row = parser.parseLine(line)
+        if row and len(row) >= 3:
+            yield row[0], row[1], row[2]
+
+
+def parseWingetUpdates(lines: Iterable[str]) -> Iterator[tuple[str, str, str, str, str]]:
+    """
+    winget upgrade: yields (name, id, version, newVersion, source). The source falls back to the whole line when the table has no source column
+    """
+    parser = ColumnTableParser(versionColumns=(2, 3))
+    for line in lines:
+        row = parser.parseLine(line)
+        if row and len(row) >= 4:
+            yield row[0], row[1], row[2], row[3], (row[-1] if len(row) >= 5 else line)
+
+
+def parseWingetInstalled(lines: Iterable[str]) -> Iterator[tuple[str, str, str]]:
+    """
+    winget list: yields (name, id, version)
+    """
+    parser = ColumnTableParser(versionColumns=(2, 3))
+    for line in lines:
+        row = parser.parseLine(line)
+        if row and len(row) >= 3:
+            yield row[0].replace("2010  x", "2010 x"), row[1], row[2] # Fix an issue with MSVC++ 2010, where it shows with a double space (see https://github.com/marticliment/WingetUI#450)
+
+
+def parseWingetDetails(lines: Iterable[str], details) -> int:
+    """
+    winget show: fills the given PackageDetails (any object with the same attributes) and returns the amount of information pieces loaded.
+    The installer size is not loaded here, since it requires a network request.
+    """
+    loadedInformationPieces = 0
+    outputIsDescribing = False
+    outputIsShowingNotes = False
+    outputIsShowingTags = False
+    for line in lines:
+        if line[:1] == " " and outputIsDescribing:
+            details.Description += "<br>"+line
+        else:
+            outputIsDescribing = False
+        if line[:1] == " " and outputIsShowingNotes:
+            details.ReleaseNotes += line + "<br>"
+        else:
+            outputIsShowingNotes = False
+        if line[:1] == " " and outputIsShowingTags:
+            details.Tags.append(line.strip())
+        else:
+            outputIsShowingTags = False
+        if "Publisher:" in line:
+            details.Publisher = line.replace("Publisher:", "").strip()
+            loadedInformationPieces += 1
+        elif "Description:" in line:
+            details.Description = line.replace("Description:", "").strip()
+            outputIsDescribing = True
+            loadedInformationPieces += 1
+        elif "Author:" in line:
+            details.Author = line.replace("Author:", "").strip()
+            loadedInformationPieces += 1
+        elif "Homepage:" in line:
+            details.HomepageURL = line.replace("Homepage:", "").strip()
+            loadedInformationPieces += 1
+        elif "License:" in line:
+            details.License = line.replace("License:", "").strip()
+            loadedInformationPieces += 1
+        elif "License Url:" in line:
+            details.LicenseURL = line.replace("License Url:", "").strip()
+            loadedInformationPieces += 1
+        elif "Installer SHA256:" in line:
+            details.InstallerHash = line.replace("Installer SHA256:", "").strip()
+            loadedInformationPieces += 1
+        elif "Installer Url:" in line:
+            details.InstallerURL = line.replace("Installer Url:", "").strip()
+            loadedInformationPieces += 1
+        elif "Release Date:" in line:
+            details.UpdateDate = line.replace("Release Date:", "").strip()
+            loadedInformationPieces += 1
+        elif "Release Notes Url:" in line:
+            details.ReleaseNotesUrl = line.replace("Release Notes Url:", "").strip()
+            loadedInformationPieces += 1
+        elif "Release Notes:" in line:
+            details.ReleaseNotes = ""
+            outputIsShowingNotes = True
+            loadedInformationPieces += 1
+        elif "Tags:" in line:
+            details.Tags = []
+            outputIsShowingTags = True
+            loadedInformationPieces += 1
+        elif "Installer Type:" in line:
+            details.InstallerType = line.replace("Installer Type:", "").strip()
+    return loadedInformationPieces
+
+
+def parseSplitTable(lines: Iterable[str], minColumns: int, headerMarker: str = "----", separator: str = " ") -> Iterator[list[str]]:
+    """
+    Tables printed by scoop, pip and npm: skips everything up to the line containing headerMarker (included),
+    and then yields the non-empty fields of every line split by separator, if there are at least minColumns of them.
+    """
+    headerPassed = False
+    for line in lines:
+        if line:
+            if not headerPassed:
+                if headerMarker in line:
+                    headerPassed = True
+            else:
+                row = [field for field in line.split(separator) if field]
+                if len(row) >= minColumns:
+                    yield row
+
+
+def parseScoopInstalled(lines: Iterable[str]) -> Iterator[tuple[str, str, str, bool]]:
+    """
+    scoop list: yields (id, version, bucket, isGlobal)
+    """
+    headerPassed = False
+    for line in lines:
+        if line:
+            if not headerPassed:
+                if "----" in line:
+                    headerPassed = True
+            else:
+                row = [field for field in line.split(" ") if field]
+                if len(row) >= 3:
+                    yield row[0], row[1], row[2].strip(), "Global" in line
+
+
+def parseChocoTable(lines: Iterable[str], minColumns: int, separator: str = " ") -> Iterator[list[str]]:
+    """
+    choco search, list and outdated: choco prints no header, so every non-empty line with at least minColumns fields is yielded.
+    The junk lines are filtered afterwards by the Chocolatey blacklists.
+    """
+    for line in lines:
+        if line:
+            row = line.split(separator)
+            if len(row) >= minColumns:
+                yield row
+
+
+def parseNpmTree(lines: Iterable[str]) -> Iterator[tuple[str, str, str]]:
+    """
+    npm list: yields (id, version, scope) for every package in the dependency tree. The scope is empty for the packages out of any scope
+    """
+    currentScope = ""
+    for line in lines:
+        if line and len(line) > 4:
+            if line[1:3] in ("--", "──"):
+                package = line[3:].split("@")
+                if len(package) >= 2:
+                    yield '@'.join(package[:-1]).strip(), package[-1].strip(), currentScope
+            elif "@" in line.split(" ")[0]:
+                currentScope = "@"+line.split(" ")[0][:-1]
+                print("🔵 NPM changed scope to", currentScope)
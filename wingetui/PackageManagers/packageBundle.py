@@ -0,0 +1,132 @@
+from datetime import datetime
+
+# Bundle format (version 2): the legacy sections ("winget" with a winget export schema, and "scoop", "chocolatey", "pip", "npm" with a
+# list of apps) are still written, so older versions can import the bundle, plus a "packages" list with everything needed to install
+# every package without looking it up first:
+#   {"Id": ..., "Name": ..., "Version": ..., "Source": ..., "PackageManager": ..., "InstallationOptions": {...}}
+
+BUNDLE_VERSION = 2
+LEGACY_SECTIONS = ("winget", "scoop", "chocolatey", "pip", "npm")
+OPTION_FIELDS = ("SkipHashCheck", "InteractiveInstallation", "RunAsAdministrator", "Version", "Architecture", "InstallationScope", "CustomParameters")
+WINGET_SOURCE_DETAILS = {
+    "Argument": "https://cdn.winget.microsoft.com/cache",
+    "Identifier" : "Microsoft.Winget.Source_8wekyb3d8bbwe",
+    "Name": "winget",
+    "Type" : "Microsoft.PreIndexed.Package"
+}
+
+
+class BundleEntry():
+    """
+    A package of a bundle. Entries of a version 2 bundle are resolved: they carry the package manager, source, version and
+    installation options of the package. Entries read from a legacy bundle only have the id and the section they were listed on.
+    """
+    Id: str = ""
+    Name: str = ""
+    Version: str = ""
+    Source: str = ""
+    ManagerName: str = ""
+    Options: dict[str, object] = {}
+    Section: str = ""
+
+    def __init__(self, id: str, name: str = "", version: str = "", source: str = "", managerName: str = "", options: dict[str, object] = None, section: str = ""):
+        self.Id = id
+        self.Name = name if name else id
+        self.Version = version
+        self.Source = source
+        self.ManagerName = managerName
+        self.Options = options if options else {}
+        self.Section = section if section else getLegacySection(source)
+
+    def isResolved(self) -> bool:
+        return self.ManagerName != ""
+
+    def __str__(self) -> str:
+        return f"<BundleEntry: {self.Id} ({self.ManagerName if self.isResolved() else 'unresolved'}, {self.Section})>"
+
+
+def getLegacySection(source: str) -> str:
+    """
+    Returns the legacy bundle section of the packages of the given source, or an empty string if the source can't be exported
+    """
+    source = source.lower()
+    for section, sourceName in (("winget", "winget"), ("scoop", "scoop"), ("chocolatey", "chocolatey"), ("npm", "npm"), ("pip", "pip")):
+        if sourceName in source:
+            return section
+    return ""
+
+
+def getOptionValues(options: object) -> dict[str, object]:
+    """
+    Returns the fields of an InstallationOptions object that are saved on the bundle
+    """
+    return {field: getattr(options, field) for field in OPTION_FIELDS}
+
+
+def setOptionValues(options: object, values: dict[str, object]) -> object:
+    """
+    Applies the fields saved on a bundle to an InstallationOptions object (unknown fields are ignored) and returns it
+    """
+    for field in OPTION_FIELDS:
+        if field in values:
+            setattr(options, field, values[field])
+    return options
+
+
+def createBundle(entries: list[BundleEntry], wingetVersion: str = "1.4") -> dict:
+    legacyPackages: dict[str, list[dict]] = {section: [] for section in LEGACY_SECTIONS}
+    packages: list[dict] = []
+    for entry in entries:
+        if entry.Section == "winget":
+            legacyPackages["winget"].append({"PackageIdentifier": entry.Id.strip()})
+        elif entry.Section in legacyPackages:
+            legacyPackages[entry.Section].append({"Name": entry.Id})
+        packages.append({
+            "Id": entry.Id,
+            "Name": entry.Name,
+            "Version": entry.Version,
+            "Source": entry.Source,
+            "PackageManager": entry.ManagerName,
+            "InstallationOptions": entry.Options,
+        })
+    bundle = {
+        "export_version": BUNDLE_VERSION,
+        "winget": {
+            "$schema" : "https://aka.ms/winget-packages.schema.2.0.json",
+            "CreationDate" : str(datetime.now()),
+            "Sources": [{
+                "Packages": legacyPackages["winget"],
+                "SourceDetails": WINGET_SOURCE_DETAILS}],
+            "WinGetVersion" : wingetVersion
+        },
+    }
+    for section in LEGACY_SECTIONS[1:]:
+        bundle[section] = {"apps": legacyPackages[section]}
+    bundle["packages"] = packages
+    return bundle
+
+
+def readBundle(contents: dict) -> list[BundleEntry]:
+    """
+    Returns the packages of a bundle. The resolved package list is used when present, otherwise the legacy sections are read
+    """
+    entries: list[BundleEntry] = []
+    if contents.get("export_version", 1) >= 2 and type(contents.get("packages")) == list:
+        for package in contents["packages"]:
+            try:
+                entries.append(BundleEntry(package["Id"], package.get("Name", ""), package.get("Version", ""), package.get("Source", ""), package.get("PackageManager", ""), package.get("InstallationOptions")))
+            except (KeyError, TypeError, AttributeError):
+                print(f"🟠 Invalid package on bundle: {package}")
+        return entries
+    try:
+        for package in contents["winget"]["Sources"][0]["Packages"]:
+            entries.append(BundleEntry(package["PackageIdentifier"], section="winget"))
+    except (KeyError, IndexError, TypeError):
+        print("🟠 Invalid winget section")
+    for section in LEGACY_SECTIONS[1:]:
+        try:
+            for package in contents[section]["apps"]:
+                entries.append(BundleEntry(package["Name"], section=section))
+        except (KeyError, TypeError):
+            print(f"🟠 Invalid {section} section")
+    return entries
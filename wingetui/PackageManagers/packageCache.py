@@ -0,0 +1,243 @@
+import os, mmap, struct
+from threading import get_ident
+from typing import Callable, Iterator
+
+# Binary catalog format (version 1), all integers are little-endian:
+#   header:  b"WUIC" + u16 format version
+#   records: u8 field count, then for every field a u16 byte length followed by the UTF-8 encoded field
+#   offsets: u32 file offset of every record, in order
+#   footer:  u32 record count + u32 offset of the offsets table + b"WUIC"
+# Records are written as they get parsed and the offsets table is appended at the end, so the file can be both streamed and mmap'd.
+
+CATALOG_MAGIC = b"WUIC"
+CATALOG_VERSION = 1
+HEADER_FORMAT = "<4sH"
+FOOTER_FORMAT = "<II4s"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+FOOTER_SIZE = struct.calcsize(FOOTER_FORMAT)
+
+
+class PackageCatalog():
+    """
+    Read-only view of a catalog cache file. The file is memory-mapped and the records are only decoded when accessed.
+    Legacy CSV caches are migrated to the binary format the first time they are opened.
+    """
+    cacheFile: str = ""
+    count: int = 0
+    offsetsPosition: int = 0
+
+    def __init__(self, cacheFile: str):
+        self.cacheFile = cacheFile
+        self.count = 0
+        self.offsetsPosition = 0
+        self.file = None
+        self.map = None
+        if os.path.exists(f"{cacheFile}.pending"):
+            try:
+                os.replace(f"{cacheFile}.pending", cacheFile)
+            except OSError as e:
+                print(f"🟠 Could not apply the pending cache for {cacheFile}: {e}")
+        if not os.path.exists(cacheFile) or os.path.getsize(cacheFile) == 0:
+            return
+        if not self.isBinaryCatalog(cacheFile):
+            self.migrateLegacyCache(cacheFile)
+        self.file = open(cacheFile, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < HEADER_SIZE + FOOTER_SIZE:
+            print(f"🟠 Cache file {cacheFile} is truncated, ignoring it")
+            self.close()
+            return
+        magic, version = struct.unpack_from(HEADER_FORMAT, self.map, 0)
+        if version != CATALOG_VERSION:
+            print(f"🟠 Cache file {cacheFile} has an unsupported format version ({version}), ignoring it")
+            self.close()
+            return
+        self.count, self.offsetsPosition, magic = struct.unpack_from(FOOTER_FORMAT, self.map, len(self.map) - FOOTER_SIZE)
+        if magic != CATALOG_MAGIC:
+            print(f"🟠 Cache file {cacheFile} is truncated, ignoring it")
+            self.count = 0
+            self.close()
+
+    @staticmethod
+    def isBinaryCatalog(cacheFile: str) -> bool:
+        with open(cacheFile, "rb") as f:
+            return f.read(len(CATALOG_MAGIC)) == CATALOG_MAGIC
+
+    @staticmethod
+    def migrateLegacyCache(cacheFile: str) -> None:
+        """
+        Rewrites a legacy comma-separated cache (name,id,version[,source]) with the binary catalog format
+        """
+        print(f"🔵 Migrating legacy cache file {cacheFile} to the binary catalog format")
+        writer = PackageCacheWriter(cacheFile, mergeOldCache=False)
+        try:
+            with open(cacheFile, "r", encoding="utf-8", errors="ignore") as legacyCache:
+                for line in legacyCache:
+                    fields = line.rstrip("\n").split(",")
+                    if len(fields) >= 3 and fields[1]:
+                        writer.addPackage(*fields[0:4])
+        except Exception:
+            writer.discard()
+            raise
+        writer.commit()
+
+    def close(self) -> None:
+        """
+        Unmaps the cache file, so it can be replaced (Windows does not allow replacing a mapped file). The records can't be read afterwards
+        """
+        self.count = 0
+        if self.map:
+            self.map.close()
+            self.map = None
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> list[str]:
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("catalog index out of range")
+        position = struct.unpack_from("<I", self.map, self.offsetsPosition + 4*index)[0]
+        fieldCount = self.map[position]
+        position += 1
+        fields: list[str] = []
+        for _ in range(fieldCount):
+            length = struct.unpack_from("<H", self.map, position)[0]
+            position += 2
+            fields.append(self.map[position:position+length].decode("utf-8", errors="ignore"))
+            position += length
+        return fields
+
+    def __iter__(self) -> Iterator[list[str]]:
+        for index in range(self.count):
+            yield self[index]
+
+
+class LazyPackageList():
+    """
+    List-like sequence of packages backed by a PackageCatalog. Every Package object is built the first time it is accessed,
+    and the same object is returned afterwards.
+    The catalog stays mapped until the list is closed, so the readers must close it once they are done building the packages they need.
+    """
+    catalog: PackageCatalog = None
+    factory: Callable = None
+
+    def __init__(self, catalog: PackageCatalog, factory: Callable[[list[str]], object]):
+        self.catalog = catalog
+        self.factory = factory
+        self.packages: list = [None] * len(catalog)
+
+    def __len__(self) -> int:
+        return len(self.packages)
+
+    def __getitem__(self, index: int):
+        package = self.packages[index]
+        if package is None:
+            package = self.factory(self.catalog[index])
+            self.packages[index] = package
+        return package
+
+    def __iter__(self):
+        for index in range(len(self.packages)):
+            yield self[index]
+
+    def close(self) -> None:
+        """
+        Closes the catalog. The packages already built are kept, and the ones that were not can't be built anymore
+        """
+        self.catalog.close()
+
+
+class PackageCacheWriter():
+    """
+    Streams the freshly parsed packages of a package manager into a temporary catalog file, and when the listing is finished,
+    merges the previous cache into it (keeping the packages that did not show up this time) and atomically replaces the cache file.
+    When used as a context manager, the cache is committed on exit, or discarded if an exception was raised.
+    The merge is keyed by (id, source), so it runs in linear time regardless of the size of the catalog.
+    """
+    cacheFile: str = ""
+    tempFile: str = ""
+    mergeOldCache: bool = True
+    writtenPackages: dict[tuple[str, str], str] = {}
+
+    def __init__(self, cacheFile: str, mergeOldCache: bool = True):
+        self.cacheFile = cacheFile
+        self.tempFile = f"{cacheFile}.{os.getpid()}.{get_ident()}.tmp"
+        self.mergeOldCache = mergeOldCache
+        self.writtenPackages = {}
+        self.offsets: list[int] = []
+        self.file = open(self.tempFile, "wb")
+        self.file.write(struct.pack(HEADER_FORMAT, CATALOG_MAGIC, CATALOG_VERSION))
+
+    def __enter__(self) -> 'PackageCacheWriter':
+        return self
+
+    def __exit__(self, exceptionType, exception, traceback) -> None:
+        if exceptionType is None:
+            self.commit()
+        else:
+            self.discard()
+
+    @staticmethod
+    def getKey(fields: list[str]) -> tuple[str, str]:
+        return (fields[1], fields[3] if len(fields) > 3 else "")
+
+    def addPackage(self, name: str, id: str, version: str, source: str = None) -> None:
+        fields = [name, id, version] if source is None else [name, id, version, source]
+        key = self.getKey(fields)
+        if key in self.writtenPackages:
+            return
+        self.writtenPackages[key] = version
+        self.writeRecord(fields)
+
+    def writeRecord(self, fields: list[str]) -> None:
+        self.offsets.append(self.file.tell())
+        record = bytearray((len(fields),))
+        for field in fields:
+            encodedField = field.encode("utf-8", errors="ignore")[:0xFFFF]
+            record += struct.pack("<H", len(encodedField))
+            record += encodedField
+        self.file.write(record)
+
+    def commit(self) -> int:
+        """
+        Merges the old cache into the new one and replaces the cache file. Returns the amount of packages written.
+        If the cache file is memory-mapped by a reader (Windows does not allow replacing it), the new catalog is left as a pending file
+        that will be applied the next time the catalog gets opened.
+        """
+        try:
+            if self.mergeOldCache and os.path.exists(self.cacheFile):
+                oldCatalog = PackageCatalog(self.cacheFile)
+                try:
+                    for fields in oldCatalog:
+                        if len(fields) >= 3 and self.getKey(fields) not in self.writtenPackages:
+                            self.writtenPackages[self.getKey(fields)] = fields[2]
+                            self.writeRecord(fields)
+                finally:
+                    oldCatalog.close()
+            offsetsPosition = self.file.tell()
+            self.file.write(struct.pack(f"<{len(self.offsets)}I", *self.offsets))
+            self.file.write(struct.pack(FOOTER_FORMAT, len(self.offsets), offsetsPosition, CATALOG_MAGIC))
+            self.file.close()
+            try:
+                os.replace(self.tempFile, self.cacheFile)
+            except PermissionError:
+                print(f"🟡 Cache file {self.cacheFile} is in use, the new cache will be applied on the next load")
+                os.replace(self.tempFile, f"{self.cacheFile}.pending")
+            return len(self.offsets)
+        except Exception:
+            self.discard()
+            raise
+
+    def discard(self) -> None:
+        """
+        Drops the temporary file, leaving the current cache file untouched
+        """
+        if not self.file.closed:
+            self.file.close()
+        if os.path.exists(self.tempFile):
+            os.remove(self.tempFile)
@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Callable
+from .queryPipeline import QuerySearch
+
+MAX_PARALLEL_RESOLUTIONS = 4 # Package ids searched at the same time
+
+
+class PackageResolver():
+    """
+    Looks package ids up on the dynamic package managers, querying the managers directly instead of going through the Discover section.
+    Up to maxParallelResolutions ids are resolved at the same time (every id tries its managers in order, until one of them has it),
+    and every id is reported as soon as it has been resolved. Cancelling the resolver kills the searches that are still running.
+    """
+    maxParallelResolutions: int = MAX_PARALLEL_RESOLUTIONS
+    cancelled: bool = False
+    pendingIds: int = 0
+    searches: set[QuerySearch] = set()
+
+    def __init__(self, maxParallelResolutions: int = MAX_PARALLEL_RESOLUTIONS):
+        self.maxParallelResolutions = maxParallelResolutions
+        self.cancelled = False
+        self.pendingIds = 0
+        self.searches = set()
+        self.executor: ThreadPoolExecutor = None
+        self.lock = Lock()
+
+    def resolve(self, packageIds: dict[str, list['DynamicPackageManager']], onResolved: Callable[[str, 'Package | None'], None], onFinished: Callable[[], None]) -> None:
+        """
+        Starts resolving the given ids (each one with the managers it may belong to) and returns right away.
+        onResolved(id, package) is called from a worker thread for every id, with None as the package if no manager has it,
+        and onFinished() once all of them have been resolved. Neither of them is called after the resolver has been cancelled.
+        """
+        self.pendingIds = len(packageIds)
+        if self.pendingIds == 0:
+            onFinished()
+            return
+        self.executor = ThreadPoolExecutor(max_workers=self.maxParallelResolutions, thread_name_prefix="Package id resolver")
+        for packageId, managers in packageIds.items():
+            self.executor.submit(self.resolveId, packageId, managers, onResolved, onFinished)
+        self.executor.shutdown(wait=False)
+
+    def resolveId(self, packageId: str, managers: list['DynamicPackageManager'], onResolved: Callable[[str, 'Package | None'], None], onFinished: Callable[[], None]) -> None:
+        try:
+            package = None
+            for manager in managers:
+                if self.cancelled:
+                    return
+                search = QuerySearch(packageId, manager.NAME)
+                with self.lock:
+                    self.searches.add(search)
+                try:
+                    for result in manager.getPackagesForQuery(packageId, search) or []:
+                        if result.Id.lower() == packageId.lower():
+                            package = result
+                            break
+                except Exception as e:
+                    print(f"🟠 Could not look {packageId} up on {manager.NAME}: {type(e).__name__}: {e}")
+                finally:
+                    with self.lock:
+                        self.searches.discard(search)
+                if package:
+                    break
+            if not self.cancelled:
+                print(f"🟢 Resolved {packageId} on {package.PackageManager.NAME}" if package else f"🟡 {packageId} was not found on any package manager")
+                onResolved(packageId, package)
+        finally:
+            with self.lock:
+                self.pendingIds -= 1
+                finished = self.pendingIds == 0
+            if finished and not self.cancelled:
+                onFinished()
+
+    def cancel(self) -> None:
+        with self.lock:
+            self.cancelled = True
+            searches = list(self.searches)
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        for search in searches:
+            search.cancel()
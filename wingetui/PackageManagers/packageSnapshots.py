@@ -0,0 +1,95 @@
+import os, time
+from threading import Lock
+from typing import Iterable
+from .packageCache import PackageCacheWriter, PackageCatalog
+
+INSTALLED_PACKAGES = "Installed"
+AVAILABLE_UPDATES = "Updates"
+
+# Maximum age (in seconds) of a snapshot to be shown while the package manager is queried again
+SNAPSHOT_TTL: dict[str, float] = {
+    INSTALLED_PACKAGES: 7*24*3600,
+    AVAILABLE_UPDATES: 24*3600,
+}
+
+
+class PackageSnapshotCache():
+    """
+    Persistent snapshots of the installed packages and the available updates of every package manager (stale-while-revalidate):
+    the sections show the last snapshot right away, query the package manager again and then replace the snapshot with the new list.
+    Snapshots are stored with the binary catalog format, one file per package manager and list.
+    """
+    snapshotFolder: str = ""
+    invalidationTimes: dict[tuple[str, str], float] = {}
+
+    def __init__(self, snapshotFolder: str):
+        self.snapshotFolder = snapshotFolder
+        self.invalidationTimes = {}
+        self.lock = Lock()
+
+    def getSnapshotFile(self, managerName: str, kind: str) -> str:
+        return os.path.join(self.snapshotFolder, f"{managerName}{kind}Snapshot")
+
+    def load(self, managerName: str, kind: str, ttl: float = None) -> list[list[str]] | None:
+        """
+        Returns the records of the snapshot, or None if there is no snapshot or it is older than the ttl (SNAPSHOT_TTL by default)
+        """
+        snapshotFile = self.getSnapshotFile(managerName, kind)
+        try:
+            if not os.path.exists(snapshotFile) and not os.path.exists(f"{snapshotFile}.pending"):
+                return None
+            catalog = PackageCatalog(snapshotFile)
+            try:
+                age = time.time() - os.path.getmtime(snapshotFile)
+                if age > (SNAPSHOT_TTL[kind] if ttl is None else ttl):
+                    print(f"🟡 {managerName} {kind.lower()} snapshot is {int(age)} seconds old, ignoring it")
+                    return None
+                return list(catalog)
+            finally:
+                catalog.close()
+        except Exception as e:
+            print(f"🟠 Could not load the {managerName} {kind.lower()} snapshot: {type(e).__name__}: {e}")
+            return None
+
+    def save(self, managerName: str, kind: str, packages: Iterable[list[str]], startTime: float) -> bool:
+        """
+        Replaces the snapshot with the given records. startTime is the time the package manager was queried at:
+        if the snapshot has been invalidated since then (an operation finished meanwhile), the records may be outdated and are not saved.
+        """
+        with self.lock:
+            if self.invalidationTimes.get((managerName, kind), 0) > startTime:
+                print(f"🟡 {managerName} {kind.lower()} snapshot was invalidated while loading, not saving it")
+                return False
+            try:
+                os.makedirs(self.snapshotFolder, exist_ok=True)
+                writer = PackageCacheWriter(self.getSnapshotFile(managerName, kind), mergeOldCache=False)
+                try:
+                    for fields in packages:
+                        writer.writeRecord(fields)
+                except Exception:
+                    writer.discard()
+                    raise
+                writer.commit()
+                return True
+            except Exception as e:
+                print(f"🟠 Could not save the {managerName} {kind.lower()} snapshot: {type(e).__name__}: {e}")
+                return False
+
+    def invalidate(self, managerName: str, kinds: tuple[str] = (INSTALLED_PACKAGES, AVAILABLE_UPDATES)) -> None:
+        """
+        Drops the snapshots of the given package manager, to be called after a package has been installed, updated or uninstalled
+        """
+        with self.lock:
+            for kind in kinds:
+                self.invalidationTimes[(managerName, kind)] = time.time()
+                snapshotFile = self.getSnapshotFile(managerName, kind)
+                for file in (snapshotFile, f"{snapshotFile}.pending"):
+                    try:
+                        os.remove(file)
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        print(f"🟠 Could not remove the snapshot {file}: {e}")
+
+
+Snapshots = PackageSnapshotCache(os.path.join(os.path.expanduser("~"), ".wingetui/cacheddata"))
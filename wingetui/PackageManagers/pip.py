@@ -4,6 +4,9 @@ from tools import *
 from tools import _
 from .PackageClasses import *
 from .sampleHelper import *
+from .processRunner import Runner, RunningCommand
+from .outputParsers import stripLines, parseSplitTable
+from .batchedUpdates import BatchOutputSplitter
         
 class PipPackageManager(DynamicLoadPackageManager):
 
@@ -27,6 +30,8 @@ class PipPackageManager(DynamicLoadPackageManager):
     Capabilities.SupportsCustomVersions = True
     Capabilities.SupportsCustomArchitectures = False
     Capabilities.SupportsCustomScopes = True
+    Capabilities.MaxParallelOperations = 1
+    Capabilities.SupportsBatchUpdates = True
     
     icon = None
 
@@ -36,39 +41,32 @@ class PipPackageManager(DynamicLoadPackageManager):
     def isEnabled(self) -> bool:
         return not getSettings(f"Disable{self.NAME}")
 
-    def getPackagesForQuery(self, query: str) -> list[Package]:
+    @cachedQuery
+    def getPackagesForQuery(self, query: str, search: QuerySearch = None) -> list[Package]:
         f"""
         Will retieve the packages for the given "query: str" from the package manager {self.NAME} in the format of a list[Package] object.
+        The commands started are attached to "search: QuerySearch", if given, so they get killed when the search is superseded.
         """
         print(f"🔵 Starting {self.NAME} search for dynamic packages")
         try:
             if shutil.which("parse_pip_search") == None:
                 print("🟡 Installing pip-search, that was missing...")
                 Command = self.EXECUTABLE.split(" ") + ["install", "parse_pip_search"] + self.getParameters(InstallationOptions())
-                p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=GSUDO_EXE_LOCATION, env=os.environ)
-                p.wait()
+                Runner.run(Command, cwd=GSUDO_EXE_LOCATION, env=os.environ)
             packages: list[Package] = []
-            p = subprocess.Popen(f"parse_pip_search {query}", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-            DashesPassed = False
-            rawoutput = "\n\n---------"
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                rawoutput += "\n"+line
-                if line:
-                    if not DashesPassed:
-                        if "----" in line:
-                            DashesPassed = True
-                    else:
-                        package = list(filter(None, line.split("|")))
-                        if len(package) >= 2:
-                            name = formatPackageIdAsName(package[0])
-                            id = package[0]
-                            version = package[1]
-                            source = self.NAME
-                            if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(Package(name, id, version, source, Pip))
+            p = Runner.start(f"parse_pip_search {query}", cwd=os.getcwd(), env=os.environ.copy())
+            if search:
+                search.attach(p)
+            rawoutput: list[str] = ["\n---------"]
+            for package in parseSplitTable(stripLines(p.getLines(), rawoutput), minColumns=2, separator="|"):
+                name = formatPackageIdAsName(package[0])
+                id = package[0]
+                version = package[1]
+                source = self.NAME
+                if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    packages.append(Package(name, id, version, source, Pip))
             print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
-            globals.PackageManagerOutput += rawoutput
+            globals.PackageManagerOutput += "\n" + "\n".join(rawoutput)
             return packages
         except Exception as e:
             report(e)
@@ -81,28 +79,18 @@ class PipPackageManager(DynamicLoadPackageManager):
         print(f"🔵 Starting {self.NAME} search for updates")
         try:
             packages: list[UpgradablePackage] = []
-            p = subprocess.Popen(f"{self.EXECUTABLE} list --outdated", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-            DashesPassed = False
-            rawoutput = "\n\n---------"
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                rawoutput += "\n"+line
-                if line:
-                    if not DashesPassed:
-                        if "----" in line:
-                            DashesPassed = True
-                    else:
-                        package = list(filter(None, line.split(" ")))
-                        if len(package) >= 3:
-                            name = formatPackageIdAsName(package[0])
-                            id = package[0]
-                            version = package[1]
-                            newVersion = package[2]
-                            source = self.NAME
-                            if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS and not newVersion in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(UpgradablePackage(name, id, version, newVersion, source, Pip))
+            p = Runner.start(f"{self.EXECUTABLE} list --outdated", cwd=os.getcwd(), env=os.environ.copy())
+            rawoutput: list[str] = ["\n---------"]
+            for package in parseSplitTable(stripLines(p.getLines(), rawoutput), minColumns=3):
+                name = formatPackageIdAsName(package[0])
+                id = package[0]
+                version = package[1]
+                newVersion = package[2]
+                source = self.NAME
+                if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS and not newVersion in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    packages.append(UpgradablePackage(name, id, version, newVersion, source, Pip))
             print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
-            globals.PackageManagerOutput += rawoutput
+            globals.PackageManagerOutput += "\n" + "\n".join(rawoutput)
             return packages
         except Exception as e:
             report(e)
@@ -115,22 +103,13 @@ class PipPackageManager(DynamicLoadPackageManager):
         print(f"🔵 Starting {self.NAME} search for installed packages")
         try:
             packages: list[Package] = []
-            p = subprocess.Popen(f"{self.EXECUTABLE} list", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-            DashesPassed = False
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                if line:
-                    if not DashesPassed:
-                        if "----" in line:
-                            DashesPassed = True
-                    else:
-                        package = list(filter(None, line.split(" ")))
-                        if len(package) >= 2:
-                            name = formatPackageIdAsName(package[0])
-                            id = package[0]
-                            version = package[1]
-                            if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(Package(name, id, version, self.NAME, Pip))
+            p = Runner.start(f"{self.EXECUTABLE} list", cwd=os.getcwd(), env=os.environ.copy())
+            for package in parseSplitTable(stripLines(p.getLines()), minColumns=2):
+                name = formatPackageIdAsName(package[0])
+                id = package[0]
+                version = package[1]
+                if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    packages.append(Package(name, id, version, self.NAME, Pip))
             print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
             return packages
         except Exception as e:
@@ -190,13 +169,8 @@ class PipPackageManager(DynamicLoadPackageManager):
                     details.InstallerHash = url["digests"]["sha256"]
                 
                         
-            p = subprocess.Popen(f"{self.EXECUTABLE} index versions {package.Id}", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.path.expanduser("~"), env=os.environ, shell=True)
-            output: list[str] = []
-            while p.poll() is None:
-                line = p.stdout.readline()
-                if line:
-                    output.append(str(line, encoding='utf-8', errors="ignore").strip())
-            for line in output:
+            result = Runner.run(f"{self.EXECUTABLE} index versions {package.Id}", cwd=os.path.expanduser("~"), env=os.environ, timeout=120)
+            for line in result.Output:
                 if "Available versions:" in line:
                     details.Versions = [v.strip() for v in line.replace("Available versions:", "").split(",")]
                     break
@@ -224,7 +198,7 @@ class PipPackageManager(DynamicLoadPackageManager):
             Parameters += ["--progress-bar", "off"]
         return Parameters
 
-    def startInstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> subprocess.Popen:
+    def startInstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> RunningCommand:
         idtoInstall = package.Id
         if options.Version:
             idtoInstall += "=="+options.Version
@@ -232,11 +206,11 @@ class PipPackageManager(DynamicLoadPackageManager):
         if options.RunAsAdministrator:
             Command = [GSUDO_EXECUTABLE] + Command
         print(f"🔵 Starting {package} installation with Command", Command)
-        p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=GSUDO_EXE_LOCATION, env=os.environ)
+        p = Runner.start(Command, cwd=GSUDO_EXE_LOCATION, env=os.environ, timeout=None, limited=False, token=widget.CancellationToken)
         Thread(target=self.installationThread, args=(p, options, widget,), name=f"{self.NAME} installation thread: installing {package.Name}").start()
         return p
 
-    def startUpdate(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> subprocess.Popen:
+    def startUpdate(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> RunningCommand:
         idtoInstall = package.Id
         if options.Version:
             idtoInstall += "=="+options.Version
@@ -244,20 +218,45 @@ class PipPackageManager(DynamicLoadPackageManager):
         if options.RunAsAdministrator:
             Command = [GSUDO_EXECUTABLE] + Command
         print(f"🔵 Starting {package} update with Command", Command)
-        p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=GSUDO_EXE_LOCATION, env=os.environ)
+        p = Runner.start(Command, cwd=GSUDO_EXE_LOCATION, env=os.environ, timeout=None, limited=False, token=widget.CancellationToken)
         Thread(target=self.installationThread, args=(p, options, widget,), name=f"{self.NAME} installation thread: update {package.Name}").start()
         return p
         
-    def installationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: InstallationWidgetType):
+    def startBatchUpdate(self, packages: list[Package], options: InstallationOptions, widgets: list[InstallationWidgetType]) -> RunningCommand:
+        Command = self.EXECUTABLE.split(" ") + ["install"] + [package.Id for package in packages] + ["--upgrade"] + self.getParameters(options)
+        if options.RunAsAdministrator:
+            Command = [GSUDO_EXECUTABLE] + Command
+        print(f"🔵 Starting batched update of {len(packages)} packages with Command", Command)
+        p = Runner.start(Command, cwd=GSUDO_EXE_LOCATION, env=os.environ, timeout=None, limited=False)
+        Thread(target=self.batchUpdateThread, args=(p, packages, options, widgets,), name=f"{self.NAME} installation thread: batched update of {len(packages)} packages").start()
+        return p
+
+    def batchUpdateThread(self, p: RunningCommand, packages: list[Package], options: InstallationOptions, widgets: list[InstallationWidgetType]):
+        splitter = BatchOutputSplitter([package.Id for package in packages])
+        for line in p.getLines():
+            line = line.strip()
+            if line:
+                for index in splitter.addLine(line):
+                    widgets[index].addInfoLine.emit(line)
+        returnCode = p.wait().ReturnCode
+        for index, widget in enumerate(widgets):
+            output = splitter.getOutput(index)
+            if returnCode == 0 or any(line.startswith("Successfully installed") and splitter.namesPackage(index, line) for line in splitter.getLines(index)): # The packages on the "Successfully installed" summary got updated, even if the command failed afterwards
+                outputCode = RETURNCODE_OPERATION_SUCCEEDED
+            elif "--user" in output:
+                outputCode = RETURNCODE_NEEDS_PIP_ELEVATION
+            else:
+                outputCode = RETURNCODE_BATCH_FAILED # A package that makes the command fail takes down the whole batch, so every package that did not get updated is retried on its own
+            widget.finishInstallation.emit(outputCode, output)
+        
+    def installationThread(self, p: RunningCommand, options: InstallationOptions, widget: InstallationWidgetType):
         output = ""
-        while p.poll() is None:
-            line = p.stdout.readline()
+        for line in p.getLines():
             line = line.strip()
-            line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
                 widget.addInfoLine.emit(line)
                 output += line+"\n"
-        match p.returncode:
+        match p.wait().ReturnCode:
             case 0:
                 outputCode = RETURNCODE_OPERATION_SUCCEEDED
             case other:
@@ -266,26 +265,24 @@ class PipPackageManager(DynamicLoadPackageManager):
             outputCode = RETURNCODE_NEEDS_PIP_ELEVATION
         widget.finishInstallation.emit(outputCode, output)
         
-    def startUninstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> subprocess.Popen:
+    def startUninstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> RunningCommand:
         Command = self.EXECUTABLE.split(" ") + ["uninstall", package.Id, "-y"] + self.getParameters(options, removeprogressbar=False)
         if options.RunAsAdministrator:
             Command = [GSUDO_EXECUTABLE] + Command
         print(f"🔵 Starting {package} uninstall with Command", Command)
-        p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=GSUDO_EXE_LOCATION, env=os.environ)
+        p = Runner.start(Command, cwd=GSUDO_EXE_LOCATION, env=os.environ, timeout=None, limited=False, token=widget.CancellationToken)
         Thread(target=self.uninstallationThread, args=(p, options, widget,), name=f"{self.NAME} installation thread: uninstall {package.Name}").start()
         return p
         
-    def uninstallationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: InstallationWidgetType):
+    def uninstallationThread(self, p: RunningCommand, options: InstallationOptions, widget: InstallationWidgetType):
         outputCode = 1
         output = ""
-        while p.poll() is None:
-            line = p.stdout.readline()
+        for line in p.getLines():
             line = line.strip()
-            line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
                 widget.addInfoLine.emit(line)
                 output += line+"\n"
-        match p.returncode:
+        match p.wait().ReturnCode:
             case 0:
                 outputCode = RETURNCODE_OPERATION_SUCCEEDED
             case other:
@@ -295,9 +292,9 @@ class PipPackageManager(DynamicLoadPackageManager):
         widget.finishInstallation.emit(outputCode, output)
 
     def detectManager(self, signal: Signal = None) -> None:
-        o = subprocess.run(f"{self.EXECUTABLE} -V", shell=True, stdout=subprocess.PIPE)
+        o = Runner.run(f"{self.EXECUTABLE} -V", mergeStderr=False, timeout=60)
         globals.componentStatus[f"{self.NAME}Found"] = shutil.which("python.exe") != None
-        globals.componentStatus[f"{self.NAME}Version"] = o.stdout.decode('utf-8').split("\n")[0]
+        globals.componentStatus[f"{self.NAME}Version"] = o.Output[0] if o.Output else ""
         if signal:
             signal.emit()
         
@@ -0,0 +1,348 @@
+import asyncio, os, shlex, signal, subprocess, time
+from collections import deque
+from threading import Condition, Lock, Thread
+from typing import Iterator
+from .cancellationToken import CancellationToken
+
+MAX_CONCURRENT_COMMANDS = 6
+DEFAULT_TIMEOUT = 300 # seconds
+MAX_PENDING_BATCHES = 32 # Every batch holds the lines of one read from the output pipe (up to 64KB)
+EOF_GRACE_PERIOD = 2 # Seconds to wait for the output pipe to close after the process has exited (a grandchild may keep it open)
+
+
+class CommandResult():
+    """
+    Result of a finished command. Output only holds the lines if the command was started with collectOutput=True.
+    ReturnCode is -1 if the command could not be started.
+    """
+    Command: list[str] = []
+    ReturnCode: int = -1
+    Output: list[str] = []
+    TimedOut: bool = False
+    Cancelled: bool = False
+    Duration: float = 0
+
+    def __init__(self, command: list[str], returnCode: int, output: list[str], timedOut: bool = False, cancelled: bool = False, duration: float = 0):
+        self.Command = command
+        self.ReturnCode = returnCode
+        self.Output = output
+        self.TimedOut = timedOut
+        self.Cancelled = cancelled
+        self.Duration = duration
+
+    def succeeded(self) -> bool:
+        return self.ReturnCode == 0 and not self.TimedOut and not self.Cancelled
+
+    def getOutput(self) -> str:
+        return "\n".join(self.Output)
+
+    def __str__(self) -> str:
+        status = "timed out" if self.TimedOut else ("cancelled" if self.Cancelled else f"exit code {self.ReturnCode}")
+        return f"<CommandResult: {' '.join(self.Command)} ({status}, {self.Duration:.2f}s)>"
+
+
+class RunningCommand():
+    """
+    Handle of a command started by the ProcessRunner. The output lines are read with getLines() from any thread.
+    Only a bounded amount of output is held: if the lines are not consumed, the runner stops reading the pipe
+    and the child process blocks on its next write, instead of the output piling up in memory.
+    Used as a context manager, the command is cancelled on exit if it is still running (for example when breaking out of the loop early).
+    If the command was started with a CancellationToken, cancelling the token cancels the command.
+    """
+    args: list[str] = []
+    pid: int = None
+    result: CommandResult = None
+
+    def __init__(self, runner: 'ProcessRunner', args: list[str]):
+        self.runner = runner
+        self.args = args
+        self.pid = None
+        self.result = None
+        self.batches: deque[list[str]] = deque()
+        self.condition = Condition()
+        self.discardOutput = False
+        self.finished = False
+        self.task: asyncio.Task = None
+        self.protocol: CommandProtocol = None
+        self.unregisterToken = None
+
+    def __enter__(self) -> 'RunningCommand':
+        return self
+
+    def __exit__(self, exceptionType, exception, traceback) -> None:
+        if not self.finished:
+            self.cancel()
+
+    def getLines(self) -> Iterator[str]:
+        """
+        Yields the output lines (without the line break) as they get printed, until the command finishes and its output has been fully read
+        """
+        while True:
+            with self.condition:
+                while not self.batches and not self.finished:
+                    self.condition.wait()
+                if not self.batches:
+                    return
+                batch = self.batches.popleft()
+            self.resumeReading()
+            yield from batch
+
+    def wait(self, timeout: float = None) -> CommandResult:
+        """
+        Waits for the command to finish and returns its result. Output lines not consumed with getLines() are dropped,
+        and so are the ones printed afterwards, so the pipe keeps being read and the command is never blocked on a write.
+        """
+        with self.condition:
+            self.discardOutput = True
+            self.batches.clear()
+            self.resumeReading()
+            self.condition.wait_for(lambda: self.result is not None, timeout)
+            return self.result
+
+    def cancel(self) -> None:
+        """
+        Kills the command (and any child process it spawned). Safe to call from any thread, at any time.
+        """
+        if self.task and not self.finished:
+            self.runner.loop.call_soon_threadsafe(self.task.cancel)
+
+    def isRunning(self) -> bool:
+        return not self.finished
+
+    def resumeReading(self) -> None:
+        if self.protocol and self.protocol.isPaused:
+            self.runner.loop.call_soon_threadsafe(self.protocol.resumeReading)
+
+    def pushBatch(self, batch: list[str]) -> int:
+        """
+        Returns the amount of batches pending to be consumed
+        """
+        with self.condition:
+            if self.discardOutput:
+                return 0
+            self.batches.append(batch)
+            self.condition.notify_all()
+            return len(self.batches)
+
+    def setResult(self, result: CommandResult) -> None:
+        with self.condition:
+            self.result = result
+            self.finished = True
+            self.condition.notify_all()
+        if self.unregisterToken:
+            self.unregisterToken()
+
+
+class CommandProtocol(asyncio.SubprocessProtocol):
+    """
+    Splits the output of a command into lines and hands them to its RunningCommand. The output pipe is paused while
+    the consumer has MAX_PENDING_BATCHES batches pending, and resumed once it catches up.
+    Process exit and end of output are tracked separately, since the pipe may outlive the process.
+    """
+    def __init__(self, handle: RunningCommand, output: list[str] | None):
+        self.handle = handle
+        self.output = output
+        self.remainder = b""
+        self.isPaused = False
+        self.transport: asyncio.SubprocessTransport = None
+        loop = asyncio.get_running_loop()
+        self.exited: asyncio.Future = loop.create_future()
+        self.outputClosed: asyncio.Future = loop.create_future()
+
+    def connection_made(self, transport: asyncio.SubprocessTransport) -> None:
+        self.transport = transport
+
+    def pipe_data_received(self, fd: int, data: bytes) -> None:
+        lines = (self.remainder + data).split(b"\n")
+        self.remainder = lines.pop()
+        if lines:
+            self.pushLines([str(line, "utf-8", errors="ignore").rstrip("\r") for line in lines])
+
+    def pipe_connection_lost(self, fd: int, exc: Exception | None) -> None:
+        if fd != 1:
+            return
+        if self.remainder:
+            self.pushLines([str(self.remainder, "utf-8", errors="ignore").rstrip("\r")])
+            self.remainder = b""
+        if not self.outputClosed.done():
+            self.outputClosed.set_result(None)
+
+    def process_exited(self) -> None:
+        if not self.exited.done():
+            self.exited.set_result(self.transport.get_returncode())
+
+    def pushLines(self, batch: list[str]) -> None:
+        if self.output is not None:
+            self.output.extend(batch)
+        if self.handle.pushBatch(batch) >= MAX_PENDING_BATCHES and not self.isPaused:
+            pipe = self.transport.get_pipe_transport(1)
+            if pipe:
+                pipe.pause_reading()
+                self.isPaused = True
+
+    def resumeReading(self) -> None:
+        if self.isPaused and len(self.handle.batches) < MAX_PENDING_BATCHES:
+            self.isPaused = False
+            pipe = self.transport.get_pipe_transport(1)
+            if pipe:
+                pipe.resume_reading()
+
+
+class ProcessRunner():
+    """
+    Runs the package manager commands on a shared asyncio event loop (living on its own daemon thread), so that waiting for
+    child processes does not need a polling thread per command. Limits the amount of commands running at the same time,
+    enforces a per-command timeout, and kills the whole process tree when a command times out or gets cancelled.
+    The public methods are synchronous and can be called from any thread.
+    """
+    maxConcurrentCommands: int = MAX_CONCURRENT_COMMANDS
+    loop: asyncio.AbstractEventLoop = None
+
+    def __init__(self, maxConcurrentCommands: int = MAX_CONCURRENT_COMMANDS):
+        self.maxConcurrentCommands = maxConcurrentCommands
+        self.loop = None
+        self.semaphore: asyncio.Semaphore = None
+        self.loopLock = Lock()
+
+    def getLoop(self) -> asyncio.AbstractEventLoop:
+        with self.loopLock:
+            if self.loop is None:
+                loop = asyncio.new_event_loop() # On Windows this is a ProactorEventLoop, which is required to spawn subprocesses
+                ready = Condition()
+                def runLoop():
+                    asyncio.set_event_loop(loop)
+                    self.semaphore = asyncio.Semaphore(self.maxConcurrentCommands)
+                    with ready:
+                        ready.notify_all()
+                    loop.run_forever()
+                with ready:
+                    Thread(target=runLoop, daemon=True, name="Package manager process runner").start()
+                    ready.wait()
+                self.loop = loop
+            return self.loop
+
+    def start(self, command: list[str] | str, shell: bool = True, cwd: str = None, env: dict = None, timeout: float = DEFAULT_TIMEOUT, mergeStderr: bool = True, limited: bool = True, collectOutput: bool = False, token: CancellationToken = None) -> RunningCommand:
+        """
+        Starts the given command and returns immediately a RunningCommand handle.
+         - timeout: seconds after which the command is killed (None to let it run forever, ie. for installations)
+         - mergeStderr: read stderr together with stdout. If False, stderr is discarded
+         - limited: count the command towards the concurrent commands limit. Unlimited commands are started right away
+         - collectOutput: keep all the output lines on the CommandResult
+         - token: cancelling it kills the command (and its whole process tree)
+        """
+        args = [command] if type(command) == str else list(command)
+        loop = self.getLoop()
+        handle = RunningCommand(self, args)
+        started = Condition()
+        def createTask():
+            handle.task = loop.create_task(self.runCommand(handle, command, shell, cwd, env, timeout, mergeStderr, limited, collectOutput))
+            handle.task.add_done_callback(lambda task: handle.finished or handle.setResult(CommandResult(args, -1, [], cancelled=task.cancelled()))) # The task may get cancelled before it starts running
+            with started:
+                started.notify_all()
+        with started:
+            loop.call_soon_threadsafe(createTask)
+            started.wait()
+        if token:
+            handle.unregisterToken = token.register(handle.cancel)
+        return handle
+
+    def run(self, command: list[str] | str, shell: bool = True, cwd: str = None, env: dict = None, timeout: float = DEFAULT_TIMEOUT, mergeStderr: bool = True, limited: bool = True) -> CommandResult:
+        """
+        Runs the command until it finishes and returns its result, with all the output lines collected
+        """
+        handle = self.start(command, shell, cwd, env, timeout, mergeStderr, limited, collectOutput=True)
+        for _ in handle.getLines():
+            pass
+        return handle.wait()
+
+    async def runCommand(self, handle: RunningCommand, command: list[str] | str, shell: bool, cwd: str, env: dict, timeout: float, mergeStderr: bool, limited: bool, collectOutput: bool) -> None:
+        output: list[str] = []
+        returnCode = None
+        timedOut = False
+        cancelled = False
+        startTime = time.monotonic()
+        transport: asyncio.SubprocessTransport = None
+        spawning: asyncio.Future = None
+        try:
+            if limited:
+                await self.semaphore.acquire()
+            try:
+                handle.protocol = CommandProtocol(handle, output if collectOutput else None)
+                spawning = asyncio.ensure_future(self.spawn(handle.protocol, command, shell, cwd, env, mergeStderr))
+                transport = await asyncio.shield(spawning) # Cancelling the spawn itself would leave a half-created process behind
+                handle.pid = transport.get_pid()
+                try:
+                    returnCode = await asyncio.wait_for(self.waitForCommand(handle), timeout)
+                except asyncio.TimeoutError:
+                    timedOut = True
+                    print(f"🟠 Command {' '.join(handle.args)} timed out after {timeout} seconds, killing it")
+                    returnCode = await self.killProcessTree(transport, handle.protocol)
+            finally:
+                if limited:
+                    self.semaphore.release()
+        except asyncio.CancelledError:
+            cancelled = True
+            print(f"🟡 Command {' '.join(handle.args)} was cancelled")
+            if transport is None and spawning:
+                try:
+                    transport = await spawning
+                except Exception:
+                    pass
+            if transport:
+                returnCode = await self.killProcessTree(transport, handle.protocol)
+        except Exception as e:
+            print(f"🔴 Could not run command {' '.join(handle.args)}: {type(e).__name__}: {e}")
+        finally:
+            if transport:
+                transport.close()
+            handle.setResult(CommandResult(handle.args, returnCode if returnCode is not None else -1, output, timedOut, cancelled, time.monotonic() - startTime))
+
+    async def spawn(self, protocol: CommandProtocol, command: list[str] | str, shell: bool, cwd: str, env: dict, mergeStderr: bool) -> asyncio.SubprocessTransport:
+        loop = asyncio.get_running_loop()
+        stderr = subprocess.STDOUT if mergeStderr else subprocess.DEVNULL
+        kwargs = {} if os.name == "nt" else {"start_new_session": True} # A new session lets killProcessTree signal the whole process group
+        if shell:
+            if type(command) != str:
+                command = subprocess.list2cmdline(command) if os.name == "nt" else shlex.join(command)
+            transport, _ = await loop.subprocess_shell(lambda: protocol, command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=stderr, cwd=cwd, env=env, **kwargs)
+        else:
+            args = shlex.split(command) if type(command) == str else command
+            transport, _ = await loop.subprocess_exec(lambda: protocol, *args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=stderr, cwd=cwd, env=env, **kwargs)
+        return transport
+
+    async def waitForCommand(self, handle: RunningCommand) -> int:
+        """
+        Waits for the process to exit and for its output to be fully read, so the trailing output is never lost.
+        If the pipe is still open after the grace period (and not because the consumer is behind), the rest of the output is ignored.
+        """
+        protocol = handle.protocol
+        returnCode = await asyncio.shield(protocol.exited)
+        while not protocol.outputClosed.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(protocol.outputClosed), EOF_GRACE_PERIOD)
+            except asyncio.TimeoutError:
+                if not protocol.isPaused:
+                    print(f"🟡 The output pipe of {' '.join(handle.args)} was kept open after the process exited, ignoring the rest of the output")
+                    break
+        return returnCode
+
+    async def killProcessTree(self, transport: asyncio.SubprocessTransport, protocol: CommandProtocol) -> int:
+        try:
+            if os.name == "nt":
+                killer = await asyncio.create_subprocess_exec("taskkill", "/F", "/T", "/PID", str(transport.get_pid()), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                await killer.wait()
+            else:
+                os.killpg(transport.get_pid(), signal.SIGKILL)
+        except OSError:
+            pass
+        try:
+            transport.kill()
+        except ProcessLookupError:
+            pass
+        try:
+            return await asyncio.wait_for(asyncio.shield(protocol.exited), 10)
+        except asyncio.TimeoutError:
+            return transport.get_returncode()
+
+
+Runner = ProcessRunner()
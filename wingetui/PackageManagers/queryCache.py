@@ -0,0 +1,110 @@
+import os, json, time
+from collections import OrderedDict
+from threading import Lock
+
+QUERY_CACHE_SIZE = 64 # Queries kept per package manager
+QUERY_CACHE_TTL = 600 # Seconds a search result is reused for
+QUERY_CACHE_FOLDER = os.path.join(os.path.expanduser("~"), ".wingetui/cacheddata")
+
+
+class QueryResultCache():
+    """
+    LRU cache of the results of the dynamic searches of a package manager, stored as [name, id, version, source] records.
+    Results older than the ttl are searched again. If a cache file is given, the entries are loaded from it the first time the cache is used
+    and written back (atomically) every time a result is added, so the cache survives restarts.
+    """
+    maxEntries: int = QUERY_CACHE_SIZE
+    ttl: float = QUERY_CACHE_TTL
+    cacheFile: str = None
+    entries: OrderedDict[str, tuple[float, list[list[str]]]] = None
+    hits: int = 0
+    misses: int = 0
+
+    def __init__(self, maxEntries: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL, cacheFile: str = None):
+        self.maxEntries = maxEntries
+        self.ttl = ttl
+        self.cacheFile = cacheFile
+        self.entries = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    @staticmethod
+    def getKey(query: str) -> str:
+        return query.strip().lower()
+
+    def get(self, query: str) -> list[list[str]] | None:
+        """
+        Returns the records cached for the query, or None if it has not been searched in the last ttl seconds
+        """
+        key = self.getKey(query)
+        with self.lock:
+            entries = self.getEntries()
+            entry = entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl:
+                del entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, query: str, records: list[list[str]]) -> None:
+        key = self.getKey(query)
+        with self.lock:
+            entries = self.getEntries()
+            entries[key] = (time.time(), records)
+            entries.move_to_end(key)
+            while len(entries) > self.maxEntries:
+                entries.popitem(last=False)
+            if self.cacheFile:
+                self.save(entries)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries = OrderedDict()
+            if self.cacheFile:
+                self.save(self.entries)
+
+    def getHitRate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+    def getEntries(self) -> OrderedDict[str, tuple[float, list[list[str]]]]:
+        if self.entries is None:
+            self.entries = OrderedDict()
+            if self.cacheFile and os.path.exists(self.cacheFile):
+                try:
+                    with open(self.cacheFile, "r", encoding="utf-8") as f:
+                        for key, savedTime, records in json.load(f):
+                            if time.time() - savedTime <= self.ttl:
+                                self.entries[key] = (savedTime, records)
+                except Exception as e:
+                    print(f"🟠 Could not load the query cache {self.cacheFile}: {type(e).__name__}: {e}")
+        return self.entries
+
+    def save(self, entries: OrderedDict[str, tuple[float, list[list[str]]]]) -> None:
+        tempFile = f"{self.cacheFile}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cacheFile), exist_ok=True)
+            with open(tempFile, "w", encoding="utf-8") as f:
+                json.dump([[key, savedTime, records] for key, (savedTime, records) in entries.items()], f)
+            os.replace(tempFile, self.cacheFile)
+        except OSError as e:
+            print(f"🟠 Could not save the query cache {self.cacheFile}: {e}")
+
+
+QueryCaches: dict[str, QueryResultCache] = {}
+QueryCachesLock = Lock()
+
+
+def getQueryCache(managerName: str) -> QueryResultCache:
+    """
+    Returns the (persistent) query cache of the given package manager
+    """
+    with QueryCachesLock:
+        if managerName not in QueryCaches:
+            QueryCaches[managerName] = QueryResultCache(cacheFile=os.path.join(QUERY_CACHE_FOLDER, f"{managerName}QueryCache.json"))
+        return QueryCaches[managerName]
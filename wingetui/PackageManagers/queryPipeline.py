@@ -0,0 +1,120 @@
+from threading import BoundedSemaphore, Lock, Thread
+from typing import Callable
+from .processRunner import RunningCommand
+
+MAX_SEARCHES_PER_MANAGER = 1 # Searches of the same manager running at the same time, counting the superseded ones that are still being killed
+
+
+class QuerySearch():
+    """
+    A dynamic search of one query on one package manager. The commands started for it are attached to it,
+    so they get killed as soon as the search gets superseded by a newer query.
+    """
+    Query: str = ""
+    ManagerName: str = ""
+    cancelled: bool = False
+    commands: list[RunningCommand] = []
+
+    def __init__(self, query: str, managerName: str):
+        self.Query = query
+        self.ManagerName = managerName
+        self.cancelled = False
+        self.commands = []
+        self.lock = Lock()
+
+    def attach(self, command: RunningCommand) -> RunningCommand:
+        """
+        Ties the given command to the search, and returns it. If the search has already been cancelled, the command is cancelled right away
+        """
+        with self.lock:
+            if not self.cancelled:
+                self.commands.append(command)
+                return command
+        command.cancel()
+        return command
+
+    def cancel(self) -> None:
+        with self.lock:
+            self.cancelled = True
+            commands = self.commands
+            self.commands = []
+        for command in commands:
+            command.cancel()
+
+    def isCancelled(self) -> bool:
+        return self.cancelled
+
+
+class QueryPipeline():
+    """
+    Runs the dynamic searches of the Discover section. Only the searches of the last submitted query are wanted: submitting a query
+    cancels the searches of the previous one, killing their commands. A manager never runs more than maxSearchesPerManager searches at once,
+    and a search superseded while waiting for its turn is dropped without starting any command.
+    It keeps count of the searches whose results were used, the wasted ones (superseded after they had started) and the skipped ones.
+    """
+    maxSearchesPerManager: int = MAX_SEARCHES_PER_MANAGER
+    searches: list[QuerySearch] = []
+    slots: dict[str, BoundedSemaphore] = {}
+    usedSearches: int = 0
+    wastedSearches: int = 0
+    skippedSearches: int = 0
+
+    def __init__(self, maxSearchesPerManager: int = MAX_SEARCHES_PER_MANAGER):
+        self.maxSearchesPerManager = maxSearchesPerManager
+        self.searches = []
+        self.slots = {}
+        self.usedSearches = 0
+        self.wastedSearches = 0
+        self.skippedSearches = 0
+        self.lock = Lock()
+
+    def submit(self, query: str, managers: list['DynamicPackageManager'], onResults: Callable[['DynamicPackageManager', str, list['Package']], None]) -> None:
+        """
+        Searches the query on the given managers, superseding the searches of the previous query.
+        onResults(manager, query, packages) is called from the search thread of every search that was not superseded
+        """
+        searches = [QuerySearch(query, manager.NAME) for manager in managers]
+        with self.lock:
+            previousSearches = self.searches
+            self.searches = searches
+        for search in previousSearches:
+            search.cancel()
+        print(f"🔵 Dynamic searches so far: {self.usedSearches} used, {self.wastedSearches} wasted, {self.skippedSearches} skipped")
+        for manager, search in zip(managers, searches):
+            Thread(target=self.runSearch, args=(manager, search, onResults), daemon=True, name=f"{manager.NAME} dyamic packages loader").start()
+
+    def cancel(self) -> None:
+        """
+        Cancels the searches of the last query, for example when the query is cleared
+        """
+        with self.lock:
+            previousSearches = self.searches
+            self.searches = []
+        for search in previousSearches:
+            search.cancel()
+
+    def runSearch(self, manager: 'DynamicPackageManager', search: QuerySearch, onResults: Callable[['DynamicPackageManager', str, list['Package']], None]) -> None:
+        with self.lock:
+            if manager.NAME not in self.slots:
+                self.slots[manager.NAME] = BoundedSemaphore(self.maxSearchesPerManager)
+            slot = self.slots[manager.NAME]
+        with slot:
+            if search.isCancelled():
+                with self.lock:
+                    self.skippedSearches += 1
+                print(f"🟡 {manager.NAME} search for \"{search.Query}\" was superseded before it started, skipping it")
+                return
+            packages = manager.getPackagesForQuery(search.Query, search)
+        with self.lock:
+            wasted = search.isCancelled()
+            if wasted:
+                self.wastedSearches += 1
+            else:
+                self.usedSearches += 1
+        if wasted:
+            print(f"🟡 {manager.NAME} search for \"{search.Query}\" was superseded while running, its results were discarded")
+            return
+        onResults(manager, search.Query, packages if packages else [])
+
+    def getMetrics(self) -> dict[str, int]:
+        return {"used": self.usedSearches, "wasted": self.wastedSearches, "skipped": self.skippedSearches}
@@ -0,0 +1,94 @@
+import time
+from threading import Event, Lock, Thread
+from typing import Callable
+
+MINIMUM_REFRESH_INTERVAL = 600 # Seconds between two background refreshes of the same catalog
+
+
+class RefreshJob():
+    """
+    A catalog refresh, shared by everyone that requested it while it was running
+    """
+    Key: str
+    Succeeded: bool = False
+    StartTime: float = 0
+    EndTime: float = 0
+    finished: Event
+
+    def __init__(self, key: str):
+        self.Key = key
+        self.Succeeded = False
+        self.StartTime = time.time()
+        self.EndTime = 0
+        self.finished = Event()
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Blocks until the refresh has finished (or the timeout expired) and returns whether it succeeded
+        """
+        self.finished.wait(timeout)
+        return self.Succeeded
+
+    def isRunning(self) -> bool:
+        return not self.finished.is_set()
+
+
+class RefreshCoordinator():
+    """
+    Single-flight coordinator for the background catalog refreshes (the package cacher threads).
+    Concurrent refresh requests for the same key are coalesced into one in-flight job, which is handed to all the requesters,
+    and a new refresh is not started until the minimum interval since the last successful one has elapsed.
+    """
+    runningJobs: dict[str, RefreshJob] = {}
+    lastJobs: dict[str, RefreshJob] = {}
+    lock: Lock
+
+    def __init__(self):
+        self.runningJobs = {}
+        self.lastJobs = {}
+        self.lock = Lock()
+
+    def refresh(self, key: str, job: Callable[[], bool], minimumInterval: float = MINIMUM_REFRESH_INTERVAL, force: bool = False) -> RefreshJob:
+        """
+        Runs job (which must return False if the refresh failed) on a background thread, unless a refresh for key is already running,
+        in which case the running one is returned, or the last successful one is more recent than minimumInterval (ignored if force is set),
+        in which case the last one is returned.
+        """
+        with self.lock:
+            if key in self.runningJobs:
+                print(f"🔵 A {key} refresh is already running, joining it")
+                return self.runningJobs[key]
+            lastJob = self.lastJobs.get(key)
+            if not force and lastJob and time.time() - lastJob.EndTime < minimumInterval:
+                print(f"🔵 {key} was refreshed {int(time.time() - lastJob.EndTime)} seconds ago, skipping refresh")
+                return lastJob
+            refreshJob = RefreshJob(key)
+            self.runningJobs[key] = refreshJob
+        Thread(target=self.runJob, args=(refreshJob, job), daemon=True, name=f"{key} package cacher thread").start()
+        return refreshJob
+
+    def runJob(self, refreshJob: RefreshJob, job: Callable[[], bool]) -> None:
+        try:
+            refreshJob.Succeeded = job() is not False
+        except Exception as e:
+            print(f"🔴 {refreshJob.Key} refresh failed: {type(e).__name__}: {e}")
+        finally:
+            refreshJob.EndTime = time.time()
+            with self.lock:
+                del self.runningJobs[refreshJob.Key]
+                if refreshJob.Succeeded:
+                    self.lastJobs[refreshJob.Key] = refreshJob
+            refreshJob.finished.set()
+
+    def getLastRefreshTime(self, key: str) -> float:
+        """
+        Returns the time (as returned by time.time()) the last successful refresh of key finished at, or 0 if it has never been refreshed
+        """
+        lastJob = self.lastJobs.get(key)
+        return lastJob.EndTime if lastJob else 0
+
+    def isRefreshing(self, key: str) -> bool:
+        return key in self.runningJobs
+
+
+Refresher = RefreshCoordinator()
@@ -4,6 +4,9 @@ from tools import *
 from tools import _
 
 from .PackageClasses import *
+from .packageCache import PackageCacheWriter, PackageCatalog, LazyPackageList
+from .processRunner import Runner, RunningCommand
+from .refreshCoordinator import Refresher
 
 class SamplePackageManager(PackageManagerModule):
 
@@ -24,6 +27,7 @@ class SamplePackageManager(PackageManagerModule):
     Capabilities.SupportsCustomVersions = True
     Capabilities.SupportsCustomArchitectures = False
     Capabilities.SupportsCustomScopes = False
+    Capabilities.MaxParallelOperations = 1
 
     if not os.path.exists(CAHCE_FILE_PATH):
         os.makedirs(CAHCE_FILE_PATH)
@@ -35,82 +39,63 @@ class SamplePackageManager(PackageManagerModule):
         f"""
         Will retieve the cached packages for the package manager {self.NAME} in the format of a list[Package] object.
         If the cache is empty, will forcefully cache the packages and return a valid list[Package] object.
-        Finally, it will start a background cacher thread.
+        Finally, it will start a background cacher thread, if the catalog was not refreshed recently.
         """
         print(f"🔵 Starting {self.NAME} search for available packages")
         try:
-            packages: list[Package] = []
-            if os.path.exists(self.CACHE_FILE):
-                f = open(self.CACHE_FILE, "r", encoding="utf-8", errors="ignore")
-                content = f.read()
-                f.close()
-                if content != "":
-                    print(f"🟢 Found valid, non-empty cache file for {self.NAME}!")
-                    for line in content.split("\n"):
-                        package = line.split(",")
-                        if len(package) >= 3 and not package[0] in self.BLACKLISTED_PACKAGE_NAMES and not package[1] in self.BLACKLISTED_PACKAGE_IDS and not package[2] in self.BLACKLISTED_PACKAGE_VERSIONS:
-                            packages.append(Package(formatPackageIdAsName(package[0]), package[1], package[2], self.NAME, self))
-                    Thread(target=self.cacheAvailablePackages, daemon=True, name=f"{self.NAME} package cacher thread").start()
-                    print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
-                    return packages
-                else:
-                    print(f"🟠 {self.NAME} cache file exists but is empty!")
-                    if second_attempt:
-                        print(f"🔴 Could not load {self.NAME} packages, returning an empty list!")
-                        return []
-                    self.cacheAvailablePackages()
-                    return self.getAvailablePackages(second_attempt = True)
+            catalog = PackageCatalog(self.CACHE_FILE)
+            if len(catalog) > 0:
+                print(f"🟢 Found valid, non-empty cache file for {self.NAME}!")
+                packages: list[Package] = LazyPackageList(catalog, lambda fields: Package(fields[0], fields[1], fields[2], self.NAME, self))
+                Refresher.refresh(self.NAME, self.cacheAvailablePackages)
+                print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
+                return packages
+            elif os.path.exists(self.CACHE_FILE):
+                print(f"🟠 {self.NAME} cache file exists but is empty!")
+                if second_attempt:
+                    print(f"🔴 Could not load {self.NAME} packages, returning an empty list!")
+                    return []
+                Refresher.refresh(self.NAME, self.cacheAvailablePackages, force=True).wait()
+                return self.getAvailablePackages(second_attempt = True)
             else:
                 print(f"🟡 {self.NAME} cache file does not exist, creating cache forcefully and returning new package list")
                 if second_attempt:
                     print(f"🔴 Could not load {self.NAME} packages, returning an empty list!")
                     return []
-                self.cacheAvailablePackages()
+                Refresher.refresh(self.NAME, self.cacheAvailablePackages, force=True).wait()
                 return self.getAvailablePackages(second_attempt = True)
         except Exception as e:
             report(e)
             return []
         
-    def cacheAvailablePackages(self) -> None:
+    def cacheAvailablePackages(self) -> bool:
         """
         INTERNAL METHOD
         Will load the available packages and write them into the cache file
         """
         print(f"🔵 Starting {self.NAME} package caching")
         try:
-            p = subprocess.Popen([self.NAME, "search", "*"] , stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True)
-            ContentsToCache = ""
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                if line:
-                    
-                    if len(line.split("|")) >= 3:
-                        # Replace these lines with the parse mechanism
-                        self.NAME = formatPackageIdAsName(line.split("|")[0])
-                        id = line.split("|")[0]
-                        version = line.split("|")[1]
-                        source = self.NAME
-                    else:
-                        continue
-                    
-                    if not self.NAME in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
-                        ContentsToCache += f"{self.NAME},{id},{version},{source}\n"
-
-            AlreadyCachedPackages = ""
-            try:
-                with open(self.CACHE_FILE, "r") as f:
-                    AlreadyCachedPackages = f.read()
-                    f.close()
-            except Exception as e:
-                report(e)
-            for line in AlreadyCachedPackages.split("\n"):
-                if line.split(",")[0] not in ContentsToCache:
-                    ContentsToCache += line + "\n"
-            with open(self.CACHE_FILE, "w") as f:
-                f.write(ContentsToCache)
+            with PackageCacheWriter(self.CACHE_FILE) as cache, Runner.start([self.EXECUTABLE, "search", "*"], timeout=900) as p:
+                for line in p.getLines():
+                    line = line.strip()
+                    if line:
+                        
+                        if len(line.split("|")) >= 3:
+                            # Replace these lines with the parse mechanism
+                            name = formatPackageIdAsName(line.split("|")[0])
+                            id = line.split("|")[0]
+                            version = line.split("|")[1]
+                            source = self.NAME
+                        else:
+                            continue
+                        
+                        if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
+                            cache.addPackage(name, id, version, source)
             print(f"🟢 {self.NAME} packages cached successfuly")
+            return True
         except Exception as e:
             report(e)
+            return False
             
     def getAvailableUpdates(self) -> list[UpgradablePackage]:
         f"""
@@ -119,10 +104,10 @@ class SamplePackageManager(PackageManagerModule):
         print(f"🔵 Starting {self.NAME} search for updates")
         try:
             packages: list[UpgradablePackage] = []
-            p = subprocess.Popen([self.EXECUTABLE, "outdated"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
+            p = Runner.start([self.EXECUTABLE, "outdated"], cwd=os.getcwd(), env=os.environ.copy())
             rawoutput = "\n\n---------"
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
+            for line in p.getLines():
+                line = line.strip()
                 rawoutput += "\n"+line
                 if line:
                     
@@ -152,10 +137,10 @@ class SamplePackageManager(PackageManagerModule):
         print(f"🔵 Starting {self.NAME} search for installed packages")
         try:
             packages: list[Package] = []
-            p = subprocess.Popen([self.EXECUTABLE, "list", "--local-only"] , stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
+            p = Runner.start([self.EXECUTABLE, "list", "--local-only"], cwd=os.getcwd(), env=os.environ.copy())
             rawoutput = "\n\n---------"
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
+            for line in p.getLines():
+                line = line.strip()
                 rawoutput += "\n"+line
                 if line:
                     
@@ -214,30 +199,30 @@ class SamplePackageManager(PackageManagerModule):
             Parameters += ["--version", options.Version]
         return Parameters
     
-    def startInstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> subprocess.Popen:
+    def startInstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> RunningCommand:
         print("🔴 This function should be reimplented!")
         Command: list[str] = [self.EXECUTABLE, "install", package.Name] + self.getParameters(options)
         if options.RunAsAdministrator:
             Command = [GSUDO_EXECUTABLE] + Command
         print(f"🔵 Starting {package} installation with Command", Command)
-        p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=GSUDO_EXE_LOCATION, env=os.environ)
+        p = Runner.start(Command, cwd=GSUDO_EXE_LOCATION, env=os.environ, timeout=None, limited=False, token=widget.CancellationToken)
         Thread(target=self.installationThread, args=(p, options, widget,), name=f"{self.NAME} installation thread: installing {package.Name}").start()
         return p
 
-    def startUpdate(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> subprocess.Popen:
+    def startUpdate(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> RunningCommand:
         print("🔴 This function should be reimplented!")
         Command: list[str] = [self.EXECUTABLE, "install", package.Name] + self.getParameters(options)
         if options.RunAsAdministrator:
             Command = [GSUDO_EXECUTABLE] + Command
         print(f"🔵 Starting {package} update with Command", Command)
-        p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=GSUDO_EXE_LOCATION, env=os.environ)
+        p = Runner.start(Command, cwd=GSUDO_EXE_LOCATION, env=os.environ, timeout=None, limited=False, token=widget.CancellationToken)
         Thread(target=self.installationThread, args=(p, options, widget,), name=f"{self.NAME} installation thread: updating {package.Name}").start()
         return p
 
-    def installationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: InstallationWidgetType):
+    def installationThread(self, p: RunningCommand, options: InstallationOptions, widget: InstallationWidgetType):
         output = ""
-        while p.poll() is None:
-            line = str(p.stdout.readline(), encoding='utf-8', errors="ignore").strip()
+        for line in p.getLines():
+            line = line.strip()
             if line:
                 output += line+"\n"
                 widget.addInfoLine.emit(line)
@@ -245,40 +230,42 @@ class SamplePackageManager(PackageManagerModule):
                     widget.counterSignal.emit(3)
                 elif "installing" in line:
                     widget.counterSignal.emit(7)
-        print(p.returncode)
-        widget.finishInstallation.emit(p.returncode, output)
+        returnCode = p.wait().ReturnCode
+        print(returnCode)
+        widget.finishInstallation.emit(returnCode, output)
 
-    def startUninstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> subprocess.Popen:
+    def startUninstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> RunningCommand:
         print("🔴 This function should be reimplented!")
         Command: list[str] = [self.EXECUTABLE, "install", package.Name] + self.getParameters(options)
         if options.RunAsAdministrator:
             Command = [GSUDO_EXECUTABLE] + Command
         print(f"🔵 Starting {package} update with Command", Command)
-        p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=GSUDO_EXE_LOCATION, env=os.environ)
+        p = Runner.start(Command, cwd=GSUDO_EXE_LOCATION, env=os.environ, timeout=None, limited=False, token=widget.CancellationToken)
         Thread(target=self.uninstallationThread, args=(p, options, widget,), name=f"{self.NAME} installation thread: updating {package.Name}").start()
         return p
 
-    def uninstallationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: InstallationWidgetType):
+    def uninstallationThread(self, p: RunningCommand, options: InstallationOptions, widget: InstallationWidgetType):
         output = ""
-        while p.poll() is None:
-            line = str(p.stdout.readline(), encoding='utf-8', errors="ignore").strip()
+        for line in p.getLines():
+            line = line.strip()
             if line:
                 output += line+"\n"
                 widget.addInfoLine.emit(line)
                 if "removing" in line:
                     widget.counterSignal.emit(5)
-        print(p.returncode)
-        widget.finishInstallation.emit(p.returncode, output)
+        returnCode = p.wait().ReturnCode
+        print(returnCode)
+        widget.finishInstallation.emit(returnCode, output)
         
     def detectManager(self, signal: Signal = None) -> None:
-        o = subprocess.run(f"{self.EXECUTABLE} -v", shell=True, stdout=subprocess.PIPE)
-        globals.componentStatus[f"{self.NAME}Found"] = o.returncode == 0
-        globals.componentStatus[f"{self.NAME}Version"] = o.stdout.decode('utf-8').replace("\n", "")
+        o = Runner.run(f"{self.EXECUTABLE} -v", mergeStderr=False, timeout=60)
+        globals.componentStatus[f"{self.NAME}Found"] = o.ReturnCode == 0
+        globals.componentStatus[f"{self.NAME}Version"] = "".join(o.Output)
         if signal:
             signal.emit()
         
     def updateSources(self, signal: Signal = None) -> None:
-        subprocess.run(f"{self.EXECUTABLE} update self", shell=True, stdout=subprocess.PIPE)
+        Runner.run(f"{self.EXECUTABLE} update self", mergeStderr=False)
         if signal:
             signal.emit()
             
@@ -291,9 +278,10 @@ class DynamicLoadPackageManager(SamplePackageManager):
     def cacheAvailablePackages(self) -> None:
         print(f"🟠 Package manager {self.NAME} does not support caching available packages")
 
-    def getPackagesForQuery(self, query: str) -> list[Package]:
+    def getPackagesForQuery(self, query: str, search: QuerySearch = None) -> list[Package]:
         f"""
         Will retieve the packages for the given "query: str" from the package manager {self.NAME} in the format of a list[Package] object.
+        The commands started are attached to "search: QuerySearch", if given, so they get killed when the search is superseded.
         """
         raise NotImplementedError("This method must be reimplemented")
 
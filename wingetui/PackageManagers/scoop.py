@@ -4,6 +4,11 @@ from tools import *
 from tools import _
 from .PackageClasses import *
 from .sampleHelper import *
+from .packageCache import PackageCacheWriter, PackageCatalog, LazyPackageList
+from .processRunner import Runner, RunningCommand
+from .refreshCoordinator import Refresher
+from .outputParsers import stripLines, parseSplitTable, parseScoopInstalled
+from .batchedUpdates import BatchOutputSplitter
     
     
 class ScoopPackageManager(SamplePackageManager):
@@ -28,6 +33,8 @@ class ScoopPackageManager(SamplePackageManager):
     Capabilities.SupportsCustomVersions = False
     Capabilities.SupportsCustomArchitectures = True
     Capabilities.SupportsCustomScopes = True
+    Capabilities.MaxParallelOperations = 1
+    Capabilities.SupportsBatchUpdates = True
 
     icon = None
 
@@ -41,85 +48,58 @@ class ScoopPackageManager(SamplePackageManager):
         f"""
         Will retieve the cached packages for the package manager {self.NAME} in the format of a list[Package] object.
         If the cache is empty, will forcefully cache the packages and return a valid list[Package] object.
-        Finally, it will start a background cacher thread.
+        Finally, it will start a background cacher thread, if the catalog was not refreshed recently.
         """
         print(f"🔵 Starting {self.NAME} search for available packages")
         try:
-            packages: list[Package] = []
-            if os.path.exists(self.CACHE_FILE):
-                f = open(self.CACHE_FILE, "r", encoding="utf-8", errors="ignore")
-                content = f.read()
-                f.close()
-                if content != "":
-                    print(f"🟢 Found valid, non-empty cache file for {self.NAME}!")
-                    for line in content.split("\n"):
-                        package = line.split(",")
-                        if len(package) >= 4 and not package[0] in self.BLACKLISTED_PACKAGE_NAMES and not package[1] in self.BLACKLISTED_PACKAGE_IDS and not package[2] in self.BLACKLISTED_PACKAGE_VERSIONS:
-                            packages.append(Package(package[0], package[1], package[2], package[3], Scoop))
-                    Thread(target=self.cacheAvailablePackages, daemon=True, name=f"{self.NAME} package cacher thread").start()
-                    print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
-                    return packages
-                else:
-                    print(f"🟠 {self.NAME} cache file exists but is empty!")
-                    if second_attempt:
-                        print(f"🔴 Could not load {self.NAME} packages, returning an empty list!")
-                        return []
-                    self.cacheAvailablePackages()
-                    return self.getAvailablePackages(second_attempt = True)
+            catalog = PackageCatalog(self.CACHE_FILE)
+            if len(catalog) > 0:
+                print(f"🟢 Found valid, non-empty cache file for {self.NAME}!")
+                packages: list[Package] = LazyPackageList(catalog, lambda fields: Package(fields[0], fields[1], fields[2], fields[3] if len(fields) > 3 else "Scoop", Scoop))
+                Refresher.refresh(self.NAME, self.cacheAvailablePackages)
+                print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
+                return packages
+            elif os.path.exists(self.CACHE_FILE):
+                print(f"🟠 {self.NAME} cache file exists but is empty!")
+                if second_attempt:
+                    print(f"🔴 Could not load {self.NAME} packages, returning an empty list!")
+                    return []
+                Refresher.refresh(self.NAME, self.cacheAvailablePackages, force=True).wait()
+                return self.getAvailablePackages(second_attempt = True)
             else:
                 print(f"🟡 {self.NAME} cache file does not exist, creating cache forcefully and returning new package list")
                 if second_attempt:
                     print(f"🔴 Could not load {self.NAME} packages, returning an empty list!")
                     return []
-                self.cacheAvailablePackages()
+                Refresher.refresh(self.NAME, self.cacheAvailablePackages, force=True).wait()
                 return self.getAvailablePackages(second_attempt = True)
         except Exception as e:
             report(e)
             return []
         
-    def cacheAvailablePackages(self) -> None:
+    def cacheAvailablePackages(self) -> bool:
         """
         INTERNAL METHOD
         Will load the available packages and write them into the cache file
         """
         print(f"🔵 Starting {self.NAME} package caching")
         try:
-            p = subprocess.Popen(f"{self.NAME} search", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ, shell=True)
-            ContentsToCache = ""
-            DashesPassed = False
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                if line:
-                    if not DashesPassed:
-                        if "----" in line:
-                            DashesPassed = True
-                    else:
-                        package = list(filter(None, line.split(" ")))
-                        name = formatPackageIdAsName(package[0])
-                        id = package[0]
-                        version = package[1]
-                        try:
-                            source = f"Scoop: {package[2].strip()}"
-                        except IndexError:
-                            source = "Scoop"
-                        if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
-                            ContentsToCache += f"{name},{id},{version},{source}\n"
-            AlreadyCachedPackages = ""
-            try:
-                if os.path.exists(self.CACHE_FILE):
-                    f = open(self.CACHE_FILE, "r")
-                    AlreadyCachedPackages = f.read()
-                    f.close()
-            except Exception as e:
-                report(e)
-            for line in AlreadyCachedPackages.split("\n"):
-                if line.split(",")[0] not in ContentsToCache:
-                    ContentsToCache += line + "\n"
-            with open(self.CACHE_FILE, "w") as f:
-                f.write(ContentsToCache)
+            with PackageCacheWriter(self.CACHE_FILE) as cache, Runner.start(f"{self.NAME} search", cwd=os.getcwd(), env=os.environ, timeout=900) as p:
+                for package in parseSplitTable(stripLines(p.getLines()), minColumns=2):
+                    name = formatPackageIdAsName(package[0])
+                    id = package[0]
+                    version = package[1]
+                    try:
+                        source = f"Scoop: {package[2].strip()}"
+                    except IndexError:
+                        source = "Scoop"
+                    if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
+                        cache.addPackage(name, id, version, source)
             print(f"🟢 {self.NAME} packages cached successfuly")
+            return True
         except Exception as e:
             report(e)
+            return False
             
     def getAvailableUpdates(self) -> list[UpgradablePackage]:
         f"""
@@ -128,28 +108,18 @@ class ScoopPackageManager(SamplePackageManager):
         print(f"🔵 Starting {self.NAME} search for updates")
         try:
             packages: list[UpgradablePackage] = []
-            p = subprocess.Popen(f"{self.EXECUTABLE} status", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-            DashesPassed = False
-            rawoutput = "\n\n---------"
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                rawoutput += "\n"+line
-                if line:
-                    if not DashesPassed:
-                        if "----" in line:
-                            DashesPassed = True
-                    else:
-                        package = list(filter(None, line.split(" ")))
-                        if len(package) >= 3:
-                            name = formatPackageIdAsName(package[0])
-                            id = package[0]
-                            version = package[1]
-                            newVersion = package[2]
-                            source = self.NAME
-                            if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS and not newVersion in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(UpgradablePackage(name, id, version, newVersion, source, Scoop))
+            p = Runner.start(f"{self.EXECUTABLE} status", cwd=os.getcwd(), env=os.environ.copy())
+            rawoutput: list[str] = ["\n---------"]
+            for package in parseSplitTable(stripLines(p.getLines(), rawoutput), minColumns=3):
+                name = formatPackageIdAsName(package[0])
+                id = package[0]
+                version = package[1]
+                newVersion = package[2]
+                source = self.NAME
+                if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS and not newVersion in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    packages.append(UpgradablePackage(name, id, version, newVersion, source, Scoop))
             print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
-            globals.PackageManagerOutput += rawoutput
+            globals.PackageManagerOutput += "\n" + "\n".join(rawoutput)
             return packages
         except Exception as e:
             report(e)
@@ -163,28 +133,15 @@ class ScoopPackageManager(SamplePackageManager):
         time.sleep(2)
         try:
             packages: list[Package] = []
-            p = subprocess.Popen(f"{self.EXECUTABLE} list", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-            DashesPassed = False
-            rawoutput = "\n\n---------"
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                rawoutput += "\n"+line
-                if line:
-                    if not DashesPassed:
-                        if "----" in line:
-                            DashesPassed = True
-                    else:
-                        globalscoop = "Global" in line
-                        package = list(filter(None, line.split(" ")))
-                        if len(package) >= 2:
-                            name = formatPackageIdAsName(package[0])
-                            id = package[0]
-                            version = package[1]
-                            source = f"Scoop{' (Global)' if globalscoop else ''}: {package[2].strip()}"
-                            if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(Package(name, id, version, source, Scoop))
+            p = Runner.start(f"{self.EXECUTABLE} list", cwd=os.getcwd(), env=os.environ.copy())
+            rawoutput: list[str] = ["\n---------"]
+            for id, version, bucket, globalscoop in parseScoopInstalled(stripLines(p.getLines(), rawoutput)):
+                name = formatPackageIdAsName(id)
+                source = f"Scoop{' (Global)' if globalscoop else ''}: {bucket}"
+                if not name in self.BLACKLISTED_PACKAGE_NAMES and not id in self.BLACKLISTED_PACKAGE_IDS and not version in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    packages.append(Package(name, id, version, source, Scoop))
             print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
-            globals.PackageManagerOutput += rawoutput
+            globals.PackageManagerOutput += "\n" + "\n".join(rawoutput)
             return packages
         except Exception as e:
             report(e)
@@ -207,20 +164,9 @@ class ScoopPackageManager(SamplePackageManager):
             details.Scopes = [_("Local"), _("Global")]
             details.InstallerType = _("Scoop package")
         
-            rawOutput = b""
-            p = subprocess.Popen(' '.join([self.EXECUTABLE, "cat", f"{package.Id}"]), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ, shell=True)
-            while p.poll() is None:
-                pass
-            for line in p.stdout.readlines():
-                line = line.strip()
-                if line:
-                    rawOutput += line+b"\n"
-
-            with open(os.path.join(os.path.expanduser("~"), ".wingetui", "scooptemp.json"), "wb") as f:
-                f.write(rawOutput)
-            mfest = open(os.path.join(os.path.expanduser("~"), ".wingetui", "scooptemp.json"), "r")
+            result = Runner.run(' '.join([self.EXECUTABLE, "cat", f"{package.Id}"]), cwd=os.getcwd(), env=os.environ, timeout=120)
             import json
-            data: dict = json.load(mfest)
+            data: dict = json.loads(result.getOutput())
             if "description" in data.keys():
                 details.Description = data["description"]
                 
@@ -282,19 +228,16 @@ class ScoopPackageManager(SamplePackageManager):
                     report(e)
                     
             output: list[str] = []   
-            p = subprocess.Popen(' '.join([self.EXECUTABLE, "info", package.Id]), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ, shell=True)
-            while p.poll() is None:
-                pass
-            for line in p.stdout.readlines():
+            result = Runner.run(' '.join([self.EXECUTABLE, "info", package.Id]), cwd=os.getcwd(), env=os.environ, timeout=120)
+            for line in result.Output:
                 line = line.strip()
                 if line:
-                    output.append(self.ansi_escape.sub('', str(line, encoding='utf-8', errors="ignore")))
+                    output.append(self.ansi_escape.sub('', line))
             for line in output:
-                for line in output:
-                    if("Updated by" in line):
-                        details.Publisher = line.replace("Updated by", "").strip()[1:].strip()
-                    elif("Updated at" in line):
-                        details.UpdateDate = line.replace("Updated at", "").strip()[1:].strip()
+                if("Updated by" in line):
+                    details.Publisher = line.replace("Updated by", "").strip()[1:].strip()
+                elif("Updated at" in line):
+                    details.UpdateDate = line.replace("Updated at", "").strip()[1:].strip()
                     
             print(f"🟢 Get info finished for {package.Name} on {self.NAME}")
             return details
@@ -327,7 +270,7 @@ class ScoopPackageManager(SamplePackageManager):
             Parameters.append("--purge")
         return Parameters
 
-    def startInstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> subprocess.Popen:
+    def startInstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> RunningCommand:
         bucket_prefix = ""
         if len(package.Source.split(":"))>1 and not "/" in package.Source:
             bucket_prefix = package.Source.lower().split(":")[1].replace(" ", "")+"/"
@@ -335,11 +278,11 @@ class ScoopPackageManager(SamplePackageManager):
         if options.RunAsAdministrator:
             Command = [GSUDO_EXECUTABLE] + Command + ["--global"]
         print(f"🔵 Starting {package} installation with Command", Command)
-        p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=GSUDO_EXE_LOCATION, env=os.environ)
+        p = Runner.start(Command, cwd=GSUDO_EXE_LOCATION, env=os.environ, timeout=None, limited=False, token=widget.CancellationToken)
         Thread(target=self.installationThread, args=(p, options, widget,), name=f"{self.NAME} installation thread: installing {package.Name}").start()
         return p
 
-    def startUpdate(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> subprocess.Popen:
+    def startUpdate(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> RunningCommand:
         bucket_prefix = ""
         if len(package.Source.split(":"))>1 and not "/" in package.Source:
             bucket_prefix = package.Source.lower().split(":")[1].replace(" ", "")+"/"
@@ -347,39 +290,69 @@ class ScoopPackageManager(SamplePackageManager):
         if options.RunAsAdministrator:
             Command = [GSUDO_EXECUTABLE] + Command + ["--global"]
         print(f"🔵 Starting {package} update with Command", Command)
-        p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=GSUDO_EXE_LOCATION, env=os.environ)
+        p = Runner.start(Command, cwd=GSUDO_EXE_LOCATION, env=os.environ, timeout=None, limited=False, token=widget.CancellationToken)
         Thread(target=self.installationThread, args=(p, options, widget,), name=f"{self.NAME} installation thread: update {package.Name}").start()
         return p
         
-    def installationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: InstallationWidgetType):
+    def startBatchUpdate(self, packages: list[Package], options: InstallationOptions, widgets: list[InstallationWidgetType]) -> RunningCommand:
+        bucket_prefix = ""
+        if len(packages[0].Source.split(":"))>1 and not "/" in packages[0].Source:
+            bucket_prefix = packages[0].Source.lower().split(":")[1].replace(" ", "")+"/"
+        Command = self.EXECUTABLE.split(" ") + ["update"] + [bucket_prefix+package.Id for package in packages] + self.getParameters(options)
+        if options.RunAsAdministrator:
+            Command = [GSUDO_EXECUTABLE] + Command + ["--global"]
+        print(f"🔵 Starting batched update of {len(packages)} packages with Command", Command)
+        p = Runner.start(Command, cwd=GSUDO_EXE_LOCATION, env=os.environ, timeout=None, limited=False)
+        Thread(target=self.batchUpdateThread, args=(p, packages, options, widgets,), name=f"{self.NAME} installation thread: batched update of {len(packages)} packages").start()
+        return p
+        
+    def installationThread(self, p: RunningCommand, options: InstallationOptions, widget: InstallationWidgetType):
         output = ""
-        outputCode = 1
-        while p.poll() is None:
-            line = p.stdout.readline()
+        for line in p.getLines():
             line = line.strip()
-            line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
-                if("Installing" in line):
-                    widget.counterSignal.emit(1)
-                elif("] 100%" in line or "Downloading" in line):
-                    widget.counterSignal.emit(4)
-                elif("was installed successfully!" in line):
-                    widget.counterSignal.emit(6)
+                self.reportProgress(line, widget)
                 widget.addInfoLine.emit(line)
-                if("was installed successfully" in line):
-                    outputCode = 0
-                elif ("is already installed" in line):
-                    outputCode = 0
                 output += line+"\n"
+        widget.finishInstallation.emit(self.getOutputCode(output, options), output)
+
+    def batchUpdateThread(self, p: RunningCommand, packages: list[Package], options: InstallationOptions, widgets: list[InstallationWidgetType]):
+        splitter = BatchOutputSplitter([package.Id for package in packages])
+        for line in p.getLines():
+            line = line.strip()
+            if line:
+                for index in splitter.addLine(line):
+                    self.reportProgress(line, widgets[index])
+                    widgets[index].addInfoLine.emit(line)
+        p.wait()
+        for index, widget in enumerate(widgets):
+            output = splitter.getOutput(index)
+            widget.finishInstallation.emit(self.getOutputCode(output, options), output)
+
+    def reportProgress(self, line: str, widget: InstallationWidgetType):
+        if("Installing" in line):
+            widget.counterSignal.emit(1)
+        elif("] 100%" in line or "Downloading" in line):
+            widget.counterSignal.emit(4)
+        elif("was installed successfully!" in line):
+            widget.counterSignal.emit(6)
+
+    def getOutputCode(self, output: str, options: InstallationOptions) -> int:
+        """
+        Returns the result of an installation or update of a single package, given its output
+        """
+        outputCode = 1
+        if "was installed successfully" in output or "is already installed" in output:
+            outputCode = 0
         if "-g" in output and not "successfully" in output and not options.RunAsAdministrator:
             outputCode = RETURNCODE_NEEDS_SCOOP_ELEVATION
         elif "requires admin rights" in output or "requires administrator rights" in output or "you need admin rights to install global apps" in output:
             outputCode = RETURNCODE_NEEDS_ELEVATION
         if "Latest versions for all apps are installed" in output:
             outputCode = RETURNCODE_NO_APPLICABLE_UPDATE_FOUND
-        widget.finishInstallation.emit(outputCode, output)
+        return outputCode
         
-    def startUninstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> subprocess.Popen:
+    def startUninstallation(self, package: Package, options: InstallationOptions, widget: InstallationWidgetType) -> RunningCommand:
         bucket_prefix = ""
         if len(package.Source.split(":"))>1 and not "/" in package.Source:
             bucket_prefix = package.Source.lower().split(":")[1].replace(" ", "")+"/"
@@ -387,17 +360,15 @@ class ScoopPackageManager(SamplePackageManager):
         if options.RunAsAdministrator:
             Command = [GSUDO_EXECUTABLE] + Command + ["--global"]
         print(f"🔵 Starting {package} uninstall with Command", Command)
-        p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=GSUDO_EXE_LOCATION, env=os.environ)
+        p = Runner.start(Command, cwd=GSUDO_EXE_LOCATION, env=os.environ, timeout=None, limited=False, token=widget.CancellationToken)
         Thread(target=self.uninstallationThread, args=(p, options, widget,), name=f"{self.NAME} installation thread: uninstall {package.Name}").start()
         return p
         
-    def uninstallationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: InstallationWidgetType):
+    def uninstallationThread(self, p: RunningCommand, options: InstallationOptions, widget: InstallationWidgetType):
         outputCode = 1
         output = ""
-        while p.poll() is None:
-            line = p.stdout.readline()
+        for line in p.getLines():
             line = line.strip()
-            line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
                 if("Uninstalling" in line):
                     widget.counterSignal.emit(1)
@@ -418,15 +389,14 @@ class ScoopPackageManager(SamplePackageManager):
 
     def loadBuckets(self, packageSignal: Signal, finishSignal: Signal) -> None:
         print("🟢 Starting scoop search...")
-        p = subprocess.Popen(f"{self.EXECUTABLE} bucket list", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ, shell=True)
+        p = Runner.start(f"{self.EXECUTABLE} bucket list", cwd=os.getcwd(), env=os.environ)
         output = []
         counter = 0
-        while p.poll() is None:
-            line = p.stdout.readline()
+        for line in p.getLines():
             line = line.strip()
             if line:
-                if(counter > 1 and not b"---" in line):
-                    output.append(self.ansi_escape.sub('', str(line, encoding='utf-8', errors="ignore")))
+                if(counter > 1 and not "---" in line):
+                    output.append(self.ansi_escape.sub('', line))
                 else:
                     counter += 1
         counter = 0
@@ -447,15 +417,15 @@ class ScoopPackageManager(SamplePackageManager):
         finishSignal.emit()
         
     def detectManager(self, signal: Signal = None) -> None:
-        o = subprocess.run(f"{self.EXECUTABLE} -v", shell=True, stdout=subprocess.PIPE)
+        o = Runner.run(f"{self.EXECUTABLE} -v", mergeStderr=False, timeout=60)
         globals.componentStatus[f"{self.NAME}Found"] = shutil.which("scoop") != None
-        globals.componentStatus[f"{self.NAME}Version"] = o.stdout.decode('utf-8').split("\n")[1]
+        globals.componentStatus[f"{self.NAME}Version"] = o.Output[1] if len(o.Output) > 1 else ""
         if signal:
             signal.emit()
         
     def updateSources(self, signal: Signal = None) -> None:
         print(f"🔵 Reloading {self.NAME} sources...")
-        subprocess.run(f"{self.EXECUTABLE} update", shell=True, stdout=subprocess.PIPE)
+        Runner.run(f"{self.EXECUTABLE} update", mergeStderr=False)
         if signal:
             signal.emit()
 
@@ -0,0 +1,376 @@
+import re
+import heapq
+from array import array
+from threading import Lock
+
+# Separates the normalized name and id in the index keys. Queries never contain it, so a match can't span both fields
+KEY_SEPARATOR = "\x00"
+TRIGRAM_LENGTH = 3
+
+# Words of a name or id: separated by any non-alphanumeric character or by a camelCase hump (VisualStudioCode, 7-Zip, HTTPServer)
+WORD_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+# Word starts of a cased key: an uppercase letter, or an alphanumeric character that doesn't follow another one
+WORD_START_PATTERN = re.compile(r"[A-Z]|(?<![^\W_])[^\W_]")
+
+# Relevance tiers of the ranked search, from best to worst
+EXACT_ID_MATCH = 100
+EXACT_NAME_MATCH = 90
+ID_SEGMENT_MATCH = 85 # The query is a whole segment of the id, like 7zip on 7zip.7zip
+PREFIX_MATCH = 70
+WORD_START_MATCH = 60
+SUBSTRING_MATCH = 40
+TYPO_MATCH = 20 # A word of the package starts with the query, allowing one typo
+SUBSEQUENCE_MATCH = 10 # The query characters appear in order, like vscode on Visual Studio Code
+
+TYPO_MIN_LENGTH = 4
+SUBSEQUENCE_MIN_LENGTH = 4
+WORD_START_LENGTH = 8 # Characters indexed after every word start. Typos are only tolerated on the first WORD_START_LENGTH characters of a query
+
+
+def normalizeSearchText(text: str) -> str:
+    """
+    Normalizes a package name, id or query the same way the sections always did: lowercase, without dashes nor spaces
+    """
+    return text.lower().replace("-", "").replace(" ", "")
+
+
+def getCasedKey(text: str) -> str:
+    """
+    Normalizes the text like normalizeSearchText, but with the first letter of every word uppercase to know where the words start.
+    The lowercase key is casedKey.lower()
+    """
+    return WORD_PATTERN.sub(lambda match: match.group().capitalize(), text).replace("-", "").replace(" ", "")
+
+
+def getTrigrams(text: str) -> set[str]:
+    return {text[i:i+TRIGRAM_LENGTH] for i in range(len(text) - TRIGRAM_LENGTH + 1)}
+
+
+def isWordStart(casedKey: str, offset: int) -> bool:
+    return offset == 0 or casedKey[offset].isupper() or not casedKey[offset-1].isalnum()
+
+
+def getWordStartOffsets(casedKey: str) -> list[int]:
+    return [match.start() for match in WORD_START_PATTERN.finditer(casedKey)]
+
+
+def isOneEditAway(a: str, b: str) -> bool:
+    """
+    Checks if a and b are equal or differ by one insertion, deletion, substitution or swap of two adjacent characters
+    """
+    if a == b:
+        return True
+    if len(a) < len(b):
+        a, b = b, a
+    if len(a) - len(b) > 1:
+        return False
+    i = 0
+    while i < len(b) and a[i] == b[i]:
+        i += 1
+    if len(a) != len(b):
+        return a[i+1:] == b[i:]
+    if a[i+1:] == b[i+1:]:
+        return True
+    return i+1 < len(a) and a[i] == b[i+1] and a[i+1] == b[i] and a[i+2:] == b[i+2:]
+
+
+def isTypoPrefix(query: str, text: str) -> bool:
+    """
+    Checks if the text begins with the query, allowing one typo
+    """
+    length = len(query)
+    return isOneEditAway(query, text[:length]) or isOneEditAway(query, text[:length+1]) or isOneEditAway(query, text[:length-1])
+
+
+def isSubsequence(query: str, key: str, start: int = 0) -> bool:
+    position = start
+    for char in query:
+        position = key.find(char, position)
+        if position < 0:
+            return False
+        position += 1
+    return True
+
+
+def getSubsequenceWordStarts(query: str, key: str, casedKey: str) -> int:
+    """
+    Matches the query characters in order, preferring the ones that start a word. Returns how many of them start a word, or -1 if there is no match
+    """
+    if not isSubsequence(query, key):
+        return -1
+    position = 0
+    wordStarts = 0
+    for i, char in enumerate(query):
+        match = key.find(char, position)
+        candidate = match
+        while candidate >= 0 and not isWordStart(casedKey, candidate):
+            candidate = key.find(char, candidate + 1)
+        if candidate >= 0 and isSubsequence(query[i+1:], key, candidate + 1):
+            match = candidate
+            wordStarts += 1
+        position = match + 1
+    return wordStarts
+
+
+def getSubsequencePattern(query: str) -> re.Pattern:
+    """
+    Builds a regex that matches the query characters in order within a single name or id. Every gap excludes the character that
+    follows it, so the regex never backtracks
+    """
+    pattern = re.escape(query[0])
+    for char in query[1:]:
+        pattern += f"[^{re.escape(char)}{KEY_SEPARATOR}]*{re.escape(char)}"
+    return re.compile(pattern)
+
+
+class SearchIndex():
+    """
+    Search index over the names and ids of the packages loaded on a section. The keys are normalized once when a package is added.
+    Substring queries of three or more characters only check the packages that contain the rarest trigram of the query,
+    and rankedSearch scores the matches to return the most relevant ones first.
+    The references can be any hashable object (the sections use their packages).
+    Big catalogs can be indexed on a worker thread, on an index of their own that starts at a range of positions reserved on the index
+    of the section, and merged into it once their packages have been added, which only has to copy the postings.
+    """
+    firstPosition: int = 0
+    references: list[object] = []
+    positions: dict[object, int] = {}
+    keys: list[str] = []
+    casedKeys: list[str] = []
+    trigrams: dict[str, array] = {}
+    wordStarts: dict[str, dict[str, array]] = {}
+    lock: Lock = None
+
+    def __init__(self, firstPosition: int = 0):
+        """
+        The positions of an index built for the positions reserved on another one start at firstPosition, and it can only be merged into that one
+        """
+        self.firstPosition = firstPosition
+        self.lock = Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        self.references = []
+        self.positions = {}
+        self.keys = []
+        self.casedKeys = []
+        self.trigrams = {}
+        self.wordStarts = {}
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def add(self, reference: object, name: str, id: str) -> None:
+        casedKey = getCasedKey(name) + KEY_SEPARATOR + getCasedKey(id)
+        key = casedKey.lower()
+        with self.lock:
+            position = self.firstPosition + len(self.references)
+            self.references.append(reference)
+            self.keys.append(key)
+            self.casedKeys.append(casedKey)
+        self.positions[reference] = position
+        for trigram in getTrigrams(key):
+            if KEY_SEPARATOR in trigram:
+                continue
+            postings = self.trigrams.get(trigram)
+            if postings is None:
+                postings = self.trigrams[trigram] = array("I")
+            postings.append(position)
+        for offset in getWordStartOffsets(casedKey):
+            wordStart = key[offset:offset+WORD_START_LENGTH].split(KEY_SEPARATOR)[0]
+            bucket = self.wordStarts.setdefault(wordStart[:2], {})
+            postings = bucket.get(wordStart)
+            if postings is None:
+                postings = bucket[wordStart] = array("I")
+            postings.append(position)
+
+    def reserve(self, count: int) -> int:
+        """
+        Thread-safe. Reserves count positions for an index that will be built on another thread and merged later, and returns the first one.
+        The reserved positions that are not merged are left empty
+        """
+        with self.lock:
+            position = len(self.references)
+            self.references.extend([None] * count)
+            self.keys.extend([""] * count)
+            self.casedKeys.extend([""] * count)
+        return position
+
+    def merge(self, index: 'SearchIndex') -> None:
+        """
+        Adds the references of an index built for the positions reserved on this one. Its postings are moved, so it must not be used afterwards
+        """
+        start, end = index.firstPosition, index.firstPosition + len(index.references)
+        self.references[start:end] = index.references
+        self.keys[start:end] = index.keys
+        self.casedKeys[start:end] = index.casedKeys
+        self.positions.update(index.positions)
+        for trigram, postings in index.trigrams.items():
+            ownPostings = self.trigrams.get(trigram)
+            if ownPostings is None:
+                self.trigrams[trigram] = postings
+            else:
+                ownPostings.extend(postings)
+        for bucketKey, bucket in index.wordStarts.items():
+            ownBucket = self.wordStarts.setdefault(bucketKey, {})
+            for wordStart, postings in bucket.items():
+                ownPostings = ownBucket.get(wordStart)
+                if ownPostings is None:
+                    ownBucket[wordStart] = postings
+                else:
+                    ownPostings.extend(postings)
+
+    def remove(self, reference: object) -> None:
+        """
+        Drops the reference from the results. Its keys stay in the index until it is cleared
+        """
+        position = self.positions.pop(reference, None)
+        if position is not None:
+            self.references[position] = None
+
+    def matches(self, reference: object, query: str) -> bool:
+        """
+        Checks a single reference, without normalizing its name and id again
+        """
+        position = self.positions.get(reference)
+        return position is not None and normalizeSearchText(query) in self.keys[position]
+
+    def getCandidates(self, query: str) -> range | array:
+        """
+        Returns the positions of the keys that may contain the (normalized) query
+        """
+        if len(query) < TRIGRAM_LENGTH:
+            return range(len(self.keys))
+        smallestPostings = None
+        for trigram in getTrigrams(query):
+            postings = self.trigrams.get(trigram)
+            if postings is None:
+                return array("I")
+            if smallestPostings is None or len(postings) < len(smallestPostings):
+                smallestPostings = postings
+        return smallestPostings
+
+    def getSubstringMatches(self, query: str) -> list[int]:
+        keys = self.keys
+        references = self.references
+        return [position for position in self.getCandidates(query) if query in keys[position] and references[position] is not None]
+
+    def search(self, query: str) -> set[object]:
+        """
+        Returns the references whose name or id contains the query, ignoring case, dashes and spaces
+        """
+        query = normalizeSearchText(query)
+        if not query:
+            return set(self.positions)
+        references = self.references
+        return {references[position] for position in self.getSubstringMatches(query)}
+
+    def getWordStartMatches(self, query: str) -> set[int]:
+        """
+        Returns the positions of the packages with a word that starts with the (normalized) query, which must not be longer than WORD_START_LENGTH.
+        Multi-word queries are compared with the text that follows the start of every word.
+        """
+        references = self.references
+        matches = set()
+        buckets = [bucket for bucketKey, bucket in self.wordStarts.items() if bucketKey.startswith(query)] if len(query) < 2 else [self.wordStarts.get(query[:2], {})]
+        for bucket in buckets:
+            for wordStart, postings in bucket.items():
+                if wordStart.startswith(query):
+                    matches.update(postings)
+        return {position for position in matches if references[position] is not None}
+
+    def getTypoMatches(self, query: str) -> set[int]:
+        """
+        Like getWordStartMatches, but allowing one typo on the first WORD_START_LENGTH characters of the query,
+        as long as the first two characters are right (or swapped)
+        """
+        query = query[:WORD_START_LENGTH]
+        half = len(query) // 2
+        firstHalf, secondHalf = query[:half], query[half+1:]
+        references = self.references
+        matches = set()
+        checkedPrefixes: dict[str, bool] = {}
+        for bucketKey in {query[:2], query[1::-1]}:
+            for wordStart, postings in self.wordStarts.get(bucketKey, {}).items():
+                # A single typo (or swap) leaves the first half or the rest after the next character untouched, which discards most words before the slow check
+                if not (wordStart.startswith(firstHalf) or secondHalf in wordStart[half-1:]):
+                    continue
+                prefix = wordStart[:len(query)+1]
+                isMatch = checkedPrefixes.get(prefix)
+                if isMatch is None:
+                    isMatch = checkedPrefixes[prefix] = isTypoPrefix(query, prefix)
+                if isMatch:
+                    matches.update(postings)
+        return {position for position in matches if references[position] is not None}
+
+    def getSubsequenceMatches(self, query: str) -> set[int]:
+        """
+        Returns the positions of the packages whose name or id contains the query characters in order,
+        the first one starting a word (like vscode on Visual Studio Code)
+        """
+        candidates = set()
+        for bucketKey, bucket in self.wordStarts.items():
+            if bucketKey.startswith(query[0]):
+                for postings in bucket.values():
+                    candidates.update(postings)
+        pattern = getSubsequencePattern(query)
+        keys = self.keys
+        references = self.references
+        return {position for position in candidates if references[position] is not None and pattern.search(keys[position])}
+
+    def getScore(self, query: str, position: int) -> tuple[int, int]:
+        """
+        Returns the relevance of a package that contains the query. Ties are broken by the shortest keys
+        """
+        key = self.keys[position]
+        casedKey = self.casedKeys[position]
+        name, id = key.split(KEY_SEPARATOR)
+        lengthPenalty = -len(key)
+        if query == id:
+            return EXACT_ID_MATCH, lengthPenalty
+        if query == name:
+            return EXACT_NAME_MATCH, lengthPenalty
+        if query in id.split("."):
+            return ID_SEGMENT_MATCH, lengthPenalty
+        if name.startswith(query) or id.startswith(query):
+            return PREFIX_MATCH, lengthPenalty
+        offset = key.find(query)
+        while offset >= 0:
+            if isWordStart(casedKey, offset):
+                return WORD_START_MATCH, lengthPenalty
+            offset = key.find(query, offset + 1)
+        return SUBSTRING_MATCH, lengthPenalty
+
+    def getSubsequenceScore(self, query: str, position: int) -> tuple[int, int]:
+        """
+        Returns how many query characters start a word on the best of the name and id of the package, and the length penalty
+        """
+        key = self.keys[position]
+        casedKey = self.casedKeys[position]
+        name, id = key.split(KEY_SEPARATOR)
+        wordStarts = max(getSubsequenceWordStarts(query, name, casedKey[:len(name)]), getSubsequenceWordStarts(query, id, casedKey[len(name)+1:]))
+        return wordStarts, -len(key)
+
+    def rankedSearch(self, query: str, limit: int) -> list[object]:
+        """
+        Returns up to limit references, the most relevant first: exact ids and names, id segments, prefixes, word starts and substrings.
+        Only the candidates that can make it to the results are scored: if there are enough word start matches, plain substring matches
+        are not looked for, and typo-tolerant and subsequence matches are only looked for when the substring matches don't fill the results.
+        """
+        query = normalizeSearchText(query)
+        if not query or limit <= 0:
+            return []
+        keys = self.keys
+        matches = self.getWordStartMatches(query) if len(query) <= WORD_START_LENGTH else set()
+        if len(matches) < limit:
+            matches.update(self.getSubstringMatches(query))
+        results = heapq.nlargest(limit, sorted(matches), key=lambda position: self.getScore(query, position))
+        if len(results) < limit and len(query) >= TYPO_MIN_LENGTH:
+            typoMatches = self.getTypoMatches(query) - matches
+            results += heapq.nlargest(limit - len(results), sorted(typoMatches), key=lambda position: -len(keys[position]))
+            matches |= typoMatches
+        if len(results) < limit and len(query) >= SUBSEQUENCE_MIN_LENGTH:
+            subsequenceMatches = self.getSubsequenceMatches(query) - matches
+            results += heapq.nlargest(limit - len(results), sorted(subsequenceMatches), key=lambda position: self.getSubsequenceScore(query, position))
+        references = self.references
+        return [references[position] for position in results]
@@ -0,0 +1,92 @@
+from typing import Callable, Iterable
+
+
+class SortOrderCache():
+    """
+    Keeps the items of a package section sorted by every sortable column, so filtering doesn't sort all the packages again.
+    The order of a column is built the first time it is sorted by, and then kept up to date as items are added and removed:
+    new items are merged on the next sort, which is linear because the existing order is already a sorted run.
+    The descending order of a column is a stable sort of its own (the items with equal keys keep the same order both ways),
+    built from the ascending one when it is first needed, and rebuilt after new items get merged.
+    The keys of the volatile columns can change at any time (like the checkbox column), so they are sorted on every call instead.
+    """
+    keyFunctions: dict[int, Callable[[object], object]] = {}
+    volatileColumns: set[int] = set()
+    orders: dict[int, list[object]] = {}
+    descendingOrders: dict[int, list[object]] = {}
+    keys: dict[int, dict[object, object]] = {}
+    pendingItems: dict[int, list[object]] = {}
+
+    def __init__(self, keyFunctions: dict[int, Callable[[object], object]], volatileColumns: Iterable[int] = ()):
+        self.keyFunctions = keyFunctions
+        self.volatileColumns = set(volatileColumns)
+        self.clear()
+
+    def clear(self) -> None:
+        self.orders = {}
+        self.descendingOrders = {}
+        self.keys = {}
+        self.pendingItems = {}
+
+    def invalidate(self, column: int) -> None:
+        """
+        Drops the order of a column, to be called when the sort key of an item on that column changes
+        """
+        self.orders.pop(column, None)
+        self.descendingOrders.pop(column, None)
+        self.keys.pop(column, None)
+        self.pendingItems.pop(column, None)
+
+    def add(self, item: object) -> None:
+        for pendingItems in self.pendingItems.values():
+            pendingItems.append(item)
+
+    def remove(self, items: set[object]) -> None:
+        for column, order in self.orders.items():
+            self.orders[column] = [item for item in order if item not in items]
+            if column in self.descendingOrders:
+                self.descendingOrders[column] = [item for item in self.descendingOrders[column] if item not in items]
+            self.pendingItems[column] = [item for item in self.pendingItems[column] if item not in items]
+            keys = self.keys[column]
+            for item in items:
+                keys.pop(item, None)
+
+    def getOrder(self, column: int, allItems: list[object]) -> list[object]:
+        order = self.orders.get(column)
+        keys = self.keys.get(column)
+        if order is None:
+            order = allItems.copy()
+            keys = {}
+            self.orders[column] = order
+            self.keys[column] = keys
+            pendingItems = order
+        else:
+            pendingItems = self.pendingItems[column]
+            order.extend(pendingItems)
+        if pendingItems:
+            keyFunction = self.keyFunctions[column]
+            for item in pendingItems:
+                keys[item] = keyFunction(item)
+            order.sort(key=keys.__getitem__)
+            self.descendingOrders.pop(column, None)
+        self.pendingItems[column] = []
+        return order
+
+    def getDescendingOrder(self, column: int, allItems: list[object]) -> list[object]:
+        order = self.getOrder(column, allItems)
+        descendingOrder = self.descendingOrders.get(column)
+        if descendingOrder is None:
+            descendingOrder = sorted(order, key=self.keys[column].__getitem__, reverse=True)
+            self.descendingOrders[column] = descendingOrder
+        return descendingOrder
+
+    def getSortedItems(self, allItems: list[object], column: int, descending: bool, selectedItems: set[object]) -> list[object]:
+        """
+        Returns the selected items sorted by the given column. Columns without a key function keep the order of allItems
+        """
+        if column in self.volatileColumns:
+            return sorted((item for item in allItems if item in selectedItems), key=self.keyFunctions[column], reverse=descending)
+        if column not in self.keyFunctions:
+            return [item for item in allItems if item in selectedItems]
+        order = self.getDescendingOrder(column, allItems) if descending else self.getOrder(column, allItems)
+        return [item for item in order if item in selectedItems]
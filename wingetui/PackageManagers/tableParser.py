@@ -0,0 +1,172 @@
+import unicodedata
+from functools import lru_cache
+from operator import itemgetter
+
+SPINNER_CHARACTERS = "-\\|/ \x08"
+VERSION_MARKERS = ("< ", "> ")
+
+
+class ColumnTableParser():
+    """
+    Single-pass parser for the fixed-width tables printed by winget (search, upgrade, list...)
+    The column boundaries are computed once from the header line (the line right above the dashes line),
+    and every row is then sliced at those boundaries, without any further splitting or joining.
+    """
+    columns: list[str] = []
+    columnStarts: list[int] = []
+    versionColumns: tuple[int] = ()
+    requiredColumns: tuple[int] = ()
+    isInsideTable: bool = False
+    previousLine: str = ""
+    getCells: itemgetter = None
+    getSeparators: itemgetter = None
+    separators: tuple[str] | str = ()
+
+    def __init__(self, versionColumns: tuple[int] = (), requiredColumns: tuple[int] = (0, 1)):
+        self.columns = []
+        self.columnStarts = []
+        self.versionColumns = versionColumns
+        self.requiredColumns = requiredColumns
+        self.isInsideTable = False
+        self.previousLine = ""
+        self.getCells = None
+        self.getSeparators = None
+        self.separators = ()
+
+    @staticmethod
+    def cleanLine(line: str) -> str:
+        """
+        Removes the progress spinner junk (carriage returns, backspaces and spinner frames) winget prints before the table
+        """
+        line = line.split("\r")[-1].split("\x08")[-1].strip()
+        if ColumnTableParser.isDashesLine(line):
+            return line
+        return line.lstrip(SPINNER_CHARACTERS)
+
+    @staticmethod
+    def isDashesLine(line: str) -> bool:
+        return line.startswith("---") and line.strip("-") == ""
+
+    def setHeader(self, header: str) -> None:
+        self.columns = header.split()
+        self.columnStarts = []
+        position = 0
+        for column in self.columns:
+            position = header.index(column, position)
+            self.columnStarts.append(position)
+            position += len(column)
+        if len(self.columnStarts) > 1:
+            # Fast path for the usual rows (ASCII, with a space right before every column): all the cells are sliced at once
+            self.getCells = itemgetter(*[slice(start, end) for start, end in zip(self.columnStarts, self.columnStarts[1:] + [None])])
+            self.getSeparators = itemgetter(*[start-1 for start in self.columnStarts[1:]])
+            self.separators = self.getSeparators(" " * self.columnStarts[-1])
+        else:
+            self.getCells = None
+
+    def parseLine(self, line: str) -> list[str] | None:
+        """
+        Feeds a line of output to the parser. Will return the list of cells (one per header column) if the line was a table row, None otherwise.
+        A blank line closes the current table, and a new header+dashes pair opens a new one (winget upgrade may print more than one table).
+        """
+        if not self.isInsideTable:
+            line = self.cleanLine(line)
+            if self.isDashesLine(line):
+                if self.previousLine:
+                    self.setHeader(self.previousLine)
+                    self.isInsideTable = True
+            elif line:
+                self.previousLine = line
+            return None
+        line = line.rstrip()
+        if not line:
+            self.isInsideTable = False
+            self.previousLine = ""
+            return None
+        if self.isDashesLine(line):
+            return None
+        if self.getCells and len(line) > self.columnStarts[-1] and isNarrowLine(line) and self.getSeparators(line) == self.separators:
+            cells = [cell.strip() for cell in self.getCells(line)]
+            if "< " in line or "> " in line:
+                self.removeVersionMarkers(cells)
+        else:
+            cells = self.parseIrregularRow(line)
+            if cells is None:
+                return None
+        for index in self.requiredColumns:
+            if not cells[index]:
+                return None
+        return cells
+
+    def parseIrregularRow(self, line: str) -> list[str] | None:
+        """
+        Parses a row that is shorter than the header, has wide characters or has a cell that overflows into the next column
+        """
+        starts = self.columnStarts if isNarrowLine(line) else self.getCharacterOffsets(line)
+        for index in self.requiredColumns:
+            if 0 < index < len(starts) and 0 < starts[index] < len(line) and line[starts[index]-1] != " ":
+                # Text running across a column boundary is a message printed after the table (such as "1 package(s) have version numbers that cannot be determined..."), not a row
+                return None
+        return self.sliceRow(line, starts)
+
+    def sliceRow(self, line: str, starts: list[int]) -> list[str]:
+        lineLength = len(line)
+        boundaries: list[int] = [0]
+        for start in starts[1:]:
+            if start >= lineLength:
+                boundaries.append(lineLength)
+                continue
+            start = max(start, boundaries[-1])
+            if start > boundaries[-1] and line[start-1] != " ":
+                # The previous cell overflowed into this column, move the start back to the beginning of the cut word
+                snapped = line.rfind(" ", boundaries[-1], start) + 1
+                start = snapped if snapped > boundaries[-1] else start
+            boundaries.append(start)
+        boundaries.append(lineLength)
+        cells = [line[boundaries[i]:boundaries[i+1]].strip() for i in range(len(starts))]
+        self.removeVersionMarkers(cells)
+        return cells
+
+    def removeVersionMarkers(self, cells: list[str]) -> None:
+        """
+        Removes the "<" and ">" winget puts before the versions it can't determine exactly
+        """
+        for index in self.versionColumns:
+            if index < len(cells) and cells[index][:2] in VERSION_MARKERS:
+                cells[index] = cells[index][2:].strip()
+
+    def getCharacterOffsets(self, line: str) -> list[int]:
+        """
+        The header positions are terminal columns, while wide (CJK) characters take two columns and combining marks none.
+        Translates the header column positions to character offsets for the given row.
+        """
+        offsets: list[int] = []
+        starts = self.columnStarts
+        width = 0
+        currentColumn = 0
+        for index, char in enumerate(line):
+            while currentColumn < len(starts) and width >= starts[currentColumn]:
+                offsets.append(index)
+                currentColumn += 1
+            if currentColumn == len(starts):
+                break
+            width += getCharacterWidth(char)
+        while len(offsets) < len(starts):
+            offsets.append(len(line))
+        return offsets
+
+
+@lru_cache(maxsize=4096)
+def getCharacterWidth(char: str) -> int:
+    """
+    Returns the terminal columns taken by the given character: two for wide (CJK) characters, none for combining marks and one otherwise
+    """
+    if unicodedata.combining(char):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in "WF" else 1
+
+
+def isNarrowLine(line: str) -> bool:
+    """
+    Returns if every character of the line takes a single terminal column, so its character offsets are its terminal columns
+    """
+    return line.isascii() or all(getCharacterWidth(char) == 1 for char in set(line) if not char.isascii())
@@ -0,0 +1,107 @@
+import re
+from functools import lru_cache
+
+# Release phases, in the order they sort for the same release numbers
+PHASE_DEVELOPMENT = 0
+PHASE_PRERELEASE = 1
+PHASE_RELEASE = 2
+PHASE_POSTRELEASE = 3
+
+PRERELEASE_TAGS = {
+    "alpha": 1, "a": 1,
+    "beta": 2, "b": 2,
+    "preview": 3, "pre": 3,
+    "rc": 4, "c": 4,
+}
+DEVELOPMENT_TAGS = ("dev",)
+POSTRELEASE_TAGS = ("post", "rev", "r", "patch", "p")
+TAG_SEPARATORS = "-._ "
+
+RELEASE_REGEX = re.compile(r"\d+(?:[.,]\d+)*")
+TAG_REGEX = re.compile(r"([-._ ]*)([a-z]+)(\d*)")
+TAG_TOKEN_REGEX = re.compile(r"[a-z]+|\d+")
+
+UNKNOWN_VERSION_KEY = (0, (), PHASE_RELEASE, ())
+
+
+@lru_cache(maxsize=65536)
+def parseVersion(version: str) -> tuple[tuple, bool]:
+    """
+    Parses a version string (semver, calendar, four-part Windows, PEP 440, chocolatey and npm prereleases...) into a tuple that compares
+    like the versions do: 1.10.2 > 1.9, 1.0.0-beta.2 < 1.0.0-rc.1 < 1.0.0 < 1.0.0.post1, 2.0 == 2.0.0, 1.1.1c < 1.1.1d.
+    Only the known PEP 440 and semver tags are prereleases, and only after a separator or followed by a number (1.0-beta, 1.0a1),
+    so a bare trailing letter (1.1.1d) is a release component. Returns the key and whether it is ambiguous: a version that does not
+    start with a number (Unknown, latest...), which sorts below every parsed version, or one with an unknown tag (1.0.0-next.3,
+    2.1.0-x64), which sorts above the release as if the tag was a release component.
+    """
+    version = version.strip().lower()
+    if version[:1] == "v":
+        version = version[1:]
+    version = version.split("+")[0]
+    release = RELEASE_REGEX.match(version)
+    if not release:
+        return ((0, (), PHASE_RELEASE, ((1, version),)) if version else UNKNOWN_VERSION_KEY, True)
+    numbers = [int(number) for number in re.split(r"[.,]", release.group())]
+    while len(numbers) > 1 and numbers[-1] == 0:
+        numbers.pop()
+    suffix = version[release.end():]
+    tokens = TAG_TOKEN_REGEX.findall(suffix)
+    if not tokens:
+        return ((1, tuple(numbers), PHASE_RELEASE, ()), False)
+    identifiers = tuple((0, int(token)) if token.isdigit() else (1, token) for token in tokens[1:])
+    if tokens[0].isdigit() and suffix[:1] in TAG_SEPARATORS:
+        return ((1, tuple(numbers), PHASE_POSTRELEASE, (0, (0, int(tokens[0]))) + identifiers), False)
+    tag = TAG_REGEX.match(suffix)
+    if tag:
+        separator, name, number = tag.groups()
+        wholeWord = number or suffix[tag.end():tag.end()+1] in ("", *TAG_SEPARATORS)
+        if wholeWord and (separator or number or len(name) > 1):
+            if name in DEVELOPMENT_TAGS:
+                return ((1, tuple(numbers), PHASE_DEVELOPMENT, (0,) + identifiers), False)
+            elif name in PRERELEASE_TAGS:
+                return ((1, tuple(numbers), PHASE_PRERELEASE, (PRERELEASE_TAGS[name],) + identifiers), False)
+            elif name in POSTRELEASE_TAGS:
+                return ((1, tuple(numbers), PHASE_POSTRELEASE, (1,) + identifiers), False)
+        elif not separator and len(name) == 1 and tag.end() == len(suffix):
+            return ((1, tuple(numbers), PHASE_RELEASE, ((1, name),)), False)
+    return ((1, tuple(numbers), PHASE_RELEASE, tuple((0, int(token)) if token.isdigit() else (1, token) for token in tokens)), True)
+
+
+def getVersionKey(version: str) -> tuple:
+    """
+    Returns the comparable key of the version (see parseVersion)
+    """
+    return parseVersion(version)[0]
+
+
+def isNewerVersion(newVersion: str, oldVersion: str) -> bool:
+    """
+    Returns True if newVersion is newer than oldVersion. Unless both of them parse unambiguously, any different version is considered newer,
+    so that an update reported by a package manager is never dropped because of a version that could not be understood.
+    """
+    newKey, newAmbiguous = parseVersion(newVersion)
+    oldKey, oldAmbiguous = parseVersion(oldVersion)
+    if not newAmbiguous and not oldAmbiguous:
+        return newKey > oldKey
+    return newVersion.strip() != oldVersion.strip()
+
+
+def encodeNumber(number: int) -> str:
+    digits = str(number)
+    return f"{len(digits):02d}{digits}"
+
+
+def getVersionSortString(version: str) -> str:
+    """
+    Encodes the version key into a string that sorts (as plain text) exactly like the key does, to be used on Qt's text-sorted columns.
+    """
+    parsed, numbers, phase, tag = getVersionKey(version)
+    encoded = str(parsed) + ".".join(encodeNumber(number) for number in numbers) + " " + str(phase)
+    for identifier in tag:
+        if type(identifier) == int:
+            encoded += str(identifier)
+        elif identifier[0] == 0:
+            encoded += "0" + encodeNumber(identifier[1]) + "."
+        else:
+            encoded += "1" + identifier[1] + " ."
+    return encoded
@@ -888,7 +888,7 @@ try:
             margin-left: 0px;
             padding-left: 10px;
         }}
-        QTreeWidget {{
+        QTreeWidget, TableView {{
             show-decoration-selected: 0;
             background-color: transparent;
             padding: 0px;
@@ -896,7 +896,7 @@ try:
             border-radius: 6px;
             border: 0px solid #1f1f1f;
         }}
-        QTreeWidget::item {{
+        QTreeWidget::item, TableView::item {{
             margin-top: 3px;
             margin-bottom: 3px;
             padding-top: 3px;
@@ -906,7 +906,7 @@ try:
             border-bottom: 1px solid #1f1f1f;
             border-top: 1px solid #1f1f1f;
         }}
-        QTreeWidget::item:selected {{
+        QTreeWidget::item:selected, TableView::item:selected {{
             margin-top: 2px;
             margin-bottom: 2px;
             padding: 0px;
@@ -918,7 +918,7 @@ try:
             border-top: 1px solid #303030;
             color: rgb({colors[2]});
         }}
-        QTreeWidget::item:hover {{
+        QTreeWidget::item:hover, TableView::item:hover {{
             margin-top: 2px;
             margin-bottom: 2px;
             padding: 0px;
@@ -929,28 +929,28 @@ try:
             border-bottom: 1px solid #303030;
             border-top: 1px solid #303030;
         }}
-        QTreeWidget::item:first {{
+        QTreeWidget::item:first, TableView::item:first {{
             border-top-left-radius: 6px;
             border-bottom-left-radius: 6px;
             border-left: 1px solid #1f1f1f;
             margin-left: 0px;
         }}
-        QTreeWidget::item:last {{
+        QTreeWidget::item:last, TableView::item:last {{
             border-top-right-radius: 6px;
             border-bottom-right-radius: 6px;
             border-right: 1px solid #1f1f1f;
             margin-right: 0px;
         }}
-        QTreeWidget::item:first:selected {{
+        QTreeWidget::item:first:selected, TableView::item:first:selected {{
             border-left: 1px solid #303030;
         }}
-        QTreeWidget::item:last:selected {{
+        QTreeWidget::item:last:selected, TableView::item:last:selected {{
             border-right: 1px solid #303030;
         }}
-        QTreeWidget::item:first:hover {{
+        QTreeWidget::item:first:hover, TableView::item:first:hover {{
             border-left: 1px solid #303030;
         }}
-        QTreeWidget::item:last:hover {{
+        QTreeWidget::item:last:hover, TableView::item:last:hover {{
             border-right: 1px solid #303030;
         }}
         QProgressBar {{
@@ -966,42 +966,42 @@ try:
             height: 16px;
             width: 16px;
         }}
-        QTreeView::indicator{{
+        QTreeView::indicator,TableView::indicator{{
             height:18px;
             width: 18px;
             margin: 0px;
             margin-left: 4px;
             margin-top: 2px;
         }}
-        QTreeView::indicator:unchecked,QCheckBox::indicator:unchecked {{
+        QTreeView::indicator:unchecked,TableView::indicator:unchecked,QCheckBox::indicator:unchecked {{
             background-color: rgba(30, 30, 30, 25%);
             border: 1px solid #444444;
             border-radius: 4px;
         }}
-        QTreeView::indicator:disabled,QCheckBox::indicator:disabled {{
+        QTreeView::indicator:disabled,TableView::indicator:disabled,QCheckBox::indicator:disabled {{
             background-color: rgba(30, 30, 30, 5%);
             color: #dddddd;
             border: 1px solid rgba(255, 255, 255, 5%);
             border-radius: 4px;
         }}
-        QTreeView::indicator:unchecked:hover,QCheckBox::indicator:unchecked:hover {{
+        QTreeView::indicator:unchecked:hover,TableView::indicator:unchecked:hover,QCheckBox::indicator:unchecked:hover {{
             background-color: #2a2a2a;
             border: 1px solid #444444;
             border-radius: 4px;
         }}
-        QTreeView::indicator:checked,QCheckBox::indicator:checked {{
+        QTreeView::indicator:checked,TableView::indicator:checked,QCheckBox::indicator:checked {{
             border: 1px solid #444444;
             background-color: rgba({colors[1]}, 80%);
             border-radius: 4px;
             image: url("{getMedia("tick")}");
         }}
-        QTreeView::indicator:disabled,QCheckBox::indicator:checked:disabled {{
+        QTreeView::indicator:disabled,TableView::indicator:disabled,QCheckBox::indicator:checked:disabled {{
             border: 1px solid #444444;
             background-color: #303030;
             color: #dddddd;
             border-radius:4px;
         }}
-        QTreeView::indicator:checked:hover,QCheckBox::indicator:checked:hover {{
+        QTreeView::indicator:checked:hover,TableView::indicator:checked:hover,QCheckBox::indicator:checked:hover {{
             border: 1px solid #444444;
             background-color: rgb({colors[2]});
             border-radius: 4px;
@@ -1629,7 +1629,7 @@ try:
             margin-left: 0px;
             padding-left: 10px;
         }}
-        QTreeWidget {{
+        QTreeWidget, TableView {{
             show-decoration-selected: 0;
             background-color: transparent;
             padding: 0px;
@@ -1637,7 +1637,7 @@ try:
             border-radius: 6px;
             border: 0px solid rgba(240, 240, 240, 55%);
         }}
-        QTreeWidget::item {{
+        QTreeWidget::item, TableView::item {{
             margin-top: 3px;
             margin-bottom: 3px;
             padding-top: 3px;
@@ -1648,7 +1648,7 @@ try:
             border-top: 1px solid rgba(220, 220, 220, 35%);
             border-bottom: 1px solid rgba(220, 220, 220, 35%);
         }}
-        QTreeWidget::item:selected {{
+        QTreeWidget::item:selected, TableView::item:selected {{
             margin-top: 2px;
             margin-bottom: 2px;
             padding: 0px;
@@ -1661,10 +1661,10 @@ try:
             border-top: 1px solid rgba(220, 220, 220, 80%);
             color: rgb({colors[3]});
         }}
-        QTreeWidget::branch {{
+        QTreeWidget::branch, TableView::branch {{
             background-color: transparent;
         }}
-        QTreeWidget::item:hover {{
+        QTreeWidget::item:hover, TableView::item:hover {{
             margin-top: 2px;
             margin-bottom: 2px;
             padding: 0px;
@@ -1676,26 +1676,26 @@ try:
             border-bottom: 1px solid rgba(220, 220, 220, 80%);
             border-top: 1px solid rgba(220, 220, 220, 80%);
         }}
-        QTreeWidget::item:first {{
+        QTreeWidget::item:first, TableView::item:first {{
             border-top-left-radius: 6px;
             border-bottom-left-radius: 6px;
             border-left: 1px solid rgba(220, 220, 220, 35%);
         }}
-        QTreeWidget::item:last {{
+        QTreeWidget::item:last, TableView::item:last {{
             border-top-right-radius: 6px;
             border-bottom-right-radius: 6px;
             border-right: 1px solid rgba(220, 220, 220, 35%);
         }}
-        QTreeWidget::item:first:selected {{
+        QTreeWidget::item:first:selected, TableView::item:first:selected {{
             border-left: 1px solid rgba(220, 220, 220, 80%);
         }}
-        QTreeWidget::item:last:selected {{
+        QTreeWidget::item:last:selected, TableView::item:last:selected {{
             border-right: 1px solid rgba(220, 220, 220, 80%);
         }}
-        QTreeWidget::item:first:hover {{
+        QTreeWidget::item:first:hover, TableView::item:first:hover {{
             border-left: 1px solid rgba(220, 220, 220, 80%);
         }}
-        QTreeWidget::item:last:hover {{
+        QTreeWidget::item:last:hover, TableView::item:last:hover {{
             border-right: 1px solid rgba(220, 220, 220, 80%);
         }}
         QProgressBar {{
@@ -1711,42 +1711,42 @@ try:
             height: 16px;
             width: 16px;
         }}
-        QTreeView::indicator{{
+        QTreeView::indicator,TableView::indicator{{
             height:18px;
             width: 18px;
             margin: 0px;
             margin-left: 4px;
             margin-top: 2px;
         }}
-        QTreeView::indicator:unchecked,QCheckBox::indicator:unchecked {{
+        QTreeView::indicator:unchecked,TableView::indicator:unchecked,QCheckBox::indicator:unchecked {{
             background-color: rgba(255, 255, 255, 25%);
             border: 1px solid rgba(0, 0, 0, 10%);
             border-radius: 4px;
         }}
-        QTreeView::indicator:disabled,QCheckBox::indicator:disabled {{
+        QTreeView::indicator:disabled,TableView::indicator:disabled,QCheckBox::indicator:disabled {{
             background-color: rgba(240, 240, 240, 0%);
             color: #444444;
             border: 1px solid rgba(0, 0, 0, 5%);
             border-radius: 4px;
         }}
-        QTreeView::indicator:unchecked:hover,QCheckBox::indicator:unchecked:hover {{
+        QTreeView::indicator:unchecked:hover,TableView::indicator:unchecked:hover,QCheckBox::indicator:unchecked:hover {{
             background-color: rgba(0, 0, 0, 5%);
             border: 1px solid rgba(0, 0, 0, 20%);
             border-radius: 4px;
         }}
-        QTreeView::indicator:checked,QCheckBox::indicator:checked {{
+        QTreeView::indicator:checked,TableView::indicator:checked,QCheckBox::indicator:checked {{
             border: 1px solid rgb({colors[3]});
             background-color: rgb({colors[2]});
             border-radius: 4px;
             image: url("{getMedia("tick")}");
         }}
-        QTreeView::indicator:checked:disabled,QCheckBox::indicator:checked:disabled {{
+        QTreeView::indicator:checked:disabled,TableView::indicator:checked:disabled,QCheckBox::indicator:checked:disabled {{
             border: 1px solid #444444;
             background-color: #303030;
             color: #444444;
             border-radius: 4px;
         }}
-        QTreeView::indicator:checked:hover,QCheckBox::indicator:checked:hover {{
+        QTreeView::indicator:checked:hover,TableView::indicator:checked:hover,QCheckBox::indicator:checked:hover {{
             border: 1px solid rgb({colors[3]});
             background-color: rgb({colors[3]});
             border-radius: 4px;
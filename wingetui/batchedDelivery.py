@@ -0,0 +1,96 @@
+import time
+from collections import deque
+from typing import Callable, Iterable, Iterator
+from PySide6.QtCore import QObject, QTimer, Signal
+
+TARGET_FRAME_TIME = 16 # Milliseconds. Delivering a chunk should never take longer than a frame
+FRAME_TIME_BUDGET = 0.75 # Fraction of the frame the chunks should aim for, leaving room for painting the new items
+MIN_CHUNK_SIZE = 10
+MAX_CHUNK_SIZE = 5000
+
+
+class BatchedDelivery(QObject):
+    """
+    Delivers the items loaded on worker threads to the main thread in chunks, one chunk per event loop iteration,
+    instead of one queued signal per item. The chunk size adapts to the measured time per item, so every chunk fits in a frame.
+    Callables can be queued too, and they are called in order with the items (to signal that a loader has finished, for example).
+    The queued iterables are not copied: their items are pulled from them as every chunk gets delivered, so the packages of a lazy
+    list (or a generator) are only built when they are about to be added to the section.
+    Items can be queued with a deliver function of their own, to be delivered differently from the rest.
+    """
+    itemsQueued = Signal()
+    queue: deque = None
+    deliverItem: Callable[[object], None] = None
+    chunkSize: int = 100
+    deliveredItems: int = 0
+    longestChunk: float = 0
+
+    def __init__(self, deliverItem: Callable[[object], None], parent: QObject = None):
+        super().__init__(parent)
+        self.queue = deque()
+        self.deliverItem = deliverItem
+        self.chunkSize = 100
+        self.deliveredItems = 0
+        self.longestChunk = 0
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.deliverChunk)
+        self.itemsQueued.connect(self.startDelivery)
+
+    def queueItems(self, items: Iterable[object], deliverItem: Callable[[object], None] = None) -> None:
+        """
+        Thread-safe. Queues the given items to be delivered on the main thread (with deliverItem, if given, instead of the default deliver function).
+        They are read from the iterable while they get delivered
+        """
+        self.queue.append((iter(items), deliverItem if deliverItem else self.deliverItem))
+        self.itemsQueued.emit()
+
+    def queueCall(self, function: Callable[[], None]) -> None:
+        """
+        Thread-safe. Queues a function to be called on the main thread after the items queued before it have been delivered
+        """
+        self.queue.append(function)
+        self.itemsQueued.emit()
+
+    def clear(self) -> None:
+        """
+        Drops the items and calls that have not been delivered yet
+        """
+        self.queue.clear()
+        self.timer.stop()
+
+    def isDelivering(self) -> bool:
+        return len(self.queue) > 0
+
+    def startDelivery(self) -> None:
+        if self.queue and not self.timer.isActive():
+            self.timer.start()
+
+    def deliverChunk(self) -> None:
+        startTime = time.perf_counter()
+        deadline = startTime + TARGET_FRAME_TIME * FRAME_TIME_BUDGET / 1000
+        delivered = 0
+        while self.queue and delivered < self.chunkSize:
+            entry: tuple[Iterator[object], Callable[[object], None]] | Callable[[], None] = self.queue[0]
+            if callable(entry):
+                self.queue.popleft()
+                entry()
+                continue
+            items, deliverItem = entry
+            for item in items:
+                deliverItem(item)
+                delivered += 1
+                if delivered >= self.chunkSize or (delivered % 16 == 0 and time.perf_counter() > deadline): # The chunk size is an estimate, never go over the frame budget
+                    break
+            else:
+                self.queue.popleft()
+                continue
+            break
+        elapsed = (time.perf_counter() - startTime) * 1000
+        self.longestChunk = max(self.longestChunk, elapsed)
+        self.deliveredItems += delivered
+        if delivered > 0 and elapsed > 0:
+            idealChunkSize = int(delivered * TARGET_FRAME_TIME * FRAME_TIME_BUDGET / elapsed)
+            self.chunkSize = max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, (self.chunkSize + idealChunkSize) // 2 if idealChunkSize > self.chunkSize else idealChunkSize))
+        if not self.queue:
+            self.timer.stop()
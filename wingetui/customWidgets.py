@@ -1,6 +1,6 @@
 from datetime import datetime
 from functools import partial
-from typing import Optional
+from typing import Callable, Optional
 from PySide6.QtCore import *
 import PySide6.QtCore
 from PySide6.QtGui import *
@@ -10,7 +10,13 @@ from win32mica import *
 from tools import *
 from tools import _
 from genericCustomWidgets import *
+from batchedDelivery import BatchedDelivery
+from packageListModel import PackageListModel, PackageListSortingModel
 from PackageManagers.PackageClasses import *
+from PackageManagers.searchIndex import SearchIndex
+from PackageManagers.sortOrders import SortOrderCache
+from PackageManagers.packageResolver import PackageResolver
+from PackageManagers.packageBundle import BundleEntry, createBundle, readBundle, getOptionValues, setOptionValues
 
 from PackageManagers.winget import Winget
 from PackageManagers.scoop import Scoop
@@ -59,6 +65,16 @@ DynamicPackagesLoadedDict: dict[PackageClasses.PackageManagerModule:bool] = {
     Winget: False  # Microsoft Store source only
 }
 
+BundleManagers: dict[str, PackageClasses.PackageManagerModule] = { # Package manager of every section of an exported bundle
+    "winget": Winget,
+    "scoop": Scoop,
+    "chocolatey": Choco,
+    "pip": Pip,
+    "npm": Npm,
+}
+
+FILTER_DEBOUNCE_TIME = 100 # Milliseconds the query must stay unchanged before the package list is filtered
+
 class QLinkLabel(QLabel):
     def __init__(self, text: str = "", stylesheet: str = ""):
         super().__init__(text)
@@ -734,15 +750,18 @@ class SoftwareSection(QWidget):
     discoverLabelIsSmall: bool = False
     isToolbarSmall: bool = False
     toolbarDefaultWidth: int = 0
-    PackageItemReference: dict[Package:TreeWidgetItemWithQAction] = {}
-    ItemPackageReference: dict[TreeWidgetItemWithQAction:Package] = {}
+    PackageItemReference: dict[Package:Package] = {}
+    ItemPackageReference: dict[Package:Package] = {}
     IdPackageReference: dict[str:Package] = {}
     sectionName: str = ""
-    packageItems: list[TreeWidgetItemWithQAction] = []
-    showableItems: list[TreeWidgetItemWithQAction] = []
-    addedItems: list[TreeWidgetItemWithQAction] = []
-    shownItems: list[TreeWidgetItemWithQAction] = []
-    nextItemToShow: int = 0
+    packageItems: list[Package] = []
+    showableItems: list[Package] = []
+    packageActions: dict[Package:QAction] = {}
+    searchIndex: SearchIndex = None
+    sortOrders: SortOrderCache = None
+    packageModel: PackageListModel = None
+    packageListModel: PackageListSortingModel = None
+    loadGeneration: int = 0 # Increased on every reload, so the loaders of a previous load stop queueing packages
 
     PackageManagers: list[PackageManagerModule] = PackageManagersList
     PackagesLoaded: dict[PackageManagerModule:bool] = {}
@@ -752,12 +771,15 @@ class SoftwareSection(QWidget):
     def __init__(self, parent = None, sectionName: str = "Install"):
         super().__init__(parent = parent)
         self.sectionName = sectionName
+        self.searchIndex = SearchIndex()
+        self.sortOrders = SortOrderCache(self.getSortKeyFunctions(), volatileColumns=(0,))
         self.infobox = globals.infobox
         self.packageExporter = PackageExporter(self)
         self.setStyleSheet("margin: 0px;")
 
         self.programbox = QWidget()
         self.callInMain.connect(lambda f: f())
+        self.packageDelivery = BatchedDelivery(self.addItem, self)
 
         self.mainLayout = QVBoxLayout()
         self.mainLayout.setContentsMargins(0, 0, 0, 0)
@@ -788,6 +810,11 @@ class SoftwareSection(QWidget):
         self.forceCheckBox.setChecked(not getSettings(f"DisableInstantSearchOn{sectionName}"))
         self.forceCheckBox.clicked.connect(lambda v: setSettings(f"DisableInstantSearchOn{sectionName}", bool(not v)))
          
+        self.filterTimer = QTimer(self) # Restarted on every keystroke, so only the settled query gets filtered
+        self.filterTimer.setSingleShot(True)
+        self.filterTimer.setInterval(FILTER_DEBOUNCE_TIME)
+        self.filterTimer.timeout.connect(lambda: self.finishFiltering(self.query.text()))
+
         self.query = CustomLineEdit()
         self.query.setPlaceholderText(" PlaceholderText")
         self.query.returnPressed.connect(lambda: (self.filter()))
@@ -840,60 +867,9 @@ class SoftwareSection(QWidget):
 
         self.packageListScrollBar = CustomScrollBar()
         self.packageListScrollBar.setOrientation(Qt.Vertical)
-        self.packageListScrollBar.valueChanged.connect(lambda v: self.addItemsToTreeWidget() if v>=(self.packageListScrollBar.maximum()-20) else None)
-
-        class HeaderView(QHeaderView):
-            sortOrder = Qt.SortOrder.DescendingOrder
-            def __init__(self, orientation: Qt.Orientation, parent: TreeWidget) -> None:
-                super().__init__(orientation, parent)
-                self.treewidget = parent
-                self.sectionClicked.connect(self.clickNewSection)
-                
-            def clickNewSection(self, s: int):
-                if s==3:
-                    self.sortOrder = Qt.SortOrder.AscendingOrder if self.sortOrder == Qt.SortOrder.DescendingOrder else Qt.SortOrder.DescendingOrder
-                    self.treewidget.sortByColumn(6, self.sortOrder)
-
-        self.packageList = TreeWidget("")
-        self.packageList.setHeader(HeaderView(Qt.Orientation.Horizontal, self.packageList))
-        self.packageList.setSortingEnabled(True)
-        self.packageList.sortByColumn(1, Qt.SortOrder.AscendingOrder)
-        self.packageList.setVerticalScrollBar(self.packageListScrollBar)
-        self.packageList.connectCustomScrollbar(self.packageListScrollBar)
-        self.packageList.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.packageList.setVerticalScrollMode(QTreeWidget.ScrollPerPixel)
-        self.packageList.setIconSize(QSize(24, 24))
-        self.packageList.header().sectionClicked.connect(lambda: self.finishFiltering(self.query.text()))
-        self.packageList.currentItemChanged.connect(lambda: self.addItemsToTreeWidget() if self.packageList.indexOfTopLevelItem(self.packageList.currentItem())+20 > self.packageList.topLevelItemCount() else None)
-
-
-        
-        def updateItemState(item: TreeWidgetItemWithQAction, column: int):
-            if column == 0:
-                item.setText(0, " " if item.checkState(0) == Qt.CheckState.Checked else "")
-                if item.checkState(0) == Qt.CheckState.Checked:
-                    self.packageList.setCurrentItem(item)
-            
-        self.packageList.itemChanged.connect(lambda i, c: updateItemState(i, c))
 
-        sct = QShortcut(Qt.Key.Key_Return, self.packageList)
-        sct.activated.connect(lambda: self.filter() if self.query.hasFocus() else self.packageList.itemDoubleClicked.emit(self.packageList.currentItem(), 0))
-        
-        def toggleItemState():
-            item = self.packageList.currentItem()
-            checked = item.checkState(0) == Qt.CheckState.Checked
-            item.setCheckState(0, Qt.CheckState.Unchecked if checked else Qt.CheckState.Checked)
-
-        sct = QShortcut(QKeySequence(Qt.Key_Space), self.packageList)
-        sct.activated.connect(toggleItemState)
-        
-        self.packageList.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.packageList.customContextMenuRequested.connect(self.showContextMenu)
+        self.packageList = self.createPackageList()
 
-        header = self.packageList.header()
-        header.setSectionResizeMode(QHeaderView.ResizeToContents)
-        header.sectionClicked.connect(lambda: self.finishFiltering(self.query.text()))
-        
         self.loadingProgressBar = QProgressBar()
         self.loadingProgressBar.setRange(0, 1000)
         self.loadingProgressBar.setValue(0)
@@ -980,6 +956,47 @@ class SoftwareSection(QWidget):
         self.rightFast.setDuration(300)
         self.rightFast.finished.connect(lambda: (self.leftSlow.start(), self.changeBarOrientation.emit()))
         
+    def createPackageList(self) -> TableView:
+        """
+        Creates the package list of the section, a table view over the package model with a row per package
+        """
+        self.packageModel = self.createPackageModel()
+        self.packageListModel = PackageListSortingModel(self)
+        self.packageListModel.setSourceModel(self.packageModel)
+
+        packageList = TableView("")
+        packageList.setModel(self.packageListModel)
+        packageList.setSortingEnabled(True)
+        packageList.sortByColumn(1, Qt.SortOrder.AscendingOrder)
+        packageList.setVerticalScrollBar(self.packageListScrollBar)
+        packageList.connectCustomScrollbar(self.packageListScrollBar)
+        packageList.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        packageList.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        packageList.setIconSize(QSize(24, 24))
+        packageList.header().sectionClicked.connect(lambda: self.finishFiltering(self.query.text()))
+        self.packageModel.packageChecked.connect(lambda package, checked: packageList.setCurrentItem(package) if checked else None)
+
+        sct = QShortcut(Qt.Key.Key_Return, packageList)
+        sct.activated.connect(lambda: self.filter() if self.query.hasFocus() else packageList.doubleClicked.emit(packageList.currentIndex()))
+
+        def toggleItemState():
+            package = packageList.currentItem()
+            if package is not None:
+                self.packageModel.setChecked(package, not self.packageModel.isChecked(package))
+
+        sct = QShortcut(QKeySequence(Qt.Key_Space), packageList)
+        sct.activated.connect(toggleItemState)
+
+        packageList.setContextMenuPolicy(Qt.CustomContextMenu)
+        packageList.customContextMenuRequested.connect(self.showContextMenu)
+
+        header = packageList.header()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        return packageList
+
+    def createPackageModel(self) -> PackageListModel:
+        raise NotImplementedError("This function requires being reimplemented")
+
     def finishInitialisation(self):
         print(f"🟢 {self.sectionName} tab loaded successfully")
         toolbarWidgets = [self.toolbar.widgetForAction(action) for action in self.toolbar.actions() if self.toolbar.widgetForAction(action) != None and type(self.toolbar.widgetForAction(action)) != TenPxSpacer]
@@ -995,9 +1012,10 @@ class SoftwareSection(QWidget):
     def getToolbar(self) -> QToolBar:
         raise NotImplementedError("This function requires being reimplemented")
         
-    def sharePackage(self, package: TreeWidgetItemWithQAction):
-        url = f"https://marticliment.com/wingetui/share?pid={package.text(2)}^&pname={package.text(1)}"
-        nativeWindowsShare(package.text(2), url, self.window())
+    def sharePackage(self, item: Package):
+        package: Package = self.ItemPackageReference[item]
+        url = f"https://marticliment.com/wingetui/share?pid={package.Id}^&pname={package.Name}"
+        nativeWindowsShare(package.Id, url, self.window())
 
     def finishLoadingIfNeeded(self, store: str) -> None:
         raise NotImplementedError("This function requires being reimplemented")
@@ -1009,72 +1027,86 @@ class SoftwareSection(QWidget):
     def addItem(self, name: str, id: str, version: str, store: str) -> None:
         raise NotImplementedError("This function requires being reimplemented")
 
-    def addItemsToTreeWidget(self, reset: bool = False):
+    def addItemsToTreeWidget(self, reset: bool = False) -> None:
+        """
+        The list only asks for the rows it paints, so the showable packages are shown all at once instead of page by page
+        """
         if reset:
-            for item in self.shownItems:
-                item.setHidden(True, forceShowAction=True)
-            self.nextItemToShow = 0
-            self.shownItems = []
-        addedItems = 0
-        while addedItems < 100:
-            if self.nextItemToShow >= len(self.showableItems):
-                break
-            itemToAdd = self.showableItems[self.nextItemToShow]
-            if itemToAdd not in self.addedItems:
-                self.packageList.addTopLevelItem(itemToAdd)
-                self.addedItems.append(itemToAdd)
-            else:
-                itemToAdd.setHidden(False)
-            self.shownItems.append(itemToAdd)
-            addedItems += 1
-            self.nextItemToShow += 1
-    
+            currentPackage = self.packageList.currentItem()
+            self.packageListModel.setPackages(self.showableItems)
+            if currentPackage is not None: # Resetting the rows loses the current row, which the tree widgets kept
+                self.packageList.setCurrentItem(currentPackage)
+        else:
+            self.packageListModel.addPackages(self.showableItems[self.packageListModel.rowCount():])
+        if self.packageListModel.rowCount() > 0:
+            self.packageList.label.setText("")
+
+    def removePackages(self, packages: list[Package]) -> None:
+        """
+        Removes the given packages from the section, with their rows and tray menu actions. The ones not on the section are skipped
+        """
+        removedItems = {self.PackageItemReference[package] for package in packages if package in self.PackageItemReference}
+        if not removedItems:
+            return
+        for item in removedItems:
+            package: Package = self.ItemPackageReference.pop(item)
+            self.PackageItemReference.pop(package, None)
+            if self.IdPackageReference.get(package.Id) == package:
+                del self.IdPackageReference[package.Id]
+            if item in self.packageActions:
+                self.packageActions.pop(item).deleteLater()
+            self.searchIndex.remove(item)
+        self.sortOrders.remove(removedItems)
+        self.packageModel.removePackages(removedItems)
+        self.packageItems = [item for item in self.packageItems if item not in removedItems]
+        self.showableItems = [item for item in self.showableItems if item not in removedItems]
+
+    def removeManagerItems(self, manager: PackageManagerModule) -> None:
+        """
+        Removes the items of the given package manager, to replace the ones loaded from a snapshot with the reloaded ones
+        """
+        removedItems = [item for item in self.packageItems if self.ItemPackageReference[item].PackageManager == manager]
+        if removedItems:
+            self.removePackages(removedItems)
+            print(f"🔵 Removed {len(removedItems)} {manager.NAME} snapshot item(s) from the {self.sectionName} section")
+
     def filter(self) -> None:
         print(f"🟢 Searching for string \"{self.query.text()}\"")
-        Thread(target=lambda: (time.sleep(0.1), self.callInMain.emit(partial(self.finishFiltering, self.query.text())))).start()
+        self.filterTimer.start()
         
-    def containsQuery(self, item: TreeWidgetItemWithQAction, querytext: str) -> bool:
-        return querytext in item.text(1).lower().replace("-", "").replace(" ", "") or querytext in item.text(2).lower().replace("-", "").replace(" ", "")
+    def containsQuery(self, item: Package, querytext: str) -> bool:
+        return self.searchIndex.matches(item, querytext)
+
+    def getMatchingItems(self, text: str) -> set[Package]:
+        """
+        Returns the package items whose name or id contain the query
+        """
+        packageItems = set(self.packageItems)
+        if text == "":
+            return packageItems
+        return self.searchIndex.search(text) & packageItems
+
+    def getSortKeyFunctions(self) -> dict[int, Callable[[Package], object]]:
+        """
+        Returns the sort key of every sortable column. The items of the sections are their packages, and their checked state is kept by the package model
+        """
+        return {
+            0: lambda package: "" if self.packageModel.isChecked(package) else " ",
+            1: lambda package: package.Name,
+            2: lambda package: package.Id,
+            3: lambda package: package.getVersionKey(),
+            4: lambda package: package.Source,
+        }
     
     def finishFiltering(self, text: str):
-        def getChecked(item: TreeWidgetItemWithQAction) -> str:
-            return "" if item.checkState(0) == Qt.CheckState.Checked else " "
-        def getTitle(item: TreeWidgetItemWithQAction) -> str:
-            return item.text(1)
-        def getID(item: TreeWidgetItemWithQAction) -> str:
-            return item.text(2)
-        def getVersion(item: TreeWidgetItemWithQAction) -> str:
-            return item.text(6)
-        def getSource(item: TreeWidgetItemWithQAction) -> str:
-            return item.text(4)
-        
         if self.query.text() != text:
             return
-        self.showableItems = []
-        
         sortColumn = self.packageList.sortColumn()
         descendingSort = self.packageList.header().sortIndicatorOrder() == Qt.SortOrder.DescendingOrder
-        match sortColumn:
-            case 0:
-                self.packageItems.sort(key=getChecked, reverse=descendingSort)
-            case 1:
-                self.packageItems.sort(key=getTitle, reverse=descendingSort)
-            case 2:
-                self.packageItems.sort(key=getID, reverse=descendingSort)
-            case 3:
-                self.packageItems.sort(key=getVersion, reverse=descendingSort)
-            case 4:
-                self.packageItems.sort(key=getSource, reverse=descendingSort)
-        
-        for item in self.packageItems:
-            if text == "":
-                self.showableItems = self.packageItems.copy()
-            else:
-                try:
-                    if self.containsQuery(item, text.replace("-", "").replace(" ", "").lower()):
-                        self.showableItems.append(item)
-                except RuntimeError:
-                    print("🟠 RuntimeError on SoftwareSection.finishFiltering")
+        self.showableItems = self.sortOrders.getSortedItems(self.packageItems, sortColumn, descendingSort, self.getMatchingItems(text))
+        self.showFilteredItems()
+
+    def showFilteredItems(self) -> None:
         found = len(self.showableItems)
         if found == 0:
             if self.packageList.label.text() == "":
@@ -1091,28 +1123,28 @@ class SoftwareSection(QWidget):
         self.programbox.show()
         self.infobox.hide()
 
-    def openInfo(self, item: TreeWidgetItemWithQAction, update: bool = False, uninstall: bool = False, installedVersion: str = "") -> None:
+    def openInfo(self, item: Package, update: bool = False, uninstall: bool = False, installedVersion: str = "") -> None:
         self.infobox.showPackageDetails(self.ItemPackageReference[item], update, uninstall, installedVersion)
         self.infobox.show()
     
     def loadPackages(self, manager) -> None:
         raise NotImplementedError("This function requires being reimplemented")
 
+    def finishManagerLoading(self, manager: PackageManagerModule) -> None:
+        """
+        Queued by the loaders after the packages of the given manager, so the manager is only marked as loaded once its packages have been added
+        """
+        self.PackagesLoaded[manager] = True
+        self.finishLoading.emit()
+
     def exportSelectedPackages(self, all: bool = False) -> None:
         """
         Export all selected packages into a file.
         """
-        packagesToExport: list[Package] = []
-        for item in self.packageItems:
-            if item.checkState(0) == Qt.CheckState.Checked or all:
-                packagesToExport.append(self.ItemPackageReference[item])
-        self.packageExporter.showExportUI(packagesToExport)
+        self.packageExporter.showExportUI(list(self.packageItems) if all else self.packageModel.getCheckedPackages())
         
     def setAllPackagesSelected(self, checked: bool) -> None:
-        self.packageList.setSortingEnabled(False)
-        for item in self.packageItems:
-            item.setCheckState(0, Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked)
-        self.packageList.setSortingEnabled(True)
+        self.packageModel.setAllChecked(checked)
 
     def startLoadingPackages(self, force: bool = False) -> None:
         for manager in self.PackageManagers: # Stop here if not all package managers loaded
@@ -1120,12 +1152,16 @@ class SoftwareSection(QWidget):
                 return
         for manager in self.PackageManagers:
             self.PackagesLoaded[manager] = False
+        self.loadGeneration += 1
+        self.packageDelivery.clear()
         self.packageItems = []
+        self.searchIndex.clear()
+        self.sortOrders.clear()
         self.PackageItemReference = {}
         self.ItemPackageReference = {}
         self.IdPackageReference = {}
-        self.shownItems = []
-        self.addedItems = []
+        self.showableItems = []
+        self.packageActions = {}
         self.loadingProgressBar.show()
         self.reloadButton.setEnabled(False)
         self.searchButton.setEnabled(False)
@@ -1321,6 +1357,8 @@ class ImageViewer(QWidget):
         return super().wheelEvent(event)
 
 class PackageExporter(MovableFramelessWindow):
+    itemPackages: dict[TreeWidgetItemWithQAction:Package] = {}
+
     def __init__(self, parent: QWidget | None = ...) -> None:
         super().__init__(parent)
         self.setLayout(QVBoxLayout())
@@ -1357,7 +1395,9 @@ class PackageExporter(MovableFramelessWindow):
         self.treewidget.setHeaderLabels([_("Package Name"), _("Package ID"), _("Source"), ""])
         
         hLayout = QHBoxLayout()
-        hLayout.setContentsMargins(0, 0, 5, 5)
+        hLayout.setContentsMargins(10, 0, 5, 5)
+        self.pinVersionsCheckBox = QCheckBox(_("Install the exported versions when importing"))
+        hLayout.addWidget(self.pinVersionsCheckBox)
         hLayout.addStretch()
         cancelButton = QPushButton(_("Cancel"))
         cancelButton.setFixedHeight(30)
@@ -1380,8 +1420,10 @@ class PackageExporter(MovableFramelessWindow):
         Receives a list composed of Package objects as the unique parameter
         """
         self.treewidget.clear()
+        self.itemPackages = {}
         for package in packageList:
             item = TreeWidgetItemWithQAction()
+            self.itemPackages[item] = package
             item.setText(0, package.Name)
             item.setText(1, package.Id)
             item.setText(2, package.Source)
@@ -1401,68 +1443,23 @@ class PackageExporter(MovableFramelessWindow):
         self.show()
         
     def exportPackages(self) -> None:
-        wingetPackagesList = []
-        scoopPackageList = []
-        chocoPackageList = []
-        npmPackageList = []
-        pipPackageList = []
         try:
+            entries: list[BundleEntry] = []
             for i in range(self.treewidget.topLevelItemCount()):
                 item = self.treewidget.topLevelItem(i)
-                if "winget" in item.text(2).lower():
-                    id = item.text(1).strip()
-                    wingetPackage = {"PackageIdentifier": id}
-                    wingetPackagesList.append(wingetPackage)
-                elif "scoop" in item.text(2).lower():
-                    scoopPackage = {"Name": item.text(1)}
-                    scoopPackageList.append(scoopPackage)
-                elif "chocolatey" in item.text(2).lower():
-                    chocoPackage = {"Name": item.text(1)}
-                    chocoPackageList.append(chocoPackage)
-                elif "npm" in item.text(2).lower():
-                    npmPackage = {"Name": item.text(1)}
-                    npmPackageList.append(npmPackage)
-                elif "pip" in item.text(2).lower():
-                    pipPackage = {"Name": item.text(1)}
-                    pipPackageList.append(pipPackage)
-            wingetDetails = {
-                "Argument": "https://cdn.winget.microsoft.com/cache",
-                "Identifier" : "Microsoft.Winget.Source_8wekyb3d8bbwe",
-                "Name": "winget",
-                "Type" : "Microsoft.PreIndexed.Package"
-            }
+                if item.isDisabled():
+                    continue
+                package: Package = self.itemPackages[item]
+                options = InstallationOptions()
+                if self.pinVersionsCheckBox.isChecked() and package.PackageManager.Capabilities.SupportsCustomVersions and package.Version not in ("", "Unknown", _("Unknown")):
+                    options.Version = package.Version
+                entries.append(BundleEntry(package.Id, package.Name, package.Version, package.Source, package.PackageManager.NAME, getOptionValues(options)))
             wingetVersion = "1.4"
             try:
                 wingetVersion = globals.componentStatus["WingetVersion"] if globals.componentStatus["WingetVersion"] else wingetVersion
             except Exception as e:
                 report(e)
-            wingetExportSchema = {
-                "$schema" : "https://aka.ms/winget-packages.schema.2.0.json",
-                "CreationDate" : str(datetime.now()),
-                "Sources": [{
-                    "Packages": wingetPackagesList,
-                    "SourceDetails": wingetDetails}],
-                "WinGetVersion" : wingetVersion
-            }
-            scoopExportSchema = {
-                "apps": scoopPackageList,
-            }
-            chocoExportSchema = {
-                "apps": chocoPackageList,
-            }
-            pipExportSchema = {
-                "apps": pipPackageList,
-            }
-            npmExportSchema = {
-                "apps": npmPackageList,
-            }
-            overallSchema = {
-                "winget": wingetExportSchema,
-                "scoop": scoopExportSchema,
-                "chocolatey": chocoExportSchema,
-                "pip": pipExportSchema,
-                "npm": npmExportSchema
-            }
+            overallSchema = createBundle(entries, wingetVersion)
             filename = QFileDialog.getSaveFileName(None, _("Save File"), _("Packages"), filter='JSON (*.json)')
             if filename[0] != "" and filename[1]:
                 print(f"🔵 Saving JSON to {filename[0]}")
@@ -1485,9 +1482,15 @@ class PackageExporter(MovableFramelessWindow):
 class PackageImporter(MovableFramelessWindow):
     
     pendingPackages: dict[str:TreeWidgetItemWithQAction] = {}
+    pendingPackageManagers: dict[str:list[PackageClasses.DynamicPackageManager]] = {}
+    itemPackages: dict[TreeWidgetItemWithQAction:Package] = {}
+    itemOptions: dict[TreeWidgetItemWithQAction:InstallationOptions] = {}
+    resolver: PackageResolver = None
     setLoadBarValue = Signal(str)
     startAnim = Signal(QVariantAnimation)
     changeBarOrientation = Signal()
+    packageResolved = Signal(str, object)
+    resolutionFinished = Signal()
 
     
     def __init__(self, parent: QWidget | None = ...) -> None:
@@ -1583,6 +1586,9 @@ class PackageImporter(MovableFramelessWindow):
         self.removeIcon = QIcon(getMedia("menu_uninstall"))
         self.versionIcon = QIcon(getMedia("version"))
         
+        self.packageResolved.connect(self.showResolvedPackage)
+        self.resolutionFinished.connect(self.loadingProgressBar.hide)
+        
         self.showImportUI()
 
     def showImportUI(self):
@@ -1592,33 +1598,29 @@ class PackageImporter(MovableFramelessWindow):
         try:
             self.loadingProgressBar.show()
             self.pendingPackages = {}
+            self.pendingPackageManagers = {}
+            self.itemPackages = {}
+            self.itemOptions = {}
             DISCOVER_SECTION: SoftwareSection = globals.discover
             self.treewidget.clear()
-            packageList: list[str] = []
             self.show()
             file = QFileDialog.getOpenFileName(None, _("Select package file"), filter="JSON (*.json)")[0]
             if file != "":
                 f = open(file, "r")
                 contents = json.load(f)
                 f.close()
-                try:
-                    packages = contents["winget"]["Sources"][0]["Packages"]
-                    for pkg in packages:
-                        packageList.append(pkg["PackageIdentifier"])
-                except KeyError as e:
-                    print("🟠 Invalid winget section")
-                for manager in ["chocolatey", "scoop", "pip", "npm"]:
-                    try:
-                        packages = contents[manager]["apps"]
-                        for pkg in packages:
-                            packageList.append(pkg["Name"])
-                    except KeyError as e:
-                        print(f"🟠 Invalid {manager} section")
-                for packageId in packageList:
+                managersByName = {manager.NAME: manager for manager in PackageManagersList}
+                unknownIcon = QIcon(getMedia("question"))
+                for entry in readBundle(contents):
+                    packageId = entry.Id
                     item = TreeWidgetItemWithQAction()
-                    unknownIcon = QIcon(getMedia("question"))
                     self.treewidget.addTopLevelItem(item)
-                    if packageId in DISCOVER_SECTION.IdPackageReference:
+                    manager = managersByName.get(entry.ManagerName)
+                    if manager is not None and manager.isEnabled():
+                        # Resolved bundle entries can be installed right away, without looking them up
+                        package = Package(entry.Name, entry.Id, entry.Version, entry.Source, manager)
+                        self.addItemFromPackage(package, item, setOptionValues(InstallationOptions(), entry.Options))
+                    elif packageId in DISCOVER_SECTION.IdPackageReference:
                         package = DISCOVER_SECTION.IdPackageReference[packageId]
                         self.addItemFromPackage(package, item)
                     else:
@@ -1633,62 +1635,71 @@ class PackageImporter(MovableFramelessWindow):
                         item.setIcon(3, unknownIcon)
                         item.setDisabled(True)
                         self.pendingPackages[packageId] = item
+                        self.pendingPackageManagers[packageId] = self.getResolutionManagers(BundleManagers.get(entry.Section))
                 self.treewidget.label.setVisible(self.treewidget.topLevelItemCount() == 0)
-                Thread(target=self.loadDynamicPackages).start()
-                self.loadingProgressBar.hide()
+                self.loadDynamicPackages()
             else:
                 self.close()
                 self.loadingProgressBar.hide()
         except Exception as e:
             report(e)
             
-    def addItemFromPackage(self, package: Package, item: TreeWidgetItemWithQAction) -> None:                        
+    def addItemFromPackage(self, package: Package, item: TreeWidgetItemWithQAction, options: InstallationOptions = None) -> None:                        
         item.setText(0, package.Name)
         item.setText(1, package.Id)
-        item.setText(2, package.Version)
+        item.setText(2, options.Version if options and options.Version else package.Version)
         item.setText(3, package.Source)
         item.setIcon(0, self.installIcon)
         item.setIcon(1, self.idIcon)
         item.setIcon(2, self.versionIcon)
         item.setDisabled(False)
         item.setIcon(3, package.getSourceIcon())
+        self.itemPackages[item] = package
+        if options:
+            self.itemOptions[item] = options
         removeButton = QPushButton()
         removeButton.setIcon(self.removeIcon)
         removeButton.setFixedSize(QSize(24, 24))
         removeButton.clicked.connect(lambda: self.treewidget.takeTopLevelItem(self.treewidget.indexOfTopLevelItem(self.treewidget.currentItem())))
         self.treewidget.setItemWidget(item, 4, removeButton)
 
+    def getResolutionManagers(self, bundleManager: PackageClasses.PackageManagerModule) -> list[PackageClasses.DynamicPackageManager]:
+        """
+        Returns the enabled dynamic package managers an id of the given bundle section may be found on, the section's own manager first
+        """
+        managers = [manager for manager in DynaimcPackageManagersList if manager.isEnabled()]
+        if bundleManager in managers:
+            return [bundleManager]
+        return managers
+
     def loadDynamicPackages(self):
-        DISCOVER_SECTION: SoftwareSection = globals.discover
-        DISCOVER_SECTION.callInMain.emit(lambda: DISCOVER_SECTION.packageList.setEnabled(False))
-        DISCOVER_SECTION.callInMain.emit(lambda: self.loadingProgressBar.show())
-        for packageId in self.pendingPackages.keys():
-            print(packageId)
-            DISCOVER_SECTION.callInMain.emit(lambda: DISCOVER_SECTION.query.setText(packageId))
-            DISCOVER_SECTION.callInMain.emit(lambda: DISCOVER_SECTION.finishFiltering(DISCOVER_SECTION.query.text()))
-            while not DISCOVER_SECTION.isLoadingDynamic: # Make time before packages actually start loading
-                time.sleep(0.001)
-            while DISCOVER_SECTION.isLoadingDynamic:
-                time.sleep(0.01)
-            if packageId in DISCOVER_SECTION.IdPackageReference:
-                package = DISCOVER_SECTION.IdPackageReference[packageId]
-                DISCOVER_SECTION.callInMain.emit(lambda: self.addItemFromPackage(package, self.pendingPackages[packageId]))
-                DISCOVER_SECTION.callInMain.emit(lambda: self.treewidget.label.setVisible(self.treewidget.topLevelItemCount() == 0))
-        DISCOVER_SECTION.callInMain.emit(lambda: self.loadingProgressBar.hide())
-        DISCOVER_SECTION.callInMain.emit(lambda: DISCOVER_SECTION.packageList.setEnabled(True))
+        """
+        Looks the packages that were not found on the Discover section up on the dynamic package managers, all of them in parallel
+        """
+        self.resolver = PackageResolver()
+        self.resolver.resolve(self.pendingPackageManagers, self.packageResolved.emit, self.resolutionFinished.emit)
+
+    def showResolvedPackage(self, packageId: str, package: Package | None) -> None:
+        if package is not None and packageId in self.pendingPackages:
+            self.addItemFromPackage(package, self.pendingPackages[packageId])
+            self.treewidget.label.setVisible(self.treewidget.topLevelItemCount() == 0)
 
     def installPackages(self) -> None:
         DISCOVER_SECTION: SoftwareSection = globals.discover
         for i in range(self.treewidget.topLevelItemCount()):
-            if not self.treewidget.topLevelItem(i).isDisabled():
+            item = self.treewidget.topLevelItem(i)
+            if not item.isDisabled() and item in self.itemPackages:
                 try:
-                    id = self.treewidget.topLevelItem(i).text(1)
-                    item = DISCOVER_SECTION.PackageItemReference[DISCOVER_SECTION.IdPackageReference[id]]
-                    DISCOVER_SECTION.installPackageItem(item)
+                    DISCOVER_SECTION.installPackage(self.itemPackages[item], self.itemOptions.get(item))
                 except Exception as e:
                     report(e)
         self.close()
 
+    def closeEvent(self, event: QCloseEvent) -> None:
+        if self.resolver:
+            self.resolver.cancel()
+        return super().closeEvent(event)
+
     def resizeEvent(self, event: QResizeEvent) -> None:
         return super().resizeEvent(event)
         
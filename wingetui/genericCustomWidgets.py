@@ -108,23 +108,22 @@ class SmoothScrollArea(QScrollArea):
         self.goTopButton.move(self.width()-48, self.height()-48)
         return super().resizeEvent(event)
 
-class TreeWidget(QTreeWidget):
+class SmoothScrollListMixin():
+    """
+    Smooth scrolling, the return to top button and the centered label of the package lists, shared by the TreeWidget and the TableView
+    """
     missingScroll: int = 0
     buttonVisible: bool = False
-    def __init__(self, emptystr: str = "") -> None:
-        super().__init__()
+
+    def setUpSmoothScrolling(self, emptystr: str) -> None:
         self.smoothScrollAnimation = QVariantAnimation(self)
         self.smoothScrollAnimation.setDuration(300)
         self.smoothScrollAnimation.setEasingCurve(QEasingCurve.OutQuart)
         self.smoothScrollAnimation.valueChanged.connect(lambda v: self.verticalScrollBar().setValue(v))
-        self.setIconSize(QSize(24, 24))
-        self.setVerticalScrollMode(QTreeView.ScrollMode.ScrollPerPixel)
-        self.setSortingEnabled(True)
         self.label = QLabel(emptystr, self)
         self.label.setAlignment(Qt.AlignVCenter | Qt.AlignHCenter)
         op=QGraphicsOpacityEffect(self.label)
         op.setOpacity(0.5)
-        self.setRootIsDecorated(False)
         self.label.setGraphicsEffect(op)
         self.label.setAttribute(Qt.WA_TransparentForMouseEvents)
         self.label.setAutoFillBackground(True)
@@ -159,10 +158,6 @@ class TreeWidget(QTreeWidget):
         self.label.move((self.width()-self.label.width())//2, (self.height()-self.label.height())//2,)
         self.goTopButton.move(self.width()-24, self.height()-48)
         return super().resizeEvent(event)
-
-    def addTopLevelItem(self, item: QTreeWidgetItem) -> None:
-        self.label.setText("")
-        return super().addTopLevelItem(item)
     
     def showTopButton(self):
         if not self.buttonVisible:
@@ -178,10 +173,6 @@ class TreeWidget(QTreeWidget):
             self.buttonAnimation.setStartValue(int(self.buttonOpacity.opacity()*100))
             self.buttonAnimation.setEndValue(0)
             self.buttonAnimation.start()
-        
-    def clear(self) -> None:
-        self.label.show()
-        return super().clear()
     
     def wheelEvent(self, e: QWheelEvent) -> None:
         currentPos = self.verticalScrollBar().value()
@@ -231,13 +222,114 @@ class TreeWidget(QTreeWidget):
                 event.ignore()
                 return
         return super().keyPressEvent(event)
+
+class TreeWidget(SmoothScrollListMixin, QTreeWidget):
+    def __init__(self, emptystr: str = "") -> None:
+        super().__init__()
+        self.setIconSize(QSize(24, 24))
+        self.setVerticalScrollMode(QTreeView.ScrollMode.ScrollPerPixel)
+        self.setSortingEnabled(True)
+        self.setRootIsDecorated(False)
+        self.setUpSmoothScrolling(emptystr)
+
+    def addTopLevelItem(self, item: QTreeWidgetItem) -> None:
+        self.label.setText("")
+        if isinstance(item, TreeWidgetItemWithQAction):
+            item.addToolTips()
+        return super().addTopLevelItem(item)
+        
+    def clear(self) -> None:
+        self.label.show()
+        return super().clear()
     
-class PackageListSortingModel(QAbstractItemModel):
-    
-    def sort(self, column: int, order: Qt.SortOrder = ...) -> None:
-        if column == 2:
-            column = 6
-        return super().sort(column, order)
+TABLE_ROW_HEIGHT = 39 # Pixels. Height of the tree widget rows with the item stylesheet, so the table views look the same
+
+
+class TableViewRowDelegate(QStyledItemDelegate):
+    """
+    Paints the cells of a TableView as the columns of a tree widget row: the stylesheet rounds the first and last cells of the row,
+    and the whole row is shown as hovered instead of the cell under the mouse
+    """
+    BEGINNING = QStyleOptionViewItem.ViewItemPosition.Beginning
+    MIDDLE = QStyleOptionViewItem.ViewItemPosition.Middle
+    END = QStyleOptionViewItem.ViewItemPosition.End
+    MOUSE_OVER = QStyle.StateFlag.State_MouseOver
+
+    def initStyleOption(self, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        super().initStyleOption(option, index)
+        view: TableView = self.parent()
+        column = index.column()
+        option.viewItemPosition = self.BEGINNING if column == 0 else self.END if column == view.lastColumn else self.MIDDLE
+        if index.row() == view.hoveredRow:
+            option.state |= self.MOUSE_OVER
+        else:
+            option.state &= ~self.MOUSE_OVER
+
+
+class TableView(SmoothScrollListMixin, QTableView):
+    """
+    Package list of the software sections, backed by a PackageListSortingModel and styled as a TreeWidget (a row per package, without
+    grid nor row header). Unlike a tree view, which lays out every row again when the rows change, a table view with rows of a fixed
+    height only asks the model for the rows it paints, so showing fifty thousand packages costs as much as showing a hundred.
+    The packages of the model are its items, so the current item is the package of the current row
+    """
+    hoveredRow: int = -1
+    lastColumn: int = -1
+    def __init__(self, emptystr: str = "") -> None:
+        super().__init__()
+        self.setIconSize(QSize(24, 24))
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.setShowGrid(False)
+        self.setWordWrap(False)
+        self.setMouseTracking(True)
+        self.setItemDelegate(TableViewRowDelegate(self))
+        self.verticalHeader().hide()
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().setDefaultSectionSize(TABLE_ROW_HEIGHT)
+        self.horizontalHeader().setDefaultAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+        self.horizontalHeader().setHighlightSections(False)
+        self.setSortingEnabled(True)
+        self.setUpSmoothScrolling(emptystr)
+
+    def setModel(self, model: QAbstractItemModel) -> None:
+        super().setModel(model)
+        self.lastColumn = model.columnCount()-1
+
+    def header(self) -> QHeaderView:
+        return self.horizontalHeader()
+
+    def mouseMoveEvent(self, event: QMouseEvent) -> None:
+        self.setHoveredRow(self.rowAt(event.position().toPoint().y()))
+        return super().mouseMoveEvent(event)
+
+    def leaveEvent(self, event: QEvent) -> None:
+        self.setHoveredRow(-1)
+        return super().leaveEvent(event)
+
+    def setHoveredRow(self, row: int) -> None:
+        if row != self.hoveredRow:
+            self.hoveredRow = row
+            self.viewport().update()
+
+    def currentItem(self) -> object:
+        return self.model().getPackage(self.currentIndex())
+
+    def setCurrentItem(self, package: object) -> None:
+        self.setCurrentIndex(self.model().getIndex(package))
+
+    def scrollToItem(self, package: object) -> None:
+        if package is not None:
+            self.scrollTo(self.model().getIndex(package))
+
+    def sortColumn(self) -> int:
+        return self.horizontalHeader().sortIndicatorSection()
+
+    def clear(self) -> None:
+        self.label.show()
+        self.model().sourceModel().clear()
 
 class ScrollWidget(QWidget):
     def __init__(self, scroller: QWidget) -> None:
@@ -350,6 +442,7 @@ class DynamicScrollArea(QWidget):
 
 class TreeWidgetItemWithQAction(QTreeWidgetItem):
     itemAction: QAction = QAction
+    __hash__ = object.__hash__ # The items are kept on sets and dicts, and the default PySide hash is several times slower
     def __init__(self, parent = None):
         super().__init__()
         
@@ -369,9 +462,18 @@ class TreeWidgetItemWithQAction(QTreeWidgetItem):
             return False
     
     def setText(self, column: int, text: str) -> None:
-        self.setToolTip(column, text)
+        if self.treeWidget() is not None: # Items out of a tree get their tooltips when they are added to one, see addToolTips
+            self.setToolTip(column, text)
         return super().setText(column, text)
 
+    def addToolTips(self) -> None:
+        """
+        Uses the text of every column as its tooltip. The package sections create an item per package but only add the shown ones to the tree,
+        so the tooltips are not stored until then
+        """
+        for column in range(self.columnCount()):
+            self.setToolTip(column, self.text(column))
+
     def treeWidget(self) -> TreeWidget:
         return super().treeWidget()
  
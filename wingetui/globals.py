@@ -34,9 +34,6 @@ trayMenuInstalledList: QMenu = None
 trayMenuUpdatesList: QMenu = None
 extrasMenuButton: QPushButton = None
 
-pending_programs: list = []
-current_program: str = ""
-
 updatesHeader: QAction = None
 installedHeader: QAction = None
 updatesAction: QAction = None
@@ -67,8 +64,6 @@ textfont: str = "Segoe UI Variable Text"
 dispfont: str = "Segoe UI Variable Display"
 dispfontsemib: str = "Segoe UI Variable Display Semib"
 
-settingsCache = {}
-
 ENABLE_WINGETUI_NOTIFICATIONS = True
 ENABLE_SUCCESS_NOTIFICATIONS = True
 ENABLE_ERROR_NOTIFICATIONS = True
@@ -0,0 +1,132 @@
+from threading import Condition, Event
+from typing import Callable
+from PackageManagers.cancellationToken import CancellationToken
+
+MAX_PARALLEL_OPERATIONS = 4 # Operations running at the same time when parallel installs are allowed, regardless of their package manager
+
+
+class InstallationJob():
+    """
+    A package operation (installation, update or uninstallation) of the installation queue.
+    onStart is called once the job is allowed to run, and onQueuePositionChanged every time its position on the queue changes while it waits.
+    Both are called from the thread that queued or finished a job, so they should only emit signals.
+    MaxParallelOperations and ExclusiveResource come from the capabilities of the job's package manager.
+    Cancelling the job's CancellationToken, if given, takes the job out of the queue, whether it was waiting or running.
+    """
+    Id: str = ""
+    Name: str = ""
+    ManagerName: str = ""
+    MaxParallelOperations: int = 1
+    ExclusiveResource: str = ""
+    CancellationToken: CancellationToken = None
+    started: Event = None
+    finished: Event = None
+
+    def __init__(self, id: str, name: str, managerName: str, onStart: Callable[[], None], onQueuePositionChanged: Callable[[int], None] = None, maxParallelOperations: int = 1, exclusiveResource: str = "", token: CancellationToken = None):
+        self.Id = id
+        self.Name = name
+        self.ManagerName = managerName
+        self.MaxParallelOperations = maxParallelOperations
+        self.ExclusiveResource = exclusiveResource
+        self.CancellationToken = token
+        self.onStart = onStart
+        self.onQueuePositionChanged = onQueuePositionChanged
+        self.started = Event()
+        self.finished = Event()
+
+    def isRunning(self) -> bool:
+        return self.started.is_set() and not self.finished.is_set()
+
+    def __str__(self) -> str:
+        return f"<InstallationJob: {self.Name} ({self.ManagerName}), id={self.Id}>"
+
+
+class InstallationScheduler():
+    """
+    Starts the queued package operations in order: one at a time, or, if parallel installations are allowed (as returned by isParallelAllowed),
+    every job that fits in the concurrency caps: up to maxParallelOperations jobs overall, up to MaxParallelOperations jobs of the same package manager,
+    and only one job for every exclusive resource. A job that does not fit does not hold back the jobs of other managers queued after it.
+    Nothing polls the queue: jobs are started when a job gets queued or finishes, or when reschedule() is called after the parallel
+    installations setting changes. The condition variable lets other threads wait for the queue.
+    """
+    waitingJobs: list[InstallationJob] = []
+    runningJobs: dict[str, InstallationJob] = {}
+    isParallelAllowed: Callable[[], bool] = None
+    maxParallelOperations: int = MAX_PARALLEL_OPERATIONS
+
+    def __init__(self, isParallelAllowed: Callable[[], bool] = lambda: False, maxParallelOperations: int = MAX_PARALLEL_OPERATIONS):
+        self.waitingJobs = []
+        self.runningJobs = {}
+        self.isParallelAllowed = isParallelAllowed
+        self.maxParallelOperations = maxParallelOperations
+        self.condition = Condition()
+
+    def queue(self, job: InstallationJob) -> InstallationJob:
+        with self.condition:
+            self.waitingJobs.append(job)
+            print(f"🔵 Queued {job}, {len(self.waitingJobs)} job(s) waiting and {len(self.runningJobs)} running")
+        if job.CancellationToken:
+            job.CancellationToken.register(lambda: self.finish(job.Id))
+        self.reschedule()
+        return job
+
+    def finish(self, jobId: str) -> None:
+        """
+        Removes the job from the queue, either because it has finished or because it has been cancelled before starting
+        """
+        with self.condition:
+            job = self.runningJobs.pop(jobId, None)
+            if job is None:
+                for waitingJob in self.waitingJobs:
+                    if waitingJob.Id == jobId:
+                        job = waitingJob
+                        self.waitingJobs.remove(waitingJob)
+                        break
+            if job is None:
+                return
+            job.finished.set()
+        self.reschedule()
+
+    def reschedule(self) -> None:
+        """
+        Starts the waiting jobs that can run now, and tells the rest of them their new position on the queue
+        """
+        with self.condition:
+            jobsToStart: list[InstallationJob] = []
+            parallelAllowed = self.isParallelAllowed()
+            for job in self.waitingJobs:
+                if self.canStart(job, parallelAllowed):
+                    jobsToStart.append(job)
+                    self.runningJobs[job.Id] = job
+                    job.started.set()
+            if jobsToStart:
+                self.waitingJobs = [job for job in self.waitingJobs if not job.started.is_set()]
+            waitingPositions = [(job, len(self.runningJobs) + position) for position, job in enumerate(self.waitingJobs)]
+            self.condition.notify_all()
+        for job in jobsToStart:
+            print(f"🟢 Starting {job}")
+            job.onStart()
+        for job, position in waitingPositions:
+            if job.onQueuePositionChanged:
+                job.onQueuePositionChanged(position)
+
+    def canStart(self, job: InstallationJob, parallelAllowed: bool) -> bool:
+        if job.CancellationToken and job.CancellationToken.isCancelled(): # Its cancellation callback is about to take it out of the queue
+            return False
+        if len(self.runningJobs) == 0:
+            return True
+        if not parallelAllowed or len(self.runningJobs) >= self.maxParallelOperations:
+            return False
+        if sum(1 for runningJob in self.runningJobs.values() if runningJob.ManagerName == job.ManagerName) >= job.MaxParallelOperations:
+            return False
+        return not job.ExclusiveResource or all(runningJob.ExclusiveResource != job.ExclusiveResource for runningJob in self.runningJobs.values())
+
+    def hasJobs(self) -> bool:
+        return len(self.waitingJobs) > 0 or len(self.runningJobs) > 0
+
+    def waitUntilIdle(self, timeout: float = None) -> bool:
+        """
+        Blocks until no job is waiting or running, and returns False if the timeout expired first
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.hasJobs(), timeout)
@@ -0,0 +1,127 @@
+import os, re
+from collections import deque
+from datetime import datetime
+from threading import Lock
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtWidgets import QPlainTextEdit
+
+MAX_CONSOLE_LINES = 5000 # Lines shown on a live output window. Older ones are dropped from the window, but not from the output file
+CONSOLE_FRAME_TIME = 16 # Milliseconds. The lines received during a frame are added to the window at once, with a single repaint
+OUTPUT_LOGS_FOLDER = os.path.join(os.path.expanduser("~"), ".wingetui/operationlogs")
+MAX_OUTPUT_LOGS = 100 # Output files kept. The operation history keeps the last lines of the output of the older operations
+
+
+def getOutputLogFile(name: str) -> str:
+    """
+    Returns the path of a new output file for the operation with the given name, deleting the oldest output files beyond MAX_OUTPUT_LOGS
+    """
+    try:
+        os.makedirs(OUTPUT_LOGS_FOLDER, exist_ok=True)
+        logs = sorted((entry for entry in os.scandir(OUTPUT_LOGS_FOLDER) if entry.name.endswith(".log")), key=lambda entry: entry.stat().st_mtime)
+        for entry in logs[:max(0, len(logs) - MAX_OUTPUT_LOGS + 1)]:
+            os.remove(entry.path)
+    except OSError as e:
+        print(f"🟠 Could not clean the operation output files: {e}")
+    fileName = re.sub(r"[^\w.-]", "_", name)
+    return os.path.join(OUTPUT_LOGS_FOLDER, f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{fileName}.log")
+
+
+class LiveOutputConsole(QObject):
+    """
+    Shows the output of an operation on a QPlainTextEdit without copying its contents on every line: the lines that arrive during the same
+    frame are appended at once (so the window gets repainted at most once per frame), and only the last maxLines lines are kept, on a ring buffer.
+    A burst too big to be appended within a frame replaces the text of the window with the ring buffer instead.
+    Every line is written to the output file too, if one is given.
+    addLine can be called from any thread, so it should be connected to the signals of the worker threads with a direct connection:
+    a burst of lines then costs the main thread a single event, instead of one queued event per line.
+    """
+    linesQueued = Signal()
+    lastLineChanged = Signal(str)
+    textEdit: QPlainTextEdit = None
+    logFile: str = ""
+    maxLines: int = MAX_CONSOLE_LINES
+    lines: deque[str] = None
+    pendingLines: list[str] = []
+    receivedLines: int = 0
+    repaints: int = 0
+    flushQueued: bool = False
+
+    def __init__(self, textEdit: QPlainTextEdit, logFile: str = "", maxLines: int = MAX_CONSOLE_LINES, parent: QObject = None):
+        super().__init__(parent)
+        self.textEdit = textEdit
+        self.logFile = logFile
+        self.maxLines = maxLines
+        self.lines = deque(maxlen=maxLines)
+        self.pendingLines = []
+        self.receivedLines = 0
+        self.repaints = 0
+        self.flushQueued = False
+        self.file = None
+        self.lock = Lock()
+        self.textEdit.setMaximumBlockCount(maxLines)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(CONSOLE_FRAME_TIME)
+        self.timer.timeout.connect(self.flush)
+        self.linesQueued.connect(self.scheduleFlush)
+
+    def addLine(self, line: str) -> None:
+        with self.lock:
+            self.pendingLines.append(line)
+            self.receivedLines += 1
+            if self.flushQueued:
+                return
+            self.flushQueued = True
+        self.linesQueued.emit()
+
+    def scheduleFlush(self) -> None:
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self) -> None:
+        """
+        Adds the pending lines to the window and to the output file
+        """
+        self.timer.stop()
+        with self.lock:
+            lines = self.pendingLines
+            self.pendingLines = []
+            self.flushQueued = False
+        if not lines:
+            return
+        self.writeLines(lines)
+        self.lines.extend(lines)
+        if len(lines) * 8 >= self.maxLines: # Appending costs a few microseconds per line, rebuilding the whole window costs about as much as appending an eighth of it
+            self.textEdit.setPlainText("\n".join(self.lines))
+        else:
+            self.textEdit.appendPlainText("\n".join(lines))
+        self.textEdit.verticalScrollBar().setValue(self.textEdit.verticalScrollBar().maximum())
+        self.repaints += 1
+        self.lastLineChanged.emit(lines[-1])
+
+    def writeLines(self, lines: list[str]) -> None:
+        if not self.logFile:
+            return
+        try:
+            if self.file is None:
+                os.makedirs(os.path.dirname(self.logFile), exist_ok=True)
+                self.file = open(self.logFile, "a", encoding="utf-8", errors="replace")
+            self.file.write("".join(line+"\n" for line in lines))
+            self.file.flush()
+        except OSError as e:
+            print(f"🟠 Could not write the operation output to {self.logFile}: {e}")
+            self.logFile = ""
+
+    def clear(self) -> None:
+        """
+        Empties the window. The lines already written to the output file are kept
+        """
+        self.flush()
+        self.lines.clear()
+        self.textEdit.clear()
+
+    def close(self) -> None:
+        self.flush()
+        if self.file:
+            self.file.close()
+            self.file = None
@@ -253,7 +253,7 @@ class RootWindow(QMainWindow):
             self.deleteChildren()
             event.accept()
         if getSettings("DisablesystemTray"):
-            if globals.pending_programs != []:
+            if Scheduler.hasJobs():
                 retValue = QMessageBox.question(self, _("Warning"), _("There is an installation in progress. If you close WingetUI, the installation may fail and have unexpected results. Do you still want to quit WingetUI?"), buttons = QMessageBox.StandardButton.No | QMessageBox.StandardButton.Yes, defaultButton = QMessageBox.StandardButton.No)
                 if retValue == QMessageBox.StandardButton.No:
                     event.ignore()
@@ -0,0 +1,261 @@
+import os, json, re
+from datetime import datetime
+from threading import Lock
+
+HISTORY_FOLDER = os.path.join(os.path.expanduser("~"), ".wingetui/operationhistory")
+LEGACY_HISTORY_FILE = os.path.join(os.path.expanduser("~"), ".wingetui/OperationHistory") # The old OperationHistory setting, imported the first time the store is used
+ENTRY_SEPARATOR = "\n\n--------------------------------\n" # Between the operations, on the legacy history and on the operation history section
+SEGMENT_SIZE = 1000 # Operations per segment file
+MAX_SEGMENTS = 20 # Segment files kept. The oldest one is deleted when a new one gets started
+HISTORY_OUTPUT_LINES = 200 # Last output lines saved with every operation. The whole output is on the output file of the operation
+HISTORY_PAGE_SIZE = 50 # Operations loaded at once on the operation history section
+OUTCOMES = ("succeeded", "failed", "cancelled")
+LEGACY_MANAGER_NAMES = {"winget": "Winget", "scoop": "Scoop", "choco": "Chocolatey", "pip": "Pip", "npm": "Npm"} # The modules of the package managers, as written on the legacy history
+
+
+class HistoryEntry():
+    """
+    A finished package operation, as saved on the operation history
+    """
+    Operation: str = ""
+    PackageName: str = ""
+    PackageId: str = ""
+    Version: str = ""
+    Source: str = ""
+    ManagerName: str = ""
+    Command: str = ""
+    ReturnCode: int = 0
+    Outcome: str = ""
+    Date: str = ""
+    OutputFile: str = ""
+    Output: list[str] = []
+
+    def __init__(self, operation: str, packageName: str, packageId: str, version: str, source: str, managerName: str, command: str, returnCode: int, outcome: str, date: str = "", outputFile: str = "", output: list[str] = None):
+        self.Operation = operation
+        self.PackageName = packageName
+        self.PackageId = packageId
+        self.Version = version
+        self.Source = source
+        self.ManagerName = managerName
+        self.Command = command
+        self.ReturnCode = returnCode
+        self.Outcome = outcome
+        self.Date = date if date else datetime.now().isoformat(sep=" ", timespec="seconds")
+        self.OutputFile = outputFile
+        self.Output = output[-HISTORY_OUTPUT_LINES:] if output else []
+
+    def getDay(self) -> str:
+        return self.Date[:10]
+
+    def toDict(self) -> dict:
+        return {"Operation": self.Operation, "PackageName": self.PackageName, "PackageId": self.PackageId, "Version": self.Version, "Source": self.Source, "PackageManager": self.ManagerName,
+                "Command": self.Command, "ReturnCode": self.ReturnCode, "Outcome": self.Outcome, "Date": self.Date, "OutputFile": self.OutputFile, "Output": self.Output}
+
+    @staticmethod
+    def fromDict(values: dict) -> 'HistoryEntry':
+        return HistoryEntry(values.get("Operation", ""), values.get("PackageName", ""), values.get("PackageId", ""), values.get("Version", ""), values.get("Source", ""), values.get("PackageManager", ""),
+                            values.get("Command", ""), values.get("ReturnCode", 0), values.get("Outcome", ""), values.get("Date", ""), values.get("OutputFile", ""), values.get("Output"))
+
+    def toText(self) -> str:
+        """
+        Returns the operation as shown on the operation history section
+        """
+        text =  f" Operation: {self.Operation} - Perform date {self.Date}\n"
+        text += f" Package: {self.PackageName} ({self.PackageId}), version {self.Version}, from {self.Source}\n"
+        text += f" Command-line call: {self.Command}\n"
+        text += f" Output code: {self.ReturnCode} ({self.Outcome})\n"
+        if self.OutputFile:
+            text += f" Full output: {self.OutputFile}\n"
+        text += f" Console output:\n"
+        for line in self.Output:
+            text += f"   | {line}\n"
+        return text
+
+    def __str__(self) -> str:
+        return f"<HistoryEntry: {self.Operation} {self.PackageId} ({self.ManagerName}), {self.Outcome} on {self.Date}>"
+
+
+class OperationHistoryStore():
+    """
+    Append-only operation history, stored as JSON lines on numbered segment files (history-000001.jsonl, ...). Appending an operation writes
+    a single line, and when a segment is full a new one gets started and the oldest ones beyond maxSegments are deleted.
+    The first query scans the segments once to build an in-memory index: the file position of every operation and its package id,
+    package manager, outcome and day. Queries filter the index and only read (and parse) the operations of the requested page.
+    """
+    folder: str = HISTORY_FOLDER
+    segmentSize: int = SEGMENT_SIZE
+    maxSegments: int = MAX_SEGMENTS
+    legacyFile: str = ""
+    segments: list[int] = None
+    currentSegmentEntries: int = 0
+    positions: list[tuple[int, int]] = None
+    metadata: list[tuple[str, str, str, str]] = None
+    indexes: dict[str, dict[str, list[int]]] = None
+
+    def __init__(self, folder: str = HISTORY_FOLDER, segmentSize: int = SEGMENT_SIZE, maxSegments: int = MAX_SEGMENTS, legacyFile: str = ""):
+        self.folder = folder
+        self.segmentSize = segmentSize
+        self.maxSegments = maxSegments
+        self.legacyFile = legacyFile
+        self.segments = None
+        self.currentSegmentEntries = 0
+        self.positions = None
+        self.metadata = None
+        self.indexes = None
+        self.lock = Lock()
+
+    def getSegmentPath(self, segment: int) -> str:
+        return os.path.join(self.folder, f"history-{segment:06d}.jsonl")
+
+    def loadSegments(self) -> None:
+        if self.segments is not None:
+            return
+        os.makedirs(self.folder, exist_ok=True)
+        self.segments = sorted(int(name[8:14]) for name in os.listdir(self.folder) if re.fullmatch(r"history-\d{6}\.jsonl", name))
+        if self.segments:
+            with open(self.getSegmentPath(self.segments[-1]), "rb") as f:
+                self.currentSegmentEntries = sum(1 for line in f if line.strip())
+        elif self.legacyFile and os.path.exists(self.legacyFile):
+            self.importLegacyHistory()
+
+    def append(self, entry: HistoryEntry) -> None:
+        with self.lock:
+            try:
+                self.loadSegments()
+                self.writeEntry(entry)
+            except OSError as e:
+                print(f"🔴 Could not save {entry} to the operation history: {e}")
+
+    def writeEntry(self, entry: HistoryEntry) -> None:
+        if not self.segments or self.currentSegmentEntries >= self.segmentSize:
+            self.segments.append(self.segments[-1] + 1 if self.segments else 1)
+            self.currentSegmentEntries = 0
+            while len(self.segments) > self.maxSegments:
+                os.remove(self.getSegmentPath(self.segments.pop(0)))
+        line = json.dumps(entry.toDict(), ensure_ascii=False).encode("utf-8") + b"\n"
+        with open(self.getSegmentPath(self.segments[-1]), "ab") as f:
+            offset = f.tell()
+            f.write(line)
+        self.currentSegmentEntries += 1
+        if self.positions is not None:
+            self.addToIndex(self.segments[-1], offset, entry.PackageId, entry.ManagerName, entry.Outcome, entry.getDay())
+
+    def loadIndex(self) -> None:
+        if self.positions is not None:
+            return
+        self.loadSegments()
+        self.positions = []
+        self.metadata = []
+        self.indexes = {"PackageId": {}, "ManagerName": {}, "Outcome": {}, "Day": {}}
+        for segment in self.segments:
+            offset = 0
+            with open(self.getSegmentPath(segment), "rb") as f:
+                for line in f:
+                    if line.strip():
+                        try:
+                            values = json.loads(line)
+                            self.addToIndex(segment, offset, values.get("PackageId", ""), values.get("PackageManager", ""), values.get("Outcome", ""), values.get("Date", "")[:10])
+                        except (ValueError, AttributeError):
+                            print(f"🟠 Invalid operation on the history segment {segment}, at {offset}")
+                    offset += len(line)
+
+    def addToIndex(self, segment: int, offset: int, packageId: str, managerName: str, outcome: str, day: str) -> None:
+        position = len(self.positions)
+        self.positions.append((segment, offset))
+        self.metadata.append((packageId.lower(), managerName, outcome, day))
+        for index, key in (("PackageId", packageId.lower()), ("ManagerName", managerName), ("Outcome", outcome), ("Day", day)):
+            self.indexes[index].setdefault(key, []).append(position)
+
+    def getCandidates(self, packageId: str, managerName: str, outcome: str, day: str) -> list[int]:
+        """
+        Returns the positions of the operations that may match the query (in order), from the most selective index that applies
+        """
+        candidateLists: list[list[int]] = []
+        if packageId:
+            packageId = packageId.lower()
+            matchingIds = [key for key in self.indexes["PackageId"] if packageId in key]
+            candidateLists.append(sorted(position for key in matchingIds for position in self.indexes["PackageId"][key]) if len(matchingIds) != 1 else self.indexes["PackageId"][matchingIds[0]])
+        for index, key in (("ManagerName", managerName), ("Outcome", outcome), ("Day", day)):
+            if key:
+                candidateLists.append(self.indexes[index].get(key, []))
+        if not candidateLists:
+            return range(len(self.positions))
+        return min(candidateLists, key=len)
+
+    def query(self, packageId: str = "", managerName: str = "", outcome: str = "", day: str = "", offset: int = 0, limit: int = 50) -> list[HistoryEntry]:
+        """
+        Returns the operations that match all the given filters, newest first, skipping the first offset ones.
+        packageId matches every package id that contains it (case-insensitively), and day is a YYYY-MM-DD date.
+        """
+        with self.lock:
+            try:
+                self.loadIndex()
+            except OSError as e:
+                print(f"🔴 Could not load the operation history: {e}")
+                return []
+            oldestSegment = self.segments[0] if self.segments else 0
+            packageId = packageId.lower()
+            positions: list[int] = []
+            skipped = 0
+            for position in reversed(self.getCandidates(packageId, managerName, outcome, day)):
+                if self.positions[position][0] < oldestSegment:
+                    break
+                entryId, entryManager, entryOutcome, entryDay = self.metadata[position]
+                if (packageId and packageId not in entryId) or (managerName and entryManager != managerName) or (outcome and entryOutcome != outcome) or (day and entryDay != day):
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                positions.append(position)
+                if len(positions) >= limit:
+                    break
+            return [entry for entry in (self.readEntry(position) for position in positions) if entry]
+
+    def readEntry(self, position: int) -> HistoryEntry | None:
+        segment, offset = self.positions[position]
+        try:
+            with open(self.getSegmentPath(segment), "rb") as f:
+                f.seek(offset)
+                return HistoryEntry.fromDict(json.loads(f.readline()))
+        except (OSError, ValueError) as e:
+            print(f"🟠 Could not read the operation at {offset} of the history segment {segment}: {e}")
+            return None
+
+    def getManagerNames(self) -> list[str]:
+        with self.lock:
+            self.loadIndex()
+            return sorted(name for name in self.indexes["ManagerName"] if name)
+
+    def importLegacyHistory(self) -> None:
+        """
+        Imports the operations of the old OperationHistory setting (plain text, newest first). The setting file is left as it was
+        """
+        try:
+            with open(self.legacyFile, "r", encoding="utf-8", errors="ignore") as f:
+                blocks = f.read().split(ENTRY_SEPARATOR)
+        except OSError as e:
+            print(f"🟠 Could not read the legacy operation history: {e}")
+            return
+        entries = [entry for entry in (parseLegacyEntry(block) for block in reversed(blocks)) if entry]
+        for entry in entries:
+            self.writeEntry(entry)
+        print(f"🟢 Imported {len(entries)} operations from the legacy operation history")
+
+
+def parseLegacyEntry(block: str) -> HistoryEntry | None:
+    """
+    Parses an operation of the old OperationHistory setting, or returns None if the block isn't one
+    """
+    match = re.search(r"Operation: (.*?) - Perform date (.*)", block)
+    if not match:
+        return None
+    package = re.search(r"Package: <Package: (.*?)>", block)
+    fields = package.group(1).split(";") if package else []
+    fields += [""] * (5 - len(fields))
+    command = re.search(r"Command-line call: (.*)", block)
+    returnCode = re.search(r"Output code: (-?\d+)", block)
+    output = [line[5:] for line in block.split("\n") if line.startswith("   | ")]
+    code = int(returnCode.group(1)) if returnCode else 1
+    manager = re.search(r"PackageManagers\.(\w+)\.", fields[4])
+    managerName = LEGACY_MANAGER_NAMES.get(manager.group(1), manager.group(1)) if manager else ""
+    return HistoryEntry(match.group(1), fields[0], fields[1], fields[2], fields[3], managerName, command.group(1).strip('"') if command else "", code, "succeeded" if code == 0 else "failed", match.group(2).strip()[:19], output=output)
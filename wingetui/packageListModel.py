@@ -0,0 +1,297 @@
+from typing import Callable
+from PySide6.QtCore import QAbstractProxyModel, QAbstractTableModel, QModelIndex, QObject, Qt, Signal
+from PySide6.QtGui import QIcon
+
+CHECK_COLUMN = 0
+
+# The view asks for several roles of every cell it paints, and reading a Qt enum member takes microseconds, so they are read once
+DISPLAY_ROLE = Qt.ItemDataRole.DisplayRole
+TOOLTIP_ROLE = Qt.ItemDataRole.ToolTipRole
+DECORATION_ROLE = Qt.ItemDataRole.DecorationRole
+CHECK_STATE_ROLE = Qt.ItemDataRole.CheckStateRole
+CHECKED = Qt.CheckState.Checked
+UNCHECKED = Qt.CheckState.Unchecked
+ROW_FLAGS = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+CHECK_COLUMN_FLAGS = ROW_FLAGS | Qt.ItemFlag.ItemIsUserCheckable
+NO_FLAGS = Qt.ItemFlag.NoItemFlags
+
+
+class PackageListModel(QAbstractTableModel):
+    """
+    Table model of the packages of a section, a row per package: the packages are the rows, so no item is created for them.
+    The texts, icons and tooltips of a row are read from its package when the view asks for them (only for the rows it paints),
+    and the checked packages are kept on a set. The rows are appended one by one, and removed all at once.
+    """
+    packageChecked = Signal(object, bool)
+    packages: list[object] = []
+    rows: dict[object, int] = {}
+    checkedPackages: set[object] = set()
+    headers: list[str] = []
+    columnTexts: dict[int, Callable[[object], str]] = {}
+    columnIcons: dict[int, QIcon] = {}
+    sourceColumn: int = -1
+    sourceIcons: dict[tuple[object, str], QIcon] = {}
+
+    def __init__(self, headers: list[str], columnTexts: dict[int, Callable[[object], str]], columnIcons: dict[int, QIcon], sourceColumn: int, parent: QObject = None):
+        super().__init__(parent)
+        self.packages = []
+        self.rows = {}
+        self.checkedPackages = set()
+        self.headers = headers
+        self.columnTexts = columnTexts
+        self.columnIcons = columnIcons
+        self.sourceColumn = sourceColumn
+        self.sourceIcons = {}
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.packages)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole) -> object:
+        if orientation == Qt.Orientation.Horizontal and role == DISPLAY_ROLE and 0 <= section < len(self.headers):
+            return self.headers[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> object:
+        return self.getData(index.row(), index.column(), role) if index.isValid() else None
+
+    def getData(self, row: int, column: int, role: int) -> object:
+        package = self.packages[row]
+        if role == DISPLAY_ROLE or role == TOOLTIP_ROLE:
+            getText = self.columnTexts.get(column)
+            return getText(package) if getText else None
+        elif role == DECORATION_ROLE:
+            if column == self.sourceColumn:
+                return self.getSourceIcon(package)
+            return self.columnIcons.get(column)
+        elif role == CHECK_STATE_ROLE and column == CHECK_COLUMN:
+            return CHECKED if package in self.checkedPackages else UNCHECKED
+        return None
+
+    def getSourceIcon(self, package) -> QIcon:
+        """
+        Returns the icon of the source of the package, asked to its package manager once per source
+        """
+        key = (package.PackageManager, package.Source)
+        icon = self.sourceIcons.get(key)
+        if icon is None:
+            icon = package.getSourceIcon()
+            self.sourceIcons[key] = icon
+        return icon
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        if not index.isValid():
+            return NO_FLAGS
+        return self.getFlags(index.column())
+
+    def getFlags(self, column: int) -> Qt.ItemFlags:
+        return CHECK_COLUMN_FLAGS if column == CHECK_COLUMN else ROW_FLAGS
+
+    def setData(self, index: QModelIndex, value: object, role: int = Qt.EditRole) -> bool:
+        if not index.isValid() or role != CHECK_STATE_ROLE or index.column() != CHECK_COLUMN:
+            return False
+        self.setChecked(self.packages[index.row()], Qt.CheckState(value) == CHECKED)
+        return True
+
+    def addPackage(self, package, checked: bool = False) -> None:
+        row = len(self.packages)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.packages.append(package)
+        self.rows[package] = row
+        if checked:
+            self.checkedPackages.add(package)
+        self.endInsertRows()
+
+    def removePackages(self, packages: set[object]) -> None:
+        """
+        Removes the rows of the given packages. The rows after them move up, so the model gets reset
+        """
+        if not any(package in self.rows for package in packages):
+            return
+        self.beginResetModel()
+        self.packages = [package for package in self.packages if package not in packages]
+        self.rows = {package: row for row, package in enumerate(self.packages)}
+        self.checkedPackages.difference_update(packages)
+        self.endResetModel()
+
+    def refreshPackage(self, package) -> None:
+        """
+        Repaints the row of the given package, once an attribute shown on it has changed
+        """
+        if package in self.rows:
+            row = self.rows[package]
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.headers)-1), [DISPLAY_ROLE, TOOLTIP_ROLE, DECORATION_ROLE])
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self.packages = []
+        self.rows = {}
+        self.checkedPackages = set()
+        self.endResetModel()
+
+    def getRow(self, package) -> int:
+        return self.rows.get(package, -1)
+
+    def isChecked(self, package) -> bool:
+        return package in self.checkedPackages
+
+    def getCheckedPackages(self) -> list[object]:
+        """
+        Returns the checked packages, in the order they were added
+        """
+        return [package for package in self.packages if package in self.checkedPackages]
+
+    def setChecked(self, package, checked: bool) -> None:
+        if checked == (package in self.checkedPackages) or package not in self.rows:
+            return
+        if checked:
+            self.checkedPackages.add(package)
+        else:
+            self.checkedPackages.discard(package)
+        index = self.index(self.rows[package], CHECK_COLUMN)
+        self.dataChanged.emit(index, index, [CHECK_STATE_ROLE])
+        self.packageChecked.emit(package, checked)
+
+    def setAllChecked(self, checked: bool) -> None:
+        self.checkedPackages = set(self.packages) if checked else set()
+        if self.packages:
+            self.dataChanged.emit(self.index(0, CHECK_COLUMN), self.index(len(self.packages)-1, CHECK_COLUMN), [CHECK_STATE_ROLE])
+
+
+class PackageListSortingModel(QAbstractProxyModel):
+    """
+    Shows the rows of a PackageListModel that the section has filtered and sorted (with its search index and sort orders, or ranked
+    by relevance), in that order. The shown rows are set as a whole, so there is no lessThan call per comparison nor a filter call per row,
+    and only the packages on the list are mapped. Sorting from the view only records the sort column: the section sorts again when a
+    header gets clicked. When rows get removed from the source model, the packages still on it stay shown.
+    """
+    packageModel: PackageListModel = None
+    sourceRows: list[int] = []
+    shownPackages: list[object] = []
+    proxyRows: dict[int, int] = None
+    columns: int = 0
+    sortColumn: int = 1
+    sortOrder: Qt.SortOrder = Qt.SortOrder.AscendingOrder
+
+    def __init__(self, parent: QObject = None):
+        super().__init__(parent)
+        self.packageModel = None
+        self.sourceRows = []
+        self.shownPackages = []
+        self.proxyRows = None
+        self.columns = 0
+        self.sortColumn = 1
+        self.sortOrder = Qt.SortOrder.AscendingOrder
+
+    def setSourceModel(self, sourceModel: PackageListModel) -> None:
+        self.beginResetModel()
+        super().setSourceModel(sourceModel)
+        self.packageModel = sourceModel
+        self.columns = sourceModel.columnCount()
+        self.sourceRows = []
+        self.proxyRows = None
+        sourceModel.modelAboutToBeReset.connect(self.beginSourceReset)
+        sourceModel.modelReset.connect(self.finishSourceReset)
+        sourceModel.dataChanged.connect(self.forwardDataChanged)
+        self.endResetModel()
+
+    def setPackages(self, packages: list[object]) -> None:
+        """
+        Shows the given packages, in the given order
+        """
+        self.beginResetModel()
+        getRow = self.packageModel.rows.__getitem__
+        self.sourceRows = [getRow(package) for package in packages]
+        self.proxyRows = None
+        self.endResetModel()
+
+    def addPackages(self, packages: list[object]) -> None:
+        """
+        Shows the given packages after the ones already shown
+        """
+        if not packages:
+            return
+        row = len(self.sourceRows)
+        self.beginInsertRows(QModelIndex(), row, row+len(packages)-1)
+        getRow = self.packageModel.rows.__getitem__
+        self.sourceRows.extend(getRow(package) for package in packages)
+        self.proxyRows = None
+        self.endInsertRows()
+
+    def beginSourceReset(self) -> None:
+        self.beginResetModel()
+        packages = self.packageModel.packages
+        self.shownPackages = [packages[row] for row in self.sourceRows]
+
+    def finishSourceReset(self) -> None:
+        rows = self.packageModel.rows
+        self.sourceRows = [rows[package] for package in self.shownPackages if package in rows]
+        self.shownPackages = []
+        self.proxyRows = None
+        self.endResetModel()
+
+    def forwardDataChanged(self, topLeft: QModelIndex, bottomRight: QModelIndex, roles: list[int] = []) -> None:
+        if not self.sourceRows:
+            return
+        if topLeft.row() == bottomRight.row():
+            index = self.mapFromSource(topLeft)
+            if index.isValid():
+                self.dataChanged.emit(index, self.index(index.row(), bottomRight.column()), roles)
+        else: # The shown rows of a source range are not contiguous
+            self.dataChanged.emit(self.index(0, topLeft.column()), self.index(len(self.sourceRows)-1, bottomRight.column()), roles)
+
+    def getPackage(self, index: QModelIndex) -> object:
+        if not index.isValid() or index.row() >= len(self.sourceRows):
+            return None
+        return self.packageModel.packages[self.sourceRows[index.row()]]
+
+    def getIndex(self, package, column: int = 0) -> QModelIndex:
+        return self.mapFromSource(self.packageModel.index(self.packageModel.getRow(package), column))
+
+    def mapToSource(self, proxyIndex: QModelIndex) -> QModelIndex:
+        if not proxyIndex.isValid() or proxyIndex.row() >= len(self.sourceRows):
+            return QModelIndex()
+        return self.packageModel.index(self.sourceRows[proxyIndex.row()], proxyIndex.column())
+
+    def mapFromSource(self, sourceIndex: QModelIndex) -> QModelIndex:
+        if not sourceIndex.isValid():
+            return QModelIndex()
+        if self.proxyRows is None: # Only needed when a shown package changes, so it is built then
+            self.proxyRows = {sourceRow: row for row, sourceRow in enumerate(self.sourceRows)}
+        row = self.proxyRows.get(sourceIndex.row())
+        return QModelIndex() if row is None else self.index(row, sourceIndex.column())
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not 0 <= row < len(self.sourceRows) or not 0 <= column < self.columns or parent.isValid():
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:
+        return QModelIndex()
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and len(self.sourceRows) > 0
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.sourceRows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self.columns
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole) -> object:
+        return self.packageModel.headerData(section, orientation, role)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> object:
+        if not index.isValid():
+            return None
+        return self.packageModel.getData(self.sourceRows[index.row()], index.column(), role)
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        column = index.column() # -1 for an invalid index
+        return CHECK_COLUMN_FLAGS if column == CHECK_COLUMN else ROW_FLAGS if column > 0 else NO_FLAGS
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder) -> None:
+        self.sortColumn = column
+        self.sortOrder = order
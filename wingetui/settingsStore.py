@@ -0,0 +1,287 @@
+import os, json, re
+from contextlib import contextmanager
+import atexit
+from threading import RLock, Timer
+from typing import Callable
+
+SETTINGS_FOLDER = os.path.join(os.path.expanduser("~"), ".wingetui")
+SETTINGS_FILE_NAME = "settings.json"
+INSTANCE_SETTINGS_PREFIXES = ("WingetUI_", "RaiseWindow_") # Lock files that the running instances look for on the settings folder, so they are still separate files
+SETTINGS_SAVE_DELAY = 0.1 # Seconds. The changes made meanwhile are saved together, with a single write
+LEGACY_SKIPPED_SETTINGS = ("OperationHistory",) # Legacy setting files that are not moved to the settings file (the operation history store imports them)
+
+
+class SettingsStore():
+    """
+    Keeps all the settings on a single JSON file (a map from the name of every enabled setting to its value), loaded once into memory.
+    Like the files of the old one-file-per-setting layout, which gets migrated the first time the store is loaded, a setting is enabled
+    while it is on the map, and its value is an empty string unless one has been set.
+    A change is applied to the map and notified to the callbacks subscribed to the setting right away, and the changes made within
+    SETTINGS_SAVE_DELAY seconds (or inside a transaction() block) are saved together, rewriting the file atomically (to a temporary file
+    that then replaces it). The changes made by other instances are picked up, setting by setting, when a setting is read with cache=False.
+    The instance lock files are kept as separate files.
+    """
+    folder: str = SETTINGS_FOLDER
+    file: str = ""
+    values: dict[str, str] = None
+    fileStamp: tuple[int, int] = None
+    transactionDepth: int = 0
+    pendingChanges: dict[str, str | None] = {}
+    transactionChanges: dict[str, str | None] = {}
+    saveTimer: Timer = None
+    subscribers: dict[str, list[Callable[[str, str | None], None]]] = {}
+    writes: int = 0
+
+    def __init__(self, folder: str = SETTINGS_FOLDER):
+        self.folder = folder
+        self.file = os.path.join(folder, SETTINGS_FILE_NAME)
+        self.values = None
+        self.fileStamp = None
+        self.transactionDepth = 0
+        self.pendingChanges = {}
+        self.transactionChanges = {}
+        self.saveTimer = None
+        self.subscribers = {}
+        self.writes = 0
+        self.lock = RLock()
+        atexit.register(self.save)
+
+    def load(self) -> None:
+        if self.values is not None:
+            return
+        with self.lock:
+            if self.values is not None:
+                return
+            values = self.readFile()
+            if values is None:
+                values = self.migrateLegacySettings()
+            self.values = values
+
+    def readFile(self) -> dict[str, str] | None:
+        """
+        Returns the settings saved on the settings file, or None if there is no settings file yet
+        """
+        try:
+            with open(self.file, "r", encoding="utf-8") as f:
+                self.fileStamp = self.getFileStamp()
+                values = json.load(f)
+            return {str(key): str(value) for key, value in values.items()}
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"🔴 Could not read the settings file {self.file}: {e}")
+            return {}
+
+    def getFileStamp(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.file)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def migrateLegacySettings(self) -> dict[str, str]:
+        """
+        Moves the settings of the old layout (a file per enabled setting, holding its value) to the settings file
+        """
+        values: dict[str, str] = {}
+        legacyFiles: list[str] = []
+        try:
+            for entry in os.scandir(self.folder):
+                if entry.is_file() and re.fullmatch(r"\w+", entry.name) and not self.isInstanceSetting(entry.name) and entry.name not in LEGACY_SKIPPED_SETTINGS:
+                    with open(entry.path, "r", encoding="utf-8", errors="ignore") as f:
+                        values[entry.name] = f.read()
+                    legacyFiles.append(entry.path)
+        except OSError as e:
+            print(f"🟠 Could not read the legacy settings: {e}")
+        if not self.writeFile(values):
+            return values
+        for path in legacyFiles:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"🟠 Could not remove the legacy setting file {path}: {e}")
+        if legacyFiles:
+            print(f"🟢 Migrated {len(legacyFiles)} legacy settings to {self.file}")
+        return values
+
+    def isInstanceSetting(self, key: str) -> bool:
+        return key.startswith(INSTANCE_SETTINGS_PREFIXES)
+
+    def get(self, key: str, cache: bool = True) -> bool:
+        """
+        Returns if the given setting is enabled
+        """
+        if cache and self.values is not None and key in self.values: # The instance settings are never on the map
+            return True
+        if key.startswith(INSTANCE_SETTINGS_PREFIXES):
+            return os.path.exists(os.path.join(self.folder, key))
+        if self.values is None:
+            self.load()
+        if not cache:
+            self.reload()
+        return key in self.values
+
+    def getValue(self, key: str, cache: bool = True) -> str:
+        """
+        Returns the value of the given setting, or an empty string if it is not set
+        """
+        if self.isInstanceSetting(key):
+            try:
+                with open(os.path.join(self.folder, key), "r", encoding="utf-8", errors="ignore") as f:
+                    return f.read()
+            except OSError:
+                return ""
+        self.load()
+        if not cache:
+            self.reload()
+        return self.values.get(key, "")
+
+    def set(self, key: str, enabled: bool) -> None:
+        """
+        Enables the setting (with an empty value) or disables it
+        """
+        self.change(key, "" if enabled else None)
+
+    def setValue(self, key: str, value: str) -> None:
+        """
+        Sets the value of the setting, enabling it
+        """
+        self.change(key, str(value))
+
+    def change(self, key: str, value: str | None) -> None:
+        if self.isInstanceSetting(key):
+            self.changeInstanceSetting(key, value)
+            return
+        self.load()
+        with self.lock:
+            if self.values.get(key) == value:
+                return
+            if value is None:
+                self.values.pop(key, None)
+            else:
+                self.values[key] = value
+            self.pendingChanges[key] = value
+            if self.transactionDepth:
+                self.transactionChanges[key] = value
+                return
+            if self.saveTimer is None:
+                self.saveTimer = Timer(SETTINGS_SAVE_DELAY, self.save)
+                self.saveTimer.daemon = True
+                self.saveTimer.start()
+        self.notify({key: value})
+
+    def changeInstanceSetting(self, key: str, value: str | None) -> None:
+        path = os.path.join(self.folder, key)
+        try:
+            if value is None:
+                if os.path.exists(path):
+                    os.remove(path)
+            else:
+                with open(path, "w", encoding="utf-8", errors="ignore") as f:
+                    f.write(value)
+        except OSError as e:
+            print(f"🟠 Could not change the instance setting {key}: {e}")
+
+    @contextmanager
+    def transaction(self):
+        """
+        Applies the changes made inside the block together: they are saved with a single write, and notified, once the outermost block ends
+        """
+        with self.lock:
+            self.transactionDepth += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self.transactionDepth -= 1
+                changes: dict[str, str | None] = {}
+                if not self.transactionDepth:
+                    changes = self.transactionChanges
+                    self.transactionChanges = {}
+                    self.save()
+            self.notify(changes)
+
+    def save(self) -> None:
+        """
+        Writes the pending changes to the settings file. Called SETTINGS_SAVE_DELAY seconds after a change, and when the program exits
+        """
+        with self.lock:
+            if self.saveTimer is not None:
+                self.saveTimer.cancel()
+                self.saveTimer = None
+            if self.pendingChanges and self.writeFile(self.values):
+                self.pendingChanges = {}
+
+    def writeFile(self, values: dict[str, str]) -> bool:
+        temporaryFile = self.file + ".tmp"
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            data = json.dumps(values, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+            with open(temporaryFile, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(temporaryFile, self.file)
+            self.fileStamp = self.getFileStamp()
+            self.writes += 1
+            return True
+        except OSError as e:
+            print(f"🔴 Could not save the settings to {self.file}: {e}")
+            return False
+
+    def reload(self) -> None:
+        """
+        Reads the settings file again if another instance has changed it, and applies (and notifies) the settings that changed
+        """
+        with self.lock:
+            if self.getFileStamp() == self.fileStamp:
+                return
+            values = self.readFile()
+            if values is None:
+                return
+            changes: dict[str, str | None] = {key: None for key in self.values if key not in values and key not in self.pendingChanges}
+            changes.update({key: value for key, value in values.items() if self.values.get(key) != value and key not in self.pendingChanges})
+            for key, value in changes.items():
+                if value is None:
+                    self.values.pop(key, None)
+                else:
+                    self.values[key] = value
+        self.notify(changes)
+
+    def subscribe(self, callback: Callable[[str, str | None], None], key: str = "") -> Callable[[], None]:
+        """
+        Calls callback(key, value) after the given setting (or any setting, if no key is given) changes. The value is None if the setting
+        has been disabled. Returns a function that unsubscribes the callback
+        """
+        with self.lock:
+            self.subscribers.setdefault(key, []).append(callback)
+        return lambda: self.unsubscribe(callback, key)
+
+    def unsubscribe(self, callback: Callable[[str, str | None], None], key: str = "") -> None:
+        with self.lock:
+            if callback in self.subscribers.get(key, []):
+                self.subscribers[key].remove(callback)
+
+    def notify(self, changes: dict[str, str | None]) -> None:
+        for key, value in changes.items():
+            with self.lock:
+                callbacks = self.subscribers.get(key, []) + self.subscribers.get("", [])
+            for callback in callbacks:
+                try:
+                    callback(key, value)
+                except Exception as e:
+                    print(f"🟠 Settings callback {callback} for {key} failed: {type(e).__name__}: {e}")
+
+    def getNames(self) -> list[str]:
+        """
+        Returns the names of the enabled settings
+        """
+        self.load()
+        with self.lock:
+            return sorted(self.values)
+
+    def clear(self) -> None:
+        """
+        Disables every setting
+        """
+        with self.transaction():
+            for key in self.getNames():
+                self.set(key, False)
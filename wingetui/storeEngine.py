@@ -1,6 +1,5 @@
 from __future__ import annotations
 from functools import partial
-import signal
 import sys, subprocess, time, os, json
 from threading import Thread
 from PySide6.QtCore import *
@@ -15,6 +14,10 @@ from tools import _
 from customWidgets import *
 import globals
 from PackageManagers.PackageClasses import Package, UpgradablePackage, PackageDetails
+from PackageManagers.processRunner import Runner, RunningCommand
+from PackageManagers.cancellationToken import CancellationToken
+from liveOutputConsole import LiveOutputConsole, getOutputLogFile
+from PackageManagers.packageSnapshots import Snapshots
 
 class PackageInstallerWidget(QWidget):
     onCancel = Signal()
@@ -24,10 +27,12 @@ class PackageInstallerWidget(QWidget):
     counterSignal = Signal(int)
     callInMain = Signal(object)
     changeBarOrientation = Signal()
-    def __init__(self, package: Package, options: InstallationOptions):
+    startOperation = Signal()
+    def __init__(self, package: Package, options: InstallationOptions, batch: BatchedUpdate = None):
         super().__init__()
         self.Package = package
         self.Options = options
+        self.Batch = batch
         self.actionDone = _("installed")
         self.actionDoing = _("installing")
         self.actionName = _("installation")
@@ -42,7 +47,8 @@ class PackageInstallerWidget(QWidget):
         self.liveOutputWindow.setReadOnly(True)
         self.liveOutputWindowWindow.resize(700, 400)
         self.liveOutputWindowWindow.setWindowTitle(_("Live command-line output"))
-        self.addInfoLine.connect(lambda s: (self.liveOutputWindow.setPlainText(self.liveOutputWindow.toPlainText()+"\n"+s), self.liveOutputWindow.verticalScrollBar().setValue(self.liveOutputWindow.verticalScrollBar().maximum())))
+        self.liveOutput = LiveOutputConsole(self.liveOutputWindow, getOutputLogFile(self.Package.Id), parent=self)
+        self.addInfoLine.connect(self.liveOutput.addLine, Qt.ConnectionType.DirectConnection)
         ApplyMica(self.liveOutputWindowWindow.winId(), MICAMODE.DARK)
         
         for manager in PackageManagersList:
@@ -83,7 +89,8 @@ class PackageInstallerWidget(QWidget):
         self.progressbar.setFixedHeight(2)
         self.changeBarOrientation.connect(lambda: self.progressbar.setInvertedAppearance(not(self.progressbar.invertedAppearance())))
         self.finishInstallation.connect(self.finish)
-        self.addInfoLine.connect(lambda text: self.liveOutputButton.setText(text))
+        self.startOperation.connect(self.runInstallation, Qt.QueuedConnection) # Queued, so the operation never starts before the widget has been set up
+        self.liveOutput.lastLineChanged.connect(lambda text: self.liveOutputButton.setText(text))
         self.counterSignal.connect(self.counter)
         self.liveOutputButton = ButtonWithResizeSignal(QIcon(getMedia("console", autoIconMode = False)), "")
         self.liveOutputButton.clicked.connect(lambda: (self.liveOutputWindowWindow.show(), ApplyMica(self.liveOutputWindowWindow.winId(), isDark()), self.liveOutputWindowWindow.setWindowIcon(self.window().windowIcon())))
@@ -106,13 +113,13 @@ class PackageInstallerWidget(QWidget):
         self.layout.addWidget(self.cancelButton)
         self.setLayout(self.layout)
         self.canceled = False
+        self.CancellationToken = CancellationToken()
         self.installId = str(time.time())
         self.cancelButton.setObjectName("PackageButton")
         self.adminBadge.setObjectName("PackageButton")
         self.liveOutputButton.setObjectName("PackageButton")
         self.liveOutputButton.setStyleSheet(f"text-align:left;font-family: \"Consolas\";font-weight: regular;padding-left: 5px;padding-right: 5px; color: {'lightgray' if isDark() else '#262626'};border-bottom-left-radius: 4px;border-bottom-right-radius: 4px;")
         self.iconLabel.setObjectName("FlatButton")
-        queueProgram(self.installId)
 
         self.leftSlow = QPropertyAnimation(self.progressbar, b"value")
         self.leftSlow.setStartValue(0)
@@ -142,25 +149,45 @@ class PackageInstallerWidget(QWidget):
         self.rightFast.valueChanged.connect(self.update)
         self.rightFast.finished.connect(lambda: (self.leftSlow.start(), self.changeBarOrientation.emit()))
 
-        self.waitThread = KillableThread(target=self.startInstallation, daemon=True)
-        self.waitThread.start()
         Thread(target=self.loadIconThread, daemon=True, name=f"Installer: loading icon for {package}").start()
         print(f"🟢 Waiting for install permission... title={self.Package.Name}, id={self.Package.Id}, installId={self.installId}")
         print("🔵 Given package:", package)
         print("🔵 Installation options:", options)
+        if self.Batch:
+            self.Batch.addWidget(self)
+        else:
+            self.queueJob()
+
+    def queueJob(self) -> None:
+        capabilities: PackageManagerCapabilities = self.Package.PackageManager.Capabilities
+        Scheduler.queue(InstallationJob(self.installId, self.Package.Name, self.Package.PackageManager.NAME, self.startInstallation, self.showQueuePosition, capabilities.MaxParallelOperations, capabilities.ExclusiveResource, self.CancellationToken))
+
+    def finishJob(self) -> None:
+        """
+        Releases the place of the operation on the installation queue, or its share of the place of its batch
+        """
+        if self.Batch:
+            self.Batch.finishWidget(self)
+        else:
+            Scheduler.finish(self.installId)
+
+    def getOutcome(self, returncode: int) -> str:
+        """
+        Returns the outcome of the operation, as saved on the operation history
+        """
+        if self.canceled or self.CancellationToken.isCancelled():
+            return "cancelled"
+        return "succeeded" if returncode in LIST_RETURNCODES_OPERATION_SUCCEEDED else "failed"
 
     def startInstallation(self) -> None:
-        while self.installId != globals.current_program and not getSettings("AllowParallelInstalls"):
-            time.sleep(0.2)
-            append = " "
-            try:
-                append += _("(Number {0} in the queue)").format(globals.pending_programs.index(self.installId))
-            except ValueError:
-                print(f"🔴 Package {self.Package.Id} not in globals.pending_programs")
-            globals.pending_programs.index(self.installId)
-            self.addInfoLine.emit(_("Waiting for other installations to finish...")+append)
+        """
+        Called by the Scheduler once the installation is allowed to run
+        """
         print("🟢 Have permission to install, starting installation threads...")
-        self.callInMain.emit(self.runInstallation)
+        self.startOperation.emit()
+
+    def showQueuePosition(self, position: int) -> None:
+        self.addInfoLine.emit(_("Waiting for other installations to finish...")+" "+_("(Number {0} in the queue)").format(position))
         
     def loadIconThread(self):
         iconPath = getPackageIcon(self.Package)
@@ -181,7 +208,7 @@ class PackageInstallerWidget(QWidget):
         globals.tray_is_installing = True
         self.callInMain.emit(update_tray_icon)
         self.finishedInstallation = False
-        self.callInMain.emit(lambda: self.liveOutputWindow.setPlainText(""))
+        self.callInMain.emit(self.liveOutput.clear)
         self.addInfoLine.emit(_("Running the installer..."))
         self.leftSlow.start()
         self.setProgressbarColor(blueColor)
@@ -206,11 +233,7 @@ class PackageInstallerWidget(QWidget):
         self.progressbar.setValue(1000)
         self.setProgressbarColor("#fec10b" if isDark() else "#fec10b")
         self.liveOutputButton.setText(_("Installation canceled by the user!"))
-        if not self.finishedInstallation:
-            try:
-                os.kill(self.p.pid, signal.CTRL_C_EVENT)
-            except Exception as e:
-                report(e)
+        self.CancellationToken.cancel() # Kills the command if it is running, and takes the operation out of the queue otherwise
         self.finishedInstallation = True
         self.cancelButton.setEnabled(True)
         self.cancelButton.setText(_("Close"))
@@ -219,16 +242,11 @@ class PackageInstallerWidget(QWidget):
         self.onCancel.emit()
         self.progressbar.setValue(1000)
         self.canceled=True
-        removeProgram(self.installId)
-        try: self.waitThread.kill()
-        except: pass
-        try: self.t.kill()
-        except: pass
-        try: os.kill(self.p.pid, signal.CTRL_C_EVENT)
-        except: pass
+        self.finishJob()
 
     def finish(self, returncode: int, output: str = "") -> None:
-        AddResultToLog(output.split("\n"), self.Package, returncode)
+        self.liveOutput.flush()
+        AddResultToLog(output.split("\n"), self.Package, returncode, self.liveOutput.logFile, self.getOutcome(returncode))
         self.leftSlow.stop()
         self.leftFast.stop()
         self.rightSlow.stop()
@@ -251,13 +269,10 @@ class PackageInstallerWidget(QWidget):
             return
         globals.tray_is_installing = False
         update_tray_icon()
+        Snapshots.invalidate(self.Package.PackageManager.NAME)
         self.finishedInstallation = True
         self.cancelButton.setEnabled(True)
-        removeProgram(self.installId)
-        try: self.waitThread.kill()
-        except: pass
-        try: os.kill(self.p.pid, signal.CTRL_C_EVENT)
-        except: pass
+        self.finishJob()
         if self.canceled:
             return
         self.cancelButton.setText(_("OK"))
@@ -288,7 +303,7 @@ class PackageInstallerWidget(QWidget):
                 globals.tray_is_needs_restart = True
                 update_tray_icon()
             if type(self) == PackageInstallerWidget:
-                self.Package.PackageItem.setCheckState(0, Qt.CheckState.Unchecked)
+                globals.discover.packageModel.setChecked(self.Package, False)
                 if not self.Package.Id in globals.uninstall.IdPackageReference.keys():    
                     print("🔵 Adding package to the uninstall section...")
                     globals.uninstall.addItem(self.Package)
@@ -376,6 +391,7 @@ class PackageInstallerWidget(QWidget):
         a.start()
 
     def close(self):
+        self.liveOutput.close()
         self.liveOutputWindow.close()
         self.liveOutputWindowWindow.close()
         globals.installersWidget.removeItem(self)
@@ -398,8 +414,8 @@ class PackageInstallerWidget(QWidget):
 
 class PackageUpdaterWidget(PackageInstallerWidget):
 
-    def __init__(self, package: UpgradablePackage, options: InstallationOptions):
-        super().__init__(package, options)
+    def __init__(self, package: UpgradablePackage, options: InstallationOptions, batch: BatchedUpdate = None):
+        super().__init__(package, options, batch)
         self.Package = package
         self.actionDone = _("updated")
         self.actionDoing = _("updating")
@@ -408,27 +424,47 @@ class PackageUpdaterWidget(PackageInstallerWidget):
         self.label.setText(_("{0} update").format(package.Name))
 
     def runInstallation(self) -> None:
+        self.prepareUpdate()
+        self.p = self.Package.PackageManager.startUpdate(self.Package, self.Options, self)
+        AddOperationToLog("update", self.Package, '"'+' '.join(self.p.args)+'"')
+
+    def prepareUpdate(self) -> None:
         globals.tray_is_installing = True
         globals.tray_is_available_updates = False
         self.callInMain.emit(update_tray_icon)
         self.finishedInstallation = False
         self.addInfoLine.emit(_("Running the updater..."))
-        self.callInMain.emit(lambda: self.liveOutputWindow.setPlainText(""))
+        self.callInMain.emit(self.liveOutput.clear)
         self.leftSlow.start()
         self.setProgressbarColor(blueColor)
-        self.p = self.Package.PackageManager.startUpdate(self.Package, self.Options, self)
-        AddOperationToLog("update", self.Package, '"'+' '.join(self.p.args)+'"')
+
+    def retryUpdate(self) -> None:
+        """
+        Runs the update again: right away if it has its own place on the installation queue, or queued on its own if it was part of a batch
+        """
+        if self.Batch:
+            batch, self.Batch = self.Batch, None
+            self.queueJob()
+            batch.finishWidget(self)
+        else:
+            self.runInstallation()
 
     def finish(self, returncode: int, output: str = "") -> None:
+        if self.Batch and not self.canceled and (self.Batch.interrupted or returncode == RETURNCODE_BATCH_FAILED) and returncode not in LIST_RETURNCODES_OPERATION_SUCCEEDED:
+            print(f"🟡 The batched update was cancelled or failed, queuing the update of {self.Package.Name} on its own")
+            self.retryUpdate()
+            return
         if returncode in (RETURNCODE_NEEDS_ELEVATION, RETURNCODE_NEEDS_SCOOP_ELEVATION):
             self.Options.RunAsAdministrator = True
             self.adminBadge.setVisible(self.Options.RunAsAdministrator)
-            self.runInstallation()
+            self.retryUpdate()
         elif returncode == RETURNCODE_NEEDS_PIP_ELEVATION:
             self.Options.CustomParameters.append("--user")
-            self.runInstallation()
+            self.retryUpdate()
             return
         else:
+            if returncode == RETURNCODE_BATCH_FAILED: # The widget is no longer on a batch (shouldn't happen)
+                returncode = RETURNCODE_FAILED
             globals.tray_is_installing = False
             update_tray_icon()
             self.leftSlow.stop()
@@ -444,24 +480,89 @@ class PackageUpdaterWidget(PackageInstallerWidget):
             if returncode in LIST_RETURNCODES_OPERATION_SUCCEEDED and not self.canceled:
                 UPDATES_SECTION: SoftwareSection = globals.updates
                 try:
-                    self.Package.PackageItem.setHidden(True)
-                    i = self.Package.PackageItem.treeWidget().takeTopLevelItem(self.Package.PackageItem.treeWidget().indexOfTopLevelItem(self.Package.PackageItem))
-                    UPDATES_SECTION.packageItems.remove(self.Package.PackageItem)
-                    if self.Package.PackageItem in UPDATES_SECTION.showableItems:
-                        UPDATES_SECTION.showableItems.remove(self.Package.PackageItem)
-                    del i
+                    UPDATES_SECTION.removePackages([self.Package])
                 except Exception as e:
                     report(e)
                 UPDATES_SECTION.updatePackageNumber()
             super().finish(returncode, output)
 
     def close(self):
+        self.liveOutput.close()
         self.liveOutputWindow.close()
         self.liveOutputWindowWindow.close()
         globals.installersWidget.removeItem(self)
         super().destroy()
         super().close()
 
+class BatchedUpdate(QObject):
+    """
+    Updates several packages of the same package manager and source with a single command, instead of starting one command per package.
+    Every package keeps its PackageUpdaterWidget, which gets the output and the result of its own package. The batch takes a single place
+    on the installation queue, and releases it once all of its widgets have finished. If the command gets cancelled (by cancelling one of
+    the packages) or fails, or a package needs to be updated with other options (elevated, for example), the packages that were not updated
+    leave the batch and get queued again, one by one.
+    """
+    startOperation = Signal()
+    Manager: PackageManagerModule = None
+    Options: InstallationOptions = None
+    widgets: list[PackageUpdaterWidget] = []
+    pendingWidgets: set[PackageUpdaterWidget] = set()
+    running: bool = False
+    interrupted: bool = False
+
+    def __init__(self, manager: PackageManagerModule, options: InstallationOptions):
+        super().__init__()
+        self.Manager = manager
+        self.Options = options
+        self.widgets = []
+        self.pendingWidgets = set()
+        self.running = False
+        self.interrupted = False
+        self.installId = f"batch-{time.time()}"
+        self.startOperation.connect(self.runBatch, Qt.ConnectionType.QueuedConnection)
+
+    def addWidget(self, widget: PackageUpdaterWidget) -> None:
+        self.widgets.append(widget)
+        self.pendingWidgets.add(widget)
+
+    def queue(self) -> None:
+        """
+        Queues the batch, once all of its widgets have been added
+        """
+        capabilities: PackageManagerCapabilities = self.Manager.Capabilities
+        Scheduler.queue(InstallationJob(self.installId, ", ".join(widget.Package.Name for widget in self.widgets), self.Manager.NAME, self.startOperation.emit, self.showQueuePosition, capabilities.MaxParallelOperations, capabilities.ExclusiveResource))
+
+    def showQueuePosition(self, position: int) -> None:
+        for widget in list(self.widgets):
+            widget.showQueuePosition(position)
+
+    def runBatch(self) -> None:
+        if not self.widgets: # All of them were cancelled before the batch could start
+            return
+        print(f"🟢 Have permission to install, starting the batched update of {len(self.widgets)} {self.Manager.NAME} packages...")
+        self.running = True
+        for widget in self.widgets:
+            widget.prepareUpdate()
+        p = self.Manager.startBatchUpdate([widget.Package for widget in self.widgets], self.Options, list(self.widgets))
+        for widget in self.widgets:
+            widget.p = p
+            widget.CancellationToken.register(p.cancel)
+            AddOperationToLog("update", widget.Package, '"'+' '.join(p.args)+'"')
+
+    def finishWidget(self, widget: PackageUpdaterWidget) -> None:
+        """
+        Called once the update of the package of the given widget has finished, or has been cancelled
+        """
+        if widget not in self.pendingWidgets:
+            return
+        self.pendingWidgets.discard(widget)
+        if not self.running:
+            self.widgets.remove(widget)
+        elif widget.canceled: # Cancelling any package of the batch kills the command
+            self.interrupted = True
+        if not self.pendingWidgets:
+            Scheduler.finish(self.installId)
+
 class PackageUninstallerWidget(PackageInstallerWidget):
     onCancel = Signal()
     killSubprocess = Signal()
@@ -484,7 +585,7 @@ class PackageUninstallerWidget(PackageInstallerWidget):
         globals.tray_is_installing = True
         self.callInMain.emit(update_tray_icon)
         self.finishedInstallation = False
-        self.callInMain.emit(lambda: self.liveOutputWindow.setPlainText(""))
+        self.callInMain.emit(self.liveOutput.clear)
         self.leftSlow.start()
         self.addInfoLine.emit(_("Running the uninstaller..."))
         self.setProgressbarColor(blueColor)
@@ -509,11 +610,7 @@ class PackageUninstallerWidget(PackageInstallerWidget):
         self.progressbar.setValue(1000)
         self.setProgressbarColor("#fec10b" if isDark() else "#fec10b")
         self.liveOutputButton.setText(_("Uninstall canceled by the user!"))
-        if not self.finishedInstallation:
-            try:
-                os.kill(self.p.pid, signal.CTRL_C_EVENT)
-            except Exception as e:
-                report(e)
+        self.CancellationToken.cancel() # Kills the command if it is running, and takes the operation out of the queue otherwise
         self.finishedInstallation = True
         self.cancelButton.setEnabled(True)
         self.cancelButton.setText(_("Close"))
@@ -522,16 +619,11 @@ class PackageUninstallerWidget(PackageInstallerWidget):
         self.onCancel.emit()
         self.progressbar.setValue(1000)
         self.canceled=True
-        removeProgram(self.installId)
-        try: self.waitThread.kill()
-        except: pass
-        try: self.t.kill()
-        except: pass
-        try: os.kill(self.p.pid, signal.CTRL_C_EVENT)
-        except: pass
+        self.finishJob()
 
     def finish(self, returncode: int, output: str = "") -> None:
-        AddResultToLog(output.split("\n"), self.Package, returncode)
+        self.liveOutput.flush()
+        AddResultToLog(output.split("\n"), self.Package, returncode, self.liveOutput.logFile, self.getOutcome(returncode))
         if returncode in (RETURNCODE_NEEDS_ELEVATION, RETURNCODE_NEEDS_SCOOP_ELEVATION):
             self.Options.RunAsAdministrator = True
             self.adminBadge.setVisible(self.Options.RunAsAdministrator)
@@ -549,41 +641,24 @@ class PackageUninstallerWidget(PackageInstallerWidget):
             self.rightFast.stop()
             self.progressbar.setValue(1000)
             if self.progressbar.invertedAppearance(): self.progressbar.setInvertedAppearance(False)
+            Snapshots.invalidate(self.Package.PackageManager.NAME)
             if returncode in LIST_RETURNCODES_OPERATION_SUCCEEDED and not self.canceled:
                 UPDATES_SECTION: SoftwareSection = globals.updates
                 UNINSTALL_SECTION: SoftwareSection = globals.uninstall
                 try:
-                    print(self.Package.PackageItem, UNINSTALL_SECTION.packageList.indexOfTopLevelItem(self.Package.PackageItem))
-                    self.Package.PackageItem.setHidden(True)
-                    i = UNINSTALL_SECTION.packageList.takeTopLevelItem(UNINSTALL_SECTION.packageList.indexOfTopLevelItem(self.Package.PackageItem))
-                    UNINSTALL_SECTION.packageItems.remove(self.Package.PackageItem)
-                    if self.Package.PackageItem in UNINSTALL_SECTION.showableItems:
-                        UNINSTALL_SECTION.showableItems.remove(self.Package.PackageItem)
-                    del i
+                    UNINSTALL_SECTION.removePackages([self.Package])
                 except Exception as e:
                     report(e)
                 UNINSTALL_SECTION.updatePackageNumber()
                 if self.Package.Id in UPDATES_SECTION.IdPackageReference:
-                    packageItem = UPDATES_SECTION.PackageItemReference[UPDATES_SECTION.IdPackageReference[self.Package.Id]]
-                    packageItem.setHidden(True)
-                    i = UPDATES_SECTION.packageList.takeTopLevelItem(UPDATES_SECTION.packageList.indexOfTopLevelItem(packageItem))
                     try:
-                        UPDATES_SECTION.packageItems.remove(packageItem)
-                        if i in UPDATES_SECTION.showableItems:
-                            UPDATES_SECTION.showableItems.remove(packageItem)
-                        del i
+                        UPDATES_SECTION.removePackages([UPDATES_SECTION.IdPackageReference[self.Package.Id]])
                     except Exception as e:
                         report(e)
                     UPDATES_SECTION.updatePackageNumber()
             self.finishedInstallation = True
             self.cancelButton.setEnabled(True)
-            removeProgram(self.installId)
-            try: self.waitThread.kill()
-            except: pass
-            try: self.t.kill()
-            except: pass
-            try: os.kill(self.p.pid, signal.CTRL_C_EVENT)
-            except: pass
+            self.finishJob()
             if not(self.canceled):
                 if(returncode in LIST_RETURNCODES_OPERATION_SUCCEEDED):
                     self.setProgressbarColor("#11945a" if isDark() else "#11945a")
@@ -627,6 +702,7 @@ class PackageUninstallerWidget(PackageInstallerWidget):
                     self.err.showErrorMessage(errorData, showNotification=False)
 
     def close(self):
+        self.liveOutput.close()
         self.liveOutputWindow.close()
         self.liveOutputWindowWindow.close()
         globals.installersWidget.removeItem(self)
@@ -643,7 +719,6 @@ class CustomInstallerWidget(PackageInstallerWidget):
     changeBarOrientation = Signal()
     def __init__(self, name: str, command: list, packageManager: PackageManagerModule):
         self.Package = Package(name, name, "N/A", packageManager.NAME, packageManager)
-        self.Package.PackageItem = QTreeWidgetItem()
         self.Options = InstallationOptions()
         self.command = command
         super().__init__(self.Package, self.Options)
@@ -652,7 +727,7 @@ class CustomInstallerWidget(PackageInstallerWidget):
         globals.tray_is_installing = True
         self.callInMain.emit(update_tray_icon)
         self.finishedInstallation = False
-        self.callInMain.emit(lambda: self.liveOutputWindow.setPlainText(""))
+        self.callInMain.emit(self.liveOutput.clear)
         self.addInfoLine.emit(_("Running the installer..."))
         self.leftSlow.start()
         self.setProgressbarColor(blueColor)
@@ -660,18 +735,18 @@ class CustomInstallerWidget(PackageInstallerWidget):
         if self.Options.RunAsAdministrator:
             Command = [GSUDO_EXECUTABLE] + Command
         print(f"🔵 Starting {self.Package} installation with Command", Command)
-        self.p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=GSUDO_EXE_LOCATION, env=os.environ)
+        self.p = Runner.start(Command, cwd=GSUDO_EXE_LOCATION, env=os.environ, timeout=None, limited=False, token=self.CancellationToken)
         Thread(target=self.installationThread, args=(self.p, self.Options,), name=f"{self.Package.PackageManager.NAME} installation thread: installing {self.Package.Name}").start()
         AddOperationToLog("installation", self.Package, '"'+' '.join(self.p.args)+'"')
 
-    def installationThread(self, p: subprocess.Popen, options: InstallationOptions):
+    def installationThread(self, p: RunningCommand, options: InstallationOptions):
         output = ""
-        while p.poll() is None:
-            line = str(p.stdout.readline(), encoding='utf-8', errors="ignore").strip()
+        for line in p.getLines():
+            line = line.strip()
             if line:
                 output += line+"\n"
                 self.addInfoLine.emit(line)
-        self.finishInstallation.emit(p.returncode, output)
+        self.finishInstallation.emit(p.wait().ReturnCode, output)
 
 class CustomUninstallerWidget(PackageUninstallerWidget):
     onCancel = Signal()
@@ -683,7 +758,6 @@ class CustomUninstallerWidget(PackageUninstallerWidget):
     changeBarOrientation = Signal()
     def __init__(self, name: str, command: list, packageManager: PackageManagerModule):
         self.Package = Package(name, name, "N/A", packageManager.NAME, packageManager)
-        self.Package.PackageItem = QTreeWidgetItem()
         self.Options = InstallationOptions()
         self.command = command
         super().__init__(self.Package, self.Options)
@@ -692,7 +766,7 @@ class CustomUninstallerWidget(PackageUninstallerWidget):
         globals.tray_is_installing = True
         self.callInMain.emit(update_tray_icon)
         self.finishedInstallation = False
-        self.callInMain.emit(lambda: self.liveOutputWindow.setPlainText(""))
+        self.callInMain.emit(self.liveOutput.clear)
         self.addInfoLine.emit(_("Running the uninstaller..."))
         self.leftSlow.start()
         self.setProgressbarColor(blueColor)
@@ -700,18 +774,18 @@ class CustomUninstallerWidget(PackageUninstallerWidget):
         if self.Options.RunAsAdministrator:
             Command = [GSUDO_EXECUTABLE] + Command
         print(f"🔵 Starting {self.Package} uninstallation with Command", Command)
-        self.p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=GSUDO_EXE_LOCATION, env=os.environ)
+        self.p = Runner.start(Command, cwd=GSUDO_EXE_LOCATION, env=os.environ, timeout=None, limited=False, token=self.CancellationToken)
         Thread(target=self.installationThread, args=(self.p, self.Options,), name=f"{self.Package.PackageManager.NAME} uninstallation thread: uninstalling {self.Package.Name}").start()
         AddOperationToLog("uninstall", self.Package, '"'+' '.join(self.p.args)+'"')
 
-    def installationThread(self, p: subprocess.Popen, options: InstallationOptions):
+    def installationThread(self, p: RunningCommand, options: InstallationOptions):
         output = ""
-        while p.poll() is None:
-            line = str(p.stdout.readline(), encoding='utf-8', errors="ignore").strip()
+        for line in p.getLines():
+            line = line.strip()
             if line:
                 output += line+"\n"
                 self.addInfoLine.emit(line)
-        self.finishInstallation.emit(p.returncode, output)
+        self.finishInstallation.emit(p.wait().ReturnCode, output)
    
 
 class ScoopBucketManager(QWidget):
@@ -12,6 +12,9 @@ from languages import *
 from external.blurwindow import GlobalBlur
 from pathlib import Path
 from datetime import datetime
+from installationScheduler import InstallationScheduler, InstallationJob
+from operationHistory import OperationHistoryStore, HistoryEntry, LEGACY_HISTORY_FILE
+from settingsStore import SettingsStore
 
 import globals
 
@@ -64,73 +67,35 @@ def getSettings(s: str, cache = True) -> bool:
     """
     Returns a boolean value representing if the given setting is enabled or not.
     """
-    globals.settingsCache
-    try:
-        try:
-            if not cache:
-                raise KeyError("Cache disabled")
-            return globals.settingsCache[s]
-        except KeyError:
-            v = os.path.exists(os.path.join(os.path.join(os.path.expanduser("~"), ".wingetui"), s))
-            globals.settingsCache[s] = v
-            return v
-    except Exception as e:
-        print(e)
-        return False
+    return Settings.get(s, cache)
 
 def setSettings(s: str, v: bool) -> None:
     """
     Sets a boolean value for the given setting
     """
-    globals.settingsCache
-    try:
-        globals.settingsCache = {}
-        if(v):
-            open(os.path.join(os.path.join(os.path.expanduser("~"), ".wingetui"), s), "w").close()
-        else:
-            try:
-                os.remove(os.path.join(os.path.join(os.path.expanduser("~"), ".wingetui"), s))
-            except FileNotFoundError:
-                pass
-    except Exception as e:
-        print(e)
-    if "Notifications" in s:
-        globals.ENABLE_WINGETUI_NOTIFICATIONS = not getSettings("DisableNotifications")
-        globals.ENABLE_SUCCESS_NOTIFICATIONS = not getSettings("DisableSuccessNotifications") and globals.ENABLE_WINGETUI_NOTIFICATIONS
-        globals.ENABLE_ERROR_NOTIFICATIONS = not getSettings("DisableErrorNotifications") and globals.ENABLE_WINGETUI_NOTIFICATIONS
-        globals.ENABLE_UPDATES_NOTIFICATIONS = not getSettings("DisableUpdatesNotifications") and globals.ENABLE_WINGETUI_NOTIFICATIONS
-        
+    Settings.set(s, v)
 
 def getSettingsValue(s: str) -> str:
     """
     Returns the stored value for the given setting. If the setting is unset or the function fails an empty string will be returned 
     """
-    globals.settingsCache
-    try:
-        try:
-            return str(globals.settingsCache[s+"Value"])
-        except KeyError:
-            with open(os.path.join(os.path.join(os.path.expanduser("~"), ".wingetui"), s), "r", encoding="utf-8", errors="ignore") as sf:
-                v: str = sf.read()
-                globals.settingsCache[s+"Value"] = v
-                return v
-    except FileNotFoundError:
-        return ""
-    except Exception as e:
-        print(e)
-        return ""
+    return Settings.getValue(s)
 
 def setSettingsValue(s: str, v: str) -> None:
     """
     Sets the stored value for the given setting. A string value is required. 
     """
-    globals.settingsCache
-    try:
-        globals.settingsCache = {}
-        with open(os.path.join(os.path.join(os.path.expanduser("~"), ".wingetui"), s), "w", encoding="utf-8", errors="ignore") as sf:
-            sf.write(v)
-    except Exception as e:
-        print(e)
+    Settings.setValue(s, v)
+
+def updateNotificationSettings(key: str, value: str) -> None:
+    if "Notifications" in key:
+        globals.ENABLE_WINGETUI_NOTIFICATIONS = not getSettings("DisableNotifications")
+        globals.ENABLE_SUCCESS_NOTIFICATIONS = not getSettings("DisableSuccessNotifications") and globals.ENABLE_WINGETUI_NOTIFICATIONS
+        globals.ENABLE_ERROR_NOTIFICATIONS = not getSettings("DisableErrorNotifications") and globals.ENABLE_WINGETUI_NOTIFICATIONS
+        globals.ENABLE_UPDATES_NOTIFICATIONS = not getSettings("DisableUpdatesNotifications") and globals.ENABLE_WINGETUI_NOTIFICATIONS
+
+Settings = SettingsStore()
+Settings.subscribe(updateNotificationSettings)
 
 def nativeWindowsShare(text: str, url: str, window: QWidget = None) -> int:
     coordinates = ""
@@ -184,49 +149,24 @@ def isDark() -> bool:
 def isTaskbarDark() -> bool:
     return readRegedit(r"Software\Microsoft\Windows\CurrentVersion\Themes\Personalize", "SystemUsesLightTheme", 1) == 0
 
-def queueProgram(id: str):
-    globals.pending_programs.append(id)
+Scheduler = InstallationScheduler(isParallelAllowed=lambda: getSettings("AllowParallelInstalls"))
+Settings.subscribe(lambda key, value: Scheduler.reschedule(), "AllowParallelInstalls")
 
-def removeProgram(id: str):
-    try:
-       globals.pending_programs.remove(id)
-    except ValueError:
-        pass
-    if(globals.current_program == id):
-        globals.current_program = ""
-
-def checkQueue():
-    print("🟢 checkQueue Thread started!")
-    while True:
-        if(globals.current_program == ""):
-            try:
-                globals.current_program = globals.pending_programs[0]
-                print(f"🔵 Current program set to {globals.current_program}")
-            except IndexError:
-                pass
-        time.sleep(0.2)
+History = OperationHistoryStore(legacyFile=LEGACY_HISTORY_FILE)
 
-operationsToAdd: dict[object:str] = {}
+operationsToAdd: dict[object:tuple[str, str, str]] = {}
 
 def AddOperationToLog(operation: str, package, commandline: str):
     global operationsToAdd
-    stringToAdd =  f" Operation: {operation} - Perform date {str(datetime.now())}\n"
-    stringToAdd += f" Package: {str(package)}\n"
-    stringToAdd += f" Command-line call: {commandline}"
-    operationsToAdd[package] = stringToAdd 
+    operationsToAdd[package] = (operation, commandline.strip('"'), datetime.now().isoformat(sep=" ", timespec="seconds"))
     
-def AddResultToLog(output: list, package, result: int):
+def AddResultToLog(output: list, package, result: int, outputFile: str = "", outcome: str = "failed"):
     print(output)
     global operationsToAdd
     try:
-        currentInstallations = getSettingsValue("OperationHistory").split("\n\n--------------------------------\n")
-        stringToAdd =  operationsToAdd[package]
-        stringToAdd += f" Output code: {result}\n"
-        stringToAdd += f" Console output:\n"
-        for line in output:
-            for subline in line.split("\r"):
-                stringToAdd += f"   | {subline}\n"
-        setSettingsValue("OperationHistory", "\n\n--------------------------------\n".join(([stringToAdd] + currentInstallations)[0:100]))
+        operation, commandline, date = operationsToAdd.pop(package, ("", "", ""))
+        lines = [subline for line in output for subline in line.split("\r")]
+        History.append(HistoryEntry(operation, package.Name, package.Id, package.Version, package.Source, package.PackageManager.NAME, commandline, result, outcome, date, outputFile, lines))
     except Exception as e:
         report(e)
 
@@ -346,31 +286,6 @@ def GetIgnoredPackageUpdates_SpecificVersion() -> list[list[str, str, str]]:
     baseList = [v for v in getSettingsValue("SingleVersionIgnoredPackageUpdates").split(";") if v]
     return  [v.split(",") for v in baseList if len(v.split(",")) == 3]
 
-class KillableThread(Thread):
-    def __init__(self, *args, **keywords): 
-        super(KillableThread, self).__init__(*args, **keywords) 
-        self.shouldBeRuning = True
-
-    def start(self): 
-        self._run = self.run 
-        self.run = self.settrace_and_run
-        Thread.start(self)
-
-    def settrace_and_run(self): 
-        sys.settrace(self.globaltrace) 
-        self._run()
-
-    def globaltrace(self, frame, event, arg): 
-        return self.localtrace if event == 'call' else None
-
-    def kill(self) -> None:
-        self.shouldBeRuning = False
-        
-    def localtrace(self, frame, event, arg): 
-        if not(self.shouldBeRuning) and event == 'line': 
-            raise SystemExit()
-        return self.localtrace 
-
 def notify(title: str, text: str, iconpath: str = getMedia("notif_info")) -> None:
     if globals.ENABLE_WINGETUI_NOTIFICATIONS:
         globals.trayIcon.showMessage(title, text, QIcon())
@@ -541,7 +456,6 @@ print(f"It took {time.time()-t0} to load all language files")
 
 
 
-Thread(target=checkQueue, daemon=True).start()
 Thread(target=foregroundWindowThread, daemon=True, name="Tools: get foreground window").start()
 
 
@@ -2,6 +2,7 @@ from __future__ import annotations
 import glob # to fix NameError: name 'TreeWidgetItemWithQAction' is not defined
 import sys, subprocess, time, os, json
 from threading import Thread
+from operator import attrgetter
 from PySide6.QtCore import *
 from PySide6.QtGui import *
 from PySide6.QtWidgets import *
@@ -14,6 +15,16 @@ import globals
 from customWidgets import *
 from tools import _
 from PackageManagers import PackageClasses
+from PackageManagers.packageCache import LazyPackageList
+from PackageManagers.packageSnapshots import Snapshots, INSTALLED_PACKAGES, AVAILABLE_UPDATES
+from PackageManagers.queryPipeline import QueryPipeline
+from PackageManagers.searchIndex import normalizeSearchText, SearchIndex
+from PackageManagers.batchedUpdates import getBatches
+from operationHistory import ENTRY_SEPARATOR, HISTORY_PAGE_SIZE
+from settingsStore import SETTINGS_FILE_NAME
+
+DISCOVER_RESULTS_LIMIT = 500 # Most relevant packages shown on the Discover section for a query
+CATALOG_CHUNK_SIZE = 1000 # Catalog packages built and indexed on the loader thread before queueing them to the Discover section
 
 class DiscoverSoftwareSection(SoftwareSection):
     PackageManagers = StaticPackageManagersList.copy()
@@ -26,23 +37,21 @@ class DiscoverSoftwareSection(SoftwareSection):
     
     finishDynamicLoading = Signal()
     isLoadingDynamic: bool = False
+    sortByRelevance: bool = True
+    queryPipeline: QueryPipeline = None
     
     def __init__(self, parent = None):
         super().__init__(parent = parent)
         
+        self.queryPipeline = QueryPipeline()
         self.finishDynamicLoading.connect(self.finishDynamicLoadingIfNeeded)
         
         self.query.setPlaceholderText(" "+_("Search for packages"))
         self.discoverLabel.setText(_("Discover Packages"))
         self.SectionImage.setPixmap(QIcon(getMedia("desktop_download")).pixmap(QSize(64, 64)))
 
-        self.packageList.setHeaderLabels(["", _("Package Name"), _("Package ID"), _("Version"), _("Source")])
-        self.packageList.setColumnCount(7)
-        self.packageList.setColumnHidden(5, True)
-        self.packageList.setColumnHidden(6, True)
-        self.packageList.setSortingEnabled(True)
-        self.packageList.sortByColumn(1, Qt.SortOrder.AscendingOrder)
-        self.packageList.itemDoubleClicked.connect(lambda item, column: self.openInfo(item) if not getSettings("InstallOnDoubleClick") else self.installPackageItem(item))
+        self.packageList.header().sectionPressed.connect(self.disableRelevanceSort)
+        self.packageList.doubleClicked.connect(lambda: self.openInfo(self.packageList.currentItem()) if not getSettings("InstallOnDoubleClick") else self.installPackageItem(self.packageList.currentItem()))
                     
         header = self.packageList.header()
         header.setSectionResizeMode(QHeaderView.ResizeToContents)
@@ -61,9 +70,6 @@ class DiscoverSoftwareSection(SoftwareSection):
         if not getSettings("WarnedAboutPackages_v2"):
             setSettings("WarnedAboutPackages_v2", True)
             self.informationBanner.show()
-        self.installIcon = QIcon(getMedia("install"))
-        self.IDIcon = QIcon(getMedia("ID"))
-        self.versionIcon = QIcon(getMedia("newversion"))
         
         self.contextMenu = QMenu(self)
         self.contextMenu.setParent(self)
@@ -97,12 +103,15 @@ class DiscoverSoftwareSection(SoftwareSection):
         self.contextMenu.addSeparator()
         
         self.finishInitialisation()
+
+    def createPackageModel(self) -> PackageListModel:
+        return PackageListModel(["", _("Package Name"), _("Package ID"), _("Version"), _("Source")],
+                                {1: attrgetter("Name"), 2: attrgetter("Id"), 3: attrgetter("Version"), 4: attrgetter("Source")},
+                                {1: QIcon(getMedia("install")), 2: QIcon(getMedia("ID")), 3: QIcon(getMedia("newversion"))}, 4, self)
         
     def showContextMenu(self, pos: QPoint) -> None:
         if not self.packageList.currentItem():
             return
-        if self.packageList.currentItem().isHidden():
-            return
         ApplyMenuBlur(self.contextMenu.winId().__int__(), self.contextMenu)
         
         try:
@@ -223,42 +232,32 @@ class DiscoverSoftwareSection(SoftwareSection):
         self.callInMain.emit(lambda: self.loadShared(id, second_round=True))
 
     def installSelectedPackageItems(self, admin: bool = False, interactive: bool = False, skiphash: bool = False) -> None:
-        for package in self.packageItems:
-            try:
-                if package.checkState(0) ==  Qt.CheckState.Checked:
-                    self.installPackageItem(package, admin, interactive, skiphash)
-            except AttributeError:
-                pass
+        for package in self.packageModel.getCheckedPackages():
+            self.installPackageItem(package, admin, interactive, skiphash)
 
     def importPackages(self):
         self.importer = PackageImporter(self)
         
     def filter(self) -> None:
-        print(f"🟢 Searching for string \"{self.query.text()}\"")
-        
-        def waitAndFilter(query: str):
-            time.sleep(0.1)
-            if query == self.query.text():
-                self.callInMain.emit(partial(self.finishFiltering, query))
-
-        Thread(target=lambda: waitAndFilter(self.query.text())).start()
+        self.sortByRelevance = True
+        super().filter()
         
     def finishFiltering(self, text: str) -> None:
         if len(text) >= 2 or getSettings("AlwaysListPackages"):
             if text != self.LastQueryDynamicallyLoaded:
                 self.LastQueryDynamicallyLoaded = text
                 self.startLoadingDyamicPackages(text)
-            super().finishFiltering(text)
+            if self.sortByRelevance and normalizeSearchText(text):
+                self.showRankedItems(text)
+            else:
+                self.restoreColumnSort()
+                super().finishFiltering(text)
             if len(self.showableItems) == 0 and self.isLoadingDynamic:
                 self.packageList.label.setText(_("Looking for packages..."))
         elif len(text) == 0:
-            self.showableItems = []
-            for item in self.packageItems:
-                try:
-                    if item.checkState(0) == Qt.CheckState.Checked:
-                        self.showableItems.append(item)
-                except RuntimeError:
-                    print("🟠 RuntimeError on DiscoverSoftwareSection.finishFiltering")
+            self.cancelDynamicSearches()
+            self.restoreColumnSort()
+            self.showableItems = self.packageModel.getCheckedPackages()
             self.addItemsToTreeWidget(reset = True)
             self.packageList.scrollToItem(self.packageList.currentItem())
             
@@ -268,12 +267,39 @@ class DiscoverSoftwareSection(SoftwareSection):
                 self.packageList.label.show()
                 self.packageList.label.setText(_("Search for packages to start"))
         else:
+            self.cancelDynamicSearches()
+            self.restoreColumnSort()
             self.showableItems = []
             self.addItemsToTreeWidget(reset=True)
             self.loadingProgressBar.hide()
             self.packageList.label.show()
             self.packageList.label.setText(_("Please type at least two characters"))
 
+    def showRankedItems(self, text: str) -> None:
+        """
+        Shows the most relevant packages for the query, the best ones first
+        """
+        if self.query.text() != text:
+            return
+        self.showableItems = self.searchIndex.rankedSearch(text, DISCOVER_RESULTS_LIMIT)
+        self.packageList.setSortingEnabled(False)
+        self.showFilteredItems()
+
+    def restoreColumnSort(self) -> None:
+        """
+        Sorts the list by its sort column again, once there are no relevance-ranked results shown
+        """
+        if not self.packageList.isSortingEnabled():
+            self.packageList.setSortingEnabled(True)
+
+    def disableRelevanceSort(self) -> None:
+        """
+        Clicking on a column header sorts the results by that column instead of by relevance, until the query changes
+        """
+        if self.sortByRelevance:
+            self.sortByRelevance = False
+            self.packageList.setSortingEnabled(True)
+
     def finishLoadingIfNeeded(self) -> None:
         itemCount = len(self.packageItems)
         self.countLabel.setText(_("Found packages: {0}, not finished yet...").format(str(itemCount)))
@@ -304,57 +330,82 @@ class DiscoverSoftwareSection(SoftwareSection):
         self.isLoadingDynamic = False
         self.loadingProgressBar.hide()
 
-    def addItem(self, package: Package) -> None:
-        if not "---" in package.Name and not package.Name in ("+", "Scoop", "At", "The", "But", "Au") and not version in ("the", "is"):
-            item = TreeWidgetItemWithQAction(self)
-            item.setCheckState(0, Qt.CheckState.Unchecked)
-            item.setText(1, package.Name)
-            item.setIcon(1, self.installIcon)
-            item.setText(2, package.Id)
-            item.setIcon(2, self.IDIcon)
-            item.setText(3, package.Version)
-            item.setIcon(3, self.versionIcon)
-            item.setText(4, package.Source)
-            item.setIcon(4, package.getSourceIcon())
-            item.setText(6, package.getFloatVersion())
-            self.PackageItemReference[package] = item
-            self.ItemPackageReference[item] = package
+    def isListable(self, package: Package) -> bool:
+        return not "---" in package.Name and not package.Name in ("+", "Scoop", "At", "The", "But", "Au") and not version in ("the", "is")
+
+    def addItem(self, package: Package, isIndexed: bool = False) -> None:
+        """
+        isIndexed is set for the catalog packages, whose search index is built on the loader thread and merged once they have all been added
+        """
+        if self.isListable(package):
+            self.packageModel.addPackage(package) # The package is its own item: its row reads the texts and icons from it
+            self.PackageItemReference[package] = package
+            self.ItemPackageReference[package] = package
             self.IdPackageReference[package.Id] = package
-            package.PackageItem = item
-            self.packageItems.append(item)
-            if self.containsQuery(item, self.query.text()):
-                self.showableItems.append(item)
+            self.packageItems.append(package)
+            if not isIndexed:
+                self.searchIndex.add(package, package.Name, package.Id)
+            self.sortOrders.add(package)
+            if self.containsQuery(package, self.query.text()):
+                self.showableItems.append(package)
                 
-    def installPackageItem(self, item: TreeWidgetItemWithQAction, admin: bool = False, interactive: bool = False, skiphash: bool = False) -> None:
+    def installPackageItem(self, item: Package, admin: bool = False, interactive: bool = False, skiphash: bool = False) -> None:
         """
-        Initialize the install procedure for the given package, passed as a TreeWidgetItemWithQAction. Switches: admin, interactive, skiphash
+        Initialize the install procedure for the given package, as listed on the section. Switches: admin, interactive, skiphash
         """
-        package: Package = self.ItemPackageReference[item]
         options = InstallationOptions()
         options.RunAsAdministrator = admin
         options.InteractiveInstallation = interactive
         options.SkipHashCheck = skiphash
-        self.addInstallation(PackageInstallerWidget(package, options))
+        self.installPackage(self.ItemPackageReference[item], options)
+
+    def installPackage(self, package: Package, options: InstallationOptions = None) -> None:
+        """
+        Initialize the install procedure for the given package, even if it is not listed on the section (ie. when importing a bundle)
+        """
+        self.addInstallation(PackageInstallerWidget(package, options if options else InstallationOptions()))
         
     def loadPackages(self, manager: PackageClasses.PackageManagerModule) -> None:
+        """
+        Builds the packages of the catalog and their search index on the loader thread (at positions reserved on the index of the section),
+        and queues the packages chunk by chunk, so the main thread only has to store them, and to merge the index once they have all been added.
+        The catalog is closed once it has been read, so the refresh started by getAvailablePackages can replace its file.
+        """
+        generation = self.loadGeneration
         packages = manager.getAvailablePackages()
-        for package in packages:
-            self.addProgram.emit(package)
-        self.PackagesLoaded[manager] = True
-        self.finishLoading.emit()
+        catalogIndex = SearchIndex(self.searchIndex.reserve(len(packages)))
+        addIndexedItem = partial(self.addItem, isIndexed=True)
+        try:
+            chunk: list[Package] = []
+            for package in packages:
+                if not self.isListable(package):
+                    continue
+                catalogIndex.add(package, package.Name, package.Id)
+                package.getVersionKey() # Cached on the package, so the first sort by version does not parse them all on the main thread
+                chunk.append(package)
+                if len(chunk) >= CATALOG_CHUNK_SIZE:
+                    if generation != self.loadGeneration: # The section was reloaded
+                        return
+                    self.packageDelivery.queueItems(chunk, addIndexedItem)
+                    chunk = []
+        finally:
+            if isinstance(packages, LazyPackageList):
+                packages.close()
+        if generation == self.loadGeneration:
+            self.packageDelivery.queueItems(chunk, addIndexedItem)
+            self.packageDelivery.queueCall(partial(self.searchIndex.merge, catalogIndex))
+            self.packageDelivery.queueCall(partial(self.finishManagerLoading, manager))
     
-    def loadDynamicPackages(self, query: str, manager: PackageClasses.DynamicPackageManager) -> None:
-        packages = manager.getPackagesForQuery(query)
+    def loadDynamicPackages(self, manager: PackageClasses.DynamicPackageManager, query: str, packages: list[Package]) -> None:
         if query == self.query.text():
-            for package in packages:
-                if package.Id not in self.IdPackageReference:
-                    self.addProgram.emit(package)
-                elif package.Source != self.IdPackageReference[package.Id].Source:
-                    self.addProgram.emit(package)
-            self.DynamicPackagesLoaded[manager] = True
-            if query == self.query.text():
-                self.finishDynamicLoading.emit()
+            self.packageDelivery.queueItems(package for package in packages if package.Id not in self.IdPackageReference or package.Source != self.IdPackageReference[package.Id].Source)
+            self.packageDelivery.queueCall(partial(self.finishDynamicManagerLoading, manager, query))
     
+    def finishDynamicManagerLoading(self, manager: PackageClasses.DynamicPackageManager, query: str) -> None:
+        self.DynamicPackagesLoaded[manager] = True
+        if query == self.query.text():
+            self.finishDynamicLoading.emit()
+
     def startLoadingPackages(self, force: bool = False) -> None:
         self.countLabel.setText(_("Searching for packages..."))
         return super().startLoadingPackages(force)
@@ -366,13 +417,24 @@ class DiscoverSoftwareSection(SoftwareSection):
             self.DynamicPackagesLoaded[manager] = False
         self.loadingProgressBar.show()
         
+        enabledManagers: list[PackageClasses.DynamicPackageManager] = []
         for manager in self.DynaimcPackageManagers:
             if manager.isEnabled():
-                Thread(target=self.loadDynamicPackages, args=(query, manager), daemon=True, name=f"{manager.NAME} dyamic packages loader").start()
+                enabledManagers.append(manager)
             else:
                 self.PackagesLoaded[manager] = True
+        self.queryPipeline.submit(query, enabledManagers, self.loadDynamicPackages) # The searches of the previous query are cancelled
                 
         self.finishDynamicLoadingIfNeeded()
+
+    def cancelDynamicSearches(self) -> None:
+        """
+        Kills the dynamic searches still running for the last query, once the query is too short to be searched
+        """
+        if self.LastQueryDynamicallyLoaded != "":
+            self.queryPipeline.cancel()
+            self.LastQueryDynamicallyLoaded = ""
+            self.isLoadingDynamic = False
     
 class UpdateSoftwareSection(SoftwareSection):
 
@@ -380,9 +442,10 @@ class UpdateSoftwareSection(SoftwareSection):
     PackagesLoaded = PackagesLoadedDict.copy()
     addProgram = Signal(object)
     availableUpdates: int = 0
-    PackageItemReference: dict[UpgradablePackage:TreeWidgetItemWithQAction] = {}
-    ItemPackageReference: dict[TreeWidgetItemWithQAction:UpgradablePackage] = {}
+    PackageItemReference: dict[UpgradablePackage:UpgradablePackage] = {}
+    ItemPackageReference: dict[UpgradablePackage:UpgradablePackage] = {}
     IdPackageReference: dict[str:UpgradablePackage] = {}
+    sourcesBeingLoaded: set[UpgradablePackage] = set()
 
     def __init__(self, parent = None):
         super().__init__(parent = parent)
@@ -394,18 +457,13 @@ class UpdateSoftwareSection(SoftwareSection):
         self.query.setPlaceholderText(" "+_("Search on available updates"))
         self.SectionImage.setPixmap(QIcon(getMedia("checked_laptop")).pixmap(QSize(64, 64)))
         self.discoverLabel.setText(_("Software Updates"))
+        self.sourcesBeingLoaded = set()
 
-        self.packageList.setHeaderLabels(["", _("Package Name"), _("Package ID"), _("Installed Version"), _("New Version"), _("Source")])
-        self.packageList.setSortingEnabled(True)
-        self.packageList.sortByColumn(1, Qt.SortOrder.AscendingOrder)
-        
-        self.packageList.itemDoubleClicked.connect(lambda item, column: (self.updatePackageItem(item) if not getSettings("DoNotUpdateOnDoubleClick") else self.openInfo(item, update=True)))            
+        self.packageList.doubleClicked.connect(lambda: (self.updatePackageItem(self.packageList.currentItem()) if not getSettings("DoNotUpdateOnDoubleClick") else self.openInfo(self.packageList.currentItem(), update=True)))            
 
         header = self.packageList.header()
         header.setSectionResizeMode(QHeaderView.ResizeToContents)
         header.setStretchLastSection(False)
-        self.packageList.setColumnCount(7)
-        self.packageList.setColumnHidden(6, True)
         header.setSectionResizeMode(0, QHeaderView.Fixed)
         header.setSectionResizeMode(1, QHeaderView.Stretch)
         header.setSectionResizeMode(2, QHeaderView.Stretch)
@@ -420,11 +478,6 @@ class UpdateSoftwareSection(SoftwareSection):
         self.countLabel.setText(_("Checking for updates..."))
         self.packageList.label.setText(self.countLabel.text())
         
-        self.installIcon = QIcon(getMedia("install"))
-        self.IDIcon = QIcon(getMedia("ID"))
-        self.versionIcon = QIcon(getMedia("version"))
-        self.newVersionIcon = QIcon(getMedia("newversion"))
-        
         self.contextMenu = QMenu(self)
         self.contextMenu.setParent(self)
         self.contextMenu.setStyleSheet("* {background: red;color: black}")
@@ -449,14 +502,14 @@ class UpdateSoftwareSection(SoftwareSection):
             UNINSTALL_SECTION: UninstallSoftwareSection = globals.uninstall
             if self.packageList.currentItem():
                 id = self.ItemPackageReference[self.packageList.currentItem()].Id
-            UNINSTALL_SECTION.uninstallPackageItem(UNINSTALL_SECTION.IdPackageReference[id].PackageItem)
+            UNINSTALL_SECTION.uninstallPackageItem(UNINSTALL_SECTION.PackageItemReference[UNINSTALL_SECTION.IdPackageReference[id]])
         self.UninstallAction.triggered.connect(lambda: uninstallPackage())
         self.IgnoreUpdates = QAction(_("Ignore updates for this package"))
         self.IgnoreUpdates.setIcon(QIcon(getMedia("pin")))
-        self.IgnoreUpdates.triggered.connect(lambda: (IgnorePackageUpdates_Permanent(self.packageList.currentItem().text(2), self.packageList.currentItem().text(5)), self.packageList.currentItem().setHidden(True), self.packageItems.remove(self.packageList.currentItem()), self.showableItems.remove(self.packageList.currentItem()), self.packageList.takeTopLevelItem(self.packageList.indexOfTopLevelItem(self.packageList.currentItem())), self.updatePackageNumber()))
+        self.IgnoreUpdates.triggered.connect(lambda: (IgnorePackageUpdates_Permanent(self.packageList.currentItem().Id, self.packageList.currentItem().Source), self.removePackages([self.packageList.currentItem()]), self.updatePackageNumber()))
         self.SkipVersionAction = QAction(_("Skip this version"))
         self.SkipVersionAction.setIcon(QIcon(getMedia("skip")))
-        self.SkipVersionAction.triggered.connect(lambda: (IgnorePackageUpdates_SpecificVersion(self.packageList.currentItem().text(2), self.packageList.currentItem().text(4), self.packageList.currentItem().text(5)), self.packageList.currentItem().setHidden(True), self.packageItems.remove(self.packageList.currentItem()), self.showableItems.remove(self.packageList.currentItem()), self.packageList.takeTopLevelItem(self.packageList.indexOfTopLevelItem(self.packageList.currentItem())), self.updatePackageNumber()))
+        self.SkipVersionAction.triggered.connect(lambda: (IgnorePackageUpdates_SpecificVersion(self.packageList.currentItem().Id, self.packageList.currentItem().NewVersion, self.packageList.currentItem().Source), self.removePackages([self.packageList.currentItem()]), self.updatePackageNumber()))
 
         self.ShareAction = QAction(_("Share this package"))
         self.ShareAction.setIcon(QIcon(getMedia("share")))
@@ -476,12 +529,15 @@ class UpdateSoftwareSection(SoftwareSection):
         self.contextMenu.addAction(self.DetailsAction)
         
         self.finishInitialisation()
+
+    def createPackageModel(self) -> PackageListModel:
+        return PackageListModel(["", _("Package Name"), _("Package ID"), _("Installed Version"), _("New Version"), _("Source")],
+                                {1: attrgetter("Name"), 2: attrgetter("Id"), 3: lambda package: package.Version if package.Version != "Unknown" else _("Unknown"), 4: attrgetter("NewVersion"), 5: lambda package: _("Loading...") if package in self.sourcesBeingLoaded else package.Source},
+                                {1: QIcon(getMedia("install")), 2: QIcon(getMedia("ID")), 3: QIcon(getMedia("version")), 4: QIcon(getMedia("newversion"))}, 5, self)
         
     def showContextMenu(self, pos: QPoint) -> None:
         if not self.packageList.currentItem():
             return
-        if self.packageList.currentItem().isHidden():
-            return
         
         try:
             Capabilities: PackageManagerCapabilities =  self.ItemPackageReference[self.packageList.currentItem()].PackageManager.Capabilities
@@ -499,18 +555,10 @@ class UpdateSoftwareSection(SoftwareSection):
     def getToolbar(self) -> QToolBar:
         
         def blacklistSelectedPackages():
-            for program in self.packageItems:
-                if not program.isHidden():
-                    try:
-                        if program.checkState(0) ==  Qt.CheckState.Checked:
-                            IgnorePackageUpdates_Permanent(program.text(2), program.text(5))
-                            program.setHidden(True)
-                            self.packageItems.remove(program)
-                            if program in self.showableItems:
-                                self.showableItems.remove(program)
-                            self.packageList.takeTopLevelItem(self.packageList.indexOfTopLevelItem(program))
-                    except AttributeError:
-                        pass
+            packages = self.packageModel.getCheckedPackages()
+            for package in packages:
+                IgnorePackageUpdates_Permanent(package.Id, package.Source)
+            self.removePackages(packages)
             self.updatePackageNumber()
 
         toolbar = QToolBar(self.window())
@@ -613,12 +661,8 @@ class UpdateSoftwareSection(SoftwareSection):
         self.loadingProgressBar.hide()
         self.loadingProgressBar.hide()
         globals.trayMenuUpdatesList.menuAction().setText(_("Available updates: {0}").format(str(len(self.packageItems))))
-        count = 0
-        lastVisibleItem = None
-        for item in self.packageItems:
-            if not item.isHidden():
-                count += 1
-                lastVisibleItem = item
+        count = len(self.packageItems)
+        lastVisibleItem = self.packageItems[-1] if count > 0 else None
         if count > 0:
             globals.tray_is_available_updates = True
             update_tray_icon()
@@ -630,11 +674,11 @@ class UpdateSoftwareSection(SoftwareSection):
                     t.setDescription(_("{0} packages are being updated").format(count)+":")
                     packageList = ""
                     for item in self.packageItems:
-                        packageList += item.text(1)+", "
+                        packageList += item.Name+", "
                     t.setSmallText(packageList[:-2])
                 elif count == 1:
                     t.setTitle(_("Update found!"))
-                    t.setDescription(_("{0} is being updated").format(lastVisibleItem.text(1)))
+                    t.setDescription(_("{0} is being updated").format(lastVisibleItem.Name))
                 t.addOnClickCallback(lambda: (globals.mainWindow.showWindow(1)))
                 if globals.ENABLE_UPDATES_NOTIFICATIONS:
                     t.show() 
@@ -647,11 +691,11 @@ class UpdateSoftwareSection(SoftwareSection):
                     t.addAction(_("Update all"), self.updateAllPackageItems)
                     packageList = ""
                     for item in self.packageItems:
-                        packageList += item.text(1)+", "
+                        packageList += item.Name+", "
                     t.setSmallText(packageList[:-2])
                 elif count == 1:
                     t.setTitle(_("Update found!"))
-                    t.setDescription(_("{0} can be updated").format(lastVisibleItem.text(1)))
+                    t.setDescription(_("{0} can be updated").format(lastVisibleItem.Name))
                     t.addAction(_("Update"), self.updateAllPackageItems)
                 t.addAction(_("Show WingetUI"), lambda: (globals.mainWindow.showWindow(1)))
                 t.addOnClickCallback(lambda: (globals.mainWindow.showWindow(1)))
@@ -680,10 +724,12 @@ class UpdateSoftwareSection(SoftwareSection):
             package.Source = UNINSTALL_SECTION.IdPackageReference[package.Id].Source
         except KeyError as e:
             print(f"🟠 Package {package.Id} found in the updates section but not in the installed one, happened again")
-        self.callInMain.emit(partial(package.PackageItem.setText, 5, package.Source))
+        self.callInMain.emit(partial(self.sourcesBeingLoaded.discard, package))
+        self.callInMain.emit(partial(self.packageModel.refreshPackage, package))
+        self.callInMain.emit(partial(self.sortOrders.invalidate, 5))
 
     def addItem(self, package: UpgradablePackage) -> None:
-        if not "---" in package.Name and not "The following packages" in package.Name and not "Name  " in package.Name and not package.Name in ("+", "Scoop", "At", "The", "But", "Au") and not package.Version.lower() in ("the", "is", "install") and not package.NewVersion in ("Manifest", package.Version):
+        if not "---" in package.Name and not "The following packages" in package.Name and not "Name  " in package.Name and not package.Name in ("+", "Scoop", "At", "The", "But", "Au") and not package.Version.lower() in ("the", "is", "install") and not package.NewVersion in ("Manifest", package.Version) and package.isNewerVersionAvailable():
             if [package.Id, package.Source.lower().split(":")[0]] in GetIgnoredPackageUpdates_Permanent():
                 print(f"🟡 Package {package.Id} is ignored")
                 return
@@ -693,101 +739,38 @@ class UpdateSoftwareSection(SoftwareSection):
             if package.Id in self.LegacyBlacklist:
                 print(f"🟠 Package {package.Id} is legacy blacklisted")
                 return
-            item = TreeWidgetItemWithQAction()
-            item.setCheckState(0, Qt.CheckState.Checked)
-            item.setText(1, package.Name)
-            item.setIcon(1, self.installIcon)
-            item.setText(2, package.Id)
-            item.setIcon(2, self.IDIcon)
-            item.setText(3, package.Version if package.Version != "Unknown" else _("Unknown"))
-            item.setIcon(3, self.versionIcon)
-            item.setText(4, package.NewVersion)
-            item.setIcon(4, self.newVersionIcon)
-            item.setText(6, package.getFloatVersion())
-            package.PackageItem = item
             if package.isManager(Scoop):
                 try:
                     UNINSTALL_SECTION: UninstallSoftwareSection = globals.uninstall
                     if package.Version == UNINSTALL_SECTION.IdPackageReference[package.Id].Version:
                         package.Source = UNINSTALL_SECTION.IdPackageReference[package.Id].Source
-                    item.setText(5, package.Source)
                 except KeyError as e:
-                    item.setText(5, _("Loading..."))
+                    self.sourcesBeingLoaded.add(package)
                     print(f"🟡 Package {package.Id} found in the updates section but not in the installed one, might be a temporal issue, retrying in 3 seconds...")
                     Thread(target=self.changeStore, args=(package,)).start()
-            else:
-                item.setText(5, package.Source)
-            item.setIcon(5, package.getSourceIcon())
-            self.PackageItemReference[package] = item
-            self.ItemPackageReference[item] = package
+            self.packageModel.addPackage(package, checked=True) # The package is its own item: its row reads the texts and icons from it
+            self.PackageItemReference[package] = package
+            self.ItemPackageReference[package] = package
             self.IdPackageReference[package.Id] = package
-            self.packageItems.append(item)
-            if self.containsQuery(item, self.query.text()):
-                self.showableItems.append(item)
+            self.packageItems.append(package)
+            self.searchIndex.add(package, package.Name, package.Id)
+            self.sortOrders.add(package)
+            if self.containsQuery(package, self.query.text()):
+                self.showableItems.append(package)
             action = QAction(package.Name+"  \t"+package.Version+"\t → \t"+package.NewVersion, globals.trayMenuUpdatesList)
-            action.triggered.connect(lambda : self.updatePackageItem(item))
+            action.triggered.connect(lambda : self.updatePackageItem(package))
             action.setShortcut(package.Version)
-            item.setAction(action)
+            self.packageActions[package] = action
             globals.trayMenuUpdatesList.addAction(action)
 
-    def finishFiltering(self, text: str):
-        def getChecked(item: TreeWidgetItemWithQAction) -> str:
-            return "" if item.checkState(0) == Qt.CheckState.Checked else " "
-        def getTitle(item: TreeWidgetItemWithQAction) -> str:
-            return item.text(1)
-        def getID(item: TreeWidgetItemWithQAction) -> str:
-            return item.text(2)
-        def getVersion(item: TreeWidgetItemWithQAction) -> str:
-            return item.text(6)
-        def getNewVersion(item: TreeWidgetItemWithQAction) -> str:
-            return item.text(4)
-        def getSource(item: TreeWidgetItemWithQAction) -> str:
-            return item.text(5)
-        
-        if self.query.text() != text:
-            return
-        self.showableItems = []
-        found = 0
-        
-        sortColumn = self.packageList.sortColumn()
-        descendingSort = self.packageList.header().sortIndicatorOrder() == Qt.SortOrder.DescendingOrder
-        match sortColumn:
-            case 0:
-                self.packageItems.sort(key=getChecked, reverse=descendingSort)
-            case 1:
-                self.packageItems.sort(key=getTitle, reverse=descendingSort)
-            case 2:
-                self.packageItems.sort(key=getID, reverse=descendingSort)
-            case 3:
-                self.packageItems.sort(key=getVersion, reverse=descendingSort)
-            case 4:
-                self.packageItems.sort(key=getNewVersion, reverse=descendingSort)
-            case 5:
-                self.packageItems.sort(key=getSource, reverse=descendingSort)
-        
-        for item in self.packageItems:
-            try:
-                if self.containsQuery(item, text.replace("-", "").replace(" ", "").lower()):
-                    self.showableItems.append(item)
-                    found += 1
-            except RuntimeError:
-                print("nullitem")
-        if found == 0:
-            if self.packageList.label.text() == "":
-                self.packageList.label.show()
-                self.packageList.label.setText(_("No packages found matching the input criteria"))
-        else:
-            if self.packageList.label.text() == _("No packages found matching the input criteria"):
-                self.packageList.label.hide()
-                self.packageList.label.setText("")
-        self.addItemsToTreeWidget(reset = True)
-        self.packageList.scrollToItem(self.packageList.currentItem())
+    def getSortKeyFunctions(self) -> dict[int, Callable[[UpgradablePackage], object]]:
+        sortKeys = super().getSortKeyFunctions()
+        sortKeys[4] = lambda package: package.getNewVersionKey()
+        sortKeys[5] = lambda package: package.Source
+        return sortKeys
     
     def updatePackageNumber(self, showQueried: bool = False, foundResults: int = 0):
-        self.availableUpdates = 0
-        for item in self.packageItems:
-            if not item.isHidden():
-                self.availableUpdates += 1
+        self.availableUpdates = len(self.packageItems)
         self.countLabel.setText(_("Available updates: {0}").format(self.availableUpdates))
         trayIconToolTip = ""
         trayMenuText = ""
@@ -816,22 +799,34 @@ class UpdateSoftwareSection(SoftwareSection):
         globals.trayMenuUpdatesList.menuAction().setText(trayMenuText)
     
     def updateAllPackageItems(self, admin: bool = False, skiphash: bool = False, interactive: bool = False) -> None:
-        for item in self.packageItems:
-            if not item.isHidden():
-                self.updatePackageItem(item, admin, skiphash, interactive)
+        self.updatePackageItems(list(self.packageItems), admin, skiphash, interactive)
 
     def updateSelectedPackageItems(self, admin: bool = False, skiphash: bool = False, interactive: bool = False) -> None:
-        for item in self.packageItems:
-            if not item.isHidden() and item.checkState(0) ==  Qt.CheckState.Checked:
-                self.updatePackageItem(item, admin, skiphash, interactive)
+        self.updatePackageItems(self.packageModel.getCheckedPackages(), admin, skiphash, interactive)
+
+    def updatePackageItems(self, items: list[UpgradablePackage], admin: bool = False, skiphash: bool = False, interactive: bool = False) -> None:
+        """
+        Updates the packages of the given items. The packages of managers that can update several packages at once are updated in batches, with a single command per batch
+        """
+        for batch in getBatches([self.ItemPackageReference[item] for item in items]):
+            if len(batch) == 1:
+                self.updatePackageItem(self.PackageItemReference[batch[0]], admin, skiphash, interactive)
+                continue
+            batchedUpdate = BatchedUpdate(batch[0].PackageManager, self.getUpdateOptions(admin, skiphash, interactive))
+            for package in batch:
+                self.addInstallation(PackageUpdaterWidget(package, self.getUpdateOptions(admin, skiphash, interactive), batchedUpdate))
+            batchedUpdate.queue()
                 
-    def updatePackageItem(self, item: TreeWidgetItemWithQAction, admin: bool = False, skiphash: bool = False, interactive: bool = False) -> None:
+    def updatePackageItem(self, item: UpgradablePackage, admin: bool = False, skiphash: bool = False, interactive: bool = False) -> None:
         package: Package = self.ItemPackageReference[item]
+        self.addInstallation(PackageUpdaterWidget(package, self.getUpdateOptions(admin, skiphash, interactive)))
+
+    def getUpdateOptions(self, admin: bool = False, skiphash: bool = False, interactive: bool = False) -> InstallationOptions:
         options = InstallationOptions()
         options.RunAsAdministrator = admin
         options.InteractiveInstallation = interactive
         options.SkipHashCheck = skiphash
-        self.addInstallation(PackageUpdaterWidget(package, options))
+        return options
      
     def reloadSources(self, asyncroutine: bool = False):
         print("🔵 Reloading sources...")
@@ -844,16 +839,22 @@ class UpdateSoftwareSection(SoftwareSection):
             self.callInMain.emit(self.startLoadingPackages)
     
     def loadPackages(self, manager: PackageClasses.PackageManagerModule) -> None:
+        snapshot = Snapshots.load(manager.NAME, AVAILABLE_UPDATES)
+        if snapshot:
+            print(f"🔵 Showing the last {manager.NAME} updates snapshot while reloading them")
+            self.packageDelivery.queueItems(UpgradablePackage(fields[0], fields[1], fields[2], fields[3], fields[4], manager) for fields in snapshot)
         t = Thread(target=lambda: self.reloadSources(asyncroutine = True), daemon=True)
         t.start()
         t0 = int(time.time())
         while t.is_alive() and (int(time.time())-t0 < 10): # Timeout of 10 seconds for the reloadSources function 
             time.sleep(0.2)
+        startTime = time.time()
         packages = manager.getAvailableUpdates()
-        for package in packages:
-            self.addProgram.emit(package)
-        self.PackagesLoaded[manager] = True
-        self.finishLoading.emit()
+        Snapshots.save(manager.NAME, AVAILABLE_UPDATES, [[package.Name, package.Id, package.Version, package.NewVersion, package.Source] for package in packages], startTime)
+        if snapshot:
+            self.packageDelivery.queueCall(partial(self.removeManagerItems, manager))
+        self.packageDelivery.queueItems(packages)
+        self.packageDelivery.queueCall(partial(self.finishManagerLoading, manager))
     
     def startLoadingPackages(self, force: bool = False) -> None:
         self.countLabel.setText(_("Searching for updates..."))
@@ -873,12 +874,6 @@ class UninstallSoftwareSection(SoftwareSection):
         self.SectionImage.setPixmap(QIcon(getMedia("workstation")).pixmap(QSize(64, 64)))
         self.discoverLabel.setText(_("Installed Packages"))
 
-        self.headers = ["", _("Package Name"), _("Package ID"), _("Installed Version"), _("Source"), "", ""] # empty header added for checkbox
-        self.packageList.setHeaderLabels(self.headers)
-        self.packageList.setColumnCount(7)
-        self.packageList.setColumnHidden(5, True)
-        self.packageList.setColumnHidden(6, True)
-        self.packageList.setSortingEnabled(True)
         header = self.packageList.header()
         header.setSectionResizeMode(QHeaderView.ResizeToContents)
         header.setStretchLastSection(False)
@@ -889,14 +884,9 @@ class UninstallSoftwareSection(SoftwareSection):
         header.setSectionResizeMode(4, QHeaderView.Fixed)
         self.packageList.setColumnWidth(3, 150)
         self.packageList.setColumnWidth(4, 150)
-        self.packageList.sortByColumn(1, Qt.SortOrder.AscendingOrder)
         self.countLabel.setText(_("Searching for installed packages..."))
         self.packageList.label.setText(self.countLabel.text())
-        self.packageList.itemDoubleClicked.connect(lambda item, column: self.uninstallPackageItem(item))
-               
-        self.installIcon = QIcon(getMedia("install"))
-        self.IDIcon = QIcon(getMedia("ID"))
-        self.versionIcon = QIcon(getMedia("version"))
+        self.packageList.doubleClicked.connect(lambda: self.uninstallPackageItem(self.packageList.currentItem()))
         
         self.contextMenu = QMenu(self)
         self.contextMenu.setParent(self)
@@ -915,7 +905,7 @@ class UninstallSoftwareSection(SoftwareSection):
         self.InteractiveAction.triggered.connect(lambda: self.uninstallPackageItem(self.packageList.currentItem(), interactive=True))
         self.IgnoreUpdatesAction = QAction(_("Ignore updates for this package"))
         self.IgnoreUpdatesAction.setIcon(QIcon(getMedia("pin")))
-        self.IgnoreUpdatesAction.triggered.connect(lambda: (IgnorePackageUpdates_Permanent(self.packageList.currentItem().text(2), self.packageList.currentItem().text(4))))
+        self.IgnoreUpdatesAction.triggered.connect(lambda: (IgnorePackageUpdates_Permanent(self.packageList.currentItem().Id, self.packageList.currentItem().Source)))
         self.DetailsAction = QAction(_("Package details"))
         self.DetailsAction.setIcon(QIcon(getMedia("info")))
         self.DetailsAction.triggered.connect(lambda: self.openInfo(self.packageList.currentItem(), uninstall=True))
@@ -936,11 +926,14 @@ class UninstallSoftwareSection(SoftwareSection):
 
         self.finishInitialisation()
 
+    def createPackageModel(self) -> PackageListModel:
+        return PackageListModel(["", _("Package Name"), _("Package ID"), _("Installed Version"), _("Source")],
+                                {1: attrgetter("Name"), 2: attrgetter("Id"), 3: attrgetter("Version"), 4: attrgetter("Source")},
+                                {1: QIcon(getMedia("install")), 2: QIcon(getMedia("ID")), 3: QIcon(getMedia("version"))}, 4, self)
+
     def showContextMenu(self, pos: QPoint) -> None:
         if not self.packageList.currentItem():
             return
-        if self.packageList.currentItem().isHidden():
-            return
         ApplyMenuBlur(self.contextMenu.winId().__int__(), self.contextMenu)
         
         try:
@@ -975,14 +968,14 @@ class UninstallSoftwareSection(SoftwareSection):
 
         def showInfo():
             item = self.packageList.currentItem()
-            if item.text(4) in ((_("Local PC"), "Microsoft Store", "Steam", "GOG", "Ubisoft Connect")):
+            if item.Source in ((_("Local PC"), "Microsoft Store", "Steam", "GOG", "Ubisoft Connect")):
                 self.err = CustomMessageBox(self.window())
                 errorData = {
                         "titlebarTitle": _("Unable to load informarion"),
                         "mainTitle": _("Unable to load informarion"),
                         "mainText": _("We could not load detailed information about this package, because it was not installed from an available package manager."),
                         "buttonTitle": _("Ok"),
-                        "errorDetails": _("Uninstallable packages with the origin listed as \"{0}\" are not published on any package manager, so there's no information available to show about them.").format(item.text(4)),
+                        "errorDetails": _("Uninstallable packages with the origin listed as \"{0}\" are not published on any package manager, so there's no information available to show about them.").format(item.Source),
                         "icon": QIcon(getMedia("notif_warn")),
                     }
                 self.err.showErrorMessage(errorData, showNotification=False)
@@ -1055,14 +1048,7 @@ class UninstallSoftwareSection(SoftwareSection):
         return toolbar
 
     def uninstallSelected(self, admin: bool = False, interactive: bool = False) -> None:
-        toUninstall = []
-        for program in self.packageItems:
-            if not program.isHidden():
-                try:
-                    if program.checkState(0) ==  Qt.CheckState.Checked:
-                        toUninstall.append(program)
-                except AttributeError:
-                    pass
+        toUninstall = self.packageModel.getCheckedPackages()
         a = CustomMessageBox(self)
         Thread(target=self.confirmUninstallSelected, args=(toUninstall, a, admin, interactive)).start()
 
@@ -1107,36 +1093,27 @@ class UninstallSoftwareSection(SoftwareSection):
 
     def addItem(self, package: Package) -> None:
         if not "---" in package.Name and not package.Name in ("+", "Scoop", "At", "The", "But", "Au") and not package.Version in ("the", "is"):
-            item = TreeWidgetItemWithQAction()
-            item.setCheckState(0, Qt.CheckState.Unchecked)
-            item.setText(1, package.Name)
-            item.setIcon(1, self.installIcon)
-            item.setText(2, package.Id)
-            item.setIcon(2, self.IDIcon)
-            item.setText(3, package.Version)
-            item.setIcon(3, self.versionIcon)
-            item.setText(4, package.Source)
-            item.setIcon(4, package.getSourceIcon())
-            item.setText(6, package.getFloatVersion())
-            self.PackageItemReference[package] = item
-            self.ItemPackageReference[item] = package
+            self.packageModel.addPackage(package) # The package is its own item: its row reads the texts and icons from it
+            self.PackageItemReference[package] = package
+            self.ItemPackageReference[package] = package
             self.IdPackageReference[package.Id] = package
-            package.PackageItem = item
-            self.packageItems.append(item)
-            if self.containsQuery(item, self.query.text()):
-                self.showableItems.append(item)
+            self.packageItems.append(package)
+            self.searchIndex.add(package, package.Name, package.Id)
+            self.sortOrders.add(package)
+            if self.containsQuery(package, self.query.text()):
+                self.showableItems.append(package)
 
             action = QAction(package.Name+" \t"+package.Version, globals.trayMenuInstalledList)
-            action.triggered.connect(lambda: (self.uninstallPackageItem(item)))
+            action.triggered.connect(lambda: (self.uninstallPackageItem(package)))
             action.setShortcut(package.Version)
-            item.setAction(action)
+            self.packageActions[package] = action
             globals.trayMenuInstalledList.addAction(action)
 
-    def confirmUninstallSelected(self, toUninstall: list[TreeWidgetItemWithQAction], a: CustomMessageBox, admin: bool = False, interactive: bool = False, removeData: bool = False):
+    def confirmUninstallSelected(self, toUninstall: list[Package], a: CustomMessageBox, admin: bool = False, interactive: bool = False, removeData: bool = False):
         questionData = {
             "titlebarTitle": _("Uninstall"),
             "mainTitle": _("Are you sure?"),
-            "mainText": _("Do you really want to uninstall {0}?").format(toUninstall[0].text(1)) if len(toUninstall) == 1 else  _("Do you really want to uninstall {0} packages?").format(len(toUninstall)),
+            "mainText": _("Do you really want to uninstall {0}?").format(self.ItemPackageReference[toUninstall[0]].Name) if len(toUninstall) == 1 else  _("Do you really want to uninstall {0} packages?").format(len(toUninstall)),
             "acceptButtonTitle": _("Yes"),
             "cancelButtonTitle": _("No"),
             "icon": QIcon(),
@@ -1148,9 +1125,9 @@ class UninstallSoftwareSection(SoftwareSection):
                 self.callInMain.emit(partial(self.uninstallPackageItem, program, admin, interactive, removeData, avoidConfirm=True))
 
     def uninstall(self, id: str, admin: bool = False, removeData: bool = False, interactive: bool = False, avoidConfirm: bool = False) -> None:
-        self.uninstallPackageItem(self.ItemPackageReference[self.IdPackageReference[id]], admin, removeData, interactive, avoidConfirm)
+        self.uninstallPackageItem(self.PackageItemReference[self.IdPackageReference[id]], admin, removeData, interactive, avoidConfirm)
 
-    def uninstallPackageItem(self, packageItem: TreeWidgetItemWithQAction, admin: bool = False, removeData: bool = False, interactive: bool = False, avoidConfirm: bool = False) -> None:
+    def uninstallPackageItem(self, packageItem: Package, admin: bool = False, removeData: bool = False, interactive: bool = False, avoidConfirm: bool = False) -> None:
         package: Package = self.ItemPackageReference[packageItem]
         if not avoidConfirm:
             a = CustomMessageBox(self)
@@ -1163,11 +1140,17 @@ class UninstallSoftwareSection(SoftwareSection):
             self.addInstallation(PackageUninstallerWidget(package, options))
 
     def loadPackages(self, manager: PackageClasses.PackageManagerModule) -> None:
+        snapshot = Snapshots.load(manager.NAME, INSTALLED_PACKAGES)
+        if snapshot:
+            print(f"🔵 Showing the last {manager.NAME} installed packages snapshot while reloading them")
+            self.packageDelivery.queueItems(Package(fields[0], fields[1], fields[2], fields[3], manager) for fields in snapshot)
+        startTime = time.time()
         packages = manager.getInstalledPackages()
-        for package in packages:
-            self.addProgram.emit(package)
-        self.PackagesLoaded[manager] = True
-        self.finishLoading.emit()
+        Snapshots.save(manager.NAME, INSTALLED_PACKAGES, [[package.Name, package.Id, package.Version, package.Source] for package in packages], startTime)
+        if snapshot:
+            self.packageDelivery.queueCall(partial(self.removeManagerItems, manager))
+        self.packageDelivery.queueItems(packages)
+        self.packageDelivery.queueCall(partial(self.finishManagerLoading, manager))
     
     def startLoadingPackages(self, force: bool = False) -> None:
         self.countLabel.setText(_("Searching for packages..."))
@@ -1179,8 +1162,7 @@ class UninstallSoftwareSection(SoftwareSection):
 
     def selectAllInstalled(self) -> None:
         self.allPkgSelected = not self.allPkgSelected
-        for item in self.packageItems:
-            item.setCheckState(Qt.CheckState.Checked if self.allPkgSelected else Qt.CheckState.Unchecked)
+        self.setAllPackagesSelected(self.allPkgSelected)
     
 
 class AboutSection(SmoothScrollArea):
@@ -1525,9 +1507,8 @@ class SettingsSection(SmoothScrollArea):
             nonlocal self
             try:
                 rawstr = ""
-                for file in glob.glob(os.path.join(os.path.expanduser("~"), ".wingetui/*")):
-                    if not "Running" in file and not "png" in file and not "PreferredLanguage" in file and not "json" in file:
-                        sName = file.replace("\\", "/").split("/")[-1]
+                for sName in Settings.getNames():
+                    if sName != "PreferredLanguage":
                         rawstr += sName+"|@|"+getSettingsValue(sName)+"|~|"
                 fileName = QFileDialog.getSaveFileName(self, _("Export settings to a local file"), os.path.expanduser("~"), f"{_('WingetUI Settings File')} (*.conf);;{_('All files')} (*.*)")
                 if fileName[0] != "":
@@ -1546,21 +1527,23 @@ class SettingsSection(SmoothScrollArea):
                     iFile = open(fileName[0], "r")
                     rawstr = iFile.read()
                     iFile.close()
-                    resetSettings()
-                    for element in rawstr.split("|~|"):
-                        pairValue = element.split("|@|")
-                        if len(pairValue) == 2:
-                            setSettings(pairValue[0], True)
-                            if pairValue[1] != "":
-                                setSettingsValue(pairValue[0], pairValue[1])
+                    with Settings.transaction():
+                        resetSettings()
+                        for element in rawstr.split("|~|"):
+                            pairValue = element.split("|@|")
+                            if len(pairValue) == 2:
+                                setSettings(pairValue[0], True)
+                                if pairValue[1] != "":
+                                    setSettingsValue(pairValue[0], pairValue[1])
                     os.startfile(sys.executable)
                     globals.app.quit()
             except Exception as e:
                 report(e)
 
         def resetSettings():
+            Settings.clear()
             for file in glob.glob(os.path.join(os.path.expanduser("~"), ".wingetui/*")):
-                if not "Running" in file:
+                if not "Running" in file and not file.endswith(SETTINGS_FILE_NAME):
                     try:
                         os.remove(file)
                     except:
@@ -1694,14 +1677,16 @@ class SettingsSection(SmoothScrollArea):
         def resetWingetUIStore():
             sd = getSettings("DisableScoop")
             wd = getSettings("DisableWinget")
-            for file in glob.glob(os.path.join(os.path.expanduser("~"), ".wingetui/*")):
-                if not "Running" in file:
-                    try:
-                        os.remove(file)
-                    except:
-                        pass
-            setSettings("DisableScoop", sd)
-            setSettings("DisableWinget", wd)
+            with Settings.transaction():
+                Settings.clear()
+                for file in glob.glob(os.path.join(os.path.expanduser("~"), ".wingetui/*")):
+                    if not "Running" in file and not file.endswith(SETTINGS_FILE_NAME):
+                        try:
+                            os.remove(file)
+                        except:
+                            pass
+                setSettings("DisableScoop", sd)
+                setSettings("DisableWinget", wd)
             restartWingetUIByLangChange()
         
         resetWingetUI = SectionButton(_("Reset WingetUI and its preferences"), _("Reset"))
@@ -1934,10 +1919,85 @@ class BaseLogSection(QWidget):
 
 
 class OperationHistorySection(BaseLogSection):
+    addEntries = Signal(str, int, int)
+    loadedEntries: int = 0
+    allLoaded: bool = False
+    loading: bool = False
+    generation: int = 0
+
+    def __init__(self):
+        super().__init__()
+        self.loadedEntries = 0
+        self.allLoaded = False
+        self.loading = False
+        self.generation = 0
+
+        self.packageIdFilter = CustomLineEdit()
+        self.packageIdFilter.setPlaceholderText(_("Package ID"))
+        self.packageIdFilter.setFixedHeight(30)
+        self.packageIdFilter.setFixedWidth(250)
+        self.packageIdFilter.textChanged.connect(self.loadData)
+
+        self.outcomeFilter = CustomComboBox()
+        self.outcomeFilter.setFixedHeight(30)
+        self.outcomeFilter.setFixedWidth(200)
+        self.outcomeFilter.addItem(_("All operations"), "")
+        self.outcomeFilter.addItem(_("Succeeded"), "succeeded")
+        self.outcomeFilter.addItem(_("Failed"), "failed")
+        self.outcomeFilter.addItem(_("Cancelled"), "cancelled")
+        self.outcomeFilter.currentIndexChanged.connect(self.loadData)
+
+        hl = QHBoxLayout()
+        hl.setSpacing(5)
+        hl.setContentsMargins(10, 10, 10, 0)
+        hl.addWidget(self.packageIdFilter)
+        hl.addWidget(self.outcomeFilter)
+        hl.addStretch()
+        self.layout().insertLayout(1, hl, stretch=0)
+
+        self.addEntries.connect(self.showEntries)
+        self.textEdit.verticalScrollBar().valueChanged.connect(self.loadMoreIfNeeded)
 
     def loadData(self):
+        """
+        Shows the first page of the operations that match the filters. The next pages get loaded when scrolling to the bottom
+        """
         print("🔵 Loading operation log...")
-        self.textEdit.setPlainText(getSettingsValue("OperationHistory"))
+        self.generation += 1
+        self.loadedEntries = 0
+        self.allLoaded = False
+        self.loading = False
+        self.textEdit.setPlainText("")
+        self.loadNextPage()
+
+    def loadNextPage(self):
+        if self.loading or self.allLoaded:
+            return
+        self.loading = True
+        Thread(target=self.queryPage, args=(self.generation, self.loadedEntries, self.packageIdFilter.text().strip(), self.outcomeFilter.currentData()), daemon=True, name="Operation history loader").start()
+
+    def queryPage(self, generation: int, offset: int, packageId: str, outcome: str):
+        entries = History.query(packageId=packageId, outcome=outcome, offset=offset, limit=HISTORY_PAGE_SIZE)
+        self.addEntries.emit(ENTRY_SEPARATOR.join(entry.toText() for entry in entries), len(entries), generation)
+
+    def showEntries(self, text: str, count: int, generation: int):
+        if generation != self.generation:
+            return # The filters changed while the page was being loaded
+        self.loading = False
+        self.allLoaded = count < HISTORY_PAGE_SIZE
+        if count:
+            scrollValue = self.textEdit.verticalScrollBar().value()
+            cursor = self.textEdit.textCursor()
+            cursor.movePosition(QTextCursor.MoveOperation.End)
+            cursor.insertText((ENTRY_SEPARATOR if self.loadedEntries else "") + text)
+            self.textEdit.verticalScrollBar().setValue(scrollValue)
+            self.loadedEntries += count
+        self.loadMoreIfNeeded()
+
+    def loadMoreIfNeeded(self, value: int = -1):
+        scrollbar = self.textEdit.verticalScrollBar()
+        if scrollbar.value() >= scrollbar.maximum() - scrollbar.pageStep():
+            self.loadNextPage()
 
 class LogSection(BaseLogSection):
 